@@ -89,13 +89,12 @@ if command -v python3 >/dev/null 2>&1 && [ -f "storage_backup.py" ]; then
         echo "   ⚠️ SUPABASE_SERVICE_ROLE_KEY не задан в backup_config.env — storage пропущен"
         echo "      Получи ключ: Supabase Dashboard → Project Settings → API → service_role"
     else
-        echo "   Запускаю бэкап storage..."
-        STORAGE_BACKUP_DIR="$BACKUP_DIR/storage_backup" \
+        echo "   Запускаю бэкап storage (потоково, без промежуточной папки)..."
+        # Объекты сразу пишутся в сжатый tar — диск не нужен под распакованную копию бакетов
         SUPABASE_URL=https://osglfptwbuqqmqunttha.supabase.co \
         SUPABASE_SERVICE_ROLE_KEY="$SUPABASE_SERVICE_ROLE_KEY" \
-        python3 storage_backup.py && echo "   ✅ Storage сохранён в $BACKUP_DIR/storage_backup" || echo "   ⚠️ Ошибка бэкапа storage"
-        # Удаляем лишний .tar.gz который создаёт скрипт — данные уже в нужной папке
-        find . -maxdepth 1 -name "storage_backup_*.tar.gz" -delete 2>/dev/null || true
+        python3 storage_backup.py --stream "$BACKUP_DIR/storage_backup.tar.gz" \
+            && echo "   ✅ Storage сохранён в $BACKUP_DIR/storage_backup.tar.gz" || echo "   ⚠️ Ошибка бэкапа storage"
     fi
 else
     echo "   ⚠️ Python3 или storage_backup.py не найдены (storage пропущен)"
@@ -104,7 +103,6 @@ fi
 # 4. Копируем временные архивы в папку бэкапа
 echo ""
 echo "📦 ШАГ 4: Создание архива..."
-find . -maxdepth 1 -name "storage_backup_*.tar.gz" -exec mv {} "$BACKUP_DIR/" \; 2>/dev/null || true
 find . -maxdepth 1 -name "database_backup.sql.gz" -exec mv {} "$BACKUP_DIR/" \; 2>/dev/null || true
 
 # Один .tar.gz ФАЙЛ (не папка): backups/backup_YYYYMMDD_HHMMSS.tar.gz
@@ -117,7 +115,6 @@ FINAL_SIZE=""
 echo ""
 echo "🧹 ШАГ 5: Очистка..."
 rm -rf "$BACKUP_DIR"
-find . -maxdepth 1 -name "storage_backup_*.tar.gz" -delete 2>/dev/null || true
 find . -maxdepth 1 -name "database_backup.sql.gz" -delete 2>/dev/null || true
 
 echo ""
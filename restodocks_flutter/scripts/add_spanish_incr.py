@@ -1,52 +1,50 @@
 #!/usr/bin/env python3
-"""Add Spanish incrementally - translates in small batches, saves progress."""
-import json
-import re
+"""Add Spanish incrementally - translates in small batches, saves progress to the i18n_store journal."""
+import sys
 import time
 from pathlib import Path
 from deep_translator import GoogleTranslator
 
-def preserve_placeholders(text):
-    phs = []
-    def repl(m):
-        phs.append(m.group(0))
-        return f"__P{len(phs)-1}__"
-    return re.sub(r'\{[^}]+\}|%s|%\d+s', repl, text), phs
-
-def restore(text, phs):
-    for i, p in enumerate(phs):
-        text = text.replace(f"__P{i}__", p, 1)
-    return text
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from i18n_store import I18nStore  # noqa: E402
+from i18n_placeholders import (  # noqa: E402
+    REF_LANG, check, is_broken, placeholders, protect, restore, update_queue, validate,
+)
 
 path = Path(__file__).parent.parent / "assets/translations/localizable.json"
-with open(path, 'r', encoding='utf-8') as f:
-    data = json.load(f)
+store = I18nStore(path)
 
-en = data["en"]
-es = data.get("es", {}).copy()
+en = store.block("en")
+es = store.block("es")
+ref = store.block(REF_LANG)
 translator = GoogleTranslator(source='en', target='es')
 todo = [k for k in en if k not in es or not str(es.get(k, "")).strip()]
 print(f"To translate: {len(todo)}")
+broken = []
 
 for i, key in enumerate(todo):
     val = str(en[key])
     if not val.strip():
-        es[key] = val
+        store.set("es", key, val)
         continue
     try:
-        clean, phs = preserve_placeholders(val)
-        t = translator.translate(clean[:5000])  # API limit
-        es[key] = restore(t or val, phs)
+        clean, phs = protect(val)
+        t = restore(translator.translate(clean[:5000]) or val, phs)  # API limit
+        # Эталон плейсхолдеров — тот же, что у i18n_placeholders.validate (ru), а не исходник en.
+        if is_broken(check(placeholders(ref.get(key, val)), placeholders(t))):
+            broken.append(key)
+            t = val
+        store.set("es", key, t)
     except:
-        es[key] = val
+        store.set("es", key, val)
     if (i + 1) % 50 == 0:
-        data["es"] = es
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        store.checkpoint()
         print(f"  {i+1}/{len(todo)} saved")
     time.sleep(0.2)
 
-data["es"] = es
-with open(path, 'w', encoding='utf-8') as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
-print(f"Done. es={len(es)}")
+store.compact()
+# В очереди — ключи, сломанные сейчас: упавшие в MT и не прошедшие validate(); остальные es из неё уходят.
+invalid = {it["key"] for it in validate({REF_LANG: ref, "es": es}, ["es"]) if is_broken(it)}
+queued = invalid | set(broken)
+update_queue("es", add=queued, remove=(set(es) | set(ref)) - queued)
+print(f"Done. es={len(es)}, broken placeholders queued: {len(queued)}")
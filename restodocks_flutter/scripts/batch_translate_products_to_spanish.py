@@ -1,29 +1,54 @@
 #!/usr/bin/env python3
 """
-Пакетный перевод продуктов на все поддерживаемые языки (ru, en, es, tr, vi).
-Вызывает Edge Function auto-translate-product в режиме batch.
+Пакетный перевод продуктов на все поддерживаемые языки (ru, en, es, kk, tr, vi).
+Вызывает Edge Function auto-translate-product в режиме batch с явными product_ids.
+
+Параллелизм и размер батча подстраиваются по AIMD: пока батчи укладываются в --target-latency
+и ошибок нет, +1 к параллельности после каждого «поколения» успешных ответов и +--batch-step
+к размеру батча; на 502/503/504/429/таймаут — параллельность вдвое, батч ×0.7, неудачный
+батч возвращается в очередь (429 — ещё и пауза по Retry-After). Медленный, но успешный батч
+уменьшает только размер батча.
+
+Курсор — последний id, до которого все батчи завершены (id читаются по порядку через REST
+keyset-пагинацией). Он сохраняется в --state после каждого ответа, повторный запуск
+продолжает с него (--reset — начать заново). Батчи после курсора, завершённые до прерывания,
+пройдут ещё раз — функция пропускает уже переведённые языки.
+
+Продукты, которые функция вернула в failed_ids, копятся в --state целиком (курсор их уже прошёл)
+и в начале каждого запуска отправляются первыми; успешно переведённые из списка убираются.
+--retry-failed — только этот проход, без каталога.
 
 ВАЖНО: перед запуском задеплойте Edge Function:
   cd restodocks_flutter
   supabase functions deploy auto-translate-product
 
 Использование:
-  python batch_translate_products_to_spanish.py   # перевести ВСЕ продукты
-  python batch_translate_products_to_spanish.py --max-batches 5   # только 5 батчей (тест)
+  python batch_translate_products_to_spanish.py                    # перевести ВСЕ продукты (или продолжить)
+  python batch_translate_products_to_spanish.py --max-batches 5    # только 5 батчей (тест)
+  python batch_translate_products_to_spanish.py --reset --force-lang vi
+  python batch_translate_products_to_spanish.py --retry-failed                  # только ранее упавшие
+  python batch_translate_products_to_spanish.py --concurrency 1 --max-concurrency 1   # последовательно
 
   SUPABASE_URL и SUPABASE_ANON_KEY берутся из lib/main.dart, если не заданы в env.
 """
 import os
 import re
 import sys
+import json
 import time
 import argparse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 
 import requests
 
-BATCH_SIZE = 30  # меньше = меньше 502 таймаутов (5 языков × 30 = 150 вызовов DeepL)
+BATCH_SIZE = 30  # стартовый размер батча (5 языков × 30 = 150 вызовов DeepL)
+MAX_BATCH_IDS = 200  # = MAX_BATCH_IDS в auto-translate-product
+ID_PAGE = 1000
+DEFAULT_STATE = Path(__file__).parent / ".translate_products_cursor.json"
+BACKOFF_STATUSES = {429, 500, 502, 503, 504, 546}
 
 
 def _load_from_main_dart() -> Tuple[Optional[str], Optional[str]]:
@@ -38,17 +63,220 @@ def _load_from_main_dart() -> Tuple[Optional[str], Optional[str]]:
     return (url_m.group(1) if url_m else None), (key_m.group(1) if key_m else None)
 
 
+def iter_product_ids(session: requests.Session, url: str, after_id: Optional[str]) -> Iterator[str]:
+    """Все id продуктов по возрастанию, страницами по ID_PAGE (keyset: id > последнего)."""
+    while True:
+        params = {"select": "id", "order": "id.asc", "limit": str(ID_PAGE)}
+        if after_id:
+            params["id"] = f"gt.{after_id}"
+        resp = session.get(f"{url}/rest/v1/products", params=params, timeout=60)
+        resp.raise_for_status()
+        rows = resp.json()
+        for row in rows:
+            yield row["id"]
+        if len(rows) < ID_PAGE:
+            return
+        after_id = rows[-1]["id"]
+
+
+def count_products(session: requests.Session, url: str, after_id: Optional[str]) -> Optional[int]:
+    params = {"select": "id", "limit": "1"}
+    if after_id:
+        params["id"] = f"gt.{after_id}"
+    try:
+        resp = session.get(f"{url}/rest/v1/products", params=params, headers={"Prefer": "count=exact"}, timeout=60)
+        total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    except requests.RequestException:
+        return None
+
+
+class Cursor:
+    """Курсор по id: сдвигается только через непрерывный префикс завершённых батчей."""
+
+    def __init__(self, path: Path, after_id: Optional[str], totals: dict, failed_ids: list[str]):
+        self.path = path
+        self.after_id = after_id
+        self.totals = totals
+        self.failed_ids = list(dict.fromkeys(failed_ids))  # все упавшие, в порядке появления
+        self.next_seq = 0
+        self.done_seq = 0
+        self.pending: dict[int, str] = {}  # seq завершённого батча -> его последний id
+
+    def issue(self) -> int:
+        self.next_seq += 1
+        return self.next_seq
+
+    def complete(self, seq: Optional[int], chunk: list[str], result: dict) -> None:
+        """seq=None — повтор ранее упавших: курсор не двигается, меняется только список failed_ids."""
+        for k in ("translated", "skipped", "failed"):
+            self.totals[k] = self.totals.get(k, 0) + int(result.get(k, 0) or 0)
+        sent = set(chunk)
+        failed = [pid for pid in self.failed_ids if pid not in sent] + list(result.get("failed_ids") or [])
+        self.failed_ids = list(dict.fromkeys(failed))
+        if seq is None:
+            self.save()
+            return
+        self.pending[seq] = chunk[-1]
+        while self.done_seq + 1 in self.pending:
+            self.done_seq += 1
+            self.after_id = self.pending.pop(self.done_seq)
+        self.save()
+
+    def save(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"after_id": self.after_id, "totals": self.totals, "failed_ids": self.failed_ids,
+                                   "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, ensure_ascii=False, indent=2),
+                       encoding="utf-8")
+        tmp.replace(self.path)
+
+
+class Aimd:
+    """Параллельность и размер батча: аддитивный рост, мультипликативный спад."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.concurrency = float(args.concurrency)
+        self.batch = float(args.batch_size)
+        self.last_decrease = 0.0
+        self.pause_until = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self.concurrency))
+
+    @property
+    def batch_size(self) -> int:
+        return max(self.args.min_batch, min(int(self.batch), self.args.max_batch))
+
+    def on_success(self, started: float, latency: float) -> None:
+        if latency > self.args.target_latency:
+            if started >= self.last_decrease:
+                self.batch = max(self.args.min_batch, self.batch * 0.75)
+                self.last_decrease = time.monotonic()
+            return
+        # +1 за поколение: 1/concurrency на каждый успешный ответ.
+        self.concurrency = min(self.args.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+        if latency < self.args.target_latency / 2:
+            self.batch = min(self.args.max_batch, self.batch + self.args.batch_step / self.concurrency)
+
+    def on_overload(self, started: float, retry_after: Optional[float]) -> None:
+        now = time.monotonic()
+        if retry_after:
+            self.pause_until = max(self.pause_until, now + min(retry_after, 120.0))
+        # Ответы батчей, отправленных до прошлого спада, повторно не штрафуют.
+        if started < self.last_decrease:
+            return
+        self.concurrency = max(1.0, self.concurrency / 2)
+        self.batch = max(self.args.min_batch, self.batch * 0.7)
+        self.last_decrease = now
+        self.pause_until = max(self.pause_until, now + self.args.backoff)
+
+
+class Overload(Exception):
+    def __init__(self, status: int, retry_after: Optional[float], message: str):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def post_batch(session: requests.Session, fn_url: str, ids: list[str], force_langs: list[str], timeout: float) -> dict:
+    payload: dict = {"batch": True, "product_ids": ids}
+    if force_langs:
+        payload["force_langs"] = force_langs
+    try:
+        resp = session.post(fn_url, json=payload, timeout=timeout)
+    except requests.RequestException as e:
+        raise Overload(0, None, f"{type(e).__name__}: {e}")
+    if resp.status_code in BACKOFF_STATUSES:
+        ra = resp.headers.get("Retry-After", "")
+        raise Overload(resp.status_code, float(ra) if ra.replace(".", "", 1).isdigit() else None, resp.text[:200])
+    if resp.status_code != 200:
+        print(f"\nError {resp.status_code}: {resp.text[:500]}")
+        sys.exit(1)
+    return resp.json()
+
+
+class Progress:
+    """Живая строка: продуктов/с за последние 30 с, всего, ETA, текущие параллельность/батч."""
+
+    def __init__(self, total: Optional[int]):
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+        self.recent: deque = deque()
+        self.latencies: deque = deque(maxlen=50)
+        self.errors = 0
+        self.tty = sys.stdout.isatty()
+        self.last_print = 0.0
+
+    def add(self, n: int, latency: float) -> None:
+        now = time.monotonic()
+        self.done += n
+        self.recent.append((now, n))
+        self.latencies.append(latency)
+        while self.recent and self.recent[0][0] < now - 30:
+            self.recent.popleft()
+
+    def rate(self) -> float:
+        now = time.monotonic()
+        if not self.recent:
+            return 0.0
+        span = max(now - self.recent[0][0], min(now - self.started, 30.0), 1e-3)
+        return sum(n for _, n in self.recent) / span
+
+    def show(self, aimd: Aimd, inflight: int, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self.last_print < (0.5 if self.tty else 10.0):
+            return
+        self.last_print = now
+        rate = self.rate()
+        lat = sorted(self.latencies)
+        p50 = lat[len(lat) // 2] if lat else 0.0
+        total = f"/{self.total}" if self.total else ""
+        eta = ""
+        if self.total and rate > 0:
+            left = max(0, self.total - self.done) / rate
+            eta = f" ETA {int(left // 60)}:{int(left % 60):02d}"
+        line = (f"  {self.done}{total} products, {rate:.1f}/s{eta} | c={aimd.limit} batch={aimd.batch_size} "
+                f"inflight={inflight} p50={p50:.1f}s errors={self.errors}")
+        print(f"\r{line:<110}" if self.tty else line, end="" if self.tty else "\n", flush=True)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Batch translate products to all languages")
     parser.add_argument("--max-batches", type=int, default=None,
                         help="Max number of batches (default: unlimited)")
     parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
-                        help=f"Batch size (default: {BATCH_SIZE})")
+                        help=f"Initial batch size (default: {BATCH_SIZE})")
+    parser.add_argument("--min-batch", type=int, default=5, help="Min batch size (default: 5)")
+    parser.add_argument("--max-batch", type=int, default=100,
+                        help=f"Max batch size (default: 100, limit {MAX_BATCH_IDS})")
+    parser.add_argument("--batch-step", type=float, default=5.0,
+                        help="Batch size additive increase per generation (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Initial concurrent requests (default: 2)")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Max concurrent requests (default: 16)")
+    parser.add_argument("--target-latency", type=float, default=45.0,
+                        help="Batch latency above this shrinks the batch, seconds (default: 45)")
+    parser.add_argument("--backoff", type=float, default=5.0,
+                        help="Pause after 502/429/timeout before sending again, seconds (default: 5)")
+    parser.add_argument("--timeout", type=float, default=180.0, help="Request timeout, seconds (default: 180)")
+    parser.add_argument("--max-retries", type=int, default=5,
+                        help="Give up after N consecutive failures of one batch (default: 5)")
+    parser.add_argument("--force-lang", action="append", default=[], metavar="LANG",
+                        help="Re-translate LANG even if it exists (repeatable)")
     parser.add_argument("--force-vi", action="store_true",
-                        help="Force re-translate Vietnamese even if exists (for fix)")
-    parser.add_argument("--start-offset", type=int, default=0,
-                        help="Start from offset (to resume after 502)")
+                        help="Force re-translate Vietnamese even if exists (= --force-lang vi)")
+    parser.add_argument("--state", type=Path, default=DEFAULT_STATE,
+                        help=f"Cursor file (default: {DEFAULT_STATE.name} next to the script)")
+    parser.add_argument("--reset", action="store_true", help="Ignore saved cursor and start from the first product")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Only resend products from failed_ids in the state file, skip the catalog pass")
     args = parser.parse_args()
+    args.max_batch = max(1, min(args.max_batch, MAX_BATCH_IDS))
+    args.min_batch = max(1, min(args.min_batch, args.max_batch))
+    args.concurrency = max(1, min(args.concurrency, args.max_concurrency))
+    force_langs = sorted({lang.lower() for lang in args.force_lang} | ({"vi"} if args.force_vi else set()))
 
     url = os.environ.get("SUPABASE_URL", "").rstrip("/") or None
     key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get("SUPABASE_ANON_KEY")
@@ -69,77 +297,107 @@ def main():
     url = url.rstrip("/")
 
     fn_url = f"{url}/functions/v1/auto-translate-product"
-    headers = {
-        "Authorization": f"Bearer {key}",
-        "Content-Type": "application/json",
-    }
-
-    offset = args.start_offset
-    total_translated = 0
-    total_skipped = 0
-    total_failed = 0
-    batch_num = 0
-
-    print(f"Starting batch translation to ru/en/es/tr/vi (batch_size={args.batch_size})")
-    if offset > 0:
-        print(f"Resuming from offset {offset}")
+    session = requests.Session()
+    session.headers.update({"Authorization": f"Bearer {key}", "apikey": key, "Content-Type": "application/json"})
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.max_concurrency + 2)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    saved = json.loads(args.state.read_text(encoding="utf-8")) if args.state.exists() else {}
+    state = {} if args.reset else saved
+    # Итоги копятся между перезапусками одного прохода; после полного прохода — заново.
+    # Упавшие id переживают и проходы, и --reset: курсор их уже прошёл, иначе их никто не повторит.
+    failed_ids = saved.get("failed_ids") or saved.get("totals", {}).get("failed_ids") or []
+    totals = state.get("totals", {}) if state.get("after_id") else {}
+    totals.pop("failed_ids", None)
+    cursor = Cursor(args.state, state.get("after_id"), totals, failed_ids)
+    if cursor.after_id and not args.retry_failed:
+        print(f"Resuming after id {cursor.after_id} ({args.state.name}; --reset to start over)")
+    if cursor.failed_ids:
+        print(f"Retrying {len(cursor.failed_ids)} previously failed products first")
+    failed_queue = deque(cursor.failed_ids)
+    ids = iter_product_ids(session, url, cursor.after_id)
+    total = len(failed_queue) if args.retry_failed else count_products(session, url, cursor.after_id)
+    progress = Progress(None if total is None else total + (0 if args.retry_failed else len(failed_queue)))
+    aimd = Aimd(args)
+
+    print(f"Translating to {'/'.join(['ru', 'en', 'es', 'kk', 'tr', 'vi'])}: concurrency {args.concurrency}"
+          f"..{args.max_concurrency}, batch {args.batch_size} ({args.min_batch}..{args.max_batch})"
+          + (f", force {','.join(force_langs)}" if force_langs else ""))
     print("-" * 50)
 
-    while True:
-        if args.max_batches is not None and batch_num >= args.max_batches:
-            print(f"Reached max batches ({args.max_batches})")
-            break
-
-        payload: dict = {"batch": True, "limit": args.batch_size, "offset": offset}
-        if args.force_vi:
-            payload["force_langs"] = ["vi"]
-        for attempt in range(3):
-            try:
-                resp = requests.post(
-                    fn_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=180,
-                )
-            except requests.RequestException as e:
-                print(f"Request error (attempt {attempt + 1}/3): {e}")
-                if attempt < 2:
-                    time.sleep(10)
+    retry: deque = deque()  # (seq, ids, attempts) — батчи после 502/429, уходят первыми
+    inflight: dict[Future, tuple[Optional[int], list[str], int, float]] = {}
+    exhausted = args.retry_failed
+    batches = 0
+    pool = ThreadPoolExecutor(max_workers=args.max_concurrency)
+    try:
+        while True:
+            now = time.monotonic()
+            while len(inflight) < aimd.limit and now >= aimd.pause_until:
+                if retry:
+                    seq, chunk, attempts = retry.popleft()
+                elif failed_queue:
+                    chunk = [failed_queue.popleft() for _ in range(min(aimd.batch_size, len(failed_queue)))]
+                    seq, attempts = None, 0
+                elif not exhausted and (args.max_batches is None or batches < args.max_batches):
+                    chunk = [pid for _, pid in zip(range(aimd.batch_size), ids)]
+                    if not chunk:
+                        exhausted = True
+                        break
+                    seq, attempts = cursor.issue(), 0
+                    batches += 1
+                else:
+                    break
+                fut = pool.submit(post_batch, session, fn_url, chunk, force_langs, args.timeout)
+                inflight[fut] = (seq, chunk, attempts, time.monotonic())
+            if not inflight:
+                if retry:
+                    time.sleep(max(0.0, aimd.pause_until - time.monotonic()))
                     continue
-                sys.exit(1)
+                break
 
-            if resp.status_code == 502 or resp.status_code == 504:
-                print(f"  [offset {offset}] {resp.status_code} (attempt {attempt + 1}/3), retry in 15s...")
-                if attempt < 2:
-                    time.sleep(15)
+            finished, _ = wait(list(inflight), timeout=0.5, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                seq, chunk, attempts, started = inflight.pop(fut)
+                latency = time.monotonic() - started
+                try:
+                    result = fut.result()
+                except Overload as e:
+                    progress.errors += 1
+                    aimd.on_overload(started, e.retry_after)
+                    if attempts + 1 >= args.max_retries:
+                        progress.show(aimd, len(inflight), force=True)
+                        print(f"\nBatch after id {cursor.after_id} failed {attempts + 1} times "
+                              f"({e.status or 'network'}: {e}); rerun to resume")
+                        sys.exit(1)
+                    retry.append((seq, chunk, attempts + 1))
                     continue
-            if resp.status_code != 200:
-                print(f"Error {resp.status_code}: {resp.text[:500]}")
-                sys.exit(1)
-            break
-
-        data = resp.json()
-        translated = data.get("translated", 0)
-        skipped = data.get("skipped", 0)
-        failed = data.get("failed", 0)
-        batch_size = data.get("batch_size", 0)
-        has_more = data.get("has_more", False)
-
-        total_translated += translated
-        total_skipped += skipped
-        total_failed += failed
-        batch_num += 1
-
-        print(f"  [offset {offset}] translated={translated}, skipped={skipped}, failed={failed}")
-
-        if batch_size < args.batch_size or not has_more:
-            break
-
-        offset += args.batch_size
-        time.sleep(2)  # пауза между батчами (снижает 502)
+                aimd.on_success(started, latency)
+                progress.add(len(chunk), latency)
+                cursor.complete(seq, chunk, result)
+            progress.show(aimd, len(inflight))
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; cursor saved at id {cursor.after_id} — rerun to resume")
+        pool.shutdown(wait=False, cancel_futures=True)
+        sys.exit(130)
+    pool.shutdown()
 
+    progress.show(aimd, 0, force=True)
+    elapsed = time.monotonic() - progress.started
+    print()
     print("-" * 50)
-    print(f"Done. Total: translated={total_translated}, skipped={total_skipped}, failed={total_failed}")
+    if args.max_batches is not None and batches >= args.max_batches:
+        print(f"Reached max batches ({args.max_batches})")
+    elif exhausted and not args.retry_failed and cursor.done_seq == cursor.next_seq:
+        # Весь каталог пройден: следующий запуск начнёт сначала.
+        cursor.after_id = None
+        cursor.save()
+    t = cursor.totals
+    print(f"Done in {elapsed:.0f}s ({progress.done / max(elapsed, 1e-9):.1f} products/s). "
+          f"Total: translated={t.get('translated', 0)}, skipped={t.get('skipped', 0)}, failed={t.get('failed', 0)}")
+    if cursor.failed_ids:
+        print(f"Failed ids ({len(cursor.failed_ids)}) in {args.state} — retried first on the next run")
 
 
 if __name__ == "__main__":
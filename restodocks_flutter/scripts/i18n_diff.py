@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Структурный diff двух версий localizable.json + проверка регрессий — за один проход.
+
+По каждой локали:
+  added / removed / changed — ключи, появившиеся / пропавшие / изменённые;
+  regressed_to_en           — значение стало равно en, хотя в базе было переведено;
+  placeholder_mismatch      — набор {…} / %s / %1s не совпадает с en (флаг new — не было в базе).
+
+База (--base):
+  путь к файлу (по умолчанию assets/translations/localizable.json.bak)
+  git:<rev>  — версия файла из git, например git:HEAD или git:origin/main
+
+Запуск (из каталога restodocks_flutter):
+  python3 scripts/i18n_diff.py                          # рабочая копия vs .bak
+  python3 scripts/i18n_diff.py --base git:HEAD          # перед коммитом
+  python3 scripts/i18n_diff.py --base git:HEAD --json-out /tmp/i18n_diff.json
+  python3 scripts/i18n_diff.py --base git:HEAD --fail-on removed,regressed_to_en,placeholder_new
+
+Код выхода 1, если хоть одна категория из --fail-on непуста (гейт для pre-commit / CI).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+_SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+from i18n_placeholders import placeholders  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+JSON_PATH = ROOT / "assets" / "translations" / "localizable.json"
+REF_LANG = "en"
+
+FAIL_CATEGORIES = ("added", "removed", "changed", "regressed_to_en", "placeholder_mismatch", "placeholder_new")
+DEFAULT_FAIL_ON = "removed,regressed_to_en,placeholder_new"
+
+
+def load_version(spec: str) -> dict[str, dict[str, str]]:
+    """Файл на диске или git:<rev> (тот же путь localizable.json внутри репозитория)."""
+    if spec.startswith("git:"):
+        rev = spec[4:] or "HEAD"
+        top = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel"],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        rel = JSON_PATH.relative_to(Path(top).resolve()).as_posix()
+        out = subprocess.run(
+            ["git", "show", f"{rev}:{rel}"],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+        ).stdout
+        return json.loads(out.decode("utf-8"))
+    return json.loads(Path(spec).read_text(encoding="utf-8"))
+
+
+def diff(
+    base: dict[str, dict[str, str]], head: dict[str, dict[str, str]]
+) -> dict[str, dict[str, list[Any]]]:
+    """Один линейный проход по объединению ключей всех локалей."""
+    base_en = base.get(REF_LANG, {})
+    head_en = head.get(REF_LANG, {})
+    ph_cache: dict[str, list[str]] = {}
+
+    def ph(v: Optional[str]) -> list[str]:
+        if not v:
+            return []
+        got = ph_cache.get(v)
+        if got is None:
+            got = placeholders(v)
+            ph_cache[v] = got
+        return got
+
+    report: dict[str, dict[str, list[Any]]] = {}
+    for lang in list(dict.fromkeys([*head.keys(), *base.keys()])):
+        old = base.get(lang) or {}
+        new = head.get(lang) or {}
+        r: dict[str, list[Any]] = {
+            "added": [],
+            "removed": [],
+            "changed": [],
+            "regressed_to_en": [],
+            "placeholder_mismatch": [],
+        }
+        for k in old:
+            if k not in new:
+                r["removed"].append(k)
+        for k, nv in new.items():
+            had = k in old
+            ov = old.get(k)
+            if not had:
+                r["added"].append(k)
+            elif ov != nv:
+                r["changed"].append(k)
+            if lang == REF_LANG:
+                continue
+            ne = head_en.get(k)
+            if ne is None:
+                continue
+            nv_s = (nv or "").strip()
+            if had and ov != nv and nv_s and nv_s == ne.strip():
+                oe = (base_en.get(k) or "").strip()
+                if (ov or "").strip() != oe:
+                    r["regressed_to_en"].append(k)
+            exp = ph(ne)
+            got = ph(nv)
+            if sorted(exp) != sorted(got):
+                old_exp = ph(base_en.get(k))
+                was_bad = had and sorted(old_exp) != sorted(ph(ov))
+                r["placeholder_mismatch"].append(
+                    {"key": k, "expected": exp, "got": got, "new": not was_bad}
+                )
+        report[lang] = r
+    return report
+
+
+def summarize(report: dict[str, dict[str, list[Any]]]) -> dict[str, int]:
+    totals = {c: 0 for c in FAIL_CATEGORIES}
+    for r in report.values():
+        for c in ("added", "removed", "changed", "regressed_to_en", "placeholder_mismatch"):
+            totals[c] += len(r[c])
+        totals["placeholder_new"] += sum(1 for m in r["placeholder_mismatch"] if m["new"])
+    return totals
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--base",
+        default=str(JSON_PATH.with_suffix(".json.bak")),
+        help="Файл или git:<rev> (по умолчанию localizable.json.bak)",
+    )
+    ap.add_argument("--head", default=str(JSON_PATH), help="Файл или git:<rev> (по умолчанию рабочая копия)")
+    ap.add_argument("--json-out", type=Path, default=None, help="Записать отчёт JSON в файл")
+    ap.add_argument(
+        "--fail-on",
+        default=DEFAULT_FAIL_ON,
+        help=f"Категории через запятую ({','.join(FAIL_CATEGORIES)}); пусто — никогда не падать",
+    )
+    ap.add_argument("--quiet", action="store_true", help="Не печатать JSON в stdout, только итог")
+    args = ap.parse_args()
+
+    fail_on = [c.strip() for c in args.fail_on.split(",") if c.strip()]
+    for c in fail_on:
+        if c not in FAIL_CATEGORIES:
+            print(f"Unknown category: {c}", file=sys.stderr)
+            return 2
+
+    t0 = time.perf_counter()
+    try:
+        base = load_version(args.base)
+        head = load_version(args.head)
+    except (OSError, subprocess.CalledProcessError, json.JSONDecodeError) as e:
+        print(f"Cannot load: {e}", file=sys.stderr)
+        return 2
+    t1 = time.perf_counter()
+    report = diff(base, head)
+    t2 = time.perf_counter()
+    totals = summarize(report)
+
+    out = {
+        "base": args.base,
+        "head": args.head,
+        "load_ms": round((t1 - t0) * 1000, 1),
+        "diff_ms": round((t2 - t1) * 1000, 1),
+        "summary": totals,
+        "locales": report,
+    }
+    text = json.dumps(out, ensure_ascii=False, indent=2)
+    if args.json_out:
+        args.json_out.write_text(text + "\n", encoding="utf-8")
+    if not args.quiet:
+        print(text)
+
+    failed = [c for c in fail_on if totals[c]]
+    summary = ", ".join(f"{c}={totals[c]}" for c in FAIL_CATEGORIES)
+    if failed:
+        print(f"[FAIL] i18n diff: {summary}", file=sys.stderr)
+        return 1
+    print(f"OK: i18n diff: {summary}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
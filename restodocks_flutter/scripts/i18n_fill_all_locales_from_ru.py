@@ -13,6 +13,8 @@
   python3 scripts/i18n_fill_all_locales_from_ru.py --langs de,es,fr,it,tr,vi,kk
 
 Перед записью создаётся localizable.json.bak.
+Переводы со сломанными плейсхолдерами не пишутся — ключи уходят в
+scripts/i18n_retranslate_queue.json (дальше: i18n_fill_from_ru_mt.py --keys-from).
 """
 
 from __future__ import annotations
@@ -34,6 +36,7 @@ _SCRIPTS_DIR = Path(__file__).resolve().parent
 if str(_SCRIPTS_DIR) not in sys.path:
     sys.path.insert(0, str(_SCRIPTS_DIR))
 from i18n_fill_from_ru_mt import gap_keys  # noqa: E402
+from i18n_placeholders import check, is_broken, placeholders, protect, restore, update_queue  # noqa: E402
 
 ROOT = Path(__file__).resolve().parents[1]
 JSON_PATH = ROOT / "assets" / "translations" / "localizable.json"
@@ -81,10 +84,12 @@ def main() -> None:
     print(f"Backup: {bak}")
 
     translators = {lang: GoogleTranslator(source="ru", target=lang) for lang in langs}
+    broken: dict[str, list[str]] = {lang: [] for lang in langs}
 
     for i in range(0, len(keys_sorted), args.batch_size):
         chunk = keys_sorted[i : i + args.batch_size]
-        texts = [ru[k] for k in chunk]
+        protected = [protect(ru[k]) for k in chunk]
+        texts = [t for t, _ in protected]
         for lang in langs:
             tr = translators[lang]
             loc = data[lang]
@@ -103,13 +108,21 @@ def main() -> None:
             if len(translated) != len(chunk):
                 print("length mismatch", lang, file=sys.stderr)
                 sys.exit(1)
-            for k, t in zip(chunk, translated):
+            for k, t, (_, phs) in zip(chunk, translated, protected):
+                t = restore(t, phs)
+                if is_broken(check(placeholders(ru[k]), placeholders(t))):
+                    broken[lang].append(k)
+                    continue
                 loc[k] = t
         done = min(i + args.batch_size, len(keys_sorted))
         print(f"  {done}/{len(keys_sorted)}")
         time.sleep(args.sleep)
 
     JSON_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    for lang, keys in broken.items():
+        if keys:
+            update_queue(lang, add=keys)
+            print(f"{lang}: broken placeholders queued: {len(keys)}")
     print("Done.")
 
 
@@ -8,14 +8,20 @@ Usage:
   python3 scripts/i18n_fill_from_ru_mt.py --lang de --priority-only
   python3 scripts/i18n_fill_from_ru_mt.py --lang kk --priority-only
   python3 scripts/i18n_fill_from_ru_mt.py --lang de   # all gaps (slow)
+  python3 scripts/i18n_fill_from_ru_mt.py --lang kk --keys-from scripts/i18n_retranslate_queue.json
+
+Placeholders ({name}, %s, %1s) are swapped for __P0__ tokens before sending and checked
+against `ru` after (i18n_placeholders.py, REF_LANG); broken results are not written and their keys
+go to scripts/i18n_retranslate_queue.json for a targeted re-run via --keys-from.
 
 Backs up JSON to assets/translations/localizable.json.bak before write.
+Progress after each batch goes to localizable.json.journal (see i18n_store.py);
+the JSON itself is rewritten once at the end. An interrupted run resumes from the journal.
 """
 
 from __future__ import annotations
 
 import argparse
-import json
 import shutil
 import sys
 import time
@@ -27,6 +33,21 @@ except ImportError:
     print("Install: pip install deep-translator", file=sys.stderr)
     sys.exit(1)
 
+_SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+from i18n_store import I18nStore  # noqa: E402
+from i18n_placeholders import (  # noqa: E402
+    QUEUE_PATH,
+    check,
+    is_broken,
+    load_queue,
+    placeholders,
+    protect,
+    restore,
+    update_queue,
+)
+
 ROOT = Path(__file__).resolve().parents[1]
 JSON_PATH = ROOT / "assets/translations/localizable.json"
 
@@ -117,15 +138,24 @@ def main() -> None:
         "--no-save-every-batch",
         action="store_false",
         dest="save_every_batch",
-        help="Писать JSON только в конце (по умолчанию — после каждого батча, чтобы не терять прогресс)",
+        help="Не журналировать батчи (по умолчанию — журнал после каждого батча, чтобы не терять прогресс)",
     )
     ap.set_defaults(save_every_batch=True)
+    ap.add_argument(
+        "--keys-from",
+        type=Path,
+        default=None,
+        help="Очередь i18n_retranslate_queue.json: переводить только сломанные ключи этой локали",
+    )
     args = ap.parse_args()
 
-    with JSON_PATH.open(encoding="utf-8") as f:
-        data = json.load(f)
+    store = I18nStore(JSON_PATH)
+    data = store.data
 
-    keys = gap_keys(data, args.lang, args.priority_only)
+    if args.keys_from:
+        keys = [k for k in load_queue(args.keys_from).get(args.lang, []) if data["ru"].get(k)]
+    else:
+        keys = gap_keys(data, args.lang, args.priority_only)
     if not keys:
         print("No gaps to fill.")
         return
@@ -136,50 +166,61 @@ def main() -> None:
     print(f"Filling {len(keys)} keys for {args.lang} (priority_only={args.priority_only})")
 
     bak = JSON_PATH.with_suffix(".json.bak")
-    shutil.copy2(JSON_PATH, bak)
-    print(f"Backup: {bak}")
+    if not store.replayed:
+        shutil.copy2(JSON_PATH, bak)
+        print(f"Backup: {bak}")
 
     ru = data["ru"]
-    loc = data[args.lang]
     failed: list[str] = []
-
-    def _write_json() -> None:
-        with JSON_PATH.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            f.write("\n")
+    broken: list[str] = []
+    fixed: list[str] = []
+    queue_path = args.keys_from or QUEUE_PATH
 
     for i in range(0, len(keys), args.batch_size):
         chunk = keys[i : i + args.batch_size]
-        texts = [ru[k] for k in chunk]
+        protected = [protect(ru[k]) for k in chunk]
+        texts = [t for t, _ in protected]
         try:
             translated = translator.translate_batch(texts)
         except Exception as e:
             print(f"Batch error at {i}: {e}, falling back to per-string")
             translated = []
-            for k in chunk:
+            for k, t in zip(chunk, texts):
                 try:
-                    translated.append(translator.translate(ru[k]))
+                    translated.append(translator.translate(t))
                     time.sleep(0.15)
                 except Exception as e2:
                     print(f"  skip {k}: {e2}")
                     failed.append(k)
-                    translated.append(loc.get(k, ru[k]))
+                    translated.append(None)
         if len(translated) != len(chunk):
             print("Length mismatch, aborting")
             sys.exit(1)
-        for k, t in zip(chunk, translated):
-            loc[k] = t
+        for k, t, (_, phs) in zip(chunk, translated, protected):
+            if t is None:
+                continue
+            t = restore(t, phs)
+            # Сверяем с плейсхолдерами того, что реально ушло в MT (ru), а не en.
+            if is_broken(check(placeholders(ru[k]), placeholders(t))):
+                print(f"  placeholders broken, queued {k}: {t!r}")
+                broken.append(k)
+                continue
+            store.set(args.lang, k, t)
+            fixed.append(k)
         done = min(i + args.batch_size, len(keys))
         print(f"  {done}/{len(keys)}", flush=True)
         if args.save_every_batch:
-            _write_json()
+            store.checkpoint()
         time.sleep(args.sleep)
 
-    if not args.save_every_batch:
-        _write_json()
+    store.compact()
+    # Сбои MT/сети — не проблема плейсхолдеров: в очередь только сломанные ключи.
+    update_queue(args.lang, add=broken, remove=fixed, path=queue_path)
 
     if failed:
         print("Failed keys:", len(failed), file=sys.stderr)
+    if broken:
+        print(f"Broken placeholders: {len(broken)} → {queue_path}", file=sys.stderr)
     print("Done.")
 
 
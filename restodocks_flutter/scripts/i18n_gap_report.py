@@ -8,6 +8,7 @@
   scripts/i18n_scan_hardcoded.py    — поиск Text(...)/label без loc.t (эвристика)
   scripts/i18n_fill_from_ru_mt.py   — перевод зазоров ru→одна локаль
   scripts/i18n_fill_all_locales_from_ru.py — ru→несколько локалей за прогон
+  scripts/i18n_diff.py              — diff двух версий словаря (vs .bak / git) + гейт регрессий
 
 Запуск из корня репозитория:
   python3 restodocks_flutter/scripts/i18n_gap_report.py
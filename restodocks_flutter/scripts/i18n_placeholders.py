@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Проверка плейсхолдеров localizable.json: все ключи × все локали против `ru` за один проход.
+Эталон — ru, как и у MT-скриптов (они переводят с ru и сверяют результат с ним же), иначе
+валидатор и MT могли бы расходиться во мнении, какая строка сломана; en проверяется как остальные.
+
+Плейсхолдеры: {name}, %s, %1s, %1$s. По каждой строке:
+  missing   — есть в ru, нет в переводе (в т.ч. «переведённые» {erreur}, {қате});
+  extra     — есть в переводе, нет в ru;
+  reordered — тот же набор, другой порядок (для %s это ошибка, для {name} — обычно норма).
+
+Ключи с missing/extra (и reordered при --queue-reordered) пишутся в очередь перевода
+scripts/i18n_retranslate_queue.json; MT-скрипты берут её через --keys-from и
+переотправляют провайдеру только сломанные строки.
+
+Общие помощники для MT-скриптов: protect()/restore() — замена плейсхолдеров на
+__P0__… перед отправкой провайдеру, check() — сверка результата с эталоном.
+
+Запуск (из каталога restodocks_flutter):
+  python3 scripts/i18n_placeholders.py
+  python3 scripts/i18n_placeholders.py --langs kk,fr --limit 20
+  python3 scripts/i18n_placeholders.py --queue-out scripts/i18n_retranslate_queue.json
+  python3 scripts/i18n_fill_from_ru_mt.py --lang kk --keys-from scripts/i18n_retranslate_queue.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+JSON_PATH = ROOT / "assets" / "translations" / "localizable.json"
+QUEUE_PATH = ROOT / "scripts" / "i18n_retranslate_queue.json"
+REF_LANG = "ru"
+
+PLACEHOLDER_RE = re.compile(r"\{[^}]+\}|%\d*\$?s")
+_TOKEN_RE = re.compile(r"__P(\d+)__")
+
+
+def placeholders(value: Optional[str]) -> list[str]:
+    if not value:
+        return []
+    return PLACEHOLDER_RE.findall(value)
+
+
+def check(expected: list[str], got: list[str]) -> dict[str, list[str]]:
+    """Пустой dict — всё совпало; иначе missing / extra / reordered."""
+    if expected == got:
+        return {}
+    ce, cg = Counter(expected), Counter(got)
+    issues: dict[str, list[str]] = {}
+    missing = list((ce - cg).elements())
+    extra = list((cg - ce).elements())
+    if missing:
+        issues["missing"] = missing
+    if extra:
+        issues["extra"] = extra
+    if not missing and not extra:
+        issues["reordered"] = got
+    return issues
+
+
+def is_broken(issues: dict[str, list[str]], include_reordered: bool = False) -> bool:
+    if "missing" in issues or "extra" in issues:
+        return True
+    return include_reordered and "reordered" in issues
+
+
+def protect(text: str) -> tuple[str, list[str]]:
+    """Заменить плейсхолдеры на __P0__, __P1__… (провайдеры MT их не трогают)."""
+    phs: list[str] = []
+
+    def repl(m: re.Match[str]) -> str:
+        phs.append(m.group(0))
+        return f"__P{len(phs) - 1}__"
+
+    return PLACEHOLDER_RE.sub(repl, text), phs
+
+
+def restore(text: str, phs: list[str]) -> str:
+    def repl(m: re.Match[str]) -> str:
+        i = int(m.group(1))
+        return phs[i] if i < len(phs) else m.group(0)
+
+    # Провайдеры иногда вставляют пробелы: "__ P0 __".
+    text = re.sub(r"__\s*P\s*(\d+)\s*__", lambda m: f"__P{m.group(1)}__", text)
+    return _TOKEN_RE.sub(repl, text)
+
+
+def validate(
+    data: dict[str, dict[str, str]], langs: Optional[Iterable[str]] = None
+) -> list[dict]:
+    """Все ключи × локали против REF_LANG. Разбор эталона кэшируется — один проход."""
+    ref = {k: placeholders(v) for k, v in data.get(REF_LANG, {}).items() if isinstance(v, str)}
+    codes = list(langs) if langs else [c for c in data if c != REF_LANG]
+    out: list[dict] = []
+    for lang in codes:
+        block = data.get(lang) or {}
+        for k, exp in ref.items():
+            v = block.get(k)
+            if not isinstance(v, str):
+                continue
+            got = placeholders(v)
+            if not exp and not got:
+                continue
+            issues = check(exp, got)
+            if issues:
+                out.append({"lang": lang, "key": k, "expected": exp, "got": got, **issues})
+    return out
+
+
+def load_queue(path: Path = QUEUE_PATH) -> dict[str, list[str]]:
+    if not path.is_file():
+        return {}
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    return {lang: list(keys) for lang, keys in (raw.get("langs") or {}).items()}
+
+
+def save_queue(queue: dict[str, list[str]], path: Path = QUEUE_PATH) -> None:
+    body = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "langs": {lang: sorted(set(keys)) for lang, keys in sorted(queue.items()) if keys},
+    }
+    path.write_text(json.dumps(body, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def update_queue(
+    lang: str,
+    add: Iterable[str] = (),
+    remove: Iterable[str] = (),
+    path: Path = QUEUE_PATH,
+) -> None:
+    """Добавить сломанные ключи локали в очередь / убрать исправленные."""
+    add, remove = set(add), set(remove)
+    if not add and not remove and not path.is_file():
+        return
+    queue = load_queue(path)
+    keys = (set(queue.get(lang, [])) | add) - remove
+    queue[lang] = sorted(keys)
+    save_queue(queue, path)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--langs", default=None, help=f"Коды через запятую (по умолчанию все, кроме {REF_LANG})")
+    ap.add_argument("--limit", type=int, default=10, help="Сколько примеров показать на язык")
+    ap.add_argument("--queue-out", type=Path, default=None, help="Записать очередь на перевод (JSON)")
+    ap.add_argument(
+        "--queue-reordered",
+        action="store_true",
+        help="Класть в очередь и ключи с изменённым порядком плейсхолдеров",
+    )
+    ap.add_argument("--strict", action="store_true", help="Код выхода 1 при любых ошибках")
+    args = ap.parse_args()
+
+    data = json.loads(JSON_PATH.read_text(encoding="utf-8"))
+    langs = [x.strip() for x in args.langs.split(",") if x.strip()] if args.langs else None
+    issues = validate(data, langs)
+
+    by_lang: dict[str, list[dict]] = {}
+    for it in issues:
+        by_lang.setdefault(it["lang"], []).append(it)
+
+    queue: dict[str, list[str]] = {}
+    for lang, items in sorted(by_lang.items()):
+        broken = [it for it in items if is_broken(it, args.queue_reordered)]
+        reordered = sum(1 for it in items if "reordered" in it)
+        print(f"{lang}: broken={len(broken)} reordered={reordered}")
+        for it in broken[: args.limit]:
+            print(
+                f"    {it['key']}: {REF_LANG}={it['expected']} got={it['got']}"
+                + (f" missing={it['missing']}" if "missing" in it else "")
+                + (f" extra={it['extra']}" if "extra" in it else "")
+            )
+        if broken:
+            queue[lang] = [it["key"] for it in broken]
+
+    total = sum(len(v) for v in queue.values())
+    print(f"Total keys to re-translate: {total}")
+    if args.queue_out:
+        # Слияние, а не перезапись: ключи других локалей (в т.ч. от MT-скриптов) остаются,
+        # у проверенных локалей — ровно текущие сломанные.
+        for lang in langs or [x for x in data if x != REF_LANG]:
+            current = set(queue.get(lang, []))
+            update_queue(lang, add=current, remove=(set(data.get(lang, {})) | set(data[REF_LANG])) - current,
+                         path=args.queue_out)
+        print(f"Queue: {args.queue_out}")
+    if args.strict and total:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
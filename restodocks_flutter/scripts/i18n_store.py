@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Хранилище localizable.json для MT-скриптов: изменения по ключам пишутся в журнал,
+сам JSON переписывается один раз в конце.
+
+- `set(lang, key, value)` — только в памяти; `checkpoint()` дописывает накопленные
+  изменения в `localizable.json.journal` (JSONL, одна строка на ключ) — O(изменений),
+  а не O(файла), как раньше `json.dump` всего словаря после каждого батча.
+- `compact()` — применяет всё к словарю и пишет JSON через временный файл + `os.replace`,
+  поэтому прерванный процесс не оставляет «порванный» localizable.json.
+- При следующем открытии незакомпакченный журнал проигрывается поверх JSON —
+  прогон можно продолжить с того же места.
+- JSON читается лениво, при первом обращении; индекс — dict[locale][key].
+
+Использование:
+  sys.path.insert(0, <restodocks_flutter/scripts>)
+  from i18n_store import I18nStore
+
+  with I18nStore(JSON_PATH) as store:
+      for k, v in translated:
+          store.set("de", k, v)
+      store.checkpoint()          # после каждого батча
+  # выход из with без исключения → compact(); при исключении журнал сохраняется
+
+  python3 scripts/i18n_store.py --compact   # вручную применить оставшийся журнал
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+JSON_PATH = ROOT / "assets" / "translations" / "localizable.json"
+
+
+def journal_path_for(json_path: Path) -> Path:
+    return json_path.with_name(json_path.name + ".journal")
+
+
+def atomic_write_json(path: Path, data: dict) -> None:
+    """Пишет JSON в тот же формат, что и скрипты раньше (indent=2 + \\n), атомарно."""
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class I18nStore:
+    """localizable.json + append-only журнал изменений."""
+
+    def __init__(self, json_path: Path = JSON_PATH, journal_path: Optional[Path] = None) -> None:
+        self.json_path = Path(json_path)
+        self.journal_path = Path(journal_path) if journal_path else journal_path_for(self.json_path)
+        self._data: Optional[dict[str, dict[str, str]]] = None
+        self._pending: list[tuple[str, str, Optional[str]]] = []
+        self._dirty = False
+        self.replayed = 0
+
+    # --- загрузка -----------------------------------------------------------
+
+    @property
+    def data(self) -> dict[str, dict[str, str]]:
+        if self._data is None:
+            self._load()
+        assert self._data is not None
+        return self._data
+
+    def _load(self) -> None:
+        with self.json_path.open(encoding="utf-8") as f:
+            self._data = json.load(f)
+        for lang, key, value in self._read_journal():
+            self._apply(lang, key, value)
+            self.replayed += 1
+        if self.replayed:
+            self._dirty = True
+            print(
+                f"i18n_store: replayed {self.replayed} journaled changes from {self.journal_path.name}",
+                file=sys.stderr,
+            )
+
+    def _read_journal(self) -> Iterator[tuple[str, str, Optional[str]]]:
+        if not self.journal_path.is_file():
+            return
+        with self.journal_path.open(encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    # Оборванная последняя строка после kill — просто пропускаем.
+                    continue
+                yield rec["l"], rec["k"], rec.get("v")
+
+    def _apply(self, lang: str, key: str, value: Optional[str]) -> None:
+        assert self._data is not None
+        block = self._data.setdefault(lang, {})
+        if value is None:
+            block.pop(key, None)
+        else:
+            block[key] = value
+
+    # --- чтение -------------------------------------------------------------
+
+    def locales(self) -> list[str]:
+        return list(self.data.keys())
+
+    def block(self, lang: str) -> dict[str, str]:
+        """Живой dict локали — только для чтения; менять через set()/delete()."""
+        return self.data.setdefault(lang, {})
+
+    def get(self, lang: str, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.data.get(lang, {}).get(key, default)
+
+    # --- запись -------------------------------------------------------------
+
+    def set(self, lang: str, key: str, value: str) -> None:
+        if self.data.get(lang, {}).get(key) == value:
+            return
+        self._apply(lang, key, value)
+        self._pending.append((lang, key, value))
+        self._dirty = True
+
+    def delete(self, lang: str, key: str) -> None:
+        if key not in self.data.get(lang, {}):
+            return
+        self._apply(lang, key, None)
+        self._pending.append((lang, key, None))
+        self._dirty = True
+
+    def reorder(self, lang: str, keys: list[str]) -> None:
+        """Порядок ключей локали как в `keys` (остальные — в конце). Применяется при compact()."""
+        block = self.block(lang)
+        order = {k: i for i, k in enumerate(keys)}
+        tail = len(order)
+        self.data[lang] = dict(sorted(block.items(), key=lambda kv: order.get(kv[0], tail)))
+        self._dirty = True
+
+    def checkpoint(self) -> int:
+        """Дописать накопленные изменения в журнал. Возвращает число записанных строк."""
+        if not self._pending:
+            return 0
+        with self.journal_path.open("a", encoding="utf-8") as f:
+            for lang, key, value in self._pending:
+                rec: dict[str, Optional[str]] = {"l": lang, "k": key}
+                if value is not None:
+                    rec["v"] = value
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        n = len(self._pending)
+        self._pending.clear()
+        return n
+
+    def compact(self) -> bool:
+        """Записать словарь в localizable.json (temp + rename) и удалить журнал."""
+        if self._data is None:
+            if not self.journal_path.is_file():
+                return False
+            self._load()
+        if not self._dirty:
+            return False
+        atomic_write_json(self.json_path, self.data)
+        self._pending.clear()
+        self._dirty = False
+        try:
+            self.journal_path.unlink()
+        except FileNotFoundError:
+            pass
+        return True
+
+    def __enter__(self) -> "I18nStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.compact()
+        else:
+            # Прогресс не теряем: следующий запуск проиграет журнал.
+            self.checkpoint()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Журнал изменений localizable.json")
+    ap.add_argument("--json", type=Path, default=JSON_PATH)
+    ap.add_argument("--compact", action="store_true", help="Применить журнал и переписать JSON")
+    args = ap.parse_args()
+
+    store = I18nStore(args.json)
+    jp = store.journal_path
+    if not jp.is_file():
+        print(f"No journal: {jp}")
+        return
+    if not args.compact:
+        n = sum(1 for _ in store._read_journal())
+        print(f"{jp}: {n} pending changes (run with --compact to apply)")
+        return
+    store.compact()
+    print(f"Compacted {store.replayed} changes into {store.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,124 @@ export interface TryParseResult {
   sanityIssues?: string[];
 }
 
+type TemplateRow = Record<string, unknown>;
+
+const TEMPLATE_COLUMNS =
+  "header_signature, header_row_index, name_col, product_col, gross_col, net_col, waste_col, output_col, technology_col";
+const PAGE_SIZE = 1000; // PostgREST max-rows: без постраничной выборки каталог молча обрезается
+
+/**
+ * Индекс каталога в памяти изолята: точная сигнатура, первые 6 колонок и отсортированный
+ * список сигнатур (диапазон «sig|…» — бинарным поиском). Поиск не зависит от размера каталога.
+ */
+interface TemplateIndex {
+  version: string | null;
+  bySig: Map<string, TemplateRow>;
+  byPrefix6: Map<string, TemplateRow>;
+  sorted: string[];
+}
+
+let cachedIndex: TemplateIndex | null = null;
+let pendingLoad: Promise<TemplateIndex | null> | null = null;
+
+const prefix6 = (sig: string) => sig.split("|").slice(0, 6).join("|");
+
+function buildIndex(rows: TemplateRow[], version: string | null): TemplateIndex {
+  const bySig = new Map<string, TemplateRow>();
+  const byPrefix6 = new Map<string, TemplateRow>();
+  for (const t of rows) {
+    const ts = (t.header_signature as string) ?? "";
+    if (!ts || bySig.has(ts)) continue;
+    bySig.set(ts, t);
+    const p6 = prefix6(ts);
+    if (p6 && !byPrefix6.has(p6)) byPrefix6.set(p6, t);
+  }
+  const sorted = [...bySig.keys()].sort();
+  return { version, bySig, byPrefix6, sorted };
+}
+
+/**
+ * Шаблон для сигнатуры: точное совпадение; иначе шаблон — префикс сигнатуры (по колонкам, самый длинный),
+ * сигнатура — префикс шаблона, совпадают первые 6 колонок.
+ */
+function findTemplate(index: TemplateIndex, sig: string): TemplateRow | null {
+  const direct = index.bySig.get(sig);
+  if (direct) return direct;
+  const parts = sig.split("|");
+  for (let k = parts.length - 1; k >= 1; k--) {
+    const t = index.bySig.get(parts.slice(0, k).join("|"));
+    if (t) return t;
+  }
+  const lo = sig + "|";
+  let a = 0;
+  let b = index.sorted.length;
+  while (a < b) {
+    const mid = (a + b) >> 1;
+    if (index.sorted[mid] < lo) a = mid + 1;
+    else b = mid;
+  }
+  if (a < index.sorted.length && index.sorted[a].startsWith(lo)) return index.bySig.get(index.sorted[a]) ?? null;
+  const p6 = prefix6(sig);
+  return (p6 && index.byPrefix6.get(p6)) || null;
+}
+
+/** Штамп версии каталога (tt_parse_templates_version, растёт триггером при любой записи); null — таблицы нет. */
+async function fetchVersion(supabase: ReturnType<typeof createClient>): Promise<string | null> {
+  const { data, error } = await supabase
+    .from("tt_parse_templates_version")
+    .select("version")
+    .eq("id", 1)
+    .maybeSingle();
+  if (error || data?.version == null) return null;
+  return String(data.version);
+}
+
+/** Каталог постранично; complete=false — страница упала посреди загрузки, rows неполные. */
+async function fetchAllTemplates(
+  supabase: ReturnType<typeof createClient>,
+): Promise<{ rows: TemplateRow[]; complete: boolean }> {
+  const rows: TemplateRow[] = [];
+  for (let from = 0; ; from += PAGE_SIZE) {
+    const { data, error } = await supabase
+      .from("tt_parse_templates")
+      .select(TEMPLATE_COLUMNS)
+      .order("header_signature")
+      .range(from, from + PAGE_SIZE - 1);
+    if (error) {
+      console.error("[try_stored_ttk_templates] templates load error:", error.message);
+      return { rows, complete: false };
+    }
+    rows.push(...((data ?? []) as TemplateRow[]));
+    if ((data ?? []).length < PAGE_SIZE) return { rows, complete: true };
+  }
+}
+
+/**
+ * Тёплый индекс изолята: на запрос — одна выборка штампа версии по PK; каталог перечитывается,
+ * только если штамп сменился (или миграция со штампом не применена). Параллельные запросы
+ * холодного изолята ждут одну загрузку. Неполный каталог (ошибка посреди загрузки) под текущим
+ * штампом не кэшируется: остаётся прежний индекс, а без него — частичный с version null,
+ * чтобы следующий запрос перечитал каталог.
+ */
+async function loadTemplateIndex(supabase: ReturnType<typeof createClient>): Promise<TemplateIndex | null> {
+  const version = await fetchVersion(supabase);
+  if (cachedIndex && version != null && cachedIndex.version === version) return cachedIndex;
+  if (!pendingLoad) {
+    pendingLoad = (async () => {
+      const { rows, complete } = await fetchAllTemplates(supabase);
+      if (complete) {
+        cachedIndex = buildIndex(rows, version);
+      } else if (!cachedIndex && rows.length > 0) {
+        cachedIndex = buildIndex(rows, null);
+      }
+      return cachedIndex;
+    })().finally(() => {
+      pendingLoad = null;
+    });
+  }
+  return await pendingLoad;
+}
+
 export async function tryParseByStoredTemplates(rows: string[][], options?: { fromPdf?: boolean }): Promise<TryParseResult | null> {
   const fromPdf = options?.fromPdf === true;
   if (rows.length < 2) return null;
@@ -29,25 +147,9 @@ export async function tryParseByStoredTemplates(rows: string[][], options?: { fr
 
   // Системная проблема: "первый попавшийся" header_signature может быть отравлен обучением и ломать парсинг.
   // Поэтому выбираем лучший кандидат: перебираем несколько сигнатур/шаблонов, парсим каждым и берём результат с лучшим score.
-  const { data: allTemplatesData } = await supabase
-    .from("tt_parse_templates")
-    .select("header_signature, header_row_index, name_col, product_col, gross_col, net_col, waste_col, output_col, technology_col");
-  const templates = (allTemplatesData ?? []) as Array<Record<string, unknown>>;
-  if (templates.length === 0) return null;
-
-  const findTemplateForSig = (sig: string): Record<string, unknown> | null => {
-    const direct = templates.find((t) => ((t.header_signature as string) ?? "") === sig);
-    if (direct) return direct;
-    const sigPrefix6 = sig.split("|").slice(0, 6).join("|");
-    const match = templates.find((t) => {
-      const ts = (t.header_signature as string) ?? "";
-      if (!ts) return false;
-      if (sig.startsWith(ts + "|") || ts.startsWith(sig + "|")) return true;
-      const tsPrefix6 = ts.split("|").slice(0, 6).join("|");
-      return sigPrefix6 && tsPrefix6 && (sigPrefix6 === tsPrefix6 || sig.startsWith(tsPrefix6 + "|"));
-    });
-    return match ?? null;
-  };
+  const index = await loadTemplateIndex(supabase);
+  if (!index || index.bySig.size === 0) return null;
+  const findTemplateForSig = (sig: string) => findTemplate(index, sig);
 
   const headerCandidates: Array<{ sig: string; headerIdx: number; data: Record<string, unknown> }> = [];
   const seenSig = new Set<string>();
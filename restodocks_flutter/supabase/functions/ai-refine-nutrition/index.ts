@@ -1,7 +1,18 @@
 // Supabase Edge Function: КБЖУ по названию продукта (fallback к Open Food Facts)
+// Одиночный режим: { productName, existing? } → { calories, protein, fat, carbs }.
+// Пакетный режим: { productNames: [...], minKcal?, maxKcal? } → { results: [...] } — все промахи кэша
+// одним вызовом модели. Оценки без existing кэшируются по нормализованному названию (nutrition_ai_cache).
 import "jsr:@supabase/functions-js/edge-runtime.d.ts";
+import { createClient } from "jsr:@supabase/supabase-js@2";
 import { chatText } from "../_shared/ai_provider.ts";
 
+/** Границы калорийности на 100 г по умолчанию (чистый жир ~900); клиент может сузить (backfill: 1..320). */
+const MIN_SANE_KCAL = 1;
+const MAX_SANE_KCAL = 900;
+const MAX_BATCH = 40;
+
+type Nutrition = { calories: number | null; protein: number | null; fat: number | null; carbs: number | null };
+
 function corsHeaders(origin: string | null) {
   return {
     "Access-Control-Allow-Origin": origin || "*",
@@ -10,37 +21,201 @@ function corsHeaders(origin: string | null) {
   };
 }
 
+function jsonResponse(req: Request, data: unknown, status = 200) {
+  return new Response(JSON.stringify(data), {
+    status,
+    headers: { ...corsHeaders(req.headers.get("Origin")), "Content-Type": "application/json" },
+  });
+}
+
+/** Ключ кэша: нижний регистр, ё→е, схлопнутые пробелы. */
+function nameKey(name: string): string {
+  return name.trim().toLowerCase().replace(/ё/g, "е").replace(/\s+/g, " ");
+}
+
+function toNum(v: unknown): number | null {
+  if (v == null || v === "") return null;
+  const n = typeof v === "number" ? v : Number(String(v).replace(",", "."));
+  return Number.isFinite(n) ? n : null;
+}
+
+function toNutrition(o: Record<string, unknown> | null | undefined): Nutrition {
+  return { calories: toNum(o?.calories), protein: toNum(o?.protein), fat: toNum(o?.fat), carbs: toNum(o?.carbs) };
+}
+
+/** Физически возможные значения на 100 г: БЖУ 0..100 и в сумме не больше ~100 г, ккал 0..MAX_SANE_KCAL. */
+function isPlausible(n: Nutrition): boolean {
+  if (n.calories == null && n.protein == null && n.fat == null && n.carbs == null) return false;
+  if (n.calories != null && (n.calories < 0 || n.calories > MAX_SANE_KCAL)) return false;
+  const macros = [n.protein, n.fat, n.carbs];
+  if (macros.some((m) => m != null && (m < 0 || m > 100))) return false;
+  return macros.reduce<number>((s, m) => s + (m ?? 0), 0) <= 105;
+}
+
+/** Ответ модели: JSON, возможно в ```-ограждении или с текстом вокруг. */
+function parseModelJson(content: string): unknown {
+  const text = content.trim().replace(/^```(?:json)?\s*/i, "").replace(/```\s*$/, "");
+  try {
+    return JSON.parse(text);
+  } catch {
+    const start = text.search(/[[{]/);
+    const end = Math.max(text.lastIndexOf("}"), text.lastIndexOf("]"));
+    if (start < 0 || end <= start) return null;
+    try {
+      return JSON.parse(text.slice(start, end + 1));
+    } catch {
+      return null;
+    }
+  }
+}
+
+function cacheClient() {
+  const url = Deno.env.get("SUPABASE_URL");
+  const key = Deno.env.get("SUPABASE_SERVICE_ROLE_KEY");
+  return url && key ? createClient(url, key, { auth: { persistSession: false } }) : null;
+}
+
+type CacheClient = NonNullable<ReturnType<typeof cacheClient>>;
+
+async function readCache(supabase: CacheClient | null, keys: string[]): Promise<Map<string, Nutrition>> {
+  const out = new Map<string, Nutrition>();
+  if (!supabase || keys.length === 0) return out;
+  const { data, error } = await supabase
+    .from("nutrition_ai_cache")
+    .select("name_key, calories, protein, fat, carbs")
+    .in("name_key", keys);
+  if (error) {
+    console.log("[ai-refine-nutrition] Cache read skip:", error.message);
+    return out;
+  }
+  for (const row of (data ?? []) as Array<Record<string, unknown>>) {
+    out.set(row.name_key as string, toNutrition(row));
+  }
+  return out;
+}
+
+async function writeCache(supabase: CacheClient | null, rows: Array<{ key: string; name: string; n: Nutrition }>) {
+  if (!supabase || rows.length === 0) return;
+  const { error } = await supabase.from("nutrition_ai_cache").upsert(
+    rows.map((r) => ({ name_key: r.key, product_name: r.name, ...r.n, updated_at: new Date().toISOString() })),
+    { onConflict: "name_key" },
+  );
+  if (error) console.log("[ai-refine-nutrition] Cache write skip:", error.message);
+}
+
+/** Одна оценка модели на весь список; индекс в ответе — позиция в списке. */
+async function estimateBatch(names: string[]): Promise<Nutrition[]> {
+  const systemPrompt = `You are a nutrition expert. For each numbered food product name, provide approximate nutrition per 100g. Output JSON only:
+{"items": [{"i": <number from the list>, "calories": number (kcal), "protein": number (g), "fat": number (g), "carbs": number (g)}, ...]}
+One item per product, same numbering. Use reasonable values for common foods. If uncertain, use null for that field. No markdown.`;
+  const list = names.map((n, i) => `${i + 1}. ${JSON.stringify(n)}`).join("\n");
+  const content = await chatText({
+    messages: [
+      { role: "system", content: systemPrompt },
+      { role: "user", content: `Products:\n${list}` },
+    ],
+    temperature: 0.2,
+    maxTokens: 200 + names.length * 80,
+    context: "nutrition",
+  });
+  const out: Nutrition[] = names.map(() => ({ calories: null, protein: null, fat: null, carbs: null }));
+  if (!content?.trim()) return out;
+  const parsed = parseModelJson(content) as { items?: unknown } | unknown[] | null;
+  const items = Array.isArray(parsed) ? parsed : Array.isArray((parsed as { items?: unknown })?.items)
+    ? (parsed as { items: unknown[] }).items
+    : [];
+  items.forEach((raw, pos) => {
+    const item = raw as Record<string, unknown>;
+    const idx = toNum(item?.i);
+    const at = idx != null && idx >= 1 && idx <= names.length ? idx - 1 : pos;
+    if (at < out.length) out[at] = toNutrition(item);
+  });
+  return out;
+}
+
+async function handleBatch(req: Request, body: { productNames: unknown[]; minKcal?: unknown; maxKcal?: unknown }) {
+  const names = body.productNames.map((n) => (typeof n === "string" ? n.trim() : "")).filter(Boolean);
+  if (names.length === 0) return jsonResponse(req, { error: "productNames required" }, 400);
+  if (names.length > MAX_BATCH) return jsonResponse(req, { error: `productNames: max ${MAX_BATCH}` }, 400);
+  const minKcal = toNum(body.minKcal) ?? MIN_SANE_KCAL;
+  const maxKcal = Math.min(toNum(body.maxKcal) ?? MAX_SANE_KCAL, MAX_SANE_KCAL);
+
+  const supabase = cacheClient();
+  const keys = names.map(nameKey);
+  const cached = await readCache(supabase, [...new Set(keys)]);
+
+  // Промахи кэша (без повторов) — одним вызовом модели.
+  const missing: string[] = [];
+  const missingName = new Map<string, string>();
+  keys.forEach((k, i) => {
+    if (!cached.has(k) && !missingName.has(k)) {
+      missingName.set(k, names[i]);
+      missing.push(k);
+    }
+  });
+  const estimated = new Map<string, Nutrition>();
+  if (missing.length > 0) {
+    const values = await estimateBatch(missing.map((k) => missingName.get(k)!));
+    const toCache: Array<{ key: string; name: string; n: Nutrition }> = [];
+    missing.forEach((k, i) => {
+      estimated.set(k, values[i]);
+      if (isPlausible(values[i])) toCache.push({ key: k, name: missingName.get(k)!, n: values[i] });
+    });
+    await writeCache(supabase, toCache);
+  }
+
+  const results = names.map((name, i) => {
+    const fromCache = cached.has(keys[i]);
+    const n = fromCache ? cached.get(keys[i])! : estimated.get(keys[i])!;
+    let status = "ok";
+    if (!isPlausible(n)) status = "unknown";
+    else if (n.calories != null && (n.calories < minKcal || n.calories > maxKcal)) status = "out_of_range";
+    const value = status === "ok" ? n : { calories: null, protein: null, fat: null, carbs: null };
+    return { productName: name, ...value, status, cached: fromCache };
+  });
+  return jsonResponse(req, {
+    results,
+    cached: results.filter((r) => r.cached).length,
+    estimated: missing.length,
+    bounds: { minKcal, maxKcal },
+  });
+}
+
 Deno.serve(async (req: Request) => {
   if (req.method === "OPTIONS") {
     return new Response(null, { headers: corsHeaders(req.headers.get("Origin")) });
   }
   if (req.method !== "POST") {
-    return new Response(JSON.stringify({ error: "Method not allowed" }), {
-      status: 405,
-      headers: { ...corsHeaders(req.headers.get("Origin")), "Content-Type": "application/json" },
-    });
+    return jsonResponse(req, { error: "Method not allowed" }, 405);
   }
 
   const hasProvider = Deno.env.get("DEEPSEEK_API_KEY")?.trim() || Deno.env.get("GROQ_API_KEY")?.trim() || Deno.env.get("GEMINI_API_KEY")?.trim() || Deno.env.get("GIGACHAT_AUTH_KEY")?.trim() || Deno.env.get("OPENAI_API_KEY");
   if (!hasProvider) {
-    return new Response(JSON.stringify({ error: "DEEPSEEK_API_KEY, GROQ_API_KEY, GEMINI_API_KEY, GIGACHAT_AUTH_KEY or OPENAI_API_KEY required" }), {
-      status: 500,
-      headers: { ...corsHeaders(req.headers.get("Origin")), "Content-Type": "application/json" },
-    });
+    return jsonResponse(req, { error: "DEEPSEEK_API_KEY, GROQ_API_KEY, GEMINI_API_KEY, GIGACHAT_AUTH_KEY or OPENAI_API_KEY required" }, 500);
   }
 
   try {
-    const { productName, existing } = (await req.json()) as {
+    const body = (await req.json()) as {
       productName?: string;
+      productNames?: unknown[];
+      minKcal?: unknown;
+      maxKcal?: unknown;
       existing?: { calories?: number; protein?: number; fat?: number; carbs?: number };
     };
+    if (Array.isArray(body.productNames)) {
+      return await handleBatch(req, body as { productNames: unknown[]; minKcal?: unknown; maxKcal?: unknown });
+    }
+    const { productName, existing } = body;
     if (!productName || typeof productName !== "string") {
-      return new Response(JSON.stringify({ error: "productName required" }), {
-        status: 400,
-        headers: { ...corsHeaders(req.headers.get("Origin")), "Content-Type": "application/json" },
-      });
+      return jsonResponse(req, { error: "productName required" }, 400);
     }
 
+    // Без existing оценка зависит только от названия — её можно отдать из кэша.
+    const supabase = existing ? null : cacheClient();
+    const key = nameKey(productName);
+    const hit = (await readCache(supabase, [key])).get(key);
+    if (hit) return jsonResponse(req, hit);
+
     const systemPrompt = `You are a nutrition expert. For the given food product name, provide approximate nutrition per 100g. Output JSON only:
 - calories: number (kcal)
 - protein: number (grams)
@@ -62,10 +237,7 @@ Use reasonable values for common foods. If uncertain, use null for that field. N
     });
 
     if (!content?.trim()) {
-      return new Response(JSON.stringify({ calories: null, protein: null, fat: null, carbs: null }), {
-        status: 200,
-        headers: { ...corsHeaders(req.headers.get("Origin")), "Content-Type": "application/json" },
-      });
+      return jsonResponse(req, { calories: null, protein: null, fat: null, carbs: null });
     }
 
     const parsed = JSON.parse(content) as Record<string, unknown>;
@@ -74,13 +246,10 @@ Use reasonable values for common foods. If uncertain, use null for that field. N
     const fat = typeof parsed.fat === "number" ? parsed.fat : (parsed.fat != null ? Number(parsed.fat) : null);
     const carbs = typeof parsed.carbs === "number" ? parsed.carbs : (parsed.carbs != null ? Number(parsed.carbs) : null);
 
-    return new Response(JSON.stringify({ calories, protein, fat, carbs }), {
-      headers: { ...corsHeaders(req.headers.get("Origin")), "Content-Type": "application/json" },
-    });
+    const result = { calories, protein, fat, carbs };
+    if (isPlausible(toNutrition(result))) await writeCache(supabase, [{ key, name: productName.trim(), n: toNutrition(result) }]);
+    return jsonResponse(req, result);
   } catch (e) {
-    return new Response(JSON.stringify({ error: String(e) }), {
-      status: 500,
-      headers: { ...corsHeaders(req.headers.get("Origin")), "Content-Type": "application/json" },
-    });
+    return jsonResponse(req, { error: String(e) }, 500);
   }
 });
@@ -10,6 +10,8 @@ import {
 
 const DEEPL_URL = "https://api-free.deepl.com/v2/translate";
 const SUPPORTED_LANGS = ["ru", "en", "es", "kk", "tr", "vi"];
+/** Верхняя граница product_ids в одном batch-запросе (время выполнения Edge Function). */
+const MAX_BATCH_IDS = 200;
 
 function jsonResponse(req: Request, data: unknown, status = 200) {
   return new Response(JSON.stringify(data), {
@@ -146,28 +148,39 @@ Deno.serve(async (req: Request) => {
   }
 
   // Режим batch: переводим продукты постранично (limit/offset для обхода таймаута)
+  // или явным списком product_ids (клиент сам ведёт курсор по id и шлёт батчи параллельно).
   if (body.batch) {
     const batchBody = body as {
       batch: boolean;
       limit?: number;
       offset?: number;
+      product_ids?: string[];
       force_langs?: string[];
     };
     const limit = batchBody.limit ?? 50;
     const offset = batchBody.offset ?? 0;
     const forceLangs = new Set((batchBody.force_langs ?? []).map((l: string) => l.toLowerCase()));
+    const productIds = Array.isArray(batchBody.product_ids)
+      ? batchBody.product_ids.filter((id) => typeof id === "string" && id.trim())
+      : null;
+    if (productIds && productIds.length > MAX_BATCH_IDS) {
+      return jsonResponse(req, { error: `product_ids: max ${MAX_BATCH_IDS}` }, 400);
+    }
 
-    const { data: products, error } = await supabase
-      .from("products")
-      .select("id, name, names")
-      .order("name")
-      .range(offset, offset + limit - 1);
+    const { data: products, error } = productIds
+      ? await supabase.from("products").select("id, name, names").in("id", productIds).order("id")
+      : await supabase
+        .from("products")
+        .select("id, name, names")
+        .order("name")
+        .range(offset, offset + limit - 1);
 
     if (error) return jsonResponse(req, { error: error.message }, 500);
 
     let translated = 0;
     let skipped = 0;
     let failed = 0;
+    const failedIds: string[] = [];
 
     for (const product of (products ?? [])) {
       const names = (product.names ?? {}) as Record<string, string>;
@@ -204,6 +217,7 @@ Deno.serve(async (req: Request) => {
         if (updateError) {
           console.error("[auto-translate-product] Update error:", updateError.message);
           failed++;
+          failedIds.push(product.id as string);
         } else {
           translated++;
         }
@@ -217,6 +231,9 @@ Deno.serve(async (req: Request) => {
     }
 
     const batchSize = (products ?? []).length;
+    if (productIds) {
+      return jsonResponse(req, { translated, skipped, failed, failed_ids: failedIds, batch_size: batchSize, has_more: false }, 200);
+    }
     return jsonResponse(req, { translated, skipped, failed, batch_size: batchSize, offset, has_more: batchSize === limit }, 200);
   }
 
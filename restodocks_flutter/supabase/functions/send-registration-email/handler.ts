@@ -89,7 +89,7 @@ function extractTokenHashFromActionLink(actionLink: string): { token_hash: strin
 }
 
 /**
- * Смок/watchdog: адреса *@invalid.restodocks не вызывают Resend (см. scripts/watch_edge_status_spikes.sh).
+ * Смок/watchdog: адреса *@invalid.restodocks не вызывают Resend (см. scripts/edge_prober.py).
  * События смотрите в Supabase → Edge Functions → Logs, поиск по `send_registration_email_noop`.
  */
 function isResendNoopRecipient(raw: string): boolean {
@@ -183,7 +183,7 @@ export async function handleRequest(req: Request): Promise<Response> {
         JSON.stringify({
           event: "send_registration_email_noop",
           message:
-            "Resend skipped (test domain invalid.restodocks). See scripts/watch_edge_status_spikes.sh",
+            "Resend skipped (test domain invalid.restodocks). See scripts/edge_prober.py",
           type: type ?? null,
         }),
       );
@@ -0,0 +1,19 @@
+-- Кэш оценок КБЖУ Edge Function ai-refine-nutrition по названию продукта (на 100 г).
+-- Ключ — нормализованное название (нижний регистр, ё→е, схлопнутые пробелы). Пишутся только
+-- правдоподобные оценки без existing; пакетный режим отдаёт попадания без вызова модели.
+
+CREATE TABLE IF NOT EXISTS public.nutrition_ai_cache (
+  name_key text PRIMARY KEY,
+  product_name text NOT NULL,
+  calories numeric,
+  protein numeric,
+  fat numeric,
+  carbs numeric,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE public.nutrition_ai_cache IS 'Кэш AI-оценок КБЖУ по названию продукта (ai-refine-nutrition)';
+
+-- Читает и пишет только service role (Edge Function); политик нет.
+ALTER TABLE public.nutrition_ai_cache ENABLE ROW LEVEL SECURITY;
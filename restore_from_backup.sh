@@ -121,6 +121,19 @@ echo ""
 echo "💾 ШАГ 6: ВОССТАНОВЛЕНИЕ STORAGE"
 echo "==============================="
 
+# Новые бэкапы: storage_backup.tar.gz (storage_backup.py --stream), внутри <бакет>/<путь>.
+# Старые: готовая папка storage_backup/.
+STORAGE_ARCHIVE=$(find "$EXTRACTED_DIR" -maxdepth 1 -name "storage_backup.tar*" -type f | head -1)
+if [ -n "$STORAGE_ARCHIVE" ] && [ ! -d "$EXTRACTED_DIR/storage_backup" ]; then
+    echo "📦 Распаковка $(basename "$STORAGE_ARCHIVE")..."
+    mkdir -p "$EXTRACTED_DIR/storage_backup"
+    case "$STORAGE_ARCHIVE" in
+        *.tar.zst) zstd -dc "$STORAGE_ARCHIVE" | tar -xf - -C "$EXTRACTED_DIR/storage_backup" ;;
+        *.tar.gz|*.tgz) tar -xzf "$STORAGE_ARCHIVE" -C "$EXTRACTED_DIR/storage_backup" ;;
+        *) tar -xf "$STORAGE_ARCHIVE" -C "$EXTRACTED_DIR/storage_backup" ;;
+    esac || echo "   ⚠️ Ошибка распаковки $STORAGE_ARCHIVE"
+fi
+
 if [ -d "$EXTRACTED_DIR/storage_backup" ] && [ "$(ls -A "$EXTRACTED_DIR/storage_backup" 2>/dev/null)" ]; then
     echo "✅ ФАЙЛЫ STORAGE НАЙДЕНЫ!"
     echo ""
@@ -128,7 +141,8 @@ if [ -d "$EXTRACTED_DIR/storage_backup" ] && [ "$(ls -A "$EXTRACTED_DIR/storage_
     echo "1. Установите Supabase CLI: npm install -g @supabase/cli"
     echo "2. Авторизуйтесь: supabase login"
     echo "3. Загрузите файлы:"
-    echo "   supabase storage upload [bucket-name] ./$EXTRACTED_DIR/storage_backup/ --project-ref osglfptwbuqqmqunttha"
+    echo "   supabase storage upload [bucket-name] ./$EXTRACTED_DIR/storage_backup/[bucket-name]/ --project-ref osglfptwbuqqmqunttha"
+    echo "   Бакеты в бэкапе: $(ls "$EXTRACTED_DIR/storage_backup" | tr '\n' ' ')"
 else
     echo "⚠️ ФАЙЛЫ STORAGE НЕ НАЙДЕНЫ"
     echo "   Возможно, storage был пустой или не настроен"
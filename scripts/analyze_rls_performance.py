@@ -0,0 +1,860 @@
+#!/usr/bin/env python3
+"""
+Статический анализ RLS-политик на производительность и рекурсию.
+
+Проигрывает SQL по порядку в модель итогового состояния (таблицы/колонки, индексы,
+функции, политики — с учётом DROP/ALTER/CREATE OR REPLACE и DDL внутри DO $$ … $$):
+  1. supabase/beta_migration_part1.sql, supabase/beta_migration_part2_catalog.sql — базовая схема;
+  2. restodocks_flutter/supabase_indexes.sql — индексы исходной установки;
+  3. --with-root: корневые *.sql (supabase_rls_policies.sql, final_rls_setup.sql, fix_rls_recursion.sql …)
+     по имени, кроме диагностических и разрушительных (ROOT_SKIP: check_*, test_*, temp_*, emergency_*,
+     clean* …);
+  4. supabase/migrations/*.sql — по имени (порядок применения); --extra FILE — отдельные файлы в конце.
+
+Проверки итоговых политик:
+  per_row_call   — auth.uid()/auth.jwt()/current_setting()/пользовательская функция вне обёртки
+                   (select …): вычисляется на каждую строку, а не один раз как initPlan;
+  in_subquery    — то же внутри подзапроса IN/EXISTS (вычисляется на строку подзапроса);
+  no_index       — колонка таблицы политики (или таблицы подзапроса/функции) в условии
+                   без индекса, где она ведущая;
+  recursion      — цепочка политика → функция (SECURITY INVOKER) / подзапрос → таблица с RLS → …
+                   возвращается к исходной таблице (ошибка 42P17 «infinite recursion detected in policy»
+                   или дорогая вложенная проверка). SECURITY DEFINER-функции цепочку обрывают.
+
+Отчёт — политики по убыванию суммарного веса находок.
+
+Запуск из корня репозитория:
+  python3 scripts/analyze_rls_performance.py
+  python3 scripts/analyze_rls_performance.py --top 50 --table employees,establishments
+  python3 scripts/analyze_rls_performance.py --with-root --json-out /tmp/rls_report.json
+  python3 scripts/analyze_rls_performance.py --fail-on-recursion   # гейт для CI
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+BASE_SCHEMA = (
+    ROOT / "supabase" / "beta_migration_part1.sql",
+    ROOT / "supabase" / "beta_migration_part2_catalog.sql",
+)
+MIGRATIONS_DIR = ROOT / "supabase" / "migrations"
+# Индексы исходной установки (часть 4 supabase_setup) — есть в развёрнутой БД, но не в migrations/.
+BOOTSTRAP_INDEXES = ROOT / "restodocks_flutter" / "supabase_indexes.sql"
+# Корневые *.sql, которые в схему развёртывания не входят: диагностика, временные и разрушительные.
+ROOT_SKIP = (
+    "check_*", "debug_*", "test_*", "simple_test.sql", "temp_*", "emergency_*", "clean*", "delete_*",
+    "reset_*", "restore_*", "*diagnostic*", "final_deployment_check.sql", "create_auth_user_*", "migrate_*_data_*",
+)
+
+# Встроенные функции, которые дёшевы и от пользователя не зависят — не считаются находками.
+CHEAP_BUILTINS = {
+    "lower", "upper", "coalesce", "nullif", "greatest", "least", "trim", "btrim", "length", "now",
+    "array", "any", "all", "exists", "in", "not", "and", "or", "cast", "row", "values", "select",
+    "jsonb_build_object", "to_jsonb", "array_agg", "count", "sum", "min", "max", "date_trunc",
+    "gen_random_uuid", "split_part", "position", "char_length", "concat", "abs", "round",
+}
+AUTH_FUNCS = {"auth.uid", "auth.jwt", "auth.role", "auth.email", "current_setting"}
+
+W_PER_ROW_AUTH = 3
+W_PER_ROW_FUNC = 5
+W_PLPGSQL = 2
+W_VOLATILE = 2
+W_IN_SUBQUERY = 1
+W_NO_INDEX = 4
+W_NO_INDEX_SUBQUERY = 3
+W_RECURSION = 10
+
+IDENT = r'(?:"(?:[^"]|"")+"|[A-Za-z_][\w$]*)'
+QNAME = rf"{IDENT}(?:\s*\.\s*{IDENT})?"
+
+
+def norm(name: str) -> str:
+    """public."Foo" → foo; auth.uid → auth.uid."""
+    parts = [p.strip().strip('"').lower() for p in re.split(r"\s*\.\s*", name.strip())]
+    if len(parts) == 2 and parts[0] == "public":
+        return parts[1]
+    return ".".join(parts)
+
+
+# --- лексика ----------------------------------------------------------------
+
+
+def split_statements(sql: str) -> Iterator[tuple[str, int]]:
+    """Операторы верхнего уровня (без комментариев) + номер строки начала.
+    Учитывает '…', "…", $tag$…$tag$, -- и /* */ (вложенные)."""
+    out: list[str] = []
+    i, n = 0, len(sql)
+    line = 1
+    start_line = 1
+    started = False
+    while i < n:
+        c = sql[i]
+        if not started and not c.isspace():
+            start_line, started = line, True
+        if c == "-" and sql.startswith("--", i):
+            j = sql.find("\n", i)
+            i = n if j < 0 else j
+            continue
+        if c == "/" and sql.startswith("/*", i):
+            depth, j = 1, i + 2
+            while j < n and depth:
+                if sql.startswith("/*", j):
+                    depth, j = depth + 1, j + 2
+                elif sql.startswith("*/", j):
+                    depth, j = depth - 1, j + 2
+                else:
+                    j += 1
+            line += sql.count("\n", i, j)
+            out.append(" ")
+            i = j
+            continue
+        if c in ("'", '"'):
+            j = i + 1
+            while j < n:
+                if sql[j] == c:
+                    if j + 1 < n and sql[j + 1] == c:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            out.append(sql[i:j + 1])
+            line += sql.count("\n", i, j + 1)
+            i = j + 1
+            continue
+        if c == "$":
+            m = re.match(r"\$([A-Za-z_]\w*)?\$", sql[i:])
+            if m:
+                tag = m.group(0)
+                j = sql.find(tag, i + len(tag))
+                j = n if j < 0 else j + len(tag)
+                out.append(sql[i:j])
+                line += sql.count("\n", i, j)
+                i = j
+                continue
+        if c == ";":
+            stmt = "".join(out).strip()
+            if stmt:
+                yield stmt, start_line
+            out, started = [], False
+            i += 1
+            continue
+        if c == "\n":
+            line += 1
+        out.append(c)
+        i += 1
+    stmt = "".join(out).strip()
+    if stmt:
+        yield stmt, start_line
+
+
+def strip_comments(s: str) -> str:
+    return "".join(stmt + ";\n" for stmt, _ in split_statements(s))
+
+
+def matching_paren(s: str, i: int) -> int:
+    """s[i] == '(' → индекс парной ')' (или len(s))."""
+    depth = 0
+    j = i
+    while j < len(s):
+        c = s[j]
+        if c in ("'", '"'):
+            k = s.find(c, j + 1)
+            j = len(s) if k < 0 else k + 1
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                return j
+        j += 1
+    return len(s)
+
+
+def split_top_level(s: str, sep: str = ",") -> list[str]:
+    parts, depth, cur, j = [], 0, [], 0
+    while j < len(s):
+        c = s[j]
+        if c in ("'", '"'):
+            k = s.find(c, j + 1)
+            k = len(s) - 1 if k < 0 else k
+            cur.append(s[j:k + 1])
+            j = k + 1
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        if c == sep and depth == 0:
+            parts.append("".join(cur).strip())
+            cur = []
+        else:
+            cur.append(c)
+        j += 1
+    if "".join(cur).strip():
+        parts.append("".join(cur).strip())
+    return parts
+
+
+def _paren_after(s: str, pattern: str) -> Optional[str]:
+    m = re.search(pattern, s, re.I)
+    if not m:
+        return None
+    start = m.end() - 1
+    return s[start + 1:matching_paren(s, start)].strip()
+
+
+# --- модель -----------------------------------------------------------------
+
+
+@dataclass
+class Policy:
+    name: str
+    table: str
+    cmd: str
+    roles: str
+    using: Optional[str]
+    check: Optional[str]
+    source: str
+
+
+@dataclass
+class Function:
+    name: str
+    language: str
+    security_definer: bool
+    volatility: str
+    body: str
+    source: str
+
+
+@dataclass
+class Index:
+    name: str
+    table: str
+    columns: list[str]
+    unique: bool
+    partial: bool
+    source: str
+
+
+@dataclass
+class Table:
+    name: str
+    columns: set[str] = field(default_factory=set)
+    rls: bool = False
+
+
+class Model:
+    def __init__(self) -> None:
+        self.tables: dict[str, Table] = {}
+        self.policies: dict[tuple[str, str], Policy] = {}
+        self.functions: dict[str, Function] = {}
+        self.indexes: dict[str, Index] = {}
+        self.applied = 0
+        self.dynamic: list[str] = []
+
+    def table(self, name: str) -> Table:
+        name = norm(name)
+        t = self.tables.get(name)
+        if t is None:
+            t = self.tables[name] = Table(name)
+        return t
+
+    def indexes_on(self, table: str) -> list[Index]:
+        return [ix for ix in self.indexes.values() if ix.table == table]
+
+    # --- применение оператора ----------------------------------------------
+
+    _DDL_START = re.compile(
+        r"\b(create\s+(?:or\s+replace\s+)?(?:policy|function|(?:unique\s+)?index|table)"
+        r"|drop\s+(?:policy|index|table|function)|alter\s+(?:table|policy))\b",
+        re.I,
+    )
+
+    def apply(self, stmt: str, source: str, in_do: bool = False) -> None:
+        head = stmt.lstrip()[:40].lower()
+        if head.startswith("do ") or head.startswith("do$"):
+            m = re.search(r"(\$[A-Za-z_]*\$)(.*)\1", stmt, re.S)
+            if m:
+                for inner, _ in split_statements(m.group(2)):
+                    self.apply(inner, source, in_do=True)
+            return
+        if re.search(r"\bexecute\s+(format\s*\(|')", stmt, re.I) and in_do:
+            self.dynamic.append(source)
+        m = self._DDL_START.search(stmt) if in_do else None
+        if in_do:
+            if not m:
+                return
+            stmt = stmt[m.start():]
+            # «… END IF» после DDL внутри DO не нужен
+            stmt = re.split(r"\bend\s+if\b|\belse\b|\belsif\b", stmt, flags=re.I)[0]
+        low = stmt.lower()
+        handlers = (
+            (r"^\s*create\s+policy\b", self._create_policy),
+            (r"^\s*drop\s+policy\b", self._drop_policy),
+            (r"^\s*alter\s+policy\b", self._alter_policy),
+            (r"^\s*create\s+(or\s+replace\s+)?function\b", self._create_function),
+            (r"^\s*drop\s+function\b", self._drop_function),
+            (r"^\s*create\s+(unique\s+)?index\b", self._create_index),
+            (r"^\s*drop\s+index\b", self._drop_index),
+            (r"^\s*create\s+(unlogged\s+)?table\b", self._create_table),
+            (r"^\s*alter\s+table\b", self._alter_table),
+            (r"^\s*drop\s+table\b", self._drop_table),
+        )
+        for pattern, handler in handlers:
+            if re.match(pattern, low):
+                handler(stmt, source)
+                self.applied += 1
+                return
+
+    def _create_policy(self, stmt: str, source: str) -> None:
+        m = re.match(rf"\s*create\s+policy\s+({IDENT})\s+on\s+({QNAME})(.*)$", stmt, re.I | re.S)
+        if not m:
+            return
+        name, table, rest = m.group(1).strip('"'), norm(m.group(2)), m.group(3)
+        cmd = re.search(r"\bfor\s+(all|select|insert|update|delete)\b", rest, re.I)
+        roles = re.search(r"\bto\s+(.+?)(?=\busing\b|\bwith\s+check\b|$)", rest, re.I | re.S)
+        self.policies[(table, name)] = Policy(
+            name=name,
+            table=table,
+            cmd=(cmd.group(1).upper() if cmd else "ALL"),
+            roles=(roles.group(1).strip() if roles else "public"),
+            using=_paren_after(rest, r"\busing\s*\("),
+            check=_paren_after(rest, r"\bwith\s+check\s*\("),
+            source=source,
+        )
+
+    def _drop_policy(self, stmt: str, source: str) -> None:
+        m = re.match(rf"\s*drop\s+policy\s+(?:if\s+exists\s+)?({IDENT})\s+on\s+({QNAME})", stmt, re.I)
+        if m:
+            self.policies.pop((norm(m.group(2)), m.group(1).strip('"')), None)
+
+    def _alter_policy(self, stmt: str, source: str) -> None:
+        m = re.match(rf"\s*alter\s+policy\s+({IDENT})\s+on\s+({QNAME})(.*)$", stmt, re.I | re.S)
+        if not m:
+            return
+        key = (norm(m.group(2)), m.group(1).strip('"'))
+        p = self.policies.get(key)
+        if p is None:
+            return
+        rest = m.group(3)
+        rn = re.search(rf"\brename\s+to\s+({IDENT})", rest, re.I)
+        if rn:
+            self.policies.pop(key)
+            p.name = rn.group(1).strip('"')
+            self.policies[(p.table, p.name)] = p
+            return
+        using = _paren_after(rest, r"\busing\s*\(")
+        check = _paren_after(rest, r"\bwith\s+check\s*\(")
+        if using is not None:
+            p.using = using
+        if check is not None:
+            p.check = check
+        p.source = source
+
+    def _create_function(self, stmt: str, source: str) -> None:
+        m = re.match(rf"\s*create\s+(?:or\s+replace\s+)?function\s+({QNAME})\s*\(", stmt, re.I)
+        if not m:
+            return
+        name = norm(m.group(1))
+        args_end = matching_paren(stmt, m.end() - 1)
+        rest = stmt[args_end + 1:]
+        body_m = re.search(r"(\$[A-Za-z_]*\$)(.*?)\1", rest, re.S)
+        if body_m:
+            body = body_m.group(2)
+            attrs = rest[:body_m.start()] + rest[body_m.end():]
+        else:
+            q = re.search(r"\bas\s+'((?:[^']|'')*)'", rest, re.I | re.S)
+            body = q.group(1).replace("''", "'") if q else ""
+            attrs = rest
+        lang = re.search(r"\blanguage\s+'?(\w+)", attrs, re.I)
+        vol = re.search(r"\b(immutable|stable|volatile)\b", attrs, re.I)
+        self.functions[name] = Function(
+            name=name,
+            language=(lang.group(1).lower() if lang else "sql"),
+            security_definer=bool(re.search(r"\bsecurity\s+definer\b", attrs, re.I)),
+            volatility=(vol.group(1).lower() if vol else "volatile"),
+            body=strip_comments(body),
+            source=source,
+        )
+
+    def _drop_function(self, stmt: str, source: str) -> None:
+        m = re.match(r"\s*drop\s+function\s+(?:if\s+exists\s+)?(.*)$", stmt, re.I | re.S)
+        if not m:
+            return
+        for part in split_top_level(re.sub(r"\b(cascade|restrict)\s*$", "", m.group(1), flags=re.I)):
+            nm = re.match(rf"\s*({QNAME})", part)
+            if nm:
+                self.functions.pop(norm(nm.group(1)), None)
+
+    def _create_index(self, stmt: str, source: str) -> None:
+        m = re.match(
+            rf"\s*create\s+(unique\s+)?index\s+(?:concurrently\s+)?(?:if\s+not\s+exists\s+)?({QNAME})?\s*"
+            rf"on\s+(?:only\s+)?({QNAME})\s*(?:using\s+(\w+)\s*)?\(",
+            stmt,
+            re.I,
+        )
+        if not m:
+            return
+        table = norm(m.group(3))
+        end = matching_paren(stmt, m.end() - 1)
+        cols = [_index_column(c) for c in split_top_level(stmt[m.end():end])]
+        name = norm(m.group(2)) if m.group(2) else f"{table}_{'_'.join(cols)}_idx"
+        self.indexes[name] = Index(
+            name=name,
+            table=table,
+            columns=cols,
+            unique=bool(m.group(1)),
+            partial=bool(re.search(r"\bwhere\b", stmt[end:], re.I)),
+            source=source,
+        )
+
+    def _drop_index(self, stmt: str, source: str) -> None:
+        m = re.match(r"\s*drop\s+index\s+(?:concurrently\s+)?(?:if\s+exists\s+)?(.*)$", stmt, re.I | re.S)
+        if m:
+            for part in split_top_level(re.sub(r"\b(cascade|restrict)\s*$", "", m.group(1), flags=re.I)):
+                self.indexes.pop(norm(part), None)
+
+    def _implicit_index(self, table: str, cols: list[str], kind: str, source: str) -> None:
+        name = f"{table}_pkey" if kind == "pkey" else f"{table}_{'_'.join(cols)}_key"
+        self.indexes[name] = Index(name, table, cols, True, False, source)
+
+    def _column_def(self, t: Table, item: str, source: str) -> None:
+        low = item.lower()
+        cm = re.match(r"\s*(?:constraint\s+\S+\s+)?(primary\s+key|unique)\s*(?:nulls\s+not\s+distinct\s*)?\(", low)
+        if cm:
+            start = item.index("(", cm.start(1))
+            cols = [norm(c) for c in split_top_level(item[start + 1:matching_paren(item, start)])]
+            self._implicit_index(t.name, cols, "pkey" if "primary" in cm.group(1) else "key", source)
+            return
+        if re.match(r"\s*(constraint|foreign\s+key|check|exclude|like)\b", low):
+            return
+        nm = re.match(rf"\s*({IDENT})\s+\S", item)
+        if not nm:
+            return
+        col = norm(nm.group(1))
+        t.columns.add(col)
+        if re.search(r"\bprimary\s+key\b", low):
+            self._implicit_index(t.name, [col], "pkey", source)
+        elif re.search(r"\bunique\b", low):
+            self._implicit_index(t.name, [col], "key", source)
+
+    def _create_table(self, stmt: str, source: str) -> None:
+        m = re.match(rf"\s*create\s+(?:unlogged\s+)?table\s+(?:if\s+not\s+exists\s+)?({QNAME})\s*\(", stmt, re.I)
+        if not m:
+            return
+        t = self.table(m.group(1))
+        end = matching_paren(stmt, m.end() - 1)
+        for item in split_top_level(stmt[m.end():end]):
+            self._column_def(t, item, source)
+
+    def _alter_table(self, stmt: str, source: str) -> None:
+        m = re.match(rf"\s*alter\s+table\s+(?:if\s+exists\s+)?(?:only\s+)?({QNAME})\s+(.*)$", stmt, re.I | re.S)
+        if not m:
+            return
+        t = self.table(m.group(1))
+        for action in split_top_level(m.group(2)):
+            low = action.lower()
+            if re.match(r"enable\s+row\s+level\s+security", low):
+                t.rls = True
+            elif re.match(r"disable\s+row\s+level\s+security", low):
+                t.rls = False
+            elif re.match(r"add\s+(constraint\s+\S+\s+)?(primary\s+key|unique)\b", low):
+                self._column_def(t, action[3:], source)
+            elif low.startswith("add"):
+                col = re.sub(r"^add\s+(column\s+)?(if\s+not\s+exists\s+)?", "", action, flags=re.I)
+                self._column_def(t, col, source)
+            elif low.startswith("drop column"):
+                nm = re.match(rf"drop\s+column\s+(?:if\s+exists\s+)?({IDENT})", action, re.I)
+                if nm:
+                    t.columns.discard(norm(nm.group(1)))
+            elif low.startswith("rename column"):
+                nm = re.match(rf"rename\s+column\s+({IDENT})\s+to\s+({IDENT})", action, re.I)
+                if nm:
+                    t.columns.discard(norm(nm.group(1)))
+                    t.columns.add(norm(nm.group(2)))
+
+    def _drop_table(self, stmt: str, source: str) -> None:
+        m = re.match(r"\s*drop\s+table\s+(?:if\s+exists\s+)?(.*)$", stmt, re.I | re.S)
+        if not m:
+            return
+        for part in split_top_level(re.sub(r"\b(cascade|restrict)\s*$", "", m.group(1), flags=re.I)):
+            name = norm(part)
+            self.tables.pop(name, None)
+            for key in [k for k in self.policies if k[0] == name]:
+                self.policies.pop(key)
+            for key in [k for k, ix in self.indexes.items() if ix.table == name]:
+                self.indexes.pop(key)
+
+
+def _index_column(expr: str) -> str:
+    """Колонка индекса без ASC/DESC/opclass; выражения — как есть (lower(email))."""
+    expr = expr.strip()
+    m = re.match(rf"({IDENT})(?:\s+\w+)*$", expr)
+    return norm(m.group(1)) if m else re.sub(r"\s+", "", expr.lower())
+
+
+def load_model(files: list[Path]) -> Model:
+    model = Model()
+    for path in files:
+        try:
+            sql = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"skip {path}: {e}", file=sys.stderr)
+            continue
+        rel = path.relative_to(ROOT) if path.is_relative_to(ROOT) else path
+        for stmt, line in split_statements(sql):
+            model.apply(stmt, f"{rel}:{line}")
+    return model
+
+
+# --- анализ выражений -------------------------------------------------------
+
+
+CALL_RE = re.compile(rf"({QNAME})\s*\(")
+FROM_RE = re.compile(rf"\b(?:from|join)\s+({QNAME})(?:\s+(?:as\s+)?(?!where\b|on\b|join\b|inner\b|left\b|union\b|group\b|order\b|limit\b)({IDENT}))?", re.I)
+
+
+@dataclass
+class Call:
+    name: str
+    pos: int
+    context: str  # initplan | subquery | per_row
+    args: str
+
+
+def _select_parens(expr: str) -> list[tuple[int, int]]:
+    """Интервалы (open, close) скобок, содержимое которых начинается с SELECT."""
+    out = []
+    for m in re.finditer(r"\(\s*select\b", expr, re.I):
+        out.append((m.start(), matching_paren(expr, m.start())))
+    return out
+
+
+def find_calls(expr: str) -> list[Call]:
+    selects = _select_parens(expr)
+    calls = []
+    for m in CALL_RE.finditer(expr):
+        name = norm(m.group(1))
+        if name in CHEAP_BUILTINS or name.split(".")[-1] in CHEAP_BUILTINS:
+            continue
+        open_ = m.end() - 1
+        close = matching_paren(expr, open_)
+        enclosing = [(a, b) for a, b in selects if a < m.start() and b > close]
+        context = "per_row"
+        if enclosing:
+            a, b = max(enclosing)  # самая внутренняя
+            inner = re.sub(r"^\(\s*select\s+", "", expr[a:b], flags=re.I).strip()
+            inner = re.sub(rf"\s+(?:as\s+)?{IDENT}$", "", inner)
+            context = "initplan" if inner == expr[m.start():close + 1].strip() else "subquery"
+        calls.append(Call(name, m.start(), context, expr[open_ + 1:close]))
+    return calls
+
+
+def compared_columns(expr: str, columns: set[str], qualifiers: set[str]) -> set[str]:
+    """Колонки из `columns`, участвующие в сравнении: col = …, … = col, col IN (…), col = ANY(…)."""
+    found = set()
+    q = "|".join(re.escape(x) for x in qualifiers) if qualifiers else None
+    prefix = rf"(?:(?:{q})\s*\.\s*)" if q else ""
+    for m in re.finditer(rf"(?<![\w.]){prefix}{'?' if q else ''}({IDENT})", expr, re.I):
+        col = norm(m.group(1))
+        if col not in columns:
+            continue
+        before = expr[:m.start()].rstrip()[-2:]
+        after = expr[m.end():m.end() + 12].lstrip().lower()
+        if before.endswith("=") or re.match(r"(=|in\b|<>|!=|is\s+not\s+distinct)", after):
+            found.add(col)
+    return found
+
+
+def _top_level(expr: str) -> str:
+    """Выражение без подзапросов (SELECT …) — только условия по строкам самой таблицы."""
+    out, last = [], 0
+    for a, b in sorted(_select_parens(expr)):
+        if a < last:
+            continue
+        out.append(expr[last:a])
+        out.append("(…)")
+        last = b + 1
+    out.append(expr[last:])
+    return "".join(out)
+
+
+def has_leading_index(model: Model, table: str, col: str) -> bool:
+    return any(ix.columns and ix.columns[0] == col for ix in model.indexes_on(table))
+
+
+def subquery_index_gaps(model: Model, sql: str) -> list[tuple[str, str]]:
+    """(таблица, колонка) для условий в подзапросах/телах функций без ведущего индекса."""
+    gaps = []
+    for m in FROM_RE.finditer(sql):
+        table = norm(m.group(1))
+        t = model.tables.get(table)
+        if t is None or not t.columns:
+            continue
+        alias = m.group(2)
+        quals = {table.split(".")[-1]} | ({alias.strip('"').lower()} if alias else set())
+        # Условия этого SELECT — от FROM до конца ближайшего закрывающего уровня.
+        seg = sql[m.end():]
+        depth = 0
+        for k, c in enumerate(seg):
+            if c == "(":
+                depth += 1
+            elif c == ")":
+                depth -= 1
+                if depth < 0:
+                    seg = seg[:k]
+                    break
+        for col in compared_columns(seg, t.columns, quals):
+            if not has_leading_index(model, table, col):
+                gaps.append((table, col))
+    return gaps
+
+
+def referenced_tables(sql: str) -> set[str]:
+    return {norm(m.group(1)) for m in FROM_RE.finditer(sql)}
+
+
+# --- находки ----------------------------------------------------------------
+
+
+@dataclass
+class Finding:
+    kind: str
+    weight: int
+    message: str
+
+
+def analyze_policy(model: Model, p: Policy, graph: dict[str, set[str]]) -> list[Finding]:
+    findings: list[Finding] = []
+    t = model.tables.get(p.table) or Table(p.table)
+    seen_gaps: set[tuple[str, str]] = set()
+    for clause, expr in (("USING", p.using), ("WITH CHECK", p.check)):
+        if not expr or expr.strip().lower() in ("true", "false"):
+            continue
+        for call in find_calls(expr):
+            fn = model.functions.get(call.name)
+            is_auth = call.name in AUTH_FUNCS
+            if not is_auth and fn is None:
+                continue
+            if call.context == "initplan":
+                continue
+            if call.context == "subquery":
+                findings.append(Finding("in_subquery", W_IN_SUBQUERY,
+                                        f"{clause}: {call.name}() внутри подзапроса — на каждую строку подзапроса"))
+                continue
+            row_args = compared_columns(f"{call.args} =", t.columns, {p.table}) or (
+                {c for c in t.columns if re.search(rf"\b{re.escape(c)}\b", call.args)}
+            )
+            if is_auth:
+                findings.append(Finding("per_row_call", W_PER_ROW_AUTH,
+                                        f"{clause}: {call.name}() без (select {call.name}()) — вычисляется на каждую строку"))
+                continue
+            w = W_PER_ROW_FUNC
+            notes = []
+            if fn.language == "plpgsql":
+                w += W_PLPGSQL
+                notes.append("plpgsql")
+            if fn.volatility == "volatile":
+                w += W_VOLATILE
+                notes.append("VOLATILE")
+            hint = (
+                f"зависит от колонок строки ({', '.join(sorted(row_args))}) — лучше col IN (select …)"
+                if row_args else f"оберните: (select {call.name}(…))"
+            )
+            findings.append(Finding("per_row_call", w,
+                                    f"{clause}: {call.name}() на каждую строку [{', '.join(notes) or fn.volatility}]; {hint}"))
+        # Колонки самой таблицы в условиях
+        for col in sorted(compared_columns(_top_level(expr), t.columns, {p.table})):
+            if col in ("id",) and has_leading_index(model, p.table, col):
+                continue
+            if not has_leading_index(model, p.table, col) and (p.table, col) not in seen_gaps:
+                seen_gaps.add((p.table, col))
+                w = W_NO_INDEX if p.cmd in ("SELECT", "ALL", "UPDATE", "DELETE") else W_NO_INDEX // 2
+                findings.append(Finding("no_index", w, f"{clause}: {p.table}.{col} в условии без индекса"))
+        # Подзапросы и тела вызываемых функций
+        bodies = [expr] + [
+            model.functions[c.name].body for c in find_calls(expr)
+            if c.name in model.functions and model.functions[c.name].language == "sql"
+        ]
+        for body in bodies:
+            for table, col in subquery_index_gaps(model, body):
+                if (table, col) in seen_gaps:
+                    continue
+                seen_gaps.add((table, col))
+                findings.append(Finding("no_index", W_NO_INDEX_SUBQUERY,
+                                        f"{clause}: подзапрос/функция фильтрует {table}.{col} без индекса"))
+    for cycle in find_cycles(graph, model, p):
+        findings.append(Finding("recursion", W_RECURSION, "рекурсия: " + " → ".join(cycle)))
+    # Повторы одного вызова в выражении (auth.uid() дважды) — одна находка «×N», вес один раз.
+    merged: dict[tuple[str, str], list] = {}
+    for f in findings:
+        merged.setdefault((f.kind, f.message), [f, 0])[1] += 1
+    return [
+        Finding(f.kind, f.weight, f.message + (f" (×{n})" if n > 1 else ""))
+        for f, n in merged.values()
+    ]
+
+
+def build_graph(model: Model) -> dict[str, set[str]]:
+    """Узлы table:X и func:Y. Рёбра: политика таблицы → вызываемые функции и таблицы подзапросов;
+    INVOKER-функция → таблицы и функции тела. DEFINER-функции и таблицы без RLS — тупики."""
+    graph: dict[str, set[str]] = {}
+    for p in model.policies.values():
+        node = f"table:{p.table}"
+        for expr in (p.using, p.check):
+            if expr:
+                graph.setdefault(node, set()).update(_edges(model, expr))
+    for f in model.functions.values():
+        if f.security_definer:
+            continue
+        graph.setdefault(f"func:{f.name}", set()).update(_edges(model, f.body))
+    return graph
+
+
+def _edges(model: Model, sql: str) -> set[str]:
+    out = {f"table:{t}" for t in referenced_tables(sql)}
+    out |= {f"func:{c.name}" for c in find_calls(sql) if c.name in model.functions}
+    return out
+
+
+def find_cycles(graph: dict[str, set[str]], model: Model, p: Policy) -> list[list[str]]:
+    """Пути от политики обратно к её таблице (через таблицы с включённым RLS)."""
+    start = f"table:{p.table}"
+    first = set()
+    for expr in (p.using, p.check):
+        if expr:
+            first |= _edges(model, expr)
+    cycles: list[list[str]] = []
+    seen_paths: set[tuple[str, ...]] = set()
+
+    def active(node: str) -> bool:
+        if node.startswith("func:"):
+            return True
+        t = model.tables.get(node[6:])
+        return bool(t and t.rls)
+
+    stack = [(n, [start, n]) for n in sorted(first)]
+    while stack and len(cycles) < 3:
+        node, path = stack.pop()
+        if node == start:
+            key = tuple(path)
+            if key not in seen_paths:
+                seen_paths.add(key)
+                cycles.append([x.split(":", 1)[1] + ("()" if x.startswith("func:") else "") for x in path])
+            continue
+        if not active(node) or len(path) > 6:
+            continue
+        for nxt in sorted(graph.get(node, ())):
+            if nxt == start or nxt not in path:
+                stack.append((nxt, path + [nxt]))
+    return cycles
+
+
+def root_skipped(path: Path, patterns: tuple[str, ...] = ROOT_SKIP) -> bool:
+    return any(fnmatch.fnmatch(path.name, p) for p in patterns)
+
+
+def deploy_files(with_root: bool) -> list[Path]:
+    """Порядок развёртывания: базовая схема → бутстрап-индексы → корневые *.sql без ROOT_SKIP → миграции."""
+    files = [p for p in BASE_SCHEMA if p.is_file()]
+    if BOOTSTRAP_INDEXES.is_file():
+        files.append(BOOTSTRAP_INDEXES)
+    if with_root:
+        files += [p for p in sorted(ROOT.glob("*.sql")) if not root_skipped(p)]
+    return files + sorted(MIGRATIONS_DIR.glob("*.sql"))
+
+
+def collect_files(with_root: bool, extra: list[Path]) -> list[Path]:
+    return deploy_files(with_root) + extra
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Статический анализ RLS-политик: per-row вызовы, индексы, рекурсия")
+    ap.add_argument("--with-root", action="store_true", help="Учитывать корневые *.sql (без ROOT_SKIP, до миграций)")
+    ap.add_argument("--extra", type=Path, action="append", default=[], help="Дополнительный SQL-файл (можно повторять)")
+    ap.add_argument("--table", default=None, help="Только эти таблицы (через запятую)")
+    ap.add_argument("--top", type=int, default=30, help="Сколько политик показать")
+    ap.add_argument("--min-score", type=int, default=1, help="Не показывать политики с весом ниже")
+    ap.add_argument("--json-out", type=Path, default=None, help="Полный отчёт в JSON")
+    ap.add_argument("--fail-on-recursion", action="store_true", help="Код выхода 1, если найдена рекурсия")
+    args = ap.parse_args()
+
+    files = collect_files(args.with_root, args.extra)
+    model = load_model(files)
+    graph = build_graph(model)
+    only = {norm(t) for t in args.table.split(",")} if args.table else None
+
+    ranked = []
+    for p in model.policies.values():
+        if only and p.table not in only:
+            continue
+        findings = analyze_policy(model, p, graph)
+        score = sum(f.weight for f in findings)
+        if score >= args.min_score:
+            ranked.append((score, p, findings))
+    ranked.sort(key=lambda x: (-x[0], x[1].table, x[1].name))
+
+    kinds: dict[str, int] = {}
+    for _, _, fs in ranked:
+        for f in fs:
+            kinds[f.kind] = kinds.get(f.kind, 0) + 1
+    rls_tables = sum(1 for t in model.tables.values() if t.rls)
+    print(
+        f"Файлов: {len(files)}, операторов DDL: {model.applied}; таблиц: {len(model.tables)} (RLS: {rls_tables}), "
+        f"политик: {len(model.policies)}, функций: {len(model.functions)}, индексов: {len(model.indexes)}"
+    )
+    if model.dynamic:
+        print(f"  EXECUTE в DO-блоках не моделируется: {len(model.dynamic)} мест (напр. {model.dynamic[0]})")
+    print(f"Политик с находками: {len(ranked)}; " + ", ".join(f"{k}={v}" for k, v in sorted(kinds.items())))
+    print()
+    for score, p, fs in ranked[: args.top]:
+        print(f"[{score:3d}] {p.table}.{p.name} ({p.cmd} TO {p.roles})  {p.source}")
+        for f in sorted(fs, key=lambda f: -f.weight):
+            print(f"        {f.kind:12} +{f.weight:<2} {f.message}")
+
+    if args.json_out:
+        report = {
+            "files": [str(f.relative_to(ROOT)) if f.is_relative_to(ROOT) else str(f) for f in files],
+            "summary": {
+                "tables": len(model.tables),
+                "rls_tables": rls_tables,
+                "policies": len(model.policies),
+                "functions": len(model.functions),
+                "indexes": len(model.indexes),
+                "findings": kinds,
+            },
+            "policies": [
+                {
+                    "score": score,
+                    "table": p.table,
+                    "name": p.name,
+                    "cmd": p.cmd,
+                    "roles": p.roles,
+                    "source": p.source,
+                    "using": p.using,
+                    "with_check": p.check,
+                    "findings": [f.__dict__ for f in fs],
+                }
+                for score, p, fs in ranked
+            ],
+        }
+        args.json_out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nJSON: {args.json_out}")
+    if args.fail_on_recursion and kinds.get("recursion"):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,7 +2,8 @@
 # -*- coding: utf-8 -*-
 """
 Применить ручной КБЖУ из CSV в БД.
-Файл: scripts/products_without_kbju.csv (создаётся export_products_without_kbju.py)
+Файл: scripts/products_without_kbju.csv (создаётся export_products_without_kbju.py; $PRODUCTS_KBJU_CSV —
+другой путь, против локальной подмены — во временном каталоге)
 
 Использование:
   export SUPABASE_SERVICE_KEY='ключ'
@@ -15,12 +16,18 @@ import json
 import urllib.error
 import os
 import sys
+import tempfile
+import urllib.parse
 import urllib.request
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-INPUT_CSV = os.path.join(SCRIPT_DIR, "products_without_kbju.csv")
 
-SUPABASE_URL = "https://osglfptwbuqqmqunttha.supabase.co"
+# SUPABASE_URL=http://127.0.0.1:54329 — локальная подмена (scripts/supabase_standin.py)
+SUPABASE_URL = os.environ.get("SUPABASE_URL", "https://osglfptwbuqqmqunttha.supabase.co").rstrip("/")
+# Против локальной подмены CSV читается из временного каталога (туда его пишет экспорт).
+_LOCAL_STANDIN = urllib.parse.urlsplit(SUPABASE_URL).hostname in ("127.0.0.1", "localhost")
+INPUT_CSV = os.environ.get("PRODUCTS_KBJU_CSV") or os.path.join(
+    tempfile.gettempdir() if _LOCAL_STANDIN else SCRIPT_DIR, "products_without_kbju.csv")
 SERVICE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 if not SERVICE_KEY:
     print("Задайте SUPABASE_SERVICE_KEY")
@@ -22,7 +22,8 @@ from typing import Any, Optional
 import urllib.error
 import urllib.request
 
-SUPABASE_URL = "https://osglfptwbuqqmqunttha.supabase.co"
+# SUPABASE_URL=http://127.0.0.1:54329 — локальная подмена (scripts/supabase_standin.py)
+SUPABASE_URL = os.environ.get("SUPABASE_URL", "https://osglfptwbuqqmqunttha.supabase.co").rstrip("/")
 SERVICE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 if not SERVICE_KEY:
     print("Задайте SUPABASE_SERVICE_KEY")
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Реплей корпуса ТТК-файлов против локально поднятых Edge Functions разбора документов
+(parse-xls-bytes, parse-doc-bytes, parse-ttk-by-templates) — латентность, пропускная
+способность, размеры запросов/ответов, ошибки и точность против эталона.
+
+Цепочка на файл — как в приложении:
+  .xlsx/.xls   → parse-xls-bytes {bytes: base64} → rows → parse-ttk-by-templates {rows}
+  .doc/.docx   → parse-doc-bytes {bytes: base64} → rows → parse-ttk-by-templates {rows}
+  .csv/.txt    → rows читаются локально            → parse-ttk-by-templates {rows}
+Если parse-xls-bytes не выбран в --functions, строки xlsx читаются локально (openpyxl).
+
+Эталон: <файл>.truth.json рядом с файлом (scripts/generate_ttk_synthetic_corpus.py).
+Файлы без эталона (scripts/fixtures/ttk_synthetic) замеряются только по латентности.
+
+Сервер:
+  supabase start && supabase functions serve --no-verify-jwt
+  export SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_SERVICE_ROLE_KEY=...
+
+Запуск из корня репозитория:
+  python3 scripts/bench_parse_functions.py --corpus scripts/fixtures/ttk_synthetic
+  python3 scripts/bench_parse_functions.py --corpus /tmp/ttk_corpus --concurrency 16 --limit 2000 \\
+      --out benchmarks/parse/$(git rev-parse --short HEAD).json --baseline benchmarks/parse/baseline.json
+
+Результат — JSON (параметры, git-ревизия, метрики по функциям, точность, худшие файлы).
+С --baseline печатается сравнение; --max-regress 10 → код выхода 1, если p95 любой
+функции вырос больше чем на 10% или точность упала.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import csv
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    print("Установите requests: pip install requests", file=sys.stderr)
+    sys.exit(1)
+
+_SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+from instrumentation import percentile  # noqa: E402
+
+ROOT = _SCRIPTS_DIR.parent
+SUPABASE_URL = os.environ.get("SUPABASE_URL", "http://127.0.0.1:54321").rstrip("/")
+SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get("SUPABASE_ANON_KEY", "")
+
+FUNCTIONS = ("parse-xls-bytes", "parse-doc-bytes", "parse-ttk-by-templates")
+XLS_EXT = (".xlsx", ".xls")
+DOC_EXT = (".doc", ".docx")
+TEXT_EXT = (".csv", ".txt")
+TOLERANCE_G = 0.5
+TOLERANCE_PCT = 1.0
+
+
+# --- метрики ----------------------------------------------------------------
+
+
+class FunctionStats:
+    """Потокобезопасный накопитель по одной функции."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.latencies_ms: list[float] = []
+        self.req_bytes = 0
+        self.resp_bytes = 0
+        self.errors: dict[str, int] = {}
+
+    def add(self, ms: float, req_bytes: int, resp_bytes: int, error: Optional[str]) -> None:
+        with self.lock:
+            self.latencies_ms.append(ms)
+            self.req_bytes += req_bytes
+            self.resp_bytes += resp_bytes
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    def summary(self, wall_s: float) -> dict:
+        lat = sorted(self.latencies_ms)
+        n = len(lat)
+        errs = sum(self.errors.values())
+        return {
+            "requests": n,
+            "errors": errs,
+            "error_rate": round(errs / n, 4) if n else 0.0,
+            "error_kinds": dict(sorted(self.errors.items(), key=lambda kv: -kv[1])),
+            "throughput_rps": round(n / wall_s, 2) if wall_s else 0.0,
+            "latency_ms": {
+                "mean": round(sum(lat) / n, 1) if n else 0.0,
+                "p50": round(percentile(lat, 50), 1),
+                "p95": round(percentile(lat, 95), 1),
+                "p99": round(percentile(lat, 99), 1),
+                "max": round(lat[-1], 1) if lat else 0.0,
+            },
+            "req_bytes_avg": round(self.req_bytes / n) if n else 0,
+            "resp_bytes_avg": round(self.resp_bytes / n) if n else 0,
+        }
+
+
+# --- HTTP -------------------------------------------------------------------
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _get_session(pool: int) -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers.update({"Content-Type": "application/json"})
+            if SUPABASE_KEY:
+                s.headers.update({"Authorization": f"Bearer {SUPABASE_KEY}", "apikey": SUPABASE_KEY})
+            _session = s
+        return _session
+
+
+def call(fn: str, payload: dict, stats: dict[str, FunctionStats], pool: int, timeout: float) -> Optional[dict]:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    t0 = time.perf_counter()
+    error = None
+    data = None
+    resp_len = 0
+    try:
+        r = _get_session(pool).post(f"{SUPABASE_URL}/functions/v1/{fn}", data=body, timeout=timeout)
+        resp_len = len(r.content)
+        if r.status_code >= 400:
+            error = f"http_{r.status_code}"
+        else:
+            data = r.json()
+            if isinstance(data, dict) and data.get("error"):
+                error = "error_field"
+    except requests.RequestException as e:
+        error = type(e).__name__
+    except ValueError:
+        error = "bad_json"
+    ms = (time.perf_counter() - t0) * 1000
+    stats[fn].add(ms, len(body), resp_len, error)
+    return None if error else data
+
+
+# --- строки файла -----------------------------------------------------------
+
+
+def local_rows(path: Path) -> list[list[str]]:
+    if path.suffix == ".txt":
+        return [[line.strip()] for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    if path.suffix == ".csv":
+        text = path.read_text(encoding="utf-8-sig")
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        return [[c.strip() for c in row] for row in csv.reader(io.StringIO(text), dialect) if any(row)]
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    rows = []
+    for ws in wb.worksheets:
+        for row in ws.iter_rows(values_only=True):
+            cells = ["" if c is None else str(c).strip() for c in row]
+            if any(cells):
+                rows.append(cells)
+    return rows
+
+
+# --- точность ---------------------------------------------------------------
+
+
+def _norm(s: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (s or "").lower().replace("ё", "е")).strip()
+
+
+def _close(expected: Optional[float], got: Optional[float]) -> bool:
+    if expected is None:
+        return True
+    if got is None:
+        return False
+    return abs(expected - got) <= max(TOLERANCE_G, abs(expected) * TOLERANCE_PCT / 100)
+
+
+def compare(truth_cards: list[dict], cards: list[dict]) -> dict[str, list[int]]:
+    """Счётчики [верно, всего] по полям; карточки сопоставляются по порядку."""
+    acc: dict[str, list[int]] = {k: [0, 0] for k in (
+        "cards", "dishName", "yieldGrams", "ingredient_recall", "ingredient_precision", "grossGrams", "netGrams",
+    )}
+    acc["cards"] = [min(len(cards), len(truth_cards)), len(truth_cards)]
+    for i, tc in enumerate(truth_cards):
+        pc = cards[i] if i < len(cards) else {}
+        acc["dishName"][1] += 1
+        acc["dishName"][0] += _norm(pc.get("dishName")) == _norm(tc.get("dishName"))
+        if tc.get("yieldGrams") is not None:
+            acc["yieldGrams"][1] += 1
+            acc["yieldGrams"][0] += _close(tc["yieldGrams"], pc.get("yieldGrams"))
+        got = {_norm(g.get("productName")): g for g in pc.get("ingredients") or []}
+        acc["ingredient_precision"][1] += len(got)
+        for ti in tc["ingredients"]:
+            acc["ingredient_recall"][1] += 1
+            g = got.get(_norm(ti["productName"]))
+            if g is None:
+                continue
+            acc["ingredient_recall"][0] += 1
+            acc["ingredient_precision"][0] += 1
+            for field in ("grossGrams", "netGrams"):
+                if ti.get(field) is not None:
+                    acc[field][1] += 1
+                    acc[field][0] += _close(ti[field], g.get(field))
+    return acc
+
+
+# --- прогон -----------------------------------------------------------------
+
+
+def collect_files(corpus: Path, limit: int) -> list[Path]:
+    exts = XLS_EXT + DOC_EXT + TEXT_EXT
+    files = sorted(p for p in corpus.rglob("*") if p.is_file() and p.suffix.lower() in exts)
+    return files[:limit] if limit > 0 else files
+
+
+def run_file(path: Path, functions: tuple[str, ...], stats: dict[str, FunctionStats], args) -> dict:
+    ext = path.suffix.lower()
+    rows = None
+    if ext in XLS_EXT + DOC_EXT:
+        fn = "parse-xls-bytes" if ext in XLS_EXT else "parse-doc-bytes"
+        if fn in functions:
+            payload = {"bytes": base64.b64encode(path.read_bytes()).decode("ascii")}
+            data = call(fn, payload, stats, args.concurrency, args.timeout)
+            rows = (data or {}).get("rows") or None
+        elif ext == ".xlsx":
+            rows = local_rows(path)
+    else:
+        rows = local_rows(path)
+
+    result: dict[str, Any] = {"file": str(path), "rows": len(rows or [])}
+    if "parse-ttk-by-templates" not in functions:
+        return result
+    if not rows or len(rows) < 2:
+        result["skipped"] = "no_rows"
+        return result
+    data = call("parse-ttk-by-templates", {"rows": rows}, stats, args.concurrency, args.timeout)
+    cards = (data or {}).get("cards") or []
+    result["cards"] = len(cards)
+    truth_path = path.with_name(path.name + ".truth.json")
+    if truth_path.is_file():
+        truth = json.loads(truth_path.read_text(encoding="utf-8"))
+        result["accuracy"] = compare(truth["cards"], cards)
+    return result
+
+
+def git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def aggregate_accuracy(results: list[dict]) -> dict[str, Optional[float]]:
+    totals: dict[str, list[int]] = {}
+    for r in results:
+        for field, (ok, n) in (r.get("accuracy") or {}).items():
+            t = totals.setdefault(field, [0, 0])
+            t[0] += ok
+            t[1] += n
+    return {field: (round(ok / n, 4) if n else None) for field, (ok, n) in totals.items()}
+
+
+def _file_score(r: dict) -> float:
+    a = r.get("accuracy") or {}
+    ok, n = a.get("ingredient_recall", (0, 0))
+    return ok / n if n else 1.0
+
+
+def compare_baseline(current: dict, baseline: dict, max_regress: Optional[float]) -> bool:
+    """Печать дельт; False — если есть регрессия сверх порога."""
+    ok = True
+    print(f"\nСравнение с базой ({baseline.get('git_rev') or '?'}, {baseline.get('started_at')}):")
+    for fn, cur in current["functions"].items():
+        base = baseline.get("functions", {}).get(fn)
+        if not base:
+            continue
+        for p in ("p50", "p95", "p99"):
+            b, c = base["latency_ms"][p], cur["latency_ms"][p]
+            delta = (c - b) / b * 100 if b else 0.0
+            flag = ""
+            if max_regress is not None and p == "p95" and delta > max_regress:
+                flag, ok = "  REGRESSION", False
+            print(f"  {fn:24} {p}: {b:8.1f} → {c:8.1f} ms ({delta:+.1f}%){flag}")
+        b_err, c_err = base["error_rate"], cur["error_rate"]
+        if c_err > b_err:
+            print(f"  {fn:24} error_rate: {b_err:.2%} → {c_err:.2%}")
+            if max_regress is not None:
+                ok = False
+    for field, c in current["accuracy"].items():
+        b = baseline.get("accuracy", {}).get(field)
+        if b is None or c is None:
+            continue
+        flag = ""
+        if max_regress is not None and c < b:
+            flag, ok = "  REGRESSION", False
+        print(f"  accuracy {field:22} {b:.4f} → {c:.4f}{flag}")
+    return ok
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Реплей корпуса против parse-xls-bytes / parse-doc-bytes / parse-ttk-by-templates")
+    ap.add_argument("--corpus", type=Path, default=ROOT / "scripts" / "fixtures" / "ttk_synthetic")
+    ap.add_argument("--functions", default=",".join(FUNCTIONS), help="Какие функции вызывать (через запятую)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Параллельных файлов")
+    ap.add_argument("--repeat", type=int, default=1, help="Сколько раз прогнать корпус")
+    ap.add_argument("--limit", type=int, default=0, help="Максимум файлов (0 — все)")
+    ap.add_argument("--timeout", type=float, default=60.0, help="Таймаут запроса, с")
+    ap.add_argument("--out", type=Path, default=None, help="JSON с результатами")
+    ap.add_argument("--baseline", type=Path, default=None, help="Предыдущий JSON для сравнения")
+    ap.add_argument("--max-regress", type=float, default=None,
+                    help="Порог роста p95, %%; при превышении или падении точности — код 1")
+    args = ap.parse_args()
+
+    functions = tuple(f.strip() for f in args.functions.split(",") if f.strip())
+    for f in functions:
+        if f not in FUNCTIONS:
+            print(f"Unknown function: {f}", file=sys.stderr)
+            return 2
+    files = collect_files(args.corpus, args.limit)
+    if not files:
+        print(f"Нет файлов в {args.corpus}", file=sys.stderr)
+        return 2
+    print(f"{len(files)} файлов × {args.repeat}, concurrency={args.concurrency}, {SUPABASE_URL}")
+
+    stats = {fn: FunctionStats() for fn in FUNCTIONS}
+    started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    t0 = time.perf_counter()
+    results: list[dict] = []
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        jobs = [f for _ in range(max(1, args.repeat)) for f in files]
+        for r in pool.map(lambda p: run_file(p, functions, stats, args), jobs):
+            results.append(r)
+            if len(results) % 200 == 0:
+                print(f"  {len(results)}/{len(jobs)}", flush=True)
+    wall = time.perf_counter() - t0
+
+    report = {
+        "started_at": started,
+        "git_rev": git_rev(),
+        "supabase_url": SUPABASE_URL,
+        "params": {
+            "corpus": str(args.corpus),
+            "files": len(files),
+            "repeat": args.repeat,
+            "concurrency": args.concurrency,
+            "functions": list(functions),
+        },
+        "wall_s": round(wall, 2),
+        "files_per_s": round(len(results) / wall, 2) if wall else 0.0,
+        "functions": {fn: stats[fn].summary(wall) for fn in functions if stats[fn].latencies_ms},
+        "accuracy": aggregate_accuracy(results),
+        "skipped": sum(1 for r in results if r.get("skipped")),
+        "worst_files": [
+            {"file": r["file"], "ingredient_recall": round(_file_score(r), 3), "cards": r.get("cards")}
+            for r in sorted((r for r in results if r.get("accuracy")), key=_file_score)[:20]
+        ],
+    }
+
+    print(f"\n{len(results)} файлов за {wall:.1f} с ({report['files_per_s']}/с)")
+    for fn, s in report["functions"].items():
+        lat = s["latency_ms"]
+        print(
+            f"  {fn:24} n={s['requests']:6} err={s['error_rate']:.2%} {s['throughput_rps']:7.1f} rps  "
+            f"p50={lat['p50']:.0f} p95={lat['p95']:.0f} p99={lat['p99']:.0f} ms  "
+            f"req≈{s['req_bytes_avg'] / 1024:.1f} КБ resp≈{s['resp_bytes_avg'] / 1024:.1f} КБ"
+        )
+    if report["accuracy"]:
+        print("  точность: " + ", ".join(f"{k}={v:.3f}" for k, v in report["accuracy"].items() if v is not None))
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Результаты: {args.out}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if not compare_baseline(report, baseline, args.max_regress):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,7 +4,8 @@ Fill localizable.json \"it\" with the same keys as \"es\" (≈1735), using ES→
 Preserves existing manual strings in \"it\" (e.g. tour_tile_*).
 
 Run from repo root: python3 scripts/build_it_locale.py
-Resume: re-run; checkpoint is scripts/.it_locale_checkpoint.json
+Resume: re-run; progress is journaled next to the JSON (localizable.json.journal,
+see restodocks_flutter/scripts/i18n_store.py) and replayed on start.
 """
 from __future__ import annotations
 
@@ -21,20 +22,20 @@ except ImportError:
 
 ROOT = Path(__file__).resolve().parents[1]
 JSON_PATH = ROOT / "restodocks_flutter/assets/translations/localizable.json"
-CHECKPOINT = Path(__file__).resolve().parent / ".it_locale_checkpoint.json"
+# Старый формат чекпоинта (только ключ → перевод); читается для совместимости.
+LEGACY_CHECKPOINT = Path(__file__).resolve().parent / ".it_locale_checkpoint.json"
+
+sys.path.insert(0, str(ROOT / "restodocks_flutter" / "scripts"))
+from i18n_store import I18nStore  # noqa: E402
 
 BATCH_SIZE = 12
 SLEEP_BETWEEN_BATCHES = 0.35
 
 
-def load_checkpoint() -> dict[str, str]:
-    if not CHECKPOINT.is_file():
+def load_legacy_checkpoint() -> dict[str, str]:
+    if not LEGACY_CHECKPOINT.is_file():
         return {}
-    return json.loads(CHECKPOINT.read_text(encoding="utf-8"))
-
-
-def save_checkpoint(cp: dict[str, str]) -> None:
-    CHECKPOINT.write_text(json.dumps(cp, ensure_ascii=False, indent=2), encoding="utf-8")
+    return json.loads(LEGACY_CHECKPOINT.read_text(encoding="utf-8"))
 
 
 def translate_batch(translator: GoogleTranslator, texts: list[str]) -> list[str]:
@@ -68,19 +69,20 @@ def translate_batch(translator: GoogleTranslator, texts: list[str]) -> list[str]
 
 def main() -> None:
     translator = GoogleTranslator(source="es", target="it")
-    data = json.loads(JSON_PATH.read_text(encoding="utf-8"))
-    es: dict[str, str] = data["es"]
-    manual_it: dict[str, str] = dict(data.get("it") or {})
+    store = I18nStore(JSON_PATH)
+    es: dict[str, str] = store.block("es")
+    # Уже есть в "it": ручные строки + переводы, проигранные из журнала прерванного прогона.
+    manual_it: dict[str, str] = dict(store.block("it"))
     es_keys: list[str] = list(es.keys())
 
-    cp = load_checkpoint()
+    cp = load_legacy_checkpoint()
     new_it: dict[str, str] = {}
 
     pending_keys: list[str] = []
     pending_texts: list[str] = []
 
     def flush() -> None:
-        nonlocal pending_keys, pending_texts, cp
+        nonlocal pending_keys, pending_texts
         if not pending_keys:
             return
         keys = pending_keys
@@ -90,8 +92,8 @@ def main() -> None:
         translated = translate_batch(translator, texts)
         for k, v in zip(keys, translated):
             new_it[k] = v
-            cp[k] = v
-        save_checkpoint(cp)
+            store.set("it", k, v)
+        store.checkpoint()
         time.sleep(SLEEP_BETWEEN_BATCHES)
 
     total = len(es_keys)
@@ -114,13 +116,16 @@ def main() -> None:
         missing = set(es_keys) - set(new_it)
         raise SystemExit(f"missing keys: {sorted(missing)[:20]!r} ...")
 
-    order = {k: j for j, k in enumerate(es_keys)}
-    data["it"] = dict(sorted(new_it.items(), key=lambda kv: order[kv[0]]))
-
-    JSON_PATH.write_text(
-        json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
-    )
-    print(f"Wrote {len(data['it'])} keys to it. Checkpoint: {CHECKPOINT}", file=sys.stderr)
+    for k, v in new_it.items():
+        store.set("it", k, v)
+    for k in list(store.block("it")):
+        if k not in new_it:
+            store.delete("it", k)
+    store.reorder("it", es_keys)
+    store.compact()
+    if LEGACY_CHECKPOINT.is_file():
+        LEGACY_CHECKPOINT.unlink()
+    print(f"Wrote {len(store.block('it'))} keys to it.", file=sys.stderr)
 
 
 if __name__ == "__main__":
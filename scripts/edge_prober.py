@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Асинхронный пробник Edge Functions и REST: доступность, статусы и латентность (замена
+scripts/watch_edge_status_spikes.sh).
+
+Все эндпоинты опрашиваются одновременно (asyncio, без сторонних HTTP-библиотек), каждый — в открытом
+цикле с постоянным интервалом: запрос уходит по расписанию, не дожидаясь предыдущего (со сдвигом
+между эндпоинтами, чтобы суммарная нагрузка была ровной). Если в полёте уже --max-inflight запросов,
+слот пропускается (dropped). Каждый запрос — новое соединение, как у curl в прежнем скрипте: время
+делится на connect (TCP+TLS), TTFB и полное; гистограммы — loadtest.LatencyHistogram.
+
+Пороги — как у shell-скрипта (суммарно по всем эндпоинтам):
+  401 > 0                 → FAIL (анонимная цепочка регистрации требует авторизации);
+  429 > MAX_429           → FAIL;
+  5xx + сетевые (599) > MAX_5XX → FAIL.
+Всплески латентности (предупреждение, с --fail-on-spike — тоже FAIL):
+  внутри прогона — p95 окна (--window) выше медианы p95 предыдущих --baseline-windows окон в
+  --spike-factor раз и не меньше чем на --min-spike-ms;
+  между прогонами — p95 эндпоинта против медианы последних --history-runs прогонов из --history (JSONL,
+  строка на прогон; CI может хранить его в кэше).
+
+По умолчанию — две функции анонимной цепочки регистрации с теми же телами, что у shell-скрипта
+(send-registration-email на *@invalid.restodocks не вызывает Resend). Свои эндпоинты:
+--endpoint 'NAME=METHOD /path [json]' (можно повторять) или --config FILE (JSON-массив
+{"name", "method", "path", "body", "headers"}); --preset none — только они.
+
+Env (как у shell-скрипта): SUPABASE_URL, SUPABASE_ANON_KEY (обязателен), SAMPLES, SLEEP_SECONDS,
+MAX_429, MAX_5XX.
+
+  python3 scripts/edge_prober.py
+  SAMPLES=60 SLEEP_SECONDS=0.5 python3 scripts/edge_prober.py --window 5 --history /tmp/edge_history.jsonl
+  python3 scripts/edge_prober.py --rate 5 --duration 120 --endpoint 'products=GET /rest/v1/products?select=id&limit=1'
+
+Локально против stand-in (scripts/supabase_standin.py):
+  python3 scripts/supabase_standin.py --port 54329 --function register-metadata=200,ms=40,jitter=10 \\
+      --function send-registration-email=200,429:0.05,503:0.02,ms=120 &
+  SUPABASE_URL=http://127.0.0.1:54329 SUPABASE_ANON_KEY=x python3 scripts/edge_prober.py --rate 20 --duration 20
+
+Отчёт JSON: loadtest_results/edge_probe_<время>.json (или --out) — статусы, ошибки, перцентили,
+сериализованные гистограммы, окна, всплески и вердикт.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from loadtest import LatencyHistogram
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_URL = "https://osglfptwbuqqmqunttha.supabase.co"
+REPORT_DIR = ROOT / "loadtest_results"
+USER_AGENT = "restodocks-edge-prober/1"
+NETWORK_ERROR = 599   # как `|| echo "599"` у curl в shell-скрипте
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    body: Optional[Any] = None
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+PRESETS: dict[str, list[Endpoint]] = {
+    "registration": [
+        Endpoint("register-metadata", "POST", "/functions/v1/register-metadata",
+                 {"establishment_id": "00000000-0000-4000-8000-000000000001"}),
+        Endpoint("send-registration-email", "POST", "/functions/v1/send-registration-email",
+                 {"type": "confirmation_only", "to": "watchdog-anon-check@invalid.restodocks", "language": "en"}),
+    ],
+    "none": [],
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def parse_endpoint(spec: str) -> Endpoint:
+    """'products=GET /rest/v1/products?select=id&limit=1' или 'fn=POST /functions/v1/fn {"a": 1}'."""
+    name, sep, rest = spec.partition("=")
+    parts = rest.strip().split(" ", 2)
+    if not sep or len(parts) < 2 or not parts[1].startswith("/"):
+        raise SystemExit(f"--endpoint ожидает NAME=METHOD /path [json]: {spec}")
+    body = json.loads(parts[2]) if len(parts) == 3 else None
+    return Endpoint(name.strip(), parts[0].upper(), parts[1], body)
+
+
+def load_config(path: Path) -> list[Endpoint]:
+    items = json.loads(path.read_text(encoding="utf-8"))
+    return [Endpoint(i["name"], i.get("method", "GET").upper(), i["path"], i.get("body"), i.get("headers") or {})
+            for i in items]
+
+
+# --- HTTP поверх asyncio ------------------------------------------------------
+
+@dataclass
+class Target:
+    scheme: str
+    host: str
+    port: int
+    ssl: Optional[ssl.SSLContext]
+
+    @classmethod
+    def parse(cls, url: str) -> "Target":
+        u = urlsplit(url)
+        if u.scheme not in ("http", "https") or not u.hostname:
+            raise SystemExit(f"SUPABASE_URL должен быть http(s)://host[:port]: {url}")
+        https = u.scheme == "https"
+        return cls(u.scheme, u.hostname, u.port or (443 if https else 80), ssl.create_default_context() if https else None)
+
+    @property
+    def host_header(self) -> str:
+        default = 443 if self.ssl else 80
+        return self.host if self.port == default else f"{self.host}:{self.port}"
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    at_s: float              # момент по расписанию от старта
+    status: int
+    total_ms: float
+    connect_ms: Optional[float] = None
+    ttfb_ms: Optional[float] = None
+    lag_ms: float = 0.0      # опоздание отправки относительно расписания
+    error: Optional[str] = None
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict[str, str]) -> int:
+    if "content-length" in headers:
+        n = int(headers["content-length"])
+        await reader.readexactly(n)
+        return n
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        total = 0
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                await reader.readline()
+                return total
+            await reader.readexactly(size + 2)
+            total += size
+    return len(await reader.read())
+
+
+async def _exchange(target: Target, ep: Endpoint, headers: dict[str, str], t0: float) -> tuple[int, float, float]:
+    reader, writer = await asyncio.open_connection(target.host, target.port, ssl=target.ssl,
+                                                   server_hostname=target.host if target.ssl else None)
+    connected = time.perf_counter()
+    try:
+        payload = b"" if ep.body is None else json.dumps(ep.body, ensure_ascii=False).encode("utf-8")
+        lines = [f"{ep.method} {ep.path} HTTP/1.1", f"Host: {target.host_header}", f"User-Agent: {USER_AGENT}",
+                 "Accept: application/json", "Connection: close"]
+        lines += [f"{k}: {v}" for k, v in {**headers, **ep.headers}.items()]
+        if ep.body is not None or ep.method in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(payload)}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+        status_line = await reader.readline()
+        first_byte = time.perf_counter()
+        parts = status_line.decode("latin-1").split(" ", 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ValueError(f"bad status line {status_line[:40]!r}")
+        resp_headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            resp_headers[k.strip().lower()] = v.strip()
+        await _read_body(reader, resp_headers)
+        return int(parts[1]), (connected - t0) * 1000, (first_byte - t0) * 1000
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+
+
+async def probe(target: Target, ep: Endpoint, headers: dict[str, str], timeout: float, at_s: float, lag_ms: float) -> Sample:
+    t0 = time.perf_counter()
+    try:
+        status, connect_ms, ttfb_ms = await asyncio.wait_for(_exchange(target, ep, headers, t0), timeout)
+        return Sample(ep.name, at_s, status, (time.perf_counter() - t0) * 1000, connect_ms, ttfb_ms, lag_ms)
+    except asyncio.TimeoutError:
+        error = "timeout"
+    except (OSError, ssl.SSLError, ValueError, asyncio.IncompleteReadError) as e:
+        error = type(e).__name__
+    return Sample(ep.name, at_s, NETWORK_ERROR, (time.perf_counter() - t0) * 1000, lag_ms=lag_ms, error=error)
+
+
+# --- статистика ----------------------------------------------------------------
+
+def status_class(status: int) -> str:
+    if status == 401:
+        return "401"
+    if status == 429:
+        return "429"
+    if status >= 500:
+        return "5xx"
+    return "other" if status >= 400 else "ok"
+
+
+@dataclass
+class EndpointStats:
+    endpoint: Endpoint
+    total: LatencyHistogram = field(default_factory=LatencyHistogram)
+    connect: LatencyHistogram = field(default_factory=LatencyHistogram)
+    ttfb: LatencyHistogram = field(default_factory=LatencyHistogram)
+    statuses: Counter = field(default_factory=Counter)
+    errors: Counter = field(default_factory=Counter)
+    windows: dict[int, tuple[LatencyHistogram, Counter]] = field(default_factory=dict)
+    dropped: int = 0
+    max_lag_ms: float = 0.0
+
+    def add(self, s: Sample, window_s: float) -> None:
+        self.total.record_ms(s.total_ms)
+        if s.connect_ms is not None:
+            self.connect.record_ms(s.connect_ms)
+        if s.ttfb_ms is not None:
+            self.ttfb.record_ms(s.ttfb_ms)
+        self.statuses[str(s.status)] += 1
+        if s.error:
+            self.errors[s.error] += 1
+        self.max_lag_ms = max(self.max_lag_ms, s.lag_ms)
+        hist, codes = self.windows.setdefault(int(s.at_s // window_s), (LatencyHistogram(), Counter()))
+        hist.record_ms(s.total_ms)
+        codes[status_class(s.status)] += 1
+
+    def classes(self) -> Counter:
+        out: Counter = Counter()
+        for code, n in self.statuses.items():
+            out[status_class(int(code))] += n
+        return out
+
+    def timeline(self, window_s: float) -> list[dict[str, Any]]:
+        return [{"start_s": idx * window_s, "count": h.count, "p50_ms": h.percentiles_ms()["p50"],
+                 "p95_ms": h.percentiles_ms()["p95"], "classes": dict(codes)}
+                for idx, (h, codes) in sorted(self.windows.items())]
+
+    def summary(self, window_s: float) -> dict[str, Any]:
+        ep = self.endpoint
+        return {
+            "method": ep.method,
+            "path": ep.path,
+            "count": self.total.count,
+            "dropped": self.dropped,
+            "statuses": dict(sorted(self.statuses.items())),
+            "classes": dict(self.classes()),
+            "errors": dict(self.errors),
+            "latency_ms": self.total.percentiles_ms(),
+            "connect_ms": self.connect.percentiles_ms(),
+            "ttfb_ms": self.ttfb.percentiles_ms(),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "histogram": self.total.to_dict(),
+            "windows": self.timeline(window_s),
+        }
+
+
+def window_spikes(name: str, timeline: list[dict], lookback: int, factor: float, min_delta: float,
+                  min_count: int) -> list[dict[str, Any]]:
+    out = []
+    usable = [w for w in timeline if w["count"] >= min_count]
+    for i, w in enumerate(usable):
+        prev = [x["p95_ms"] for x in usable[max(0, i - lookback):i]]
+        if len(prev) < min(lookback, 2):
+            continue
+        base = statistics.median(prev)
+        if w["p95_ms"] > base * factor and w["p95_ms"] - base >= min_delta:
+            out.append({"endpoint": name, "kind": "window", "start_s": w["start_s"], "p95_ms": w["p95_ms"],
+                        "baseline_p95_ms": round(base, 2)})
+    return out
+
+
+def history_spikes(endpoints: dict[str, dict], history: list[dict], runs: int, factor: float,
+                   min_delta: float) -> tuple[list[dict[str, Any]], dict[str, dict[str, float]]]:
+    spikes, baselines = [], {}
+    recent = history[-runs:]
+    for name, summary in endpoints.items():
+        prev = [h["endpoints"][name] for h in recent if name in h.get("endpoints", {})]
+        if len(prev) < 3:
+            continue
+        base_p95 = statistics.median(p["p95_ms"] for p in prev)
+        base_p50 = statistics.median(p["p50_ms"] for p in prev)
+        baselines[name] = {"runs": len(prev), "p50_ms": round(base_p50, 2), "p95_ms": round(base_p95, 2)}
+        p95 = summary["latency_ms"]["p95"]
+        if summary["count"] and p95 > base_p95 * factor and p95 - base_p95 >= min_delta:
+            spikes.append({"endpoint": name, "kind": "history", "p95_ms": p95, "baseline_p95_ms": round(base_p95, 2),
+                           "baseline_runs": len(prev)})
+    return spikes, baselines
+
+
+def read_history(path: Optional[Path]) -> list[dict]:
+    if not path or not path.is_file():
+        return []
+    out = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            continue
+    return out
+
+
+def append_history(path: Path, run_id: str, endpoints: dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    row = {"run_id": run_id, "endpoints": {
+        name: {"count": s["count"], "p50_ms": s["latency_ms"]["p50"], "p95_ms": s["latency_ms"]["p95"],
+               **{k: s["classes"].get(k, 0) for k in ("401", "429", "5xx")}}
+        for name, s in endpoints.items() if s["count"]}}
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+# --- прогон --------------------------------------------------------------------
+
+async def run_probes(args: argparse.Namespace, target: Target, endpoints: list[Endpoint],
+                     headers: dict[str, str]) -> dict[str, EndpointStats]:
+    stats = {ep.name: EndpointStats(ep) for ep in endpoints}
+    inflight = asyncio.Semaphore(args.max_inflight)
+    interval = 1.0 / args.rate
+    start = time.perf_counter()
+    tasks: list[asyncio.Task] = []
+
+    async def one(ep: Endpoint, at_s: float) -> None:
+        try:
+            s = await probe(target, ep, headers, args.timeout, at_s, (time.perf_counter() - start - at_s) * 1000)
+        finally:
+            inflight.release()
+        stats[ep.name].add(s, args.window)
+        if args.verbose:
+            print(f"  {at_s:7.2f}s {ep.name}: {s.status} {s.total_ms:.0f} ms" + (f" ({s.error})" if s.error else ""))
+
+    # Общее расписание: i-й запрос эндпоинта k — в (i + k/n) · interval.
+    schedule = sorted((i * interval + k * interval / len(endpoints), k)
+                      for k in range(len(endpoints)) for i in range(args.samples))
+    for at_s, k in schedule:
+        delay = start + at_s - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if inflight.locked():
+            stats[endpoints[k].name].dropped += 1
+            continue
+        await inflight.acquire()
+        tasks.append(asyncio.create_task(one(endpoints[k], at_s)))
+    await asyncio.gather(*tasks)
+    return stats
+
+
+def print_summary(endpoints: dict[str, dict]) -> None:
+    print(f"  {'endpoint':32} {'n':>5} {'drop':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'conn p50':>8}  statuses")
+    for name, s in endpoints.items():
+        lat, conn = s["latency_ms"], s["connect_ms"]
+        st = " ".join(f"{k}:{v}" for k, v in s["statuses"].items())
+        print(f"  {name:32} {s['count']:5d} {s['dropped']:4d} {lat['p50']:8.1f} {lat['p95']:8.1f} {lat['p99']:8.1f} "
+              f"{lat['max']:8.1f} {conn['p50']:8.1f}  {st}")
+
+
+def main() -> int:
+    samples_env, sleep_env = _env_int("SAMPLES", 6), _env_float("SLEEP_SECONDS", 2.0)
+    ap = argparse.ArgumentParser(description="Асинхронный пробник Edge Functions/REST: статусы, латентность, всплески")
+    ap.add_argument("--url", default=os.environ.get("SUPABASE_URL") or DEFAULT_URL, help="База (по умолчанию $SUPABASE_URL)")
+    ap.add_argument("--preset", choices=sorted(PRESETS), default="registration", help="Набор эндпоинтов по умолчанию")
+    ap.add_argument("--endpoint", action="append", default=[], help="NAME=METHOD /path [json] (можно повторять)")
+    ap.add_argument("--config", type=Path, default=None, help="JSON-массив эндпоинтов")
+    ap.add_argument("--only", default=None, help="Только эти эндпоинты (через запятую)")
+    ap.add_argument("--samples", type=int, default=None, help=f"Запросов на эндпоинт (по умолчанию $SAMPLES={samples_env})")
+    ap.add_argument("--interval", type=float, default=sleep_env,
+                    help=f"Интервал между запросами эндпоинта, с (по умолчанию $SLEEP_SECONDS={sleep_env:g})")
+    ap.add_argument("--rate", type=float, default=None, help="Запросов в секунду на эндпоинт (вместо --interval)")
+    ap.add_argument("--duration", type=float, default=None, help="Длительность, с (вместо --samples)")
+    ap.add_argument("--max-inflight", type=int, default=32, help="Одновременных запросов максимум")
+    ap.add_argument("--timeout", type=float, default=20.0, help="Таймаут запроса, с (превышение — 599)")
+    ap.add_argument("--max-429", type=int, default=_env_int("MAX_429", 1), help="Порог 429 (по умолчанию $MAX_429)")
+    ap.add_argument("--max-5xx", type=int, default=_env_int("MAX_5XX", 1), help="Порог 5xx/599 (по умолчанию $MAX_5XX)")
+    ap.add_argument("--window", type=float, default=10.0, help="Окно для поиска всплесков внутри прогона, с")
+    ap.add_argument("--baseline-windows", type=int, default=5, help="Сколько предыдущих окон — скользящая база")
+    ap.add_argument("--min-window-count", type=int, default=3, help="Окна с меньшим числом запросов не учитываются")
+    ap.add_argument("--spike-factor", type=float, default=2.0, help="Всплеск: p95 выше базы в N раз")
+    ap.add_argument("--min-spike-ms", type=float, default=100.0, help="… и не меньше чем на N мс")
+    ap.add_argument("--history", type=Path, default=None, help="JSONL истории прогонов (читается и дополняется)")
+    ap.add_argument("--history-runs", type=int, default=20, help="Сколько последних прогонов — база")
+    ap.add_argument("--fail-on-spike", action="store_true", help="Всплеск латентности — тоже FAIL")
+    ap.add_argument("--out", type=Path, default=None, help=f"Отчёт JSON (по умолчанию {REPORT_DIR.relative_to(ROOT)}/edge_probe_*.json)")
+    ap.add_argument("--no-report", action="store_true", help="Не писать отчёт")
+    ap.add_argument("--verbose", "-v", action="store_true", help="Печатать каждый ответ")
+    args = ap.parse_args()
+
+    key = os.environ.get("SUPABASE_ANON_KEY", "")
+    if not key:
+        print("Missing SUPABASE_ANON_KEY", file=sys.stderr)
+        return 1
+    endpoints = list(PRESETS[args.preset]) + [parse_endpoint(s) for s in args.endpoint]
+    if args.config:
+        endpoints += load_config(args.config)
+    if args.only:
+        only = {x.strip() for x in args.only.split(",")}
+        endpoints = [ep for ep in endpoints if ep.name in only]
+    if not endpoints:
+        print("Нет эндпоинтов (--preset/--endpoint/--config)", file=sys.stderr)
+        return 2
+    if len({ep.name for ep in endpoints}) != len(endpoints):
+        print("Имена эндпоинтов должны быть уникальны", file=sys.stderr)
+        return 2
+    args.rate = args.rate or 1.0 / max(args.interval, 1e-3)
+    args.samples = args.samples or (max(1, int(args.duration * args.rate)) if args.duration else samples_env)
+
+    target = Target.parse(args.url.rstrip("/"))
+    headers = {"apikey": key, "Authorization": f"Bearer {key}", "Content-Type": "application/json"}
+    print(f"Probing {len(endpoints)} endpoints × {args.samples} samples at {args.rate:g}/s each "
+          f"({target.scheme}://{target.host_header})...")
+    started = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    stats = asyncio.run(run_probes(args, target, endpoints, headers))
+    wall_s = time.perf_counter() - t0
+
+    summaries = {name: st.summary(args.window) for name, st in stats.items()}
+    print_summary(summaries)
+    spikes = [sp for name, s in summaries.items()
+              for sp in window_spikes(name, s["windows"], args.baseline_windows, args.spike_factor,
+                                      args.min_spike_ms, args.min_window_count)]
+    hist_spikes, baselines = history_spikes(summaries, read_history(args.history), args.history_runs,
+                                            args.spike_factor, args.min_spike_ms)
+    spikes += hist_spikes
+    for sp in spikes:
+        where = f"окно {sp['start_s']:.0f}s" if sp["kind"] == "window" else f"против {sp['baseline_runs']} прогонов"
+        print(f"  ! всплеск латентности {sp['endpoint']} ({where}): p95 {sp['p95_ms']:.1f} мс при базе "
+              f"{sp['baseline_p95_ms']:.1f} мс")
+
+    totals: Counter = Counter()
+    for st in stats.values():
+        totals.update(st.classes())
+    count_401, count_429, count_5xx = totals["401"], totals["429"], totals["5xx"]
+    print(f"Summary: 401={count_401}, 429={count_429}, 5xx={count_5xx}")
+    failures = []
+    if count_401 > 0:
+        failures.append("detected 401 responses in anon registration chain")
+    if count_429 > args.max_429:
+        failures.append(f"429 spike detected ({count_429} > {args.max_429})")
+    if count_5xx > args.max_5xx:
+        failures.append(f"5xx spike detected ({count_5xx} > {args.max_5xx})")
+    if spikes and args.fail_on_spike:
+        failures.append(f"latency spike detected ({len(spikes)})")
+
+    run_id = "edge_probe_" + started.strftime("%Y%m%d%H%M%S")
+    if not args.no_report:
+        report = {
+            "run_id": run_id,
+            "url": f"{target.scheme}://{target.host_header}",
+            "started_at": started.isoformat(timespec="seconds"),
+            "wall_s": round(wall_s, 3),
+            "config": {"samples": args.samples, "rate": args.rate, "max_inflight": args.max_inflight,
+                       "timeout_s": args.timeout, "window_s": args.window, "spike_factor": args.spike_factor,
+                       "min_spike_ms": args.min_spike_ms},
+            "thresholds": {"max_401": 0, "max_429": args.max_429, "max_5xx": args.max_5xx},
+            "totals": {"401": count_401, "429": count_429, "5xx": count_5xx},
+            "endpoints": summaries,
+            "history_baseline": baselines,
+            "spikes": spikes,
+            "verdict": "fail" if failures else "ok",
+            "failures": failures,
+        }
+        out = args.out or REPORT_DIR / f"{run_id}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Report: {out}")
+    if args.history:
+        append_history(args.history, run_id, summaries)
+
+    for msg in failures:
+        print(f"WATCHDOG FAIL: {msg}", file=sys.stderr)
+    if failures:
+        return 1
+    print("WATCHDOG OK: no spike thresholds exceeded.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,13 +12,15 @@ Open Food Facts: https://world.openfoodfacts.org/ — бесплатный API,
 Rate limit: ~100 req/min. Скрипт делает паузу 1.5 с между запросами.
 """
 import json
+import os
 import sys
 import time
 import urllib.request
 import urllib.error
 import urllib.parse
 
-SUPABASE_URL = "https://osglfptwbuqqmqunttha.supabase.co"
+# SUPABASE_URL=http://127.0.0.1:54329 — локальная подмена (scripts/supabase_standin.py)
+SUPABASE_URL = os.environ.get("SUPABASE_URL", "https://osglfptwbuqqmqunttha.supabase.co").rstrip("/")
 USER_AGENT = "Restodocks/1.0 - Product Database"
 OFF_API = "https://world.openfoodfacts.org/cgi/search.pl"
 
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Масштабируемый синтетический корпус ТТК для нагрузочных тестов импорта
+(parse-xls-bytes → parse-ttk-by-templates, parse-doc-bytes).
+
+В отличие от generate_ttk_synthetic_training_fixtures.py (фиксированный набор ручных макетов)
+генерирует тысячи файлов по параметрам: карточек в файле, строк в карточке, смесь макетов,
+локалей, форматов и разделителей CSV. Рядом с каждым файлом — <файл>.truth.json с эталоном
+в форме ответа parse-ttk-by-templates (dishName, yieldGrams, ingredients[productName,
+grossGrams, netGrams]) для замера точности.
+
+Запуск из корня репозитория:
+  python3 scripts/generate_ttk_synthetic_corpus.py --out /tmp/ttk_corpus --files 200
+  python3 scripts/generate_ttk_synthetic_corpus.py --out /data/ttk_corpus --files 10000 \\
+      --cards 50-300 --rows 3-25 --layouts gost=3,brutto_only=1,numbered_kg=2,flat=2 \\
+      --locales ru=4,en=1,kk=1 --formats xlsx=3,csv=2 --delimiters ",;\\t" --workers 8 --seed 42
+
+Один и тот же --seed даёт тот же корпус (файл i генерируется из своего Random(seed, i) —
+результат не зависит от числа воркеров). Файлы раскладываются по подкаталогам по 1000,
+manifest.json — список файлов с параметрами и сводка.
+
+Макеты:
+  gost         — название, «Наименование сырья и продуктов / Расход сырья на N порций», Брутто/Нетто
+  brutto_only  — Наименование | Продукт | Брутто (без нетто), строка «Итого»
+  numbered_kg  — № | Наименование продукта | Ед. изм. | Брутто в ед. изм. | Вес брутто, кг | Вес нетто, кг
+  flat         — Наименование | Продукт | Брутто | Нетто | Выход | Технология (блюдо в каждой строке)
+
+Зависимость: pip install openpyxl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+_SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+from generate_ttk_synthetic_training_fixtures import save_csv, save_multi_sheet  # noqa: E402
+
+FILES_PER_DIR = 1000
+
+LAYOUTS = ("gost", "brutto_only", "numbered_kg", "flat")
+FORMATS = ("xlsx", "csv")
+
+# Шапки по локалям. Русский — основной формат, en/kk — реже встречающиеся выгрузки.
+HEADERS = {
+    "ru": {
+        "raw": "Наименование сырья и продуктов",
+        "per": "Расход сырья на {n} порций",
+        "gross": "Брутто, г",
+        "net": "Нетто, г",
+        "dish": "Наименование",
+        "product": "Продукт",
+        "product_full": "Наименование продукта",
+        "unit": "Ед. изм.",
+        "gross_unit": "Брутто в ед. изм.",
+        "gross_kg": "Вес брутто, кг",
+        "net_kg": "Вес нетто, кг",
+        "output": "Выход",
+        "tech": "Технология",
+        "tech_text": "Нарезать, соединить, довести до готовности.",
+        "total": "Итого",
+        "kg": "кг",
+    },
+    "en": {
+        "raw": "Raw materials and products",
+        "per": "Consumption per {n} portions",
+        "gross": "Gross, g",
+        "net": "Net, g",
+        "dish": "Dish",
+        "product": "Product",
+        "product_full": "Product name",
+        "unit": "Unit",
+        "gross_unit": "Gross per unit",
+        "gross_kg": "Gross weight, kg",
+        "net_kg": "Net weight, kg",
+        "output": "Yield",
+        "tech": "Technology",
+        "tech_text": "Chop, combine and cook until done.",
+        "total": "Total",
+        "kg": "kg",
+    },
+    "kk": {
+        "raw": "Шикізат пен өнімдердің атауы",
+        "per": "{n} порцияға шикізат шығыны",
+        "gross": "Брутто, г",
+        "net": "Нетто, г",
+        "dish": "Атауы",
+        "product": "Өнім",
+        "product_full": "Өнім атауы",
+        "unit": "Өлш. бірл.",
+        "gross_unit": "Өлш. бірл. брутто",
+        "gross_kg": "Брутто салмағы, кг",
+        "net_kg": "Нетто салмағы, кг",
+        "output": "Шығымы",
+        "tech": "Технология",
+        "tech_text": "Турап, араластырып, дайын болғанша пісіру.",
+        "total": "Барлығы",
+        "kg": "кг",
+    },
+}
+
+PRODUCTS = {
+    "ru": [
+        "Говядина лопатка", "Свинина шея", "Филе куриное", "Филе лосося", "Картофель", "Морковь",
+        "Лук репчатый", "Чеснок", "Свёкла", "Капуста белокочанная", "Перец болгарский", "Томаты",
+        "Огурцы свежие", "Рис круглый", "Гречка", "Мука пшеничная", "Сахар", "Соль", "Масло сливочное",
+        "Масло растительное", "Сметана 20%", "Сливки 33%", "Молоко 3,2%", "Яйцо куриное", "Сыр твёрдый",
+        "Творог 9%", "Петрушка", "Укроп", "Перец чёрный молотый", "Лавровый лист", "Майонез",
+        "Горошек зелёный", "Шампиньоны", "Кинза", "Имбирь", "Соевый соус", "Уксус 9%", "Паприка",
+    ],
+    "en": [
+        "Beef shoulder", "Pork neck", "Chicken fillet", "Salmon fillet", "Potatoes", "Carrots",
+        "Onion", "Garlic", "Beetroot", "White cabbage", "Bell pepper", "Tomatoes", "Cucumbers",
+        "Rice", "Buckwheat", "Wheat flour", "Sugar", "Salt", "Butter", "Vegetable oil", "Sour cream",
+        "Cream 33%", "Milk", "Chicken egg", "Hard cheese", "Cottage cheese", "Parsley", "Dill",
+        "Black pepper", "Bay leaf", "Mayonnaise", "Green peas", "Mushrooms", "Cilantro", "Ginger",
+    ],
+    "kk": [
+        "Сиыр еті", "Қой еті", "Тауық филесі", "Картоп", "Сәбіз", "Пияз", "Сарымсақ", "Қызылша",
+        "Қырыққабат", "Болгар бұрышы", "Қызанақ", "Қияр", "Күріш", "Қарақұмық", "Бидай ұны", "Қант",
+        "Тұз", "Сары май", "Өсімдік майы", "Қаймақ", "Сүт", "Тауық жұмыртқасы", "Ірімшік", "Ақжелкен",
+        "Аскөк", "Қара бұрыш", "Саңырауқұлақ", "Кинза",
+    ],
+}
+
+DISHES = {
+    "ru": ["Суп", "Салат", "Котлеты", "Рагу", "Плов", "Запеканка", "Паста", "Жаркое", "Каша", "Пирог"],
+    "en": ["Soup", "Salad", "Cutlets", "Stew", "Pilaf", "Casserole", "Pasta", "Roast", "Porridge", "Pie"],
+    "kk": ["Сорпа", "Салат", "Котлет", "Рагу", "Палау", "Запеканка", "Паста", "Қуырдақ", "Ботқа", "Бәліш"],
+}
+DISH_SUFFIX = {
+    "ru": ["домашний", "по-деревенски", "фирменный", "с зеленью", "острый", "сезонный", "классический"],
+    "en": ["homestyle", "rustic", "signature", "with herbs", "spicy", "seasonal", "classic"],
+    "kk": ["үй", "ауылша", "фирмалық", "көкпен", "ащы", "маусымдық", "классикалық"],
+}
+
+
+def parse_range(spec: str) -> tuple[int, int]:
+    """"50-300" → (50, 300); "12" → (12, 12)."""
+    lo, _, hi = spec.partition("-")
+    lo_i = int(lo)
+    hi_i = int(hi) if hi else lo_i
+    if lo_i < 1 or hi_i < lo_i:
+        raise argparse.ArgumentTypeError(f"bad range: {spec}")
+    return lo_i, hi_i
+
+
+def parse_mix(spec: str, allowed: tuple[str, ...] | None = None) -> dict[str, float]:
+    """"gost=3,flat=1" → веса; имя без веса = 1."""
+    mix: dict[str, float] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, w = part.partition("=")
+        if allowed and name not in allowed:
+            raise argparse.ArgumentTypeError(f"unknown value {name!r}, expected one of {', '.join(allowed)}")
+        mix[name] = float(w) if w else 1.0
+    if not mix:
+        raise argparse.ArgumentTypeError("empty mix")
+    return mix
+
+
+def _pick(rng: random.Random, mix: dict[str, float]) -> str:
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def _num(value: float, locale: str, digits: int = 0) -> str:
+    """Число как в выгрузках: ru/kk — запятая, en — точка; без хвостовых нулей."""
+    s = f"{value:.{digits}f}"
+    if "." in s:
+        s = s.rstrip("0").rstrip(".")
+    return s.replace(".", ",") if locale != "en" else s
+
+
+# --- карточки ---------------------------------------------------------------
+
+
+def make_card(rng: random.Random, locale: str, rows: tuple[int, int], with_net: bool = True) -> dict:
+    products = rng.sample(PRODUCTS[locale], k=rng.randint(*rows))
+    ingredients = []
+    for name in products:
+        gross = rng.randint(3, 450)
+        ing = {"productName": name, "grossGrams": float(gross)}
+        if with_net:
+            waste = rng.choice((0, 0, 0, 5, 10, 15, 20, 25))
+            ing["netGrams"] = float(round(gross * (100 - waste) / 100))
+        ingredients.append(ing)
+    dish = f"{rng.choice(DISHES[locale])} {rng.choice(DISH_SUFFIX[locale])} №{rng.randint(1, 999)}"
+    card = {"dishName": dish, "ingredients": ingredients}
+    if with_net:
+        card["yieldGrams"] = float(sum(i["netGrams"] for i in ingredients))
+    return card
+
+
+def render_gost(card: dict, h: dict, locale: str, portions: int) -> list[list]:
+    rows = [[card["dishName"], "", ""], [h["raw"], h["per"].format(n=portions)], ["", h["gross"], h["net"]]]
+    for i in card["ingredients"]:
+        rows.append([i["productName"], _num(i["grossGrams"], locale), _num(i["netGrams"], locale)])
+    return rows
+
+
+def render_brutto_only(card: dict, h: dict, locale: str) -> list[list]:
+    rows = [[card["dishName"], "", ""], [h["dish"], h["product"], h["gross"]]]
+    for i in card["ingredients"]:
+        rows.append([card["dishName"], i["productName"], _num(i["grossGrams"], locale)])
+    rows.append([h["total"], "", _num(sum(i["grossGrams"] for i in card["ingredients"]), locale)])
+    return rows
+
+
+def render_numbered_kg(card: dict, h: dict, locale: str) -> list[list]:
+    rows = [
+        [card["dishName"], "", "", "", "", ""],
+        ["№", h["product_full"], h["unit"], h["gross_unit"], h["gross_kg"], h["net_kg"]],
+    ]
+    for n, i in enumerate(card["ingredients"], 1):
+        kg = i["grossGrams"] / 1000
+        rows.append([
+            str(n), i["productName"], h["kg"], _num(kg, locale, 3), _num(kg, locale, 3),
+            _num(i["netGrams"] / 1000, locale, 3),
+        ])
+    rows.append(["", h["output"], "", "", "", _num(card["yieldGrams"] / 1000, locale, 3)])
+    return rows
+
+
+def render_flat(card: dict, h: dict, locale: str, rng: random.Random) -> list[list]:
+    rows = [[h["dish"], h["product"], h["gross"], h["net"], h["output"], h["tech"]]]
+    for n, i in enumerate(card["ingredients"]):
+        rows.append([
+            card["dishName"], i["productName"], _num(i["grossGrams"], locale), _num(i["netGrams"], locale),
+            _num(card["yieldGrams"], locale) if n == 0 else "",
+            h["tech_text"] if n == 0 and rng.random() < 0.5 else "",
+        ])
+    return rows
+
+
+def render(layout: str, card: dict, locale: str, rng: random.Random) -> list[list]:
+    h = HEADERS[locale]
+    if layout == "gost":
+        return render_gost(card, h, locale, rng.choice((1, 1, 1, 10, 25)))
+    if layout == "brutto_only":
+        return render_brutto_only(card, h, locale)
+    if layout == "numbered_kg":
+        return render_numbered_kg(card, h, locale)
+    return render_flat(card, h, locale, rng)
+
+
+# --- файлы ------------------------------------------------------------------
+
+
+def _file_rng(seed: int, index: int) -> random.Random:
+    # Строковый сид детерминирован между процессами (в отличие от hash() с PYTHONHASHSEED).
+    return random.Random(f"{seed}:{index}")
+
+
+def generate_file(job: tuple) -> dict:
+    """Воркер пула: один файл корпуса + <файл>.truth.json. Возвращает запись манифеста."""
+    index, out, seed, cards, rows, layouts, locales, formats, delimiters, sheets_per_card = job
+    rng = _file_rng(seed, index)
+    layout = _pick(rng, layouts)
+    locale = _pick(rng, locales)
+    fmt = _pick(rng, formats)
+    n_cards = rng.randint(*cards)
+    with_net = layout != "brutto_only"
+    truth_cards = [make_card(rng, locale, rows, with_net) for _ in range(n_cards)]
+
+    rel_dir = f"{index // FILES_PER_DIR:04d}"
+    stem = f"synth__{layout}__{locale}__{index:06d}"
+    path = Path(out) / rel_dir / f"{stem}.{fmt}"
+    blocks = [render(layout, c, locale, rng) for c in truth_cards]
+    delimiter = None
+    if fmt == "xlsx" and sheets_per_card:
+        sheets = [(f"{n + 1}", b) for n, b in enumerate(blocks)]
+    else:
+        # Карточки подряд на одном листе, между ними пустая строка.
+        grid: list[list] = []
+        for n, b in enumerate(blocks):
+            if n:
+                grid.append([])
+            grid.extend(b)
+        sheets = [("TTK", grid)]
+    if fmt == "xlsx":
+        path.parent.mkdir(parents=True, exist_ok=True)
+        save_multi_sheet(path, sheets)
+    else:
+        delimiter = rng.choice(delimiters)
+        save_csv(path, sheets[0][1], delimiter)
+
+    truth = {
+        "file": f"{rel_dir}/{path.name}",
+        "format": fmt,
+        "layout": layout,
+        "locale": locale,
+        "delimiter": delimiter,
+        "seed": seed,
+        "index": index,
+        "rows": sum(len(rows) for _, rows in sheets),
+        "ingredients": sum(len(c["ingredients"]) for c in truth_cards),
+        "cards": truth_cards,
+    }
+    path.with_name(path.name + ".truth.json").write_text(
+        json.dumps(truth, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+    )
+    entry = {k: truth[k] for k in ("file", "format", "layout", "locale", "delimiter", "rows", "ingredients")}
+    entry["cards"] = n_cards
+    entry["bytes"] = path.stat().st_size
+    return entry
+
+
+def generate_corpus(
+    out: Path,
+    files: int,
+    seed: int,
+    cards: tuple[int, int],
+    rows: tuple[int, int],
+    layouts: dict[str, float],
+    locales: dict[str, float],
+    formats: dict[str, float],
+    delimiters: str,
+    sheets_per_card: bool,
+    workers: int,
+) -> dict:
+    out.mkdir(parents=True, exist_ok=True)
+    jobs = (
+        (i, str(out), seed, cards, rows, layouts, locales, formats, delimiters, sheets_per_card)
+        for i in range(files)
+    )
+    t0 = time.perf_counter()
+    entries: list[dict] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for entry in pool.map(generate_file, jobs, chunksize=max(1, min(64, files // (workers * 4) or 1))):
+            entries.append(entry)
+            if len(entries) % 500 == 0:
+                rate = len(entries) / (time.perf_counter() - t0)
+                print(f"  {len(entries)}/{files} файлов, {rate:.0f}/с", flush=True)
+    elapsed = time.perf_counter() - t0
+
+    summary = {
+        "files": len(entries),
+        "cards": sum(e["cards"] for e in entries),
+        "ingredients": sum(e["ingredients"] for e in entries),
+        "bytes": sum(e["bytes"] for e in entries),
+        "elapsed_s": round(elapsed, 2),
+    }
+    for key in ("layout", "locale", "format"):
+        counts: dict[str, int] = {}
+        for e in entries:
+            counts[e[key]] = counts.get(e[key], 0) + 1
+        summary[f"by_{key}"] = dict(sorted(counts.items()))
+    manifest = {
+        "params": {
+            "seed": seed,
+            "cards": list(cards),
+            "rows": list(rows),
+            "layouts": layouts,
+            "locales": locales,
+            "formats": formats,
+            "delimiters": delimiters,
+            "sheets_per_card": sheets_per_card,
+        },
+        "summary": summary,
+        "files": entries,
+    }
+    (out / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    return summary
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Синтетический корпус ТТК + эталон для нагрузочных тестов парсера")
+    p.add_argument("--out", type=Path, required=True, help="Каталог корпуса")
+    p.add_argument("--files", type=int, default=100, help="Число файлов")
+    p.add_argument("--seed", type=int, default=1, help="Сид (тот же сид → тот же корпус)")
+    p.add_argument("--cards", type=parse_range, default=(1, 20), help="Карточек в файле: N или MIN-MAX")
+    p.add_argument("--rows", type=parse_range, default=(3, 15), help="Ингредиентов в карточке: N или MIN-MAX")
+    p.add_argument("--layouts", type=lambda s: parse_mix(s, LAYOUTS), default=parse_mix(",".join(LAYOUTS)),
+                   help="Смесь макетов с весами, напр. gost=3,brutto_only=1")
+    p.add_argument("--locales", type=lambda s: parse_mix(s, tuple(HEADERS)), default=parse_mix("ru=4,en=1,kk=1"),
+                   help="Смесь локалей с весами (ru, en, kk)")
+    p.add_argument("--formats", type=lambda s: parse_mix(s, FORMATS), default=parse_mix("xlsx=2,csv=1"),
+                   help="Смесь форматов с весами (xlsx, csv)")
+    p.add_argument("--delimiters", default=",;\t", help="Разделители CSV (выбирается случайно на файл)")
+    p.add_argument("--sheets-per-card", action="store_true", help="xlsx: каждая карточка на своём листе")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Процессов в пуле")
+    args = p.parse_args()
+    # Ингредиенты в карточке не повторяются: больше, чем продуктов в словаре локали, не набрать.
+    limit = min(len(PRODUCTS[loc]) for loc in args.locales)
+    if args.rows[1] > limit:
+        p.error(f"--rows: не больше {limit} (продуктов в словаре для {','.join(sorted(args.locales))})")
+
+    delimiters = args.delimiters.encode().decode("unicode_escape")
+    out = args.out.resolve()
+    summary = generate_corpus(
+        out, args.files, args.seed, args.cards, args.rows, args.layouts, args.locales,
+        args.formats, delimiters, args.sheets_per_card, max(1, args.workers),
+    )
+    print(
+        f"OK: {out}  файлов={summary['files']} карточек={summary['cards']} "
+        f"ингредиентов={summary['ingredients']} ({summary['bytes'] / 1e6:.1f} МБ, {summary['elapsed_s']} с)"
+    )
+    print(f"  макеты: {summary['by_layout']}  локали: {summary['by_locale']}  форматы: {summary['by_format']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Общая инструментовка для сервисных скриптов (scripts/, restodocks_flutter/scripts/):
+таймеры фаз, счётчики, латентность HTTP по провайдеру/эндпоинту, буферизованный лог
+(текст + структурированный JSONL), --profile (cProfile → .pstats) и --metrics-out (сводка JSON).
+
+Только stdlib — подключается в любом скрипте без новых зависимостей:
+
+    from instrumentation import Instrumentation, add_arguments   # scripts/*.py
+
+    # restodocks_flutter/scripts/*.py:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+    from instrumentation import Instrumentation, add_arguments
+
+    METRICS = Instrumentation("my_script", log_path=LOG_FILE)
+
+    def main():
+        ap = argparse.ArgumentParser()
+        add_arguments(ap)                       # --profile, --metrics-out, --events-out
+        args = ap.parse_args()
+        METRICS.start_from_args(args)           # профилировщик, atexit-сброс
+        with METRICS.phase("fetch"):
+            ...
+        with METRICS.http("off", "search") as call:
+            with urllib.request.urlopen(req) as resp:
+                raw = resp.read()
+            call.done(resp.status, len(raw))
+        METRICS.count("rules_hit")
+        METRICS.log("OK", product_id=pid, kcal=cal)   # строка в stdout/лог + запись JSONL
+
+Лог-файлы открываются один раз; строки копятся в буфере и сбрасываются каждые
+flush_lines строк / flush_interval секунд и при выходе (atexit, в том числе после Ctrl+C).
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import cProfile
+import io
+import json
+import math
+import pstats
+import random
+import sys
+import threading
+import time
+import urllib.error
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+
+# Сколько замеров латентности хранить на ключ: дальше — равномерная выборка (reservoir),
+# count/sum/min/max остаются точными.
+MAX_SAMPLES = 50_000
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank перцентиль по отсортированному списку."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p * len(sorted_values) / 100.0) - 1))
+    return sorted_values[k]
+
+
+class Timing:
+    """Счётчик + сумма/мин/макс + выборка для перцентилей (значения в мс)."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max = 0.0
+        self.samples: list[float] = []
+        self._rng = random.Random(seed)
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = max(self.max, ms)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(ms)
+        else:
+            j = self._rng.randrange(self.count)
+            if j < MAX_SAMPLES:
+                self.samples[j] = ms
+
+    def summary(self) -> dict[str, Any]:
+        s = sorted(self.samples)
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 1),
+            "mean_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "min_ms": round(self.min or 0.0, 2),
+            "p50_ms": round(percentile(s, 50), 2),
+            "p90_ms": round(percentile(s, 90), 2),
+            "p95_ms": round(percentile(s, 95), 2),
+            "p99_ms": round(percentile(s, 99), 2),
+            "max_ms": round(self.max, 2),
+        }
+
+
+class HttpStats:
+    def __init__(self) -> None:
+        self.latency = Timing()
+        self.statuses: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self.bytes_in = 0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            **self.latency.summary(),
+            "status": dict(sorted(self.statuses.items())),
+            "errors": dict(sorted(self.errors.items(), key=lambda kv: -kv[1])),
+            "bytes_in": self.bytes_in,
+        }
+
+
+class HttpCall:
+    """Объект внутри `with inst.http(...)`: done(status, nbytes) или исключение."""
+
+    def __init__(self) -> None:
+        self.status: Optional[int] = None
+        self.nbytes = 0
+
+    def done(self, status: Optional[int] = 200, nbytes: int = 0) -> None:
+        self.status = status
+        self.nbytes = nbytes
+
+
+def error_kind(e: BaseException) -> str:
+    if isinstance(e, urllib.error.HTTPError):
+        return f"http_{e.code}"
+    if isinstance(e, urllib.error.URLError) and isinstance(e.reason, BaseException):
+        return type(e.reason).__name__
+    return type(e).__name__
+
+
+class BufferedWriter:
+    """Файл, открытый один раз на дозапись; сброс по числу строк или интервалу."""
+
+    def __init__(self, path: Path, flush_lines: int, flush_interval: float) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._f: Optional[TextIO] = path.open("a", encoding="utf-8")
+        self._buf: list[str] = []
+        self._flush_lines = flush_lines
+        self._flush_interval = flush_interval
+        self._last = time.monotonic()
+
+    def write(self, line: str) -> None:
+        self._buf.append(line)
+        now = time.monotonic()
+        if len(self._buf) >= self._flush_lines or now - self._last >= self._flush_interval:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None) -> None:
+        if self._f is None:
+            return
+        if self._buf:
+            self._f.write("\n".join(self._buf) + "\n")
+            self._buf.clear()
+        self._f.flush()
+        self._last = now if now is not None else time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class Instrumentation:
+    def __init__(
+        self,
+        name: str,
+        log_path: Optional[Path | str] = None,
+        events_path: Optional[Path | str] = None,
+        echo: bool = True,
+        flush_lines: int = 200,
+        flush_interval: float = 2.0,
+    ) -> None:
+        self.name = name
+        self.echo = echo
+        self._log_path = Path(log_path) if log_path else None
+        self._events_path = Path(events_path) if events_path else None
+        self._flush_lines = flush_lines
+        self._flush_interval = flush_interval
+        self._text: Optional[BufferedWriter] = None
+        self._events: Optional[BufferedWriter] = None
+        self._lock = threading.Lock()
+        self.phases: dict[str, Timing] = {}
+        self.counters: dict[str, float] = {}
+        self.http_stats: dict[tuple[str, str], HttpStats] = {}
+        self.metrics_out: Optional[Path] = None
+        self.profile_out: Optional[Path] = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._started_wall = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._closed = False
+        self._atexit = False
+
+    # --- запуск / завершение ------------------------------------------------
+
+    def start(
+        self,
+        metrics_out: Optional[Path] = None,
+        profile_out: Optional[Path] = None,
+        events_path: Optional[Path] = None,
+    ) -> "Instrumentation":
+        self.metrics_out = metrics_out
+        self.profile_out = profile_out
+        if events_path:
+            self._events_path = events_path
+        self._started_wall = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        if profile_out and self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if not self._atexit:
+            atexit.register(self.close)
+            self._atexit = True
+        return self
+
+    def start_from_args(self, args: argparse.Namespace) -> "Instrumentation":
+        return self.start(
+            metrics_out=getattr(args, "metrics_out", None),
+            profile_out=getattr(args, "profile", None),
+            events_path=getattr(args, "events_out", None),
+        )
+
+    def close(self) -> None:
+        """Сброс логов, pstats и сводки метрик. Повторный вызов — no-op."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._profiler is not None and self.profile_out:
+            self._profiler.disable()
+            self.profile_out.parent.mkdir(parents=True, exist_ok=True)
+            self._profiler.dump_stats(str(self.profile_out))
+            buf = io.StringIO()
+            pstats.Stats(self._profiler, stream=buf).sort_stats("cumulative").print_stats(25)
+            print(f"\nProfile: {self.profile_out}  (python3 -m pstats {self.profile_out})", file=sys.stderr)
+            print(buf.getvalue(), file=sys.stderr)
+        if self.metrics_out:
+            self.metrics_out.parent.mkdir(parents=True, exist_ok=True)
+            self.metrics_out.write_text(
+                json.dumps(self.summary(), ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+            )
+            print(f"Metrics: {self.metrics_out}", file=sys.stderr)
+        for w in (self._text, self._events):
+            if w is not None:
+                w.close()
+
+    # --- лог ----------------------------------------------------------------
+
+    def log(self, msg: str, also_print: bool = True, **fields: Any) -> None:
+        """Строка «[ts] msg» в stdout и текстовый лог; запись {ts, msg, **fields} в JSONL."""
+        now = datetime.now()
+        line = f"[{now.strftime('%Y-%m-%d %H:%M:%S')}] {msg}"
+        with self._lock:
+            if self._log_path is not None:
+                if self._text is None:
+                    self._text = BufferedWriter(self._log_path, self._flush_lines, self._flush_interval)
+                self._text.write(line)
+            self._write_event({"ts": now.isoformat(timespec="milliseconds"), "msg": msg, **fields})
+        if also_print and self.echo:
+            print(line)
+
+    def event(self, kind: str, **fields: Any) -> None:
+        """Только структурированная запись (без вывода в stdout)."""
+        with self._lock:
+            self._write_event({"ts": datetime.now().isoformat(timespec="milliseconds"), "event": kind, **fields})
+
+    def _write_event(self, record: dict[str, Any]) -> None:
+        if self._events_path is None:
+            return
+        if self._events is None:
+            self._events = BufferedWriter(self._events_path, self._flush_lines, self._flush_interval)
+        self._events.write(json.dumps(record, ensure_ascii=False, default=str))
+
+    def flush(self) -> None:
+        with self._lock:
+            for w in (self._text, self._events):
+                if w is not None:
+                    w.flush()
+
+    # --- метрики ------------------------------------------------------------
+
+    def count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Таймер фазы; вложенные фазы считаются каждая отдельно (время родителя включает детей)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                self.phases.setdefault(name, Timing()).add(ms)
+
+    @contextmanager
+    def http(self, provider: str, endpoint: str) -> Iterator[HttpCall]:
+        """Латентность/статус/ошибка вызова. Исключение учитывается и пробрасывается дальше."""
+        call = HttpCall()
+        t0 = time.perf_counter()
+        err: Optional[BaseException] = None
+        try:
+            yield call
+        except BaseException as e:
+            err = e
+            raise
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                st = self.http_stats.setdefault((provider, endpoint), HttpStats())
+                st.latency.add(ms)
+                st.bytes_in += call.nbytes
+                if err is not None:
+                    kind = error_kind(err)
+                    st.errors[kind] = st.errors.get(kind, 0) + 1
+                    if isinstance(err, urllib.error.HTTPError):
+                        st.statuses[str(err.code)] = st.statuses.get(str(err.code), 0) + 1
+                elif call.status is not None:
+                    st.statuses[str(call.status)] = st.statuses.get(str(call.status), 0) + 1
+
+    # --- сводка -------------------------------------------------------------
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "script": self.name,
+                "started_at": self._started_wall.isoformat(timespec="seconds"),
+                "wall_s": round(time.perf_counter() - self._t0, 3),
+                "phases": {k: v.summary() for k, v in self.phases.items()},
+                "counters": dict(self.counters),
+                "http": {f"{p} {e}": st.summary() for (p, e), st in sorted(self.http_stats.items())},
+                "profile": str(self.profile_out) if self.profile_out else None,
+            }
+
+    def print_summary(self, file: TextIO = sys.stdout) -> None:
+        s = self.summary()
+        print(f"\n{self.name}: {s['wall_s']:.1f} s", file=file)
+        if s["phases"]:
+            print(f"  {'phase':28} {'n':>7} {'total s':>9} {'share':>6} {'p50 ms':>9} {'p95 ms':>9}", file=file)
+            wall_ms = max(s["wall_s"] * 1000, 1e-9)
+            for name, p in sorted(s["phases"].items(), key=lambda kv: -kv[1]["total_ms"]):
+                print(
+                    f"  {name:28} {p['count']:7d} {p['total_ms'] / 1000:9.1f} {p['total_ms'] / wall_ms:6.1%} "
+                    f"{p['p50_ms']:9.1f} {p['p95_ms']:9.1f}",
+                    file=file,
+                )
+        if s["http"]:
+            print(f"  {'http':40} {'n':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  status/errors", file=file)
+            for key, h in s["http"].items():
+                n_err = sum(h["errors"].values())
+                extra = " ".join(f"{k}:{v}" for k, v in {**h["status"], **h["errors"]}.items())
+                print(
+                    f"  {key:40} {h['count']:7d} {n_err:5d} {h['p50_ms']:9.1f} {h['p95_ms']:9.1f} {h['p99_ms']:9.1f}  {extra}",
+                    file=file,
+                )
+        if s["counters"]:
+            print("  " + ", ".join(f"{k}={v:g}" for k, v in sorted(s["counters"].items())), file=file)
+
+
+def add_arguments(ap: argparse.ArgumentParser) -> None:
+    """--profile PATH, --metrics-out PATH, --events-out PATH."""
+    g = ap.add_argument_group("instrumentation")
+    g.add_argument("--profile", type=Path, nargs="?", const=Path("profile.pstats"), default=None,
+                   help="cProfile → PATH (.pstats, по умолчанию profile.pstats) + топ-25 по cumulative в stderr")
+    g.add_argument("--metrics-out", type=Path, default=None,
+                   help="Сводка фаз/счётчиков/HTTP-латентности в JSON при завершении")
+    g.add_argument("--events-out", type=Path, default=None, help="Структурированный лог событий (JSONL)")
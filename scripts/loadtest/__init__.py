@@ -0,0 +1,52 @@
+"""
+Нагрузочный тест слоя БД (PostgREST + Auth admin) — Python-версия scripts/supabase_stress_no_ai.js
+с составными сценариями, открытым циклом нагрузки и HDR-гистограммами.
+
+Точка входа: scripts/supabase_loadtest.py (см. docstring там).
+
+client/runner/report/scenarios импортируются лениво (им нужен requests): LatencyHistogram доступна
+без него — её использует scripts/edge_prober.py на stdlib.
+"""
+
+import importlib
+from typing import Any
+
+from .histogram import LatencyHistogram
+
+_LAZY = {
+    "RestClient": "client", "RestError": "client",
+    "build_report": "report", "compare": "report", "print_summary": "report", "write_report": "report",
+    "Context": "runner", "Scenario": "runner", "ScenarioResult": "runner", "SkipScenario": "runner",
+    "parse_spec": "runner", "run_scenario": "runner",
+    "DEFAULT_PLAN": "scenarios", "RUN_ID_RE": "scenarios", "SCENARIOS": "scenarios", "cleanup": "scenarios",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = [
+    "DEFAULT_PLAN",
+    "RUN_ID_RE",
+    "SCENARIOS",
+    "Context",
+    "LatencyHistogram",
+    "RestClient",
+    "RestError",
+    "Scenario",
+    "ScenarioResult",
+    "SkipScenario",
+    "build_report",
+    "cleanup",
+    "compare",
+    "parse_spec",
+    "print_summary",
+    "run_scenario",
+    "write_report",
+]
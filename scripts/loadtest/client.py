@@ -0,0 +1,140 @@
+"""
+Тонкий клиент PostgREST (/rest/v1) и Auth admin (/auth/v1/admin) поверх requests.
+
+Одна requests.Session на поток (пул соединений на поток — без гонок), ошибки HTTP
+поднимаются как RestError со статусом и сообщением PostgREST.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RestError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+    @property
+    def kind(self) -> str:
+        return f"http_{self.status}"
+
+
+class RestClient:
+    def __init__(self, base_url: str, key: str, timeout: float = 30.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.key = key
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        s = getattr(self._local, "session", None)
+        if s is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers.update({
+                "apikey": self.key,
+                "Authorization": f"Bearer {self.key}",
+                "Content-Type": "application/json",
+            })
+            self._local.session = s
+        return s
+
+    def _request(self, method: str, path: str, **kw: Any) -> requests.Response:
+        r = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kw)
+        if r.status_code >= 400:
+            try:
+                body = r.json()
+                msg = body.get("message") or body.get("msg") or body.get("error_description") or r.text
+            except ValueError:
+                msg = r.text
+            raise RestError(r.status_code, str(msg)[:300])
+        return r
+
+    # --- PostgREST ----------------------------------------------------------
+
+    def select(
+        self,
+        table: str,
+        params: Optional[dict[str, str]] = None,
+        range_: Optional[tuple[int, int]] = None,
+        count: bool = False,
+    ) -> tuple[list[dict], Optional[int]]:
+        """GET /rest/v1/<table>. Возвращает (строки, точный count при count=True)."""
+        headers = {}
+        if range_:
+            headers["Range"] = f"{range_[0]}-{range_[1]}"
+        if count:
+            headers["Prefer"] = "count=exact"
+        r = self._request("GET", f"/rest/v1/{table}", params=params or {}, headers=headers)
+        total = None
+        if count:
+            cr = r.headers.get("Content-Range", "")
+            tail = cr.rsplit("/", 1)[-1]
+            total = int(tail) if tail.isdigit() else None
+        return r.json(), total
+
+    def count(self, table: str, params: Optional[dict[str, str]] = None) -> Optional[int]:
+        """HEAD + Prefer: count=exact (как select('id', {count: 'exact', head: true}))."""
+        r = self._request(
+            "HEAD", f"/rest/v1/{table}", params={"select": "id", **(params or {})}, headers={"Prefer": "count=exact"}
+        )
+        tail = r.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+        return int(tail) if tail.isdigit() else None
+
+    def insert(self, table: str, rows: Any, returning: Optional[str] = None) -> list[dict]:
+        headers = {"Prefer": "return=representation" if returning else "return=minimal"}
+        params = {"select": returning} if returning else {}
+        r = self._request("POST", f"/rest/v1/{table}", json=rows, params=params, headers=headers)
+        return r.json() if returning else []
+
+    def update(self, table: str, values: dict, params: dict[str, str]) -> None:
+        self._request("PATCH", f"/rest/v1/{table}", json=values, params=params, headers={"Prefer": "return=minimal"})
+
+    def delete(self, table: str, params: dict[str, str]) -> None:
+        self._request("DELETE", f"/rest/v1/{table}", params=params, headers={"Prefer": "return=minimal"})
+
+    def list_columns(self, table: str) -> list[str]:
+        """Колонки по первой строке (как listColumns в supabase_stress_no_ai.js); [] — неизвестно."""
+        try:
+            rows, _ = self.select(table, {"select": "*", "limit": "1"})
+        except RestError:
+            return []
+        return list(rows[0].keys()) if rows else []
+
+    # --- Auth admin ---------------------------------------------------------
+
+    def create_user(self, email: str, password: str, metadata: dict) -> str:
+        r = self._request(
+            "POST",
+            "/auth/v1/admin/users",
+            json={"email": email, "password": password, "email_confirm": True, "user_metadata": metadata},
+        )
+        body = r.json()
+        uid = body.get("id") or (body.get("user") or {}).get("id")
+        if not uid:
+            raise RestError(r.status_code, "auth user id is missing")
+        return uid
+
+    def list_users(self, page: int, per_page: int = 200) -> list[dict]:
+        r = self._request("GET", "/auth/v1/admin/users", params={"page": page, "per_page": per_page})
+        body = r.json()
+        return body.get("users", []) if isinstance(body, dict) else body
+
+    def delete_user(self, uid: str) -> None:
+        self._request("DELETE", f"/auth/v1/admin/users/{uid}")
+
+
+def project(payload: dict, columns: list[str]) -> dict:
+    """Оставить только существующие колонки (projectToColumns из JS-скрипта)."""
+    if not columns:
+        return payload
+    return {k: v for k, v in payload.items() if k in columns}
@@ -0,0 +1,111 @@
+"""
+Гистограмма латентности в духе HdrHistogram: лог-линейные корзины с фиксированной
+относительной точностью (по умолчанию ~0.1%), O(1) на запись, память не растёт с числом замеров.
+
+Значения — микросекунды (int). Корзина: старший бит задаёт экспоненту, следующие
+`precision_bits` бит — линейную под-корзину; значение восстанавливается серединой корзины.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Iterable, Optional
+
+
+class LatencyHistogram:
+    def __init__(self, precision_bits: int = 10) -> None:
+        self.precision_bits = precision_bits
+        self._sub = 1 << precision_bits
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+        self._lock = threading.Lock()
+
+    # --- корзины ------------------------------------------------------------
+
+    def _index(self, v: int) -> int:
+        if v < self._sub:
+            return v
+        exp = v.bit_length() - self.precision_bits - 1
+        return ((exp + 1) << self.precision_bits) + ((v >> exp) - self._sub)
+
+    def _value(self, idx: int) -> int:
+        """Середина корзины (для точных корзин — само значение)."""
+        if idx < self._sub:
+            return idx
+        exp = (idx >> self.precision_bits) - 1
+        mantissa = (idx & (self._sub - 1)) + self._sub
+        lo = mantissa << exp
+        return lo + ((1 << exp) >> 1)
+
+    # --- запись -------------------------------------------------------------
+
+    def record(self, us: int) -> None:
+        us = max(0, int(us))
+        idx = self._index(us)
+        with self._lock:
+            self.counts[idx] = self.counts.get(idx, 0) + 1
+            self.count += 1
+            self.total_us += us
+            if self.min_us is None or us < self.min_us:
+                self.min_us = us
+            if us > self.max_us:
+                self.max_us = us
+
+    def record_ms(self, ms: float) -> None:
+        self.record(int(ms * 1000))
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        assert other.precision_bits == self.precision_bits
+        with self._lock:
+            for idx, n in other.counts.items():
+                self.counts[idx] = self.counts.get(idx, 0) + n
+            self.count += other.count
+            self.total_us += other.total_us
+            if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+                self.min_us = other.min_us
+            self.max_us = max(self.max_us, other.max_us)
+
+    # --- чтение -------------------------------------------------------------
+
+    def percentile_us(self, p: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(p * self.count / 100))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                return min(self._value(idx), self.max_us)
+        return self.max_us
+
+    def percentiles_ms(self, ps: Iterable[float] = (50, 90, 95, 99, 99.9)) -> dict[str, float]:
+        out = {f"p{p:g}": round(self.percentile_us(p) / 1000, 2) for p in ps}
+        out["mean"] = round(self.total_us / self.count / 1000, 2) if self.count else 0.0
+        out["min"] = round((self.min_us or 0) / 1000, 2)
+        out["max"] = round(self.max_us / 1000, 2)
+        return out
+
+    def to_dict(self) -> dict:
+        """Сериализуемый вид (для сохранения и слияния между прогонами)."""
+        return {
+            "precision_bits": self.precision_bits,
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "counts": {str(k): v for k, v in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "LatencyHistogram":
+        h = cls(d.get("precision_bits", 10))
+        h.counts = {int(k): v for k, v in d.get("counts", {}).items()}
+        h.count = d.get("count", 0)
+        h.total_us = d.get("total_us", 0)
+        h.min_us = d.get("min_us")
+        h.max_us = d.get("max_us", 0)
+        return h
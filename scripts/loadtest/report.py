@@ -0,0 +1,123 @@
+"""
+Отчёт прогона: JSON (полный, с гистограммами для слияния) + CSV (строка на сценарий)
+и сравнение двух прогонов.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from .runner import ScenarioResult
+
+CSV_FIELDS = (
+    "scenario", "mode", "ops", "ok", "failed", "dropped", "error_rate", "throughput_ops", "wall_s",
+    "p50_ms", "p90_ms", "p95_ms", "p99_ms", "p99.9_ms", "max_ms", "resp_p99_ms",
+)
+
+
+def scenario_summary(r: ScenarioResult) -> dict[str, Any]:
+    total = r.ok + r.failed
+    out: dict[str, Any] = {
+        "mode": r.mode,
+        "params": r.params,
+        "ops": total,
+        "ok": r.ok,
+        "failed": r.failed,
+        "dropped": r.dropped,
+        "error_rate": round(r.failed / total, 4) if total else 0.0,
+        "errors": dict(r.errors),
+        "error_samples": r.error_samples,
+        "wall_s": round(r.wall_s, 3),
+        "throughput_ops": round(total / r.wall_s, 2) if r.wall_s else 0.0,
+        "service_ms": r.service.percentiles_ms(),
+        "histogram": r.service.to_dict(),
+        "extra": r.extra,
+    }
+    if r.response is not None:
+        out["response_ms"] = r.response.percentiles_ms()
+    if r.skipped:
+        out["skipped"] = r.skipped
+    return out
+
+
+def build_report(meta: dict[str, Any], results: list[ScenarioResult]) -> dict[str, Any]:
+    return {**meta, "scenarios": {r.name: scenario_summary(r) for r in results}}
+
+
+def write_report(report: dict[str, Any], out_dir: Path) -> tuple[Path, Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    json_path = out_dir / f"{report['run_id']}.json"
+    csv_path = out_dir / f"{report['run_id']}.csv"
+    json_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    with csv_path.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        w.writeheader()
+        for name, s in report["scenarios"].items():
+            lat = s["service_ms"]
+            w.writerow({
+                "scenario": name,
+                "mode": s["mode"],
+                "ops": s["ops"],
+                "ok": s["ok"],
+                "failed": s["failed"],
+                "dropped": s["dropped"],
+                "error_rate": s["error_rate"],
+                "throughput_ops": s["throughput_ops"],
+                "wall_s": s["wall_s"],
+                "p50_ms": lat["p50"],
+                "p90_ms": lat["p90"],
+                "p95_ms": lat["p95"],
+                "p99_ms": lat["p99"],
+                "p99.9_ms": lat["p99.9"],
+                "max_ms": lat["max"],
+                "resp_p99_ms": (s.get("response_ms") or {}).get("p99", ""),
+            })
+    return json_path, csv_path
+
+
+def print_summary(report: dict[str, Any]) -> None:
+    print(f"\n{'scenario':32} {'mode':6} {'ops':>7} {'err%':>6} {'ops/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, s in report["scenarios"].items():
+        if s.get("skipped"):
+            print(f"{name:32} skipped: {s['skipped']}")
+            continue
+        lat = s["service_ms"]
+        line = (
+            f"{name:32} {s['mode']:6} {s['ops']:7d} {s['error_rate'] * 100:6.2f} {s['throughput_ops']:8.1f} "
+            f"{lat['p50']:8.1f} {lat['p95']:8.1f} {lat['p99']:8.1f} {lat['max']:8.1f}"
+        )
+        if "response_ms" in s:
+            line += f"  resp p99={s['response_ms']['p99']:.1f} dropped={s['dropped']}"
+        print(line)
+        for sample in s["error_samples"][:2]:
+            print(f"{'':32} ! {sample}")
+
+
+def compare(base: dict[str, Any], head: dict[str, Any], max_regress: Optional[float] = None) -> list[str]:
+    """Печать дельт p50/p95/p99/ops/s/ошибок по общим сценариям; возвращает список регрессий."""
+    regressions: list[str] = []
+    print(f"\n{base.get('run_id')} → {head.get('run_id')}")
+    for name, h in head["scenarios"].items():
+        b = base["scenarios"].get(name)
+        if not b or b.get("skipped") or h.get("skipped"):
+            continue
+        print(f"  {name}")
+        for p in ("p50", "p95", "p99"):
+            bv, hv = b["service_ms"][p], h["service_ms"][p]
+            delta = (hv - bv) / bv * 100 if bv else 0.0
+            flag = ""
+            if max_regress is not None and p != "p50" and delta > max_regress:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {p} {delta:+.1f}%")
+            print(f"    {p:4} {bv:9.1f} → {hv:9.1f} ms ({delta:+.1f}%){flag}")
+        bt, ht = b["throughput_ops"], h["throughput_ops"]
+        print(f"    ops/s {bt:8.1f} → {ht:8.1f} ({((ht - bt) / bt * 100) if bt else 0.0:+.1f}%)")
+        if h["error_rate"] > b["error_rate"]:
+            flag = "  REGRESSION" if max_regress is not None else ""
+            print(f"    error_rate {b['error_rate']:.2%} → {h['error_rate']:.2%}{flag}")
+            if flag:
+                regressions.append(f"{name} error_rate")
+    return regressions
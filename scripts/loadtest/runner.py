@@ -0,0 +1,200 @@
+"""
+Исполнение сценариев: закрытый цикл (N операций, C потоков) и открытый цикл
+(заданная интенсивность прихода, равномерно или по Пуассону, на время D).
+
+Открытый цикл не ждёт ответа перед следующим запросом: время отклика считается от
+запланированного момента старта (без coordinated omission), отдельно — время обслуживания.
+Если в полёте уже max_inflight запросов, приход отбрасывается и считается в dropped.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+import traceback
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from .client import RestClient, RestError
+from .histogram import LatencyHistogram
+
+
+class SkipScenario(Exception):
+    """Сценарий неприменим (нет колонки/таблицы/данных) — пропуск, не ошибка прогона."""
+
+
+@dataclass
+class Context:
+    client: RestClient
+    run_id: str
+    langs: list[str]
+    seed: int = 0
+    state: dict[str, Any] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def require(self, *keys: str) -> None:
+        missing = [k for k in keys if not self.state.get(k)]
+        if missing:
+            raise SkipScenario(f"нет {', '.join(missing)} — добавьте предшествующие сценарии в план")
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    op: Callable[[Context, dict, int, random.Random], Optional[dict]]
+    prepare: Optional[Callable[[Context, dict], None]] = None
+    defaults: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    mode: str
+    params: dict[str, Any]
+    service: LatencyHistogram = field(default_factory=LatencyHistogram)
+    response: Optional[LatencyHistogram] = None
+    ok: int = 0
+    failed: int = 0
+    dropped: int = 0
+    errors: Counter = field(default_factory=Counter)
+    error_samples: list[str] = field(default_factory=list)
+    wall_s: float = 0.0
+    skipped: Optional[str] = None
+    extra: dict[str, Any] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, service_ms: float, response_ms: Optional[float], error: Optional[BaseException],
+               extra: Optional[dict] = None) -> None:
+        self.service.record_ms(service_ms)
+        if response_ms is not None and self.response is not None:
+            self.response.record_ms(response_ms)
+        with self._lock:
+            if error is None:
+                self.ok += 1
+                for k, v in (extra or {}).items():
+                    if isinstance(v, (int, float)):
+                        self.extra[k] = self.extra.get(k, 0) + v
+            else:
+                self.failed += 1
+                kind = error.kind if isinstance(error, RestError) else type(error).__name__
+                self.errors[kind] += 1
+                if len(self.error_samples) < 5:
+                    self.error_samples.append(str(error)[:200])
+
+
+def parse_spec(spec: str) -> tuple[str, dict[str, Any]]:
+    """"read_probe:rate=50,duration=30" → ("read_probe", {"rate": 50, "duration": 30})."""
+    name, _, rest = spec.partition(":")
+    params: dict[str, Any] = {}
+    for part in rest.split(","):
+        if not part.strip():
+            continue
+        k, _, v = part.partition("=")
+        v = v.strip()
+        try:
+            params[k.strip()] = int(v)
+        except ValueError:
+            try:
+                params[k.strip()] = float(v)
+            except ValueError:
+                params[k.strip()] = v
+    return name.strip(), params
+
+
+def _seed(ctx: Context, sc: Scenario) -> int:
+    # crc32, а не hash(): hash строк зависит от PYTHONHASHSEED.
+    return zlib.crc32(f"{ctx.seed}:{sc.name}".encode())
+
+
+def _timed(ctx: Context, sc: Scenario, params: dict, i: int, rng: random.Random, result: ScenarioResult,
+           intended: Optional[float]) -> None:
+    t0 = time.perf_counter()
+    err: Optional[BaseException] = None
+    extra = None
+    try:
+        extra = sc.op(ctx, params, i, rng)
+    except SkipScenario:
+        raise
+    except Exception as e:  # noqa: BLE001 — нагрузочный тест считает любые ошибки
+        err = e
+        if not isinstance(e, RestError) and len(result.error_samples) < 1:
+            traceback.print_exc()
+    t1 = time.perf_counter()
+    result.record((t1 - t0) * 1000, (t1 - intended) * 1000 if intended is not None else None, err, extra)
+
+
+def run_scenario(ctx: Context, sc: Scenario, overrides: dict[str, Any]) -> ScenarioResult:
+    params = {**sc.defaults, **overrides}
+    open_loop = "rate" in params
+    result = ScenarioResult(sc.name, "open" if open_loop else "closed", params)
+    if open_loop:
+        result.response = LatencyHistogram()
+    try:
+        if sc.prepare:
+            sc.prepare(ctx, params)
+        t0 = time.perf_counter()
+        if open_loop:
+            _run_open(ctx, sc, params, result)
+        else:
+            _run_closed(ctx, sc, params, result)
+        result.wall_s = time.perf_counter() - t0
+    except SkipScenario as e:
+        result.skipped = str(e)
+    return result
+
+
+def _run_closed(ctx: Context, sc: Scenario, params: dict, result: ScenarioResult) -> None:
+    ops = int(params.get("ops", 1))
+    concurrency = max(1, int(params.get("concurrency", 1)))
+    base_seed = _seed(ctx, sc)
+
+    def task(i: int) -> None:
+        _timed(ctx, sc, params, i, random.Random(base_seed + i), result, None)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for f in [pool.submit(task, i) for i in range(ops)]:
+            f.result()
+
+
+def _run_open(ctx: Context, sc: Scenario, params: dict, result: ScenarioResult) -> None:
+    rate = float(params["rate"])
+    duration = float(params.get("duration", 10))
+    arrival = str(params.get("arrival", "poisson"))
+    max_inflight = max(1, int(params.get("max_inflight", max(8, int(rate)))))
+    base_seed = _seed(ctx, sc)
+    sched_rng = random.Random(base_seed)
+    inflight = threading.BoundedSemaphore(max_inflight)
+
+    def task(i: int, intended: float) -> None:
+        try:
+            _timed(ctx, sc, params, i, random.Random(base_seed + i), result, intended)
+        finally:
+            inflight.release()
+
+    start = time.perf_counter()
+    next_at = start
+    i = 0
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        while True:
+            gap = sched_rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+            next_at += gap
+            if next_at - start >= duration:
+                break
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not inflight.acquire(blocking=False):
+                result.dropped += 1
+                continue
+            futures.append(pool.submit(task, i, next_at))
+            i += 1
+        for f in futures:
+            f.result()
+    result.extra["target_rate"] = rate
+    result.extra["scheduled"] = i + result.dropped
@@ -0,0 +1,357 @@
+"""
+Сценарии нагрузки. Первые шесть повторяют фазы scripts/supabase_stress_no_ai.js
+(establishment → employees → tech_cards → inventories → language_churn → read_probe),
+остальные добавляют горячие пути приложения: поиск продуктов, постраничная номенклатура
+заведения, заказы POS, журналы ХАССП.
+
+Все записи помечаются run_id: имя заведения «[STRESS <run_id>] …», e-mail
+stress+<run_id>+empNNN@example.invalid, comment/payload с run_id. Всё, кроме auth-пользователей,
+висит на заведении с ON DELETE CASCADE — cleanup() удаляет заведение и пользователей.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import re
+from typing import Optional
+
+from .client import RestClient, RestError, project
+from .runner import Context, Scenario, SkipScenario
+
+RUN_ID_RE = re.compile(r"^stress_\d{14}$")
+
+SEARCH_TERMS = (
+    "мол", "сыр", "кур", "говяд", "карт", "лук", "масло", "соль", "сахар", "мука",
+    "milk", "cheese", "chicken", "beef", "potato", "onion", "butter", "salt", "sugar", "flour",
+)
+
+
+def _name_prefix(run_id: str) -> str:
+    return f"[STRESS {run_id}]"
+
+
+# --- фазы из supabase_stress_no_ai.js ----------------------------------------
+
+
+def op_establishment(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    pin = str(rng.randint(100000, 999999))
+    row = ctx.client.insert(
+        "establishments",
+        {
+            "name": f"{_name_prefix(ctx.run_id)} Load Test Establishment",
+            "pin_code": pin,
+            "address": "Load test synthetic address",
+            "phone": "+0000000000",
+            "email": f"stress-{ctx.run_id}@example.invalid",
+        },
+        returning="id,name,pin_code",
+    )[0]
+    ctx.state["establishment_id"] = row["id"]
+    return {}
+
+
+def prepare_employees(ctx: Context, params: dict) -> None:
+    ctx.require("establishment_id")
+    ctx.state["employee_columns"] = ctx.client.list_columns("employees")
+    ctx.state.setdefault("employee_ids", [])
+
+
+def op_employee(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    email = f"stress+{ctx.run_id}+emp{i:03d}@example.invalid"
+    uid = ctx.client.create_user(
+        email, f"StressPass!{i:04d}x", {"stress_test": True, "run_id": ctx.run_id, "index": i}
+    )
+    payload = {
+        "id": uid,
+        "auth_user_id": uid,
+        "full_name": f"Stress Employee {i}",
+        "surname": f"Synthetic {i}",
+        "email": email,
+        "password_hash": None,
+        "department": "kitchen" if i % 2 == 0 else "service",
+        "section": "cold" if i % 3 == 0 else "hot",
+        "roles": ["owner"] if i == 0 else ["staff"],
+        "establishment_id": ctx.state["establishment_id"],
+        "personal_pin": str(100000 + (i % 900000)).zfill(6),
+        "preferred_language": ctx.langs[i % len(ctx.langs)] if ctx.langs else "en",
+        "is_active": True,
+        "data_access_enabled": True,
+    }
+    ctx.client.insert("employees", project(payload, ctx.state["employee_columns"]))
+    with ctx.lock:
+        ctx.state["employee_ids"].append(uid)
+        if i == 0 or not ctx.state.get("created_by"):
+            ctx.state["created_by"] = uid
+    return {}
+
+
+def prepare_tech_cards(ctx: Context, params: dict) -> None:
+    ctx.require("establishment_id", "created_by")
+    ctx.state["tech_card_columns"] = ctx.client.list_columns("tech_cards")
+    ctx.state.setdefault("tech_card_ids", [])
+    params["ops"] = math.ceil(int(params["count"]) / int(params["batch"]))
+
+
+def op_tech_cards_batch(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    batch, count = int(params["batch"]), int(params["count"])
+    prefix = _name_prefix(ctx.run_id)
+    rows = []
+    for x in range(i * batch, min((i + 1) * batch, count)):
+        lang = ctx.langs[x % len(ctx.langs)] if ctx.langs else "en"
+        rows.append(project({
+            "dish_name": f"{prefix} Dish {x + 1}",
+            "dish_name_localized": {lang: f"{prefix} Dish {x + 1} ({lang})"},
+            "category": "load_test",
+            "portion_weight": 100 + (x % 50),
+            "yield": 80 + (x % 20),
+            "technology": "Synthetic non-AI content for DB load test.",
+            "comment": f"run_id={ctx.run_id}",
+            "card_type": "dish",
+            "base_portions": 1,
+            "establishment_id": ctx.state["establishment_id"],
+            "created_by": ctx.state["created_by"],
+        }, ctx.state["tech_card_columns"]))
+    ids = ctx.client.insert("tech_cards", rows, returning="id")
+    with ctx.lock:
+        ctx.state["tech_card_ids"].extend(r["id"] for r in ids)
+    return {"rows": len(rows)}
+
+
+def op_inventories(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    ctx.require("establishment_id", "created_by")
+    count, items = int(params["count"]), int(params["items"])
+    rows = [
+        {
+            "establishment_id": ctx.state["establishment_id"],
+            "created_by_employee_id": ctx.state["created_by"],
+            "recipient_chef_id": ctx.state["created_by"],
+            "recipient_email": f"inventory+{ctx.run_id}+{n}@example.invalid",
+            "payload": {
+                "run_id": ctx.run_id,
+                "synthetic": True,
+                "inventory_index": n + 1,
+                "items": [{"sku": f"LOAD-{n + 1}-{j + 1}", "qty": (j % 7) + 1, "unit": "pcs"} for j in range(items)],
+            },
+        }
+        for n in range(count)
+    ]
+    ctx.client.insert("inventory_documents", rows)
+    return {"rows": count}
+
+
+def prepare_language_churn(ctx: Context, params: dict) -> None:
+    ctx.require("establishment_id")
+    cols = ctx.state.get("employee_columns") or ctx.client.list_columns("employees")
+    if cols and "preferred_language" not in cols:
+        raise SkipScenario("preferred_language column missing")
+    rows, _ = ctx.client.select(
+        "employees", {"select": "id", "establishment_id": f"eq.{ctx.state['establishment_id']}", "limit": "1000"}
+    )
+    ids = [r["id"] for r in rows if r.get("id")]
+    if not ids:
+        raise SkipScenario("no employees found")
+    ctx.state["churn_ids"] = ids
+
+
+def op_language_switch(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    ids = ctx.state["churn_ids"]
+    ctx.client.update(
+        "employees",
+        {"preferred_language": ctx.langs[(i + 1) % len(ctx.langs)] if ctx.langs else "en"},
+        {"id": f"eq.{ids[i % len(ids)]}", "establishment_id": f"eq.{ctx.state['establishment_id']}"},
+    )
+    return {}
+
+
+def op_read_probe(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    ctx.require("establishment_id")
+    ctx.client.count("tech_cards", {"establishment_id": f"eq.{ctx.state['establishment_id']}"})
+    return {}
+
+
+# --- новые сценарии ---------------------------------------------------------
+
+
+def op_product_search(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    """Поиск по общему справочнику (только чтение, ничего не создаёт)."""
+    term = rng.choice(SEARCH_TERMS)
+    rows, _ = ctx.client.select(
+        "products",
+        {"select": "id,name,category", "name": f"ilike.*{term}*", "order": "name", "limit": str(params["limit"])},
+    )
+    return {"rows": len(rows)}
+
+
+def prepare_establishment_products(ctx: Context, params: dict) -> None:
+    ctx.require("establishment_id")
+    rows, _ = ctx.client.select("products", {"select": "id", "order": "id", "limit": str(params["count"])})
+    if not rows:
+        raise SkipScenario("products is empty")
+    ctx.state["product_ids"] = [r["id"] for r in rows]
+    params["ops"] = math.ceil(len(rows) / int(params["batch"]))
+
+
+def op_establishment_products_batch(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    batch = int(params["batch"])
+    ids = ctx.state["product_ids"][i * batch:(i + 1) * batch]
+    ctx.client.insert("establishment_products", [
+        {
+            "establishment_id": ctx.state["establishment_id"],
+            "product_id": pid,
+            "price": round(rng.uniform(50, 2000), 2),
+            "currency": "RUB",
+        }
+        for pid in ids
+    ])
+    return {"rows": len(ids)}
+
+
+def op_establishment_products_page(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    ctx.require("establishment_id")
+    size = int(params["page_size"])
+    total = ctx.state.get("establishment_products_total")
+    page = rng.randrange(max(1, math.ceil((total or size) / size)))
+    rows, count = ctx.client.select(
+        "establishment_products",
+        {
+            "select": "product_id,price,currency",
+            "establishment_id": f"eq.{ctx.state['establishment_id']}",
+            "order": "product_id",
+        },
+        range_=(page * size, page * size + size - 1),
+        count=total is None,
+    )
+    if count is not None:
+        ctx.state["establishment_products_total"] = count
+    return {"rows": len(rows)}
+
+
+def prepare_pos_orders(ctx: Context, params: dict) -> None:
+    ctx.require("establishment_id", "tech_card_ids")
+    if ctx.state.get("pos_table_ids"):
+        return
+    tables = ctx.client.insert(
+        "pos_dining_tables",
+        [
+            {"establishment_id": ctx.state["establishment_id"], "table_number": n + 1, "sort_order": n,
+             "floor_name": f"STRESS {ctx.run_id}"}
+            for n in range(int(params["tables"]))
+        ],
+        returning="id",
+    )
+    ctx.state["pos_table_ids"] = [t["id"] for t in tables]
+
+
+def op_pos_order(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    """Цикл заказа: черновик → строки → выборка активных (как PosOrderService) → закрытие."""
+    est = ctx.state["establishment_id"]
+    order = ctx.client.insert(
+        "pos_orders",
+        {"establishment_id": est, "dining_table_id": rng.choice(ctx.state["pos_table_ids"]),
+         "guest_count": rng.randint(1, 6), "status": "draft"},
+        returning="id",
+    )[0]
+    lines = [
+        {"order_id": order["id"], "tech_card_id": rng.choice(ctx.state["tech_card_ids"]),
+         "quantity": rng.randint(1, 3), "course_number": 1, "sort_order": n}
+        for n in range(rng.randint(1, int(params["max_lines"])))
+    ]
+    ctx.client.insert("pos_order_lines", lines)
+    ctx.client.update("pos_orders", {"status": "sent"}, {"id": f"eq.{order['id']}"})
+    active, _ = ctx.client.select(
+        "pos_orders",
+        {
+            "select": "id,status,guest_count,created_at,pos_order_lines(quantity,served_at,tech_cards(category,sections,selling_price))",
+            "establishment_id": f"eq.{est}",
+            "status": "in.(draft,sent)",
+            "order": "created_at.desc",
+        },
+    )
+    ctx.client.update("pos_orders", {"status": "closed"}, {"id": f"eq.{order['id']}"})
+    return {"lines": len(lines), "active_seen": len(active)}
+
+
+def op_haccp_log(ctx: Context, params: dict, i: int, rng: random.Random) -> dict:
+    """Запись замера холодильника + чтение последних записей журнала (как HaccpLogServiceSupabase)."""
+    ctx.require("establishment_id", "created_by")
+    est = ctx.state["establishment_id"]
+    ctx.client.insert("haccp_numeric_logs", {
+        "establishment_id": est,
+        "created_by_employee_id": ctx.state["created_by"],
+        "log_type": "fridge_temperature",
+        "value1": round(rng.uniform(1, 6), 1),
+        "equipment": f"Fridge {rng.randint(1, 5)}",
+        "note": f"run_id={ctx.run_id}",
+    })
+    rows, _ = ctx.client.select("haccp_numeric_logs", {
+        "select": "*",
+        "establishment_id": f"eq.{est}",
+        "log_type": "eq.fridge_temperature",
+        "order": "created_at.desc",
+        "limit": str(params["read_limit"]),
+    })
+    return {"rows": len(rows)}
+
+
+SCENARIOS: dict[str, Scenario] = {
+    s.name: s
+    for s in (
+        Scenario("establishment", "Создать синтетическое заведение", op_establishment, defaults={"ops": 1}),
+        Scenario("employees", "Auth-пользователи + employees", op_employee, prepare_employees,
+                 {"ops": 100, "concurrency": 8}),
+        Scenario("tech_cards", "Пакетная вставка tech_cards", op_tech_cards_batch, prepare_tech_cards,
+                 {"count": 1000, "batch": 100, "concurrency": 1}),
+        Scenario("inventories", "inventory_documents одним insert", op_inventories, defaults={"ops": 1, "count": 10, "items": 30}),
+        Scenario("language_churn", "Смена preferred_language сотрудников", op_language_switch, prepare_language_churn,
+                 {"ops": 300, "concurrency": 8}),
+        Scenario("read_probe", "count(tech_cards) заведения", op_read_probe, defaults={"ops": 60, "concurrency": 8}),
+        Scenario("product_search", "ilike-поиск по products", op_product_search, defaults={"ops": 200, "concurrency": 8, "limit": 20}),
+        Scenario("establishment_products", "Номенклатура заведения (вставка)", op_establishment_products_batch,
+                 prepare_establishment_products, {"count": 1000, "batch": 200, "concurrency": 2}),
+        Scenario("establishment_products_paging", "Постраничное чтение номенклатуры", op_establishment_products_page,
+                 defaults={"ops": 200, "concurrency": 8, "page_size": 100}),
+        Scenario("pos_orders", "Заказ POS: черновик → строки → активные → закрытие", op_pos_order, prepare_pos_orders,
+                 {"ops": 100, "concurrency": 4, "tables": 20, "max_lines": 4}),
+        Scenario("haccp_logs", "Запись и чтение haccp_numeric_logs", op_haccp_log,
+                 defaults={"ops": 200, "concurrency": 4, "read_limit": 50}),
+    )
+}
+
+# План по умолчанию — те же фазы, что у supabase_stress_no_ai.js.
+DEFAULT_PLAN = ("establishment", "employees", "tech_cards", "inventories", "language_churn", "read_probe")
+
+
+def cleanup(client: RestClient, run_id: str) -> dict:
+    """Удалить всё, что создал прогон run_id. Отказывает для id не вида stress_YYYYMMDDhhmmss."""
+    if not RUN_ID_RE.match(run_id or ""):
+        raise ValueError(f"run_id должен быть вида stress_YYYYMMDDhhmmss, получено {run_id!r}")
+    rows, _ = client.select("establishments", {"select": "id,name", "name": f"like.{_name_prefix(run_id)}*"})
+    deleted = 0
+    for row in rows:
+        if not row["name"].startswith(_name_prefix(run_id)):
+            continue
+        client.delete("establishments", {"id": f"eq.{row['id']}"})
+        deleted += 1
+
+    marker = f"stress+{run_id.lower()}+"
+    to_delete: list[str] = []
+    page = 1
+    while True:
+        users = client.list_users(page)
+        if not users:
+            break
+        to_delete.extend(u["id"] for u in users if marker in (u.get("email") or "").lower())
+        page += 1
+    removed = 0
+    errors: list[str] = []
+    for uid in to_delete:
+        try:
+            client.delete_user(uid)
+            removed += 1
+        except RestError as e:
+            errors.append(str(e))
+    out: dict[str, Optional[object]] = {"deletedEstablishments": deleted, "removedUsers": removed}
+    if errors:
+        out["userErrors"] = errors[:5]
+    return out
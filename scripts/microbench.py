@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарки чистых Python-функций сервисных скриптов (без сети и БД) на
+детерминированных синтетических входах масштаба 10^3 / 10^4 / 10^5.
+
+Функции:
+  find_kbju              scripts/ttk_add_kbju.py            (словарь растёт с N, 1000 поисков)
+  apply_category_rules   scripts/backfill_nutrition_from_off.py
+  search_terms_for       scripts/backfill_nutrition_from_off.py
+  match_score            scripts/backfill_nutrition_from_off.py
+  clean_name             scripts/clean_product_names.py
+  convert_formula        scripts/numbers_to_google_formulas.py
+  parse_ingredient       scripts/recipe_nlg_to_ttk.py (_parse_ingredient, кэш сбрасывается на каждом повторе)
+  parse_ingredient_hot   то же, 10% уникальных строк — работа LRU-кэша
+  gap_keys_mt            restodocks_flutter/scripts/i18n_fill_from_ru_mt.py (нужен deep-translator)
+  gap_keys_kk            restodocks_flutter/scripts/i18n_deepl_kk_gaps.py (нужен requests)
+
+Для каждого масштаба — минимум и медиана из --repeat прогонов, нс/оп и показатель роста
+(наклон log(нс/оп) по log N между соседними масштабами: ~0 — O(1) на операцию, ~1 — O(N)).
+Бенчмарк, модуль которого не импортируется (нет зависимости), помечается skipped.
+
+Базовая линия хранится в scripts/bench_baselines/microbench.json (перезапись: run --save-baseline).
+Сравнение — по минимальному времени; регрессия, если нс/оп выросло больше --max-regress %
+и больше чем на --min-delta-ns (шум таймера на быстрых функциях).
+
+  python3 scripts/microbench.py list
+  python3 scripts/microbench.py run                                  # 10^3,10^4,10^5 → вывод + сравнение с базой
+  python3 scripts/microbench.py run --only find_kbju,clean_name --scales 1000,10000
+  python3 scripts/microbench.py run --out /tmp/head.json --no-compare
+  python3 scripts/microbench.py compare scripts/bench_baselines/microbench.json /tmp/head.json --max-regress 25
+  python3 scripts/microbench.py run --save-baseline                  # после осознанного изменения
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import importlib
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = ROOT / "scripts"
+FLUTTER_SCRIPTS_DIR = ROOT / "restodocks_flutter" / "scripts"
+BASELINE_PATH = SCRIPTS_DIR / "bench_baselines" / "microbench.json"
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+
+for _p in (SCRIPTS_DIR, FLUTTER_SCRIPTS_DIR):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+# clean_product_names.py завершает процесс без ключа при импорте; сеть бенчмарк не трогает.
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "microbench-offline")
+
+
+# --- синтетические входы ----------------------------------------------------
+
+RU_WORDS = [
+    "молоко", "сливки", "сметана", "кефир", "масло", "сливочное", "сахар", "соль", "мука", "пшеничная",
+    "говядина", "вырезка", "свинина", "шейка", "курица", "филе", "бедро", "лосось", "треска", "креветки",
+    "картофель", "морковь", "лук", "репчатый", "чеснок", "томаты", "огурцы", "перец", "болгарский",
+    "шампиньоны", "шпинат", "укроп", "петрушка", "базилик", "сыр", "пармезан", "моцарелла", "яйцо",
+    "рис", "гречка", "макароны", "шоколад", "темный", "вода", "питьевая", "уксус", "горчица", "мёд",
+]
+EN_WORDS = [
+    "milk", "cream", "butter", "sugar", "salt", "flour", "beef", "tenderloin", "pork", "chicken", "breast",
+    "salmon", "shrimp", "potato", "carrot", "onion", "garlic", "tomato", "cucumber", "pepper", "mushroom",
+    "spinach", "dill", "basil", "cheese", "parmesan", "egg", "rice", "pasta", "chocolate", "dark", "water",
+    "extract", "powder", "soda", "almond", "vanilla", "lemon", "juice", "oil", "olive", "vinegar",
+]
+UNITS = ["cup", "cups", "tablespoons", "tbsp.", "teaspoon", "tsp.", "oz.", "lb.", "g", "kg", "ml", "pinch", "can"]
+AMOUNTS = ["1", "2", "1/2", "1 1/2", "3/4", "250", "1.5", "2-3", "1 (8 oz.)"]
+LANGS = ("ru", "en", "kk", "de")
+
+
+def _name(rng: random.Random, words: list[str], lo: int = 1, hi: int = 4) -> str:
+    return " ".join(rng.choice(words) for _ in range(rng.randint(lo, hi)))
+
+
+def gen_product_names(n: int, rng: random.Random) -> list[str]:
+    """Названия как в каталоге: регистр, проценты, «Т.» в начале, «VND» в конце, табы."""
+    out = []
+    for _ in range(n):
+        s = _name(rng, RU_WORDS if rng.random() < 0.7 else EN_WORDS)
+        r = rng.random()
+        if r < 0.2:
+            s += f" {rng.choice(['3.2', '2,5', '20', '33', '82.5'])}%"
+        if rng.random() < 0.15:
+            s = rng.choice(["Т. ", "т.", "T. "]) + s
+        if rng.random() < 0.15:
+            s += rng.choice([" VND", "\tVND", "  vnd "])
+        if rng.random() < 0.3:
+            s = s.capitalize()
+        out.append(s)
+    return out
+
+
+def gen_products(n: int, rng: random.Random) -> list[dict]:
+    names = gen_product_names(n, rng)
+    out = []
+    for s in names:
+        p: dict[str, Any] = {"name": s}
+        if rng.random() < 0.6:
+            p["names"] = {"ru": s, "en": _name(rng, EN_WORDS, 1, 3) if rng.random() < 0.7 else ""}
+        out.append(p)
+    return out
+
+
+def gen_formulas(n: int, rng: random.Random) -> list[str]:
+    sheets = ["Sheet 1", "Sheet 2", "Продукты", "ТТК 1", "Calc"]
+    tables = ["Table 1", "Table 2", "Таблица 1"]
+    out = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rng.randint(1, 4)):
+            cell = f"{rng.choice('ABCDEFGH')}{rng.randint(1, 500)}"
+            kind = rng.random()
+            if kind < 0.4:
+                parts.append(f"{rng.choice(sheets)}::{rng.choice(tables)}::{cell}")
+            elif kind < 0.55:
+                parts.append(f"'{rng.choice(sheets)}'::'{rng.choice(tables)}'::{cell}")
+            elif kind < 0.75:
+                parts.append(f"{rng.choice(tables)}::{cell}")
+            else:
+                parts.append(cell)
+        f = "=" + rng.choice(["+", "*", "-", "/"]).join(parts)
+        if rng.random() < 0.3:
+            f = f"=SUM({f[1:]})"
+        out.append(f if rng.random() > 0.05 else "plain text")
+    return out
+
+
+def gen_ingredients(n: int, rng: random.Random, unique_share: float = 1.0) -> list[str]:
+    pool_size = max(1, int(n * unique_share))
+    pool = []
+    for i in range(pool_size):
+        s = f"{rng.choice(AMOUNTS)} {rng.choice(UNITS)} {_name(rng, EN_WORDS, 1, 3)}"
+        if rng.random() < 0.3:
+            s += f", {rng.choice(['chopped', 'diced', 'softened', 'to taste'])}"
+        if rng.random() < 0.1:
+            s = _name(rng, EN_WORDS, 1, 2)
+        pool.append(f"{s} #{i}" if unique_share >= 1.0 else s)
+    return [pool[rng.randrange(pool_size)] for _ in range(n)] if unique_share < 1.0 else pool
+
+
+def gen_kbju_dict(n: int, rng: random.Random) -> dict[str, dict]:
+    out: dict[str, dict] = {}
+    for i, s in enumerate(gen_product_names(n, rng)):
+        key = f"{s.lower().strip()} {i}" if rng.random() < 0.5 else s.lower().strip()
+        out.setdefault(key, {"calories": rng.randint(0, 900), "protein": 1.0, "fat": 1.0, "carbs": 1.0})
+    return out
+
+
+def gen_locales(n: int, rng: random.Random) -> dict[str, dict[str, str]]:
+    prefixes = ["settings_", "inventory_", "checklist_", "menu_", "misc_", "haccp_", "role_", "x_"]
+    data: dict[str, dict[str, str]] = {lang: {} for lang in LANGS}
+    for i in range(n):
+        k = f"{rng.choice(prefixes)}{i}"
+        en = f"Label {i} {rng.choice(EN_WORDS)}"
+        ru = en if rng.random() < 0.1 else f"Метка {i} {rng.choice(RU_WORDS)}"
+        data["en"][k] = en
+        data["ru"][k] = ru
+        for lang in ("kk", "de"):
+            data[lang][k] = en if rng.random() < 0.3 else f"{lang}:{i}"
+    return data
+
+
+# --- бенчмарки --------------------------------------------------------------
+
+
+@dataclass
+class Bench:
+    name: str
+    module: str
+    description: str
+    # (модуль, N, rng) → (функция без аргументов, число операций, reset перед повтором или None)
+    setup: Callable[[Any, int, random.Random], tuple[Callable[[], Any], int, Optional[Callable[[], None]]]]
+
+
+def _loop(fn: Callable, items: list) -> Callable[[], None]:
+    def run() -> None:
+        for x in items:
+            fn(x)
+    return run
+
+
+def _setup_find_kbju(m, n, rng):
+    kbju = gen_kbju_dict(n, rng)
+    keys = list(kbju)
+    lookups = []
+    for _ in range(1000):
+        r = rng.random()
+        if r < 0.4:
+            lookups.append(rng.choice(keys).upper())                       # точное совпадение
+        elif r < 0.6:
+            lookups.append("пф " + rng.choice(keys))                       # префикс «пф»
+        elif r < 0.8:
+            lookups.append(rng.choice(keys).split()[0] + " особый")        # первое слово
+        else:
+            lookups.append(f"неизвестный продукт {rng.randint(0, 10**6)}")  # промах → полный перебор
+    return (lambda: [m.find_kbju(kbju, s) for s in lookups]), len(lookups), None
+
+
+def _setup_category_rules(m, n, rng):
+    return _loop(m.apply_category_rules, gen_products(n, rng)), n, None
+
+
+def _setup_search_terms(m, n, rng):
+    return _loop(m.search_terms_for, gen_products(n, rng)), n, None
+
+
+def _setup_match_score(m, n, rng):
+    pairs = [(_name(rng, EN_WORDS + RU_WORDS, 1, 3), _name(rng, EN_WORDS + RU_WORDS, 2, 6), rng.uniform(0, 300))
+             for _ in range(n)]
+
+    def run() -> None:
+        for s, p, k in pairs:
+            m.match_score(s, p, k)
+    return run, n, None
+
+
+def _setup_clean_name(m, n, rng):
+    return _loop(m.clean_name, gen_product_names(n, rng)), n, None
+
+
+def _setup_convert_formula(m, n, rng):
+    return _loop(m.convert_formula, gen_formulas(n, rng)), n, None
+
+
+def _setup_parse_ingredient(m, n, rng):
+    items = gen_ingredients(n, rng, 1.0)
+    return _loop(m._parse_ingredient, items), n, (lambda: m.set_ingredient_cache_size(m.INGREDIENT_CACHE_SIZE))
+
+
+def _setup_parse_ingredient_hot(m, n, rng):
+    items = gen_ingredients(n, rng, 0.1)
+    return _loop(m._parse_ingredient, items), n, (lambda: m.set_ingredient_cache_size(m.INGREDIENT_CACHE_SIZE))
+
+
+def _setup_gap_keys_mt(m, n, rng):
+    data = gen_locales(n, rng)
+    return (lambda: (m.gap_keys(data, "de", False), m.gap_keys(data, "kk", True))), 2 * n, None
+
+
+def _setup_gap_keys_kk(m, n, rng):
+    data = gen_locales(n, rng)
+    return (lambda: (m.gap_keys(data, None), m.gap_keys(data, "settings_"))), 2 * n, None
+
+
+BENCHES = {
+    b.name: b
+    for b in (
+        Bench("find_kbju", "ttk_add_kbju", "словарь N записей, 1000 поисков (40% точных, 20% промахов)", _setup_find_kbju),
+        Bench("apply_category_rules", "backfill_nutrition_from_off", "N продуктов × CATEGORY_RULES", _setup_category_rules),
+        Bench("search_terms_for", "backfill_nutrition_from_off", "N продуктов с names ru/en", _setup_search_terms),
+        Bench("match_score", "backfill_nutrition_from_off", "N пар (запрос, название)", _setup_match_score),
+        Bench("clean_name", "clean_product_names", "N названий с Т./VND", _setup_clean_name),
+        Bench("convert_formula", "numbers_to_google_formulas", "N формул Numbers", _setup_convert_formula),
+        Bench("parse_ingredient", "recipe_nlg_to_ttk", "N уникальных строк (холодный кэш)", _setup_parse_ingredient),
+        Bench("parse_ingredient_hot", "recipe_nlg_to_ttk", "N строк, 10% уникальных (LRU)", _setup_parse_ingredient_hot),
+        Bench("gap_keys_mt", "i18n_fill_from_ru_mt", "N ключей × 4 локали, de + kk priority", _setup_gap_keys_mt),
+        Bench("gap_keys_kk", "i18n_deepl_kk_gaps", "N ключей × 4 локали, все + prefix", _setup_gap_keys_kk),
+    )
+}
+
+
+def load_module(name: str) -> tuple[Optional[Any], Optional[str]]:
+    try:
+        return importlib.import_module(name), None
+    except SystemExit:
+        return None, "модуль завершил процесс при импорте (нет зависимости?)"
+    except ImportError as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def time_once(fn: Callable[[], Any], reset: Optional[Callable[[], None]]) -> float:
+    if reset:
+        reset()
+    gc.collect()
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+    finally:
+        if gc_was:
+            gc.enable()
+
+
+def run_bench(b: Bench, scales: list[int], repeat: int, seed: int, budget_s: float) -> dict[str, Any]:
+    module, err = load_module(b.module)
+    if module is None:
+        return {"skipped": err}
+    out: dict[str, Any] = {"module": b.module, "scales": {}}
+    prev: Optional[tuple[int, float]] = None
+    for n in scales:
+        rng = random.Random(f"{seed}:{b.name}:{n}")
+        fn, ops, reset = b.setup(module, n, rng)
+        times = [time_once(fn, reset)]  # первый прогон — ещё и прогрев
+        while len(times) < repeat and sum(times) < budget_s:
+            times.append(time_once(fn, reset))
+        best = min(times)
+        ns_op = best / ops * 1e9
+        entry = {
+            "n": n,
+            "ops": ops,
+            "runs": len(times),
+            "min_s": round(best, 6),
+            "median_s": round(statistics.median(times), 6),
+            "ns_per_op": round(ns_op, 1),
+        }
+        if prev is not None and prev[1] > 0 and ns_op > 0:
+            entry["growth"] = round(math.log(ns_op / prev[1]) / math.log(n / prev[0]), 2)
+        prev = (n, ns_op)
+        out["scales"][str(n)] = entry
+        print(
+            f"  {b.name:22} N={n:>7}  {ns_op:12.1f} ns/op  min {best * 1000:9.2f} ms  "
+            f"median {entry['median_s'] * 1000:9.2f} ms  runs={len(times)}"
+            + (f"  growth={entry['growth']:+.2f}" if "growth" in entry else ""),
+            flush=True,
+        )
+    return out
+
+
+def compare(base: dict, head: dict, max_regress: float, min_delta_ns: float) -> list[str]:
+    regressions: list[str] = []
+    print(f"\n{base.get('created_at', '?')} ({base.get('python', '?')}) → {head.get('created_at', '?')} ({head.get('python', '?')})")
+    for name, h in head["benches"].items():
+        b = base["benches"].get(name)
+        if not b or "skipped" in b or "skipped" in h:
+            continue
+        for n, he in h["scales"].items():
+            be = b["scales"].get(n)
+            if not be:
+                continue
+            bv, hv = be["ns_per_op"], he["ns_per_op"]
+            delta = (hv - bv) / bv * 100 if bv else 0.0
+            flag = ""
+            if delta > max_regress and hv - bv > min_delta_ns:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} N={n} {delta:+.1f}%")
+            elif delta < -max_regress and bv - hv > min_delta_ns:
+                flag = "  faster"
+            print(f"  {name:22} N={n:>7} {bv:12.1f} → {hv:12.1f} ns/op ({delta:+6.1f}%){flag}")
+    return regressions
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    scales = [int(float(x)) for x in args.scales.split(",") if x.strip()]
+    names = [x.strip() for x in args.only.split(",")] if args.only else list(BENCHES)
+    unknown = [x for x in names if x not in BENCHES]
+    if unknown:
+        print(f"Неизвестные бенчмарки: {', '.join(unknown)} (см. list)", file=sys.stderr)
+        return 2
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "benches": {},
+    }
+    for name in names:
+        r = run_bench(BENCHES[name], scales, args.repeat, args.seed, args.budget)
+        if "skipped" in r:
+            print(f"  {name:22} skipped: {r['skipped']}")
+        report["benches"][name] = r
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nReport: {args.out}")
+    if args.save_baseline:
+        base = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else {"benches": {}}
+        base.update({k: v for k, v in report.items() if k != "benches"})
+        base["benches"].update(report["benches"])
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(base, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline: {BASELINE_PATH}")
+        return 0
+    if not args.no_compare and BASELINE_PATH.exists():
+        base = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+        regressions = compare(base, report, args.max_regress, args.min_delta_ns)
+        if regressions:
+            print("Регрессии: " + "; ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    head = json.loads(args.head.read_text(encoding="utf-8"))
+    regressions = compare(base, head, args.max_regress, args.min_delta_ns)
+    if regressions:
+        print("Регрессии: " + "; ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    for b in BENCHES.values():
+        print(f"{b.name:22} {b.module:30} {b.description}")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Микробенчмарки горячих путей сервисных скриптов")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="Прогнать бенчмарки")
+    run.add_argument("--only", default=None, help="Имена через запятую (см. list)")
+    run.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES))
+    run.add_argument("--repeat", type=int, default=5, help="Повторов на масштаб (берётся минимум)")
+    run.add_argument("--budget", type=float, default=5.0, help="Не повторять, если масштаб уже занял столько секунд")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out", type=Path, default=None, help="Отчёт JSON")
+    run.add_argument("--save-baseline", action="store_true", help=f"Записать результат в {BASELINE_PATH.relative_to(ROOT)}")
+    run.add_argument("--no-compare", action="store_true", help="Не сравнивать с базовой линией")
+    run.set_defaults(func=cmd_run)
+
+    cmp_ = sub.add_parser("compare", help="Сравнить два отчёта")
+    cmp_.add_argument("base", type=Path)
+    cmp_.add_argument("head", type=Path)
+    cmp_.set_defaults(func=cmd_compare)
+
+    for p in (run, cmp_):
+        p.add_argument("--max-regress", type=float, default=25.0, help="Порог роста нс/оп, %%")
+        p.add_argument("--min-delta-ns", type=float, default=50.0, help="Игнорировать рост меньше N нс/оп")
+
+    ls = sub.add_parser("list", help="Список бенчмарков")
+    ls.set_defaults(func=cmd_list)
+
+    args = ap.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
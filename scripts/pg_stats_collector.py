@@ -0,0 +1,710 @@
+#!/usr/bin/env python3
+"""
+Снимки pg_stat_statements и статистики таблиц/индексов в локальный SQLite: дельты по интервалам,
+top-N и регрессии между окнами или релизами (в дополнение к точечным monitor_database.sh /
+diagnose_database.sh, которые не говорят, какой запрос стал медленнее).
+
+collect снимает одним запросом psql:
+  - pg_stat_statements текущей БД (до --max-statements по total_exec_time): calls, exec/plan time,
+    rows, shared/temp blocks, wal_bytes; ключ — queryid + роль + toplevel;
+  - pg_stat_user_tables + pg_statio_user_tables (seq/idx scan, tup_*, live/dead, размер, heap read/hit);
+  - pg_stat_user_indexes + pg_statio_user_indexes (scan, tup, размер, blocks read/hit);
+  - pg_stat_statements_info.stats_reset (PG 14+) — признак сброса.
+и сразу пишет дельту к предыдущему снимку того же источника (счётчик уменьшился или stats_reset
+сменился — сброс, дельта = текущее значение). Для запросов дельта считается к последним виденным
+счётчикам этого ключа (statement_last): запрос, выпавший из top на несколько снимков и вернувшийся,
+не засчитывает весь свой накопленный счёт в один интервал; полные значения — только после сброса или
+при первом появлении. С --every — периодически (Ctrl-C — стоп).
+--label помечает снимки (релиз/версия), по меткам потом сравниваются окна.
+
+Окно — интервал (from, to] по id снимков: сумма дельт. Отчёты:
+  top  — top-N запросов окна по total | mean | calls | rows | read (shared_blks_read) | temp,
+         плюс таблицы с наибольшим seq_tup_read и индексы без сканирований в окне;
+  diff — окно head против окна base (по умолчанию: последний интервал против --base-intervals
+         предыдущих; или --base/--head FROM:TO; или --base-label/--head-label). Флаги регрессий:
+           mean  — средняя длительность выросла больше --max-regress % и на --min-delta-ms;
+           calls — частота вызовов (в секунду окна) выросла в --factor раз (N+1, потерянный кэш);
+           rows  — строк на вызов больше в --factor раз;
+           read  — чтений с диска на вызов больше в --factor раз;
+           new   — запроса не было в base, а в head он занял больше --min-new-ms;
+           seq_scan — таблица: seq_tup_read в секунду выросло в --factor раз.
+         Учитываются запросы с ≥ --min-calls вызовов в обоих окнах. Есть регрессии — код выхода 1.
+
+Хранилище: --store (по умолчанию $PGSTATS_STORE или loadtest_results/pg_stats.sqlite3), таблицы
+snapshots, queries, statement_last/statement_deltas, table_deltas, index_deltas.
+Расширение: CREATE EXTENSION IF NOT EXISTS pg_stat_statements (в Supabase уже включено, схема extensions;
+локально — shared_preload_libraries = 'pg_stat_statements'). PostgreSQL 14+.
+
+  python3 scripts/pg_stats_collector.py collect --label v1.42.0
+  python3 scripts/pg_stats_collector.py collect --every 300 --count 12       # час, каждые 5 минут
+  python3 scripts/pg_stats_collector.py list
+  python3 scripts/pg_stats_collector.py top --by mean --top 15
+  python3 scripts/pg_stats_collector.py top --from 3 --to 9 --by read
+  python3 scripts/pg_stats_collector.py diff                                   # последний интервал vs предыдущие
+  python3 scripts/pg_stats_collector.py diff --base-label v1.41.0 --head-label v1.42.0 --json-out /tmp/pgdiff.json
+  python3 scripts/pg_stats_collector.py prune --keep-days 14
+
+Подключение: --dsn или $DATABASE_URL / $SUPABASE_DB_URL (как в backup_config.env), по умолчанию
+локальный supabase. Зависимость: psql в PATH.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+_SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+from query_plan_regression import DEFAULT_DSN, redact, run_psql  # noqa: E402
+
+ROOT = _SCRIPTS_DIR.parent
+DEFAULT_STORE = ROOT / "loadtest_results" / "pg_stats.sqlite3"
+
+STATEMENT_COUNTERS = ("calls", "total_exec_time", "total_plan_time", "rows", "shared_blks_hit", "shared_blks_read",
+                      "temp_blks_read", "temp_blks_written", "wal_bytes")
+TABLE_COUNTERS = ("seq_scan", "seq_tup_read", "idx_scan", "idx_tup_fetch", "n_tup_ins", "n_tup_upd", "n_tup_del",
+                  "n_tup_hot_upd", "heap_blks_read", "heap_blks_hit")
+TABLE_GAUGES = ("n_live_tup", "n_dead_tup", "size_bytes")
+INDEX_COUNTERS = ("idx_scan", "idx_tup_read", "idx_tup_fetch", "idx_blks_read", "idx_blks_hit")
+INDEX_GAUGES = ("size_bytes",)
+
+SORT_KEYS = ("total", "mean", "calls", "rows", "read", "temp")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS snapshots (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  source TEXT NOT NULL,
+  taken_at TEXT NOT NULL,
+  epoch REAL NOT NULL,
+  label TEXT,
+  server_version TEXT,
+  stats_reset TEXT,
+  dealloc INTEGER,
+  statements INTEGER
+);
+CREATE INDEX IF NOT EXISTS snapshots_source_idx ON snapshots (source, id);
+CREATE TABLE IF NOT EXISTS queries (
+  source TEXT NOT NULL,
+  key TEXT NOT NULL,
+  role TEXT,
+  query TEXT,
+  PRIMARY KEY (source, key)
+);
+CREATE TABLE IF NOT EXISTS statement_last (
+  source TEXT NOT NULL,
+  key TEXT NOT NULL,
+  stats_reset TEXT,
+  seen_epoch REAL NOT NULL,
+  {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in STATEMENT_COUNTERS)},
+  PRIMARY KEY (source, key)
+);
+CREATE TABLE IF NOT EXISTS statement_deltas (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+  key TEXT NOT NULL,
+  {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in STATEMENT_COUNTERS)},
+  PRIMARY KEY (snapshot_id, key)
+);
+CREATE TABLE IF NOT EXISTS table_snapshots (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+  name TEXT NOT NULL,
+  {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in TABLE_COUNTERS + TABLE_GAUGES)},
+  PRIMARY KEY (snapshot_id, name)
+);
+CREATE TABLE IF NOT EXISTS table_deltas (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+  name TEXT NOT NULL,
+  {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in TABLE_COUNTERS + TABLE_GAUGES)},
+  PRIMARY KEY (snapshot_id, name)
+);
+CREATE TABLE IF NOT EXISTS index_snapshots (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+  name TEXT NOT NULL,
+  table_name TEXT NOT NULL,
+  {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in INDEX_COUNTERS + INDEX_GAUGES)},
+  PRIMARY KEY (snapshot_id, name)
+);
+CREATE TABLE IF NOT EXISTS index_deltas (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+  name TEXT NOT NULL,
+  table_name TEXT NOT NULL,
+  {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in INDEX_COUNTERS + INDEX_GAUGES)},
+  PRIMARY KEY (snapshot_id, name)
+);
+"""
+
+
+# --- съём --------------------------------------------------------------------
+
+def extension_schema(dsn: str, psql: str) -> str:
+    res = run_psql(dsn, psql, "SELECT n.nspname FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace "
+                              "WHERE e.extname = 'pg_stat_statements';\n", {})
+    if res.returncode != 0:
+        raise SystemExit(f"psql: {res.stderr.strip()}")
+    schema = res.stdout.strip()
+    if not schema:
+        raise SystemExit("pg_stat_statements не установлено: CREATE EXTENSION IF NOT EXISTS pg_stat_statements "
+                         "(и shared_preload_libraries = 'pg_stat_statements')")
+    return schema
+
+
+def snapshot_sql(schema: str, max_statements: int) -> str:
+    s = '"' + schema.replace('"', '""') + '"'
+    return f"""
+SELECT json_build_object(
+  'server_version', current_setting('server_version'),
+  'database', current_database(),
+  'stats_reset', (SELECT CASE WHEN to_regclass('{s}.pg_stat_statements_info') IS NOT NULL
+                    THEN (SELECT row_to_json(i) FROM {s}.pg_stat_statements_info i) END),
+  'statements', (SELECT coalesce(json_agg(x), '[]') FROM (
+    SELECT s.queryid::text AS queryid, coalesce(r.rolname, s.userid::text) AS role, s.toplevel, s.query,
+           s.calls, s.total_exec_time, s.total_plan_time, s.rows, s.shared_blks_hit, s.shared_blks_read,
+           s.temp_blks_read, s.temp_blks_written, s.wal_bytes
+    FROM {s}.pg_stat_statements s LEFT JOIN pg_roles r ON r.oid = s.userid
+    WHERE s.dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) AND s.queryid IS NOT NULL
+    ORDER BY s.total_exec_time DESC LIMIT {int(max_statements)}) x),
+  'tables', (SELECT coalesce(json_agg(x), '[]') FROM (
+    SELECT t.schemaname || '.' || t.relname AS name, t.seq_scan, t.seq_tup_read, coalesce(t.idx_scan, 0) AS idx_scan,
+           coalesce(t.idx_tup_fetch, 0) AS idx_tup_fetch, t.n_tup_ins, t.n_tup_upd, t.n_tup_del, t.n_tup_hot_upd,
+           coalesce(io.heap_blks_read, 0) AS heap_blks_read, coalesce(io.heap_blks_hit, 0) AS heap_blks_hit,
+           t.n_live_tup, t.n_dead_tup, pg_total_relation_size(t.relid) AS size_bytes
+    FROM pg_stat_user_tables t LEFT JOIN pg_statio_user_tables io ON io.relid = t.relid) x),
+  'indexes', (SELECT coalesce(json_agg(x), '[]') FROM (
+    SELECT i.schemaname || '.' || i.indexrelname AS name, i.schemaname || '.' || i.relname AS table_name,
+           i.idx_scan, i.idx_tup_read, i.idx_tup_fetch, coalesce(io.idx_blks_read, 0) AS idx_blks_read,
+           coalesce(io.idx_blks_hit, 0) AS idx_blks_hit, pg_relation_size(i.indexrelid) AS size_bytes
+    FROM pg_stat_user_indexes i LEFT JOIN pg_statio_user_indexes io ON io.indexrelid = i.indexrelid) x)
+)"""
+
+
+def fetch_snapshot(args: argparse.Namespace, schema: str) -> dict[str, Any]:
+    res = run_psql(args.dsn, args.psql, snapshot_sql(schema, args.max_statements).strip() + ";\n", {})
+    if res.returncode != 0:
+        raise SystemExit(f"psql: {res.stderr.strip()}")
+    return json.loads(res.stdout)
+
+
+def source_name(dsn: str) -> str:
+    """Хост:порт/БД без учётных данных — ключ источника в хранилище."""
+    m = re.match(r"^\w+://(?:[^@/]*@)?([^/?]+)/?([^?]*)", dsn)
+    if m:
+        return f"{m.group(1)}/{m.group(2) or 'postgres'}"
+    parts = dict(re.findall(r"(\w+)=(\S+)", dsn))
+    return f"{parts.get('host', 'localhost')}:{parts.get('port', '5432')}/{parts.get('dbname', 'postgres')}"
+
+
+def statement_key(row: dict[str, Any]) -> str:
+    return f"{row['queryid']}:{row['role']}:{'t' if row.get('toplevel', True) else 'n'}"
+
+
+# --- хранилище ---------------------------------------------------------------
+
+def open_store(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _delta(cur: dict[str, float], prev: Optional[dict[str, float]], counters: tuple[str, ...],
+           gauges: tuple[str, ...], reset: bool) -> dict[str, float]:
+    """Дельта счётчиков; при сбросе (флаг или любой счётчик уменьшился) — текущие значения."""
+    if prev is None or reset or any(cur[c] < prev.get(c, 0) for c in counters):
+        out = {c: cur[c] for c in counters}
+    else:
+        out = {c: cur[c] - prev.get(c, 0) for c in counters}
+    out.update({g: cur[g] for g in gauges})
+    return out
+
+
+def _rows(conn: sqlite3.Connection, table: str, key: str, snapshot_id: Optional[int]) -> dict[str, dict[str, float]]:
+    if snapshot_id is None:
+        return {}
+    return {r[key]: dict(r) for r in conn.execute(f"SELECT * FROM {table} WHERE snapshot_id = ?", (snapshot_id,))}
+
+
+def _insert(conn: sqlite3.Connection, table: str, snapshot_id: int, rows: Iterable[dict[str, Any]],
+            cols: tuple[str, ...]) -> None:
+    names = ("snapshot_id",) + cols
+    conn.executemany(f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                     [(snapshot_id, *(r[c] for c in cols)) for r in rows])
+
+
+def store_snapshot(conn: sqlite3.Connection, source: str, snap: dict[str, Any], label: Optional[str],
+                   taken: Optional[datetime] = None) -> int:
+    taken = taken or datetime.now(timezone.utc)
+    info = snap.get("stats_reset") or {}
+    prev = conn.execute("SELECT id, stats_reset FROM snapshots WHERE source = ? ORDER BY id DESC LIMIT 1",
+                        (source,)).fetchone()
+    stats_reset = info.get("stats_reset")
+    prev_id = prev["id"] if prev else None
+    # Запрос мог выпасть из top --max-statements и вернуться: дельта — к последним виденным счётчикам.
+    last = {r["key"]: dict(r) for r in conn.execute("SELECT * FROM statement_last WHERE source = ?", (source,))}
+
+    statements = []
+    for r in snap["statements"]:
+        row = {"key": statement_key(r), **{c: float(r.get(c) or 0) for c in STATEMENT_COUNTERS}}
+        statements.append(row)
+        conn.execute("INSERT INTO queries (source, key, role, query) VALUES (?, ?, ?, ?) "
+                     "ON CONFLICT (source, key) DO UPDATE SET query = excluded.query",
+                     (source, row["key"], r["role"], r["query"]))
+    tables = [{"name": r["name"], **{c: float(r.get(c) or 0) for c in TABLE_COUNTERS + TABLE_GAUGES}}
+              for r in snap["tables"]]
+    indexes = [{"name": r["name"], "table_name": r["table_name"],
+                **{c: float(r.get(c) or 0) for c in INDEX_COUNTERS + INDEX_GAUGES}} for r in snap["indexes"]]
+
+    cur = conn.execute(
+        "INSERT INTO snapshots (source, taken_at, epoch, label, server_version, stats_reset, dealloc, statements) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (source, taken.isoformat(timespec="seconds"), taken.timestamp(), label, snap.get("server_version"),
+         info.get("stats_reset"), info.get("dealloc"), len(statements)))
+    sid = cur.lastrowid
+    _insert(conn, "table_snapshots", sid, tables, ("name",) + TABLE_COUNTERS + TABLE_GAUGES)
+    _insert(conn, "index_snapshots", sid, indexes, ("name", "table_name") + INDEX_COUNTERS + INDEX_GAUGES)
+
+    if prev_id is not None:
+        deltas = []
+        for r in statements:
+            seen = last.get(r["key"])
+            reset = (seen is not None and stats_reset is not None and seen["stats_reset"] is not None
+                     and seen["stats_reset"] != stats_reset)
+            deltas.append({"key": r["key"], **_delta(r, seen, STATEMENT_COUNTERS, (), reset)})
+        _insert(conn, "statement_deltas", sid, [d for d in deltas if d["calls"] > 0], ("key",) + STATEMENT_COUNTERS)
+        old = _rows(conn, "table_snapshots", "name", prev_id)
+        _insert(conn, "table_deltas", sid,
+                [{"name": r["name"], **_delta(r, old.get(r["name"]), TABLE_COUNTERS, TABLE_GAUGES, False)} for r in tables],
+                ("name",) + TABLE_COUNTERS + TABLE_GAUGES)
+        old = _rows(conn, "index_snapshots", "name", prev_id)
+        _insert(conn, "index_deltas", sid,
+                [{"name": r["name"], "table_name": r["table_name"],
+                  **_delta(r, old.get(r["name"]), INDEX_COUNTERS, INDEX_GAUGES, False)} for r in indexes],
+                ("name", "table_name") + INDEX_COUNTERS + INDEX_GAUGES)
+        # Сырые счётчики нужны только для следующей дельты.
+        for table in ("table_snapshots", "index_snapshots"):
+            conn.execute(f"DELETE FROM {table} WHERE snapshot_id = ?", (prev_id,))
+    cols = ("source", "key", "stats_reset", "seen_epoch") + STATEMENT_COUNTERS
+    conn.executemany(
+        f"INSERT INTO statement_last ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+        f"ON CONFLICT (source, key) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in cols[2:])}",
+        [(source, r["key"], stats_reset, taken.timestamp(), *(r[c] for c in STATEMENT_COUNTERS)) for r in statements])
+    conn.commit()
+    return sid
+
+
+# --- окна ----------------------------------------------------------------------
+
+@dataclass
+class Window:
+    source: str
+    start: int          # id снимка — начало (не включается)
+    end: int            # id снимка — конец (включается)
+    seconds: float
+    title: str
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"from": self.start, "to": self.end, "seconds": round(self.seconds, 1), "title": self.title}
+
+
+def latest_source(conn: sqlite3.Connection, source: Optional[str]) -> str:
+    if source:
+        return source
+    row = conn.execute("SELECT source FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+    if row is None:
+        raise SystemExit("В хранилище нет снимков — сначала collect")
+    return row["source"]
+
+
+def snapshot_ids(conn: sqlite3.Connection, source: str) -> list[sqlite3.Row]:
+    return conn.execute("SELECT id, epoch, label, taken_at FROM snapshots WHERE source = ? ORDER BY id", (source,)).fetchall()
+
+
+def make_window(conn: sqlite3.Connection, source: str, start: int, end: int, title: str) -> Window:
+    rows = {r["id"]: r for r in snapshot_ids(conn, source)}
+    if start not in rows or end not in rows or start >= end:
+        raise SystemExit(f"Окно ({start}, {end}] вне снимков источника {source}")
+    return Window(source, start, end, rows[end]["epoch"] - rows[start]["epoch"], title)
+
+
+def parse_range(conn: sqlite3.Connection, source: str, spec: str, title: str) -> Window:
+    a, sep, b = spec.partition(":")
+    if not sep:
+        raise SystemExit(f"Ожидается FROM:TO (id снимков): {spec}")
+    return make_window(conn, source, int(a), int(b), title)
+
+
+def label_window(conn: sqlite3.Connection, source: str, label: str) -> Window:
+    """Снимки с меткой: окно от снимка перед первым из них до последнего."""
+    ids = [r["id"] for r in snapshot_ids(conn, source)]
+    tagged = [r["id"] for r in snapshot_ids(conn, source) if r["label"] == label]
+    if not tagged:
+        raise SystemExit(f"Нет снимков с меткой {label}")
+    first = ids.index(tagged[0])
+    start = ids[first - 1] if first > 0 else tagged[0]
+    if start == tagged[-1]:
+        raise SystemExit(f"Метка {label}: нужен хотя бы один интервал (два снимка)")
+    return make_window(conn, source, start, tagged[-1], f"label {label}")
+
+
+def default_windows(conn: sqlite3.Connection, source: str, base_intervals: int) -> tuple[Window, Window]:
+    ids = [r["id"] for r in snapshot_ids(conn, source)]
+    if len(ids) < 3:
+        raise SystemExit("Для diff по умолчанию нужно хотя бы 3 снимка (база и последний интервал)")
+    head = make_window(conn, source, ids[-2], ids[-1], "последний интервал")
+    start = ids[max(0, len(ids) - 2 - base_intervals)]
+    base = make_window(conn, source, start, ids[-2], f"{ids.index(ids[-2]) - ids.index(start)} предыдущих интервалов")
+    return base, head
+
+
+def window_statements(conn: sqlite3.Connection, w: Window) -> dict[str, dict[str, Any]]:
+    sums = ", ".join(f"SUM(d.{c}) AS {c}" for c in STATEMENT_COUNTERS)
+    rows = conn.execute(
+        f"SELECT d.key, {sums}, q.role, q.query FROM statement_deltas d "
+        f"JOIN snapshots s ON s.id = d.snapshot_id LEFT JOIN queries q ON q.source = s.source AND q.key = d.key "
+        f"WHERE s.source = ? AND d.snapshot_id > ? AND d.snapshot_id <= ? GROUP BY d.key", (w.source, w.start, w.end))
+    return {r["key"]: dict(r) for r in rows}
+
+
+def window_tables(conn: sqlite3.Connection, w: Window) -> dict[str, dict[str, Any]]:
+    sums = ", ".join(f"SUM(d.{c}) AS {c}" for c in TABLE_COUNTERS)
+    last = ", ".join(f"MAX(CASE WHEN d.snapshot_id = {int(w.end)} THEN d.{g} END) AS {g}" for g in TABLE_GAUGES)
+    rows = conn.execute(
+        f"SELECT d.name, {sums}, {last} FROM table_deltas d JOIN snapshots s ON s.id = d.snapshot_id "
+        f"WHERE s.source = ? AND d.snapshot_id > ? AND d.snapshot_id <= ? GROUP BY d.name", (w.source, w.start, w.end))
+    return {r["name"]: dict(r) for r in rows}
+
+
+def window_indexes(conn: sqlite3.Connection, w: Window) -> dict[str, dict[str, Any]]:
+    sums = ", ".join(f"SUM(d.{c}) AS {c}" for c in INDEX_COUNTERS)
+    rows = conn.execute(
+        f"SELECT d.name, MAX(d.table_name) AS table_name, {sums}, "
+        f"MAX(CASE WHEN d.snapshot_id = {int(w.end)} THEN d.size_bytes END) AS size_bytes "
+        f"FROM index_deltas d JOIN snapshots s ON s.id = d.snapshot_id "
+        f"WHERE s.source = ? AND d.snapshot_id > ? AND d.snapshot_id <= ? GROUP BY d.name", (w.source, w.start, w.end))
+    return {r["name"]: dict(r) for r in rows}
+
+
+# --- отчёты --------------------------------------------------------------------
+
+def mean_ms(r: dict[str, Any]) -> float:
+    return r["total_exec_time"] / r["calls"] if r["calls"] else 0.0
+
+
+def per_call(r: dict[str, Any], col: str) -> float:
+    return r[col] / r["calls"] if r["calls"] else 0.0
+
+
+def hit_ratio(r: dict[str, Any]) -> Optional[float]:
+    total = r["shared_blks_hit"] + r["shared_blks_read"]
+    return r["shared_blks_hit"] / total if total else None
+
+
+def short_query(q: Optional[str], width: int) -> str:
+    text = re.sub(r"\s+", " ", q or "?").strip()
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def statement_view(key: str, r: dict[str, Any]) -> dict[str, Any]:
+    hr = hit_ratio(r)
+    return {
+        "key": key, "role": r.get("role"), "calls": int(r["calls"]),
+        "total_ms": round(r["total_exec_time"], 2), "mean_ms": round(mean_ms(r), 3),
+        "plan_ms": round(r["total_plan_time"], 2), "rows": int(r["rows"]),
+        "rows_per_call": round(per_call(r, "rows"), 2), "read_per_call": round(per_call(r, "shared_blks_read"), 2),
+        "hit_ratio": round(hr, 4) if hr is not None else None, "temp_written": int(r["temp_blks_written"]),
+        "query": r.get("query"),
+    }
+
+
+def top_statements(stmts: dict[str, dict[str, Any]], by: str, n: int) -> list[dict[str, Any]]:
+    keyf = {
+        "total": lambda r: r["total_exec_time"], "mean": mean_ms, "calls": lambda r: r["calls"],
+        "rows": lambda r: r["rows"], "read": lambda r: r["shared_blks_read"], "temp": lambda r: r["temp_blks_written"],
+    }[by]
+    ranked = sorted(stmts.items(), key=lambda kv: -keyf(kv[1]))[:n]
+    return [statement_view(k, r) for k, r in ranked]
+
+
+def print_statements(rows: list[dict[str, Any]], width: int) -> None:
+    print(f"  {'#':>3} {'calls':>9} {'total ms':>11} {'mean ms':>9} {'rows/call':>9} {'read/call':>9} {'hit%':>6}  query")
+    for i, r in enumerate(rows, 1):
+        hit = f"{r['hit_ratio'] * 100:5.1f}" if r["hit_ratio"] is not None else "    -"
+        print(f"  {i:3d} {r['calls']:9d} {r['total_ms']:11.1f} {r['mean_ms']:9.2f} {r['rows_per_call']:9.1f} "
+              f"{r['read_per_call']:9.1f} {hit:>6}  {short_query(r['query'], width)}")
+
+
+def compare_windows(base: dict[str, dict], head: dict[str, dict], base_w: Window, head_w: Window,
+                    args: argparse.Namespace) -> list[dict[str, Any]]:
+    flags: list[dict[str, Any]] = []
+    bs, hs = max(base_w.seconds, 1e-9), max(head_w.seconds, 1e-9)
+    for key, h in head.items():
+        b = base.get(key)
+        if b is None:
+            if h["total_exec_time"] >= args.min_new_ms:
+                flags.append({"kind": "new", "key": key, "detail": f"{h['total_exec_time']:.0f} ms за окно, "
+                              f"{int(h['calls'])} вызовов", "head": statement_view(key, h)})
+            continue
+        if b["calls"] < args.min_calls or h["calls"] < args.min_calls:
+            continue
+        bm, hm = mean_ms(b), mean_ms(h)
+        if hm > bm * (1 + args.max_regress / 100) and hm - bm >= args.min_delta_ms:
+            flags.append({"kind": "mean", "key": key, "detail": f"{bm:.2f} → {hm:.2f} ms ({(hm / bm - 1) * 100 if bm else 0:+.0f}%)",
+                          "base": statement_view(key, b), "head": statement_view(key, h)})
+        br, hr = b["calls"] / bs, h["calls"] / hs
+        if hr > br * args.factor:
+            flags.append({"kind": "calls", "key": key, "detail": f"{br:.2f} → {hr:.2f} вызовов/с",
+                          "base": statement_view(key, b), "head": statement_view(key, h)})
+        for kind, col in (("rows", "rows"), ("read", "shared_blks_read")):
+            bp, hp = per_call(b, col), per_call(h, col)
+            if hp > max(bp, 1.0) * args.factor:
+                flags.append({"kind": kind, "key": key, "detail": f"{bp:.1f} → {hp:.1f} на вызов",
+                              "base": statement_view(key, b), "head": statement_view(key, h)})
+    return flags
+
+
+def compare_tables(base: dict[str, dict], head: dict[str, dict], base_w: Window, head_w: Window,
+                   args: argparse.Namespace) -> list[dict[str, Any]]:
+    flags = []
+    bs, hs = max(base_w.seconds, 1e-9), max(head_w.seconds, 1e-9)
+    for name, h in head.items():
+        b = base.get(name)
+        if b is None or h["seq_scan"] < args.min_calls:
+            continue
+        br, hr = b["seq_tup_read"] / bs, h["seq_tup_read"] / hs
+        if hr > max(br, args.min_seq_rows) * args.factor:
+            flags.append({"kind": "seq_scan", "key": name, "detail": f"seq_tup_read {br:.0f} → {hr:.0f} строк/с, "
+                          f"seq_scan {int(b['seq_scan'])} → {int(h['seq_scan'])}"})
+    return flags
+
+
+# --- команды -------------------------------------------------------------------
+
+def cmd_collect(args: argparse.Namespace) -> int:
+    conn = open_store(args.store)
+    schema = extension_schema(args.dsn, args.psql)
+    source = args.source or source_name(args.dsn)
+    n = 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            snap = fetch_snapshot(args, schema)
+            sid = store_snapshot(conn, source, snap, args.label)
+            n += 1
+            d = conn.execute("SELECT COUNT(*), COALESCE(SUM(calls), 0), COALESCE(SUM(total_exec_time), 0) "
+                             "FROM statement_deltas WHERE snapshot_id = ?", (sid,)).fetchone()
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] снимок #{sid} ({source}): запросов {len(snap['statements'])}, "
+                  f"таблиц {len(snap['tables'])}, индексов {len(snap['indexes'])}; "
+                  f"за интервал: {d[0]} активных, {int(d[1])} вызовов, {d[2]:.0f} ms "
+                  f"({(time.perf_counter() - t0) * 1000:.0f} ms на съём)")
+            if not args.every or (args.count and n >= args.count):
+                break
+            time.sleep(max(0.0, args.every - (time.perf_counter() - t0)))
+    except KeyboardInterrupt:
+        print(f"\nОстановлено после {n} снимков")
+    return 0
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    conn = open_store(args.store)
+    for source in [r["source"] for r in conn.execute("SELECT DISTINCT source FROM snapshots ORDER BY source")]:
+        print(f"{source}:")
+        rows = conn.execute(
+            "SELECT s.id, s.taken_at, s.label, s.statements, s.stats_reset, COUNT(d.key) AS active, "
+            "COALESCE(SUM(d.calls), 0) AS calls, COALESCE(SUM(d.total_exec_time), 0) AS ms FROM snapshots s "
+            "LEFT JOIN statement_deltas d ON d.snapshot_id = s.id WHERE s.source = ? GROUP BY s.id ORDER BY s.id",
+            (source,)).fetchall()
+        for r in rows[-args.last:]:
+            print(f"  #{r['id']:<5} {r['taken_at']}  {r['label'] or '-':12} запросов {r['statements']:5d}  "
+                  f"интервал: {r['active']:4d} активных, {int(r['calls']):8d} вызовов, {r['ms']:10.0f} ms")
+    return 0
+
+
+def resolve_window(conn: sqlite3.Connection, args: argparse.Namespace, source: str) -> Window:
+    ids = [r["id"] for r in snapshot_ids(conn, source)]
+    if args.label:
+        return label_window(conn, source, args.label)
+    if args.since:
+        cutoff = time.time() - parse_duration(args.since)
+        rows = snapshot_ids(conn, source)
+        before = [r["id"] for r in rows if r["epoch"] <= cutoff]
+        start = before[-1] if before else ids[0]
+        return make_window(conn, source, start, ids[-1], f"последние {args.since}")
+    end = args.to or ids[-1]
+    start = args.from_ or (ids[ids.index(end) - 1] if ids.index(end) > 0 else end)
+    return make_window(conn, source, start, end, f"({start}, {end}]")
+
+
+def parse_duration(s: str) -> float:
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd]?)", s.strip())
+    if not m:
+        raise SystemExit(f"Длительность вида 30m / 2h / 1d: {s}")
+    return float(m.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+
+
+def cmd_top(args: argparse.Namespace) -> int:
+    conn = open_store(args.store)
+    source = latest_source(conn, args.source)
+    w = resolve_window(conn, args, source)
+    stmts = window_statements(conn, w)
+    total_ms = sum(r["total_exec_time"] for r in stmts.values())
+    calls = sum(r["calls"] for r in stmts.values())
+    print(f"{source}: окно {w.title} ({w.seconds:.0f} с): {len(stmts)} запросов, {int(calls)} вызовов, "
+          f"{total_ms:.0f} ms ({calls / max(w.seconds, 1e-9):.1f} вызовов/с)")
+    report: dict[str, Any] = {"source": source, "window": w.as_dict(), "by": args.by}
+    report["statements"] = top_statements(stmts, args.by, args.top)
+    print(f"\nTop {args.top} по {args.by}:")
+    print_statements(report["statements"], args.width)
+
+    tables = window_tables(conn, w)
+    seq = sorted(tables.items(), key=lambda kv: -kv[1]["seq_tup_read"])[:args.top]
+    report["tables"] = [{"name": k, **{c: int(v[c] or 0) for c in TABLE_COUNTERS + TABLE_GAUGES}} for k, v in seq]
+    print("\nТаблицы по seq_tup_read:")
+    print(f"  {'table':40} {'seq_scan':>9} {'seq_tup_read':>13} {'idx_scan':>9} {'live':>10} {'dead':>9}")
+    for t in report["tables"]:
+        if t["seq_tup_read"] or t["idx_scan"]:
+            print(f"  {t['name']:40} {t['seq_scan']:9d} {t['seq_tup_read']:13d} {t['idx_scan']:9d} "
+                  f"{t['n_live_tup']:10d} {t['n_dead_tup']:9d}")
+    idx = window_indexes(conn, w)
+    unused = sorted(((k, v) for k, v in idx.items() if not v["idx_scan"]), key=lambda kv: -(kv[1]["size_bytes"] or 0))
+    report["unused_indexes"] = [{"name": k, "table": v["table_name"], "size_bytes": int(v["size_bytes"] or 0)}
+                                for k, v in unused]
+    if unused:
+        print(f"\nИндексы без сканирований в окне: {len(unused)} (по размеру: "
+              + ", ".join(f"{k} {int(v['size_bytes'] or 0) // 1024} КБ" for k, v in unused[:args.top]) + ")")
+    if args.json_out:
+        args.json_out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nJSON: {args.json_out}")
+    return 0
+
+
+def cmd_diff(args: argparse.Namespace) -> int:
+    conn = open_store(args.store)
+    source = latest_source(conn, args.source)
+    if args.base_label or args.head_label:
+        if not (args.base_label and args.head_label):
+            raise SystemExit("Нужны обе метки: --base-label и --head-label")
+        base_w, head_w = label_window(conn, source, args.base_label), label_window(conn, source, args.head_label)
+    elif args.base or args.head:
+        if not (args.base and args.head):
+            raise SystemExit("Нужны оба окна: --base FROM:TO и --head FROM:TO")
+        base_w, head_w = parse_range(conn, source, args.base, "base"), parse_range(conn, source, args.head, "head")
+    else:
+        base_w, head_w = default_windows(conn, source, args.base_intervals)
+    base, head = window_statements(conn, base_w), window_statements(conn, head_w)
+    flags = compare_windows(base, head, base_w, head_w, args)
+    flags += compare_tables(window_tables(conn, base_w), window_tables(conn, head_w), base_w, head_w, args)
+    order = {"mean": 0, "new": 1, "calls": 2, "read": 3, "rows": 4, "seq_scan": 5}
+    flags.sort(key=lambda f: (order.get(f["kind"], 9), -(f.get("head", {}).get("total_ms") or 0)))
+
+    print(f"{source}: base {base_w.title} ({base_w.start}, {base_w.end}] {base_w.seconds:.0f} с, {len(base)} запросов; "
+          f"head {head_w.title} ({head_w.start}, {head_w.end}] {head_w.seconds:.0f} с, {len(head)} запросов")
+    if not flags:
+        print("Регрессий нет")
+    else:
+        print(f"Регрессии: {len(flags)}")
+        for f in flags[:args.top * 3]:
+            text = short_query((f.get("head") or {}).get("query"), args.width) if "head" in f else ""
+            print(f"  [{f['kind']:8}] {f['detail']:38} {text or f['key']}")
+        if len(flags) > args.top * 3:
+            print(f"  … ещё {len(flags) - args.top * 3}")
+    if args.json_out:
+        report = {"source": source, "base": base_w.as_dict(), "head": head_w.as_dict(),
+                  "thresholds": {"max_regress": args.max_regress, "min_delta_ms": args.min_delta_ms,
+                                 "factor": args.factor, "min_calls": args.min_calls, "min_new_ms": args.min_new_ms},
+                  "regressions": flags, "top_head": top_statements(head, "total", args.top)}
+        args.json_out.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"JSON: {args.json_out}")
+    return 1 if flags else 0
+
+
+def cmd_prune(args: argparse.Namespace) -> int:
+    conn = open_store(args.store)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=args.keep_days)).timestamp()
+    # Последний снимок каждого источника остаётся: от него считается следующая дельта.
+    n = conn.execute("DELETE FROM snapshots WHERE epoch < ? AND id NOT IN (SELECT MAX(id) FROM snapshots GROUP BY source)",
+                     (cutoff,)).rowcount
+    # Запрос, не появлявшийся в top дольше окна хранения, при возвращении считается новым.
+    conn.execute("DELETE FROM statement_last WHERE seen_epoch < ?", (cutoff,))
+    conn.execute("DELETE FROM queries WHERE NOT EXISTS (SELECT 1 FROM statement_deltas d JOIN snapshots s "
+                 "ON s.id = d.snapshot_id WHERE s.source = queries.source AND d.key = queries.key) "
+                 "AND NOT EXISTS (SELECT 1 FROM statement_last l "
+                 "WHERE l.source = queries.source AND l.key = queries.key)")
+    conn.commit()
+    conn.execute("VACUUM")
+    print(f"Удалено снимков: {n}")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Снимки pg_stat_statements в SQLite: дельты, top-N, регрессии")
+    ap.add_argument("--store", type=Path, default=Path(os.environ.get("PGSTATS_STORE", DEFAULT_STORE)),
+                    help="Файл SQLite (по умолчанию $PGSTATS_STORE или loadtest_results/pg_stats.sqlite3)")
+    ap.add_argument("--source", default=None, help="Источник (host:port/db); по умолчанию из --dsn / последний снятый")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def add_window(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--top", type=int, default=20, help="Сколько строк показать")
+        p.add_argument("--width", type=int, default=90, help="Ширина текста запроса")
+        p.add_argument("--json-out", type=Path, default=None, help="Отчёт JSON")
+
+    col = sub.add_parser("collect", help="Снять снимок (или периодически)")
+    col.add_argument("--dsn", default=os.environ.get("DATABASE_URL") or os.environ.get("SUPABASE_DB_URL") or DEFAULT_DSN,
+                     help="Строка подключения (по умолчанию $DATABASE_URL, $SUPABASE_DB_URL или локальный supabase)")
+    col.add_argument("--psql", default="psql", help="Путь к psql")
+    col.add_argument("--label", default=None, help="Метка снимка (релиз/версия)")
+    col.add_argument("--every", type=float, default=None, help="Снимать каждые N секунд")
+    col.add_argument("--count", type=int, default=None, help="С --every: остановиться после N снимков")
+    col.add_argument("--max-statements", type=int, default=5000, help="Запросов pg_stat_statements в снимке максимум")
+    col.set_defaults(func=cmd_collect)
+
+    ls = sub.add_parser("list", help="Снимки по источникам")
+    ls.add_argument("--last", type=int, default=30, help="Сколько последних снимков показать")
+    ls.set_defaults(func=cmd_list)
+
+    top = sub.add_parser("top", help="Top-N запросов окна")
+    top.add_argument("--by", choices=SORT_KEYS, default="total", help="Сортировка")
+    top.add_argument("--from", dest="from_", type=int, default=None, help="id снимка — начало окна (не включается)")
+    top.add_argument("--to", type=int, default=None, help="id снимка — конец окна (по умолчанию последний)")
+    top.add_argument("--since", default=None, help="Окно за последние 30m / 2h / 1d")
+    top.add_argument("--label", default=None, help="Окно снимков с меткой")
+    add_window(top)
+    top.set_defaults(func=cmd_top)
+
+    df = sub.add_parser("diff", help="Регрессии: окно head против окна base")
+    df.add_argument("--base", default=None, help="FROM:TO — id снимков базового окна")
+    df.add_argument("--head", default=None, help="FROM:TO — id снимков проверяемого окна")
+    df.add_argument("--base-label", default=None, help="Базовое окно по метке (релиз)")
+    df.add_argument("--head-label", default=None, help="Проверяемое окно по метке (релиз)")
+    df.add_argument("--base-intervals", type=int, default=6, help="Без окон: сколько интервалов до последнего — база")
+    df.add_argument("--max-regress", type=float, default=30.0, help="Порог роста средней длительности, %%")
+    df.add_argument("--min-delta-ms", type=float, default=1.0, help="… и не меньше чем на N мс")
+    df.add_argument("--factor", type=float, default=2.0, help="Рост частоты/строк/чтений на вызов в N раз — флаг")
+    df.add_argument("--min-calls", type=int, default=20, help="Не сравнивать запросы с меньшим числом вызовов")
+    df.add_argument("--min-new-ms", type=float, default=1000.0, help="Новый запрос с суммарным временем больше — флаг")
+    df.add_argument("--min-seq-rows", type=float, default=1000.0, help="seq_tup_read/с ниже — не флаг")
+    add_window(df)
+    df.set_defaults(func=cmd_diff)
+
+    pr = sub.add_parser("prune", help="Удалить старые снимки")
+    pr.add_argument("--keep-days", type=float, default=30.0, help="Хранить N дней")
+    pr.set_defaults(func=cmd_prune)
+
+    args = ap.parse_args()
+    if args.cmd == "collect":
+        print(f"DB: {redact(args.dsn)} → {args.store}", file=sys.stderr)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
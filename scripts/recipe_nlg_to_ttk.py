@@ -12,12 +12,37 @@
   python scripts/recipe_nlg_to_ttk.py --csv ~/Downloads/full_dataset.csv --limit 100
   python scripts/recipe_nlg_to_ttk.py --csv /path/to/file.csv --limit 1000 --out scripts/fixtures/recipenlg/
 
-Зависимости для --csv: pip install pandas
+Полный датасет (2M строк) — потоково, пулом процессов, в шарды JSONL:
+  python scripts/recipe_nlg_to_ttk.py --csv full_dataset.csv --limit 0 --jsonl \
+      --out /data/recipenlg_ttk --workers 8 --shard-size 100000 --compress gz
+
+  CSV читается построчно (модуль csv, без pandas), чанки по --chunk-size строк уходят
+  в пул процессов с to_ttk_json; в полёте не больше 2×workers чанков — память плоская.
+  Результат: shard-00000.jsonl[.gz|.zst] (одна строка — {"id": <номер строки>, ...ТТК})
+  и index.json со списком шардов, диапазонами id и числом записей.
+
+Словарь ингредиентов и покрытие каталогом продуктов:
+  python scripts/recipe_nlg_to_ttk.py --csv full_dataset.csv --limit 0 --jsonl --out /data/ttk \
+      --ingredient-dict /data/ttk/ingredients.json --match-products world_products.json
+
+  Строки ингредиентов сильно повторяются ("salt", "2.0 tablespoon vegetable oil"), поэтому
+  разбор строки кэшируется (LRU, --cache-size). --ingredient-dict пишет частотный словарь
+  нормализованных названий → результат разбора; --match-products сверяет его с каталогом
+  (JSON-список с name/en/names или CSV с колонкой name) и печатает покрытие ссылками.
+
+Зависимости: стандартная библиотека; --compress zst — pip install zstandard
 """
 import argparse
+import csv
+import gzip
 import json
+import os
 import re
 import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -31,9 +56,8 @@ _UNITS = re.compile(
 )
 
 
-def _parse_ingredient(s: str) -> dict:
-    """Парсит одну строку ингредиента в {productName, grossGrams?, unit?}."""
-    s = s.strip()
+def _parse_ingredient_uncached(s: str) -> dict:
+    """Парсит одну (уже обрезанную) строку ингредиента в {productName, grossGrams?, unit?}."""
     if not s:
         return None
     m = _UNITS.match(s)
@@ -67,6 +91,137 @@ def _parse_ingredient(s: str) -> dict:
     }
 
 
+INGREDIENT_CACHE_SIZE = 65536
+
+_parse_cached = lru_cache(maxsize=INGREDIENT_CACHE_SIZE)(_parse_ingredient_uncached)
+
+
+def set_ingredient_cache_size(size: int) -> None:
+    """Пересоздать LRU-кэш разбора (также initializer воркеров пула)."""
+    global _parse_cached
+    _parse_cached = lru_cache(maxsize=max(0, size))(_parse_ingredient_uncached)
+
+
+def _parse_ingredient(s: str) -> dict:
+    """Парсит одну строку ингредиента в {productName, grossGrams?, unit?} (через LRU-кэш)."""
+    parsed = _parse_cached(s.strip())
+    # Копия: результат уходит в рецепт, кэшированный объект не должен меняться снаружи.
+    return dict(parsed) if parsed else parsed
+
+
+_NAME_JUNK = re.compile(r"\([^)]*\)|[^\w\s-]")
+
+
+def normalize_ingredient_name(name: str) -> str:
+    """Ключ словаря: нижний регистр, без скобок и пунктуации, пробелы схлопнуты."""
+    s = _NAME_JUNK.sub(" ", (name or "").lower())
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def count_ingredients(freq: dict, ingredients: list) -> None:
+    """freq: норм. название → [частота, Counter единиц, пример разбора]."""
+    for ing in ingredients:
+        key = normalize_ingredient_name(ing.get("productName"))
+        if not key:
+            continue
+        entry = freq.get(key)
+        if entry is None:
+            freq[key] = entry = [0, Counter(), ing]
+        entry[0] += 1
+        entry[1][ing.get("unit") or ""] += 1
+
+
+def merge_ingredient_freq(total: dict, part: dict) -> None:
+    for key, (n, units, example) in part.items():
+        entry = total.get(key)
+        if entry is None:
+            total[key] = [n, units, example]
+        else:
+            entry[0] += n
+            entry[1].update(units)
+
+
+def write_ingredient_dict(freq: dict, path: Path) -> list:
+    """Частотный словарь ингредиентов (по убыванию частоты) в JSON."""
+    items = [
+        {
+            "name": key,
+            "count": n,
+            "units": {u or "-": c for u, c in units.most_common()},
+            "parse": {k: example.get(k) for k in ("productName", "grossGrams", "unit")},
+        }
+        for key, (n, units, example) in sorted(freq.items(), key=lambda kv: (-kv[1][0], kv[0]))
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(items, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    print(f"Словарь ингредиентов: {len(items)} названий → {path}")
+    return items
+
+
+def load_product_names(path: str) -> dict:
+    """Каталог продуктов → {нормализованное название: исходное}. JSON (name/en/names) или CSV (name)."""
+    names = {}
+
+    def add(v):
+        if isinstance(v, str) and v.strip():
+            key = normalize_ingredient_name(v)
+            if key:
+                names.setdefault(key, v.strip())
+
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                add(row.get("name"))
+                add(row.get("en"))
+    else:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        for p in data if isinstance(data, list) else data.get("products", []):
+            add(p.get("name"))
+            add(p.get("en"))
+            if isinstance(p.get("names"), dict):
+                for v in p["names"].values():
+                    add(v)
+    return names
+
+
+def _match_key(key: str, catalog: dict):
+    if key in catalog:
+        return key
+    # Простое единственное число: "carrots" → "carrot", "tomatoes" → "tomato"
+    for cand in (key[:-1] if key.endswith("s") else None, key[:-2] if key.endswith("es") else None):
+        if cand and cand in catalog:
+            return cand
+    return None
+
+
+def match_products(items: list, catalog: dict, top_unmatched: int = 30) -> dict:
+    """Покрытие словаря каталогом: доля названий и доля вхождений (с учётом частоты)."""
+    matched_names = matched_occ = total_occ = 0
+    unmatched = []
+    for it in items:
+        total_occ += it["count"]
+        if _match_key(it["name"], catalog):
+            matched_names += 1
+            matched_occ += it["count"]
+        else:
+            unmatched.append(it)
+    report = {
+        "catalog_names": len(catalog),
+        "ingredient_names": len(items),
+        "matched_names": matched_names,
+        "name_coverage": round(matched_names / len(items), 4) if items else 0.0,
+        "occurrence_coverage": round(matched_occ / total_occ, 4) if total_occ else 0.0,
+        "top_unmatched": [{"name": it["name"], "count": it["count"]} for it in unmatched[:top_unmatched]],
+    }
+    print(
+        f"Покрытие каталогом ({len(catalog)} названий): названий {matched_names}/{len(items)} "
+        f"({report['name_coverage']:.1%}), вхождений {report['occurrence_coverage']:.1%}"
+    )
+    for it in report["top_unmatched"][:10]:
+        print(f"    нет в каталоге: {it['name']} ×{it['count']}")
+    return report
+
+
 def _ingredients_from_str(text: str) -> list:
     """Парсит строку ингредиентов, разделённых запятыми."""
     if not text or not isinstance(text, str):
@@ -159,21 +314,188 @@ def load_sample(limit: int):
         yield r
 
 
+def _maybe_list(val):
+    """В full_dataset.csv списки хранятся строкой JSON: '["1 c. sugar", ...]'."""
+    if isinstance(val, str) and val.startswith("["):
+        try:
+            parsed = json.loads(val)
+        except ValueError:
+            return val
+        if isinstance(parsed, list):
+            return parsed
+    return val
+
+
+def _normalize_row(d: dict) -> dict:
+    # Нормализуем колонки: lite — name/steps, full — title/directions/NER
+    if "title" in d and "name" not in d:
+        d["name"] = d.get("title")
+    if "directions" in d and "steps" not in d:
+        d["steps"] = d.get("directions")
+    if "NER" in d and "ner" not in d:
+        d["ner"] = d.get("NER")
+    for k in ("ingredients", "steps", "ner"):
+        if k in d:
+            d[k] = _maybe_list(d[k])
+    return d
+
+
 def load_csv(path: str, limit: int):
-    try:
-        import pandas as pd
-    except ImportError:
-        print("Установи: pip install pandas")
-        sys.exit(1)
-    df = pd.read_csv(path, nrows=limit, on_bad_lines="skip")
-    # Нормализуем колонки: lite — name/steps, full — title/directions
-    for _, row in df.iterrows():
-        d = row.to_dict()
-        if "title" in d and "name" not in d:
-            d["name"] = d.get("title")
-        if "directions" in d and "steps" not in d:
-            d["steps"] = d.get("directions")
-        yield d
+    """Потоковое чтение CSV построчно; limit <= 0 — без ограничения."""
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        for i, row in enumerate(reader):
+            if 0 < limit <= i:
+                break
+            yield _normalize_row(row)
+
+
+def _chunks(rows, size: int):
+    """(номер первой строки, [строки]) по size штук."""
+    buf = []
+    start = 0
+    for i, r in enumerate(rows):
+        if not buf:
+            start = i
+        buf.append(r)
+        if len(buf) >= size:
+            yield start, buf
+            buf = []
+    if buf:
+        yield start, buf
+
+
+def _convert_chunk(job):
+    """Воркер пула: чанк строк CSV → строки JSONL (сериализация тоже в воркере) + частоты ингредиентов."""
+    start, rows = job
+    lines = []
+    freq = {}
+    for i, r in enumerate(rows):
+        obj = {"id": start + i, **to_ttk_json(r)}
+        count_ingredients(freq, obj["ingredients"])
+        lines.append(json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n")
+    info = _parse_cached.cache_info()
+    return start, lines, freq, (os.getpid(), info.hits, info.misses)
+
+
+def _open_shard(path: Path, compress: str):
+    if compress == "gz":
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    if compress == "zst":
+        try:
+            import zstandard
+        except ImportError:
+            print("Установи: pip install zstandard (или --compress gz)")
+            sys.exit(1)
+        return _ZstText(open(path, "wb"), zstandard)
+    return open(path, "w", encoding="utf-8")
+
+
+class _ZstText:
+    """Текстовая обёртка над zstandard.stream_writer (закрывает и исходный файл)."""
+
+    def __init__(self, raw, zstandard):
+        self._raw = raw
+        self._w = zstandard.ZstdCompressor(level=6).stream_writer(raw)
+
+    def write(self, s: str) -> None:
+        self._w.write(s.encode("utf-8"))
+
+    def close(self) -> None:
+        self._w.close()
+        self._raw.close()
+
+
+class ShardWriter:
+    """Пишет JSONL-шарды по shard_size записей и собирает index.json."""
+
+    def __init__(self, out_dir: Path, shard_size: int, compress: str):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.compress = compress
+        self.suffix = {"gz": ".jsonl.gz", "zst": ".jsonl.zst"}.get(compress, ".jsonl")
+        self.shards = []
+        self._f = None
+        self._cur = None
+        self.total = 0
+
+    def _rotate(self, first_id: int) -> None:
+        self._close_current()
+        name = f"shard-{len(self.shards):05d}{self.suffix}"
+        self._cur = {"file": name, "records": 0, "first_id": first_id, "last_id": first_id}
+        self._f = _open_shard(self.out_dir / name, self.compress)
+
+    def _close_current(self) -> None:
+        if self._f is None:
+            return
+        self._f.close()
+        self._cur["bytes"] = (self.out_dir / self._cur["file"]).stat().st_size
+        self.shards.append(self._cur)
+        self._f = None
+
+    def write(self, first_id: int, lines: list) -> None:
+        for i, line in enumerate(lines):
+            rid = first_id + i
+            if self._f is None or self._cur["records"] >= self.shard_size:
+                self._rotate(rid)
+            self._f.write(line)
+            self._cur["records"] += 1
+            self._cur["last_id"] = rid
+            self.total += 1
+
+    def close(self, meta: dict) -> Path:
+        self._close_current()
+        index = {**meta, "total": self.total, "shard_size": self.shard_size, "shards": self.shards}
+        path = self.out_dir / "index.json"
+        path.write_text(json.dumps(index, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        return path
+
+
+def convert_to_jsonl(rows, out_dir: Path, workers: int, chunk_size: int, shard_size: int,
+                     compress: str, source: str, cache_size: int = INGREDIENT_CACHE_SIZE):
+    """Потоковая конвертация: чанки → пул процессов → шарды по порядку строк. (index, частоты)"""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    freq = {}
+    cache_stats = {}
+    writer = ShardWriter(out_dir, shard_size, compress)
+    t0 = time.monotonic()
+    window = max(1, workers * 2)
+    pending = deque()
+    chunks_done = 0
+
+    def drain_one() -> None:
+        nonlocal chunks_done
+        start, lines, part, (pid, hits, misses) = pending.popleft().result()
+        writer.write(start, lines)
+        merge_ingredient_freq(freq, part)
+        cache_stats[pid] = (hits, misses)
+        chunks_done += 1
+        if chunks_done % 50 == 0:
+            rate = writer.total / max(time.monotonic() - t0, 1e-6)
+            print(f"  {writer.total} рецептов, {rate:.0f}/с", flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=set_ingredient_cache_size,
+                             initargs=(cache_size,)) as pool:
+        for job in _chunks(rows, chunk_size):
+            pending.append(pool.submit(_convert_chunk, job))
+            if len(pending) >= window:
+                drain_one()
+        while pending:
+            drain_one()
+    elapsed = time.monotonic() - t0
+    hits = sum(h for h, _ in cache_stats.values())
+    misses = sum(m for _, m in cache_stats.values())
+    index = writer.close({
+        "source": source,
+        "elapsed_s": round(elapsed, 2),
+        "workers": workers,
+        "ingredient_cache": {"size": cache_size, "hits": hits, "misses": misses},
+    })
+    print(f"Сохранено {writer.total} рецептов в {len(writer.shards)} шардов ({elapsed:.1f} с), индекс: {index}")
+    if hits + misses:
+        print(f"Кэш разбора ингредиентов: попаданий {hits / (hits + misses):.1%} ({misses} уникальных разборов)")
+    return index, freq
 
 
 def main():
@@ -183,7 +505,43 @@ def main():
     ap.add_argument("--csv", type=str, default=None, help="Путь к полному CSV (Kaggle)")
     ap.add_argument("--sample", action="store_true", help="Использовать встроенные примеры (без загрузки)")
     ap.add_argument("--single", action="store_true", help="Один JSON со всеми рецептами (list)")
+    ap.add_argument("--jsonl", action="store_true", help="Потоково в шарды JSONL + index.json (для полного датасета)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Процессов для --jsonl")
+    ap.add_argument("--chunk-size", type=int, default=2000, help="Строк CSV на задачу пула")
+    ap.add_argument("--shard-size", type=int, default=100000, help="Рецептов в одном шарде")
+    ap.add_argument("--compress", choices=("none", "gz", "zst"), default="none", help="Сжатие шардов")
+    ap.add_argument("--cache-size", type=int, default=INGREDIENT_CACHE_SIZE,
+                    help="Размер LRU-кэша разбора строк ингредиентов (0 — без кэша)")
+    ap.add_argument("--ingredient-dict", type=str, default=None,
+                    help="Записать частотный словарь нормализованных ингредиентов (JSON)")
+    ap.add_argument("--match-products", type=str, default=None,
+                    help="Каталог продуктов (JSON/CSV) — посчитать покрытие словаря ингредиентов")
     args = ap.parse_args()
+    set_ingredient_cache_size(args.cache_size)
+
+    def emit_dictionary(freq: dict) -> None:
+        if not (args.ingredient_dict or args.match_products):
+            return
+        dict_path = Path(args.ingredient_dict or Path(args.out) / "ingredients_dict.json")
+        items = write_ingredient_dict(freq, dict_path)
+        if args.match_products:
+            report = match_products(items, load_product_names(args.match_products))
+            cov_path = dict_path.with_name(dict_path.stem + "_coverage.json")
+            cov_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+            print(f"Отчёт покрытия: {cov_path}")
+
+    if args.jsonl:
+        if args.csv:
+            rows, source = load_csv(args.csv, args.limit), args.csv
+        elif args.sample:
+            rows, source = load_sample(min(args.limit, len(_SAMPLE_RECIPES))), "sample"
+        else:
+            print("Укажи --csv /path/to/full_dataset.csv (или --sample)")
+            sys.exit(1)
+        _, freq = convert_to_jsonl(rows, Path(args.out), max(1, args.workers), max(1, args.chunk_size),
+                                   max(1, args.shard_size), args.compress, source, args.cache_size)
+        emit_dictionary(freq)
+        return
 
     if args.csv:
         recipes = list(load_csv(args.csv, args.limit))
@@ -198,6 +556,10 @@ def main():
     out_dir.mkdir(parents=True, exist_ok=True)
 
     results = [to_ttk_json(r) for r in recipes]
+    freq = {}
+    for obj in results:
+        count_ingredients(freq, obj["ingredients"])
+    emit_dictionary(freq)
 
     if args.single:
         out_path = out_dir / "ttk_samples.json"
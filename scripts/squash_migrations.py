@@ -0,0 +1,836 @@
+#!/usr/bin/env python3
+"""
+Squash миграций в базовую схему (baseline) с проверкой эквивалентности по каталогу.
+
+Свежее окружение сейчас проигрывает supabase/beta_migration_part{1,2}.sql + сотни файлов
+restodocks_flutter/supabase/migrations (+ по желанию корневые *.sql) — это долго для CI и нагрузочных
+стендов. Скрипт:
+  1. создаёт scratch-БД на том же сервере (--dsn — админское подключение, обычно локальный supabase):
+     клон --template (чистая БД supabase без миграций — быстрее и точнее) или template0 + платформенный
+     слой (схемы auth/storage из --dsn без политик/триггеров приложения, расширения, публикации);
+  2. снимает «чистый» каталог, проигрывает файлы по порядку (каждый — одной транзакцией, как supabase CLI;
+     ошибка в миграции — стоп, в корневом ad-hoc SQL — предупреждение и дальше);
+  3. выгружает baseline: расширения, которые создали миграции → pg_dump --schema-only схем приложения
+     (public и созданные миграциями) → данные, которые миграции засеяли (INSERT, при
+     session_replication_role = replica — без повторного срабатывания триггеров) → объекты приложения
+     в платформенных схемах (политики storage.objects, триггеры auth.users, функции, бакеты
+     storage.buckets, членство в публикациях) → отметка применённых версий в
+     supabase_migrations.schema_migrations (чтобы `supabase migration up` применял только новые);
+  4. загружает baseline во вторую scratch-БД и сравнивает нормализованные дампы каталога (схемы,
+     расширения, типы, отношения с RLS/ACL, колонки в логическом порядке, ограничения, индексы,
+     функции с ACL, триггеры, политики, представления, последовательности, публикации, комментарии,
+     default privileges) и данные (число строк + md5 по таблицам приложения). Расхождение — код выхода 1.
+
+Маркер отсечки — заголовок файла (-- squash-cutoff: …, хэши каждого вошедшего файла) и имя
+<версия последней миграции>_baseline.sql. Новые миграции с версией больше отсечки применяются поверх.
+`status` офлайн показывает, что добавилось после отсечки и не изменились ли уже сжатые файлы;
+`verify` повторяет шаг 4 для готового baseline (гейт для CI).
+
+Корневые *.sql (--with-root) — по имени, без диагностических и разрушительных (ROOT_SKIP: check_*,
+debug_*, test_*, temp_*, emergency_*, clean*, delete_*, reset_*, restore_*, *diagnostic* …).
+Секреты vault (vault.create_secret в миграциях) в baseline не переносятся — их создают в окружении.
+
+  python3 scripts/squash_migrations.py plan
+  python3 scripts/squash_migrations.py plan --with-root --list
+  python3 scripts/squash_migrations.py build
+  python3 scripts/squash_migrations.py build --template supabase_pristine --with-root --out /tmp/baseline
+  python3 scripts/squash_migrations.py build --cutoff 20260401000000 --keep   # scratch-БД не удалять
+  python3 scripts/squash_migrations.py verify supabase/baseline/20260505120000_baseline.sql
+  python3 scripts/squash_migrations.py status supabase/baseline/20260505120000_baseline.sql
+
+Загрузка baseline: psql "$DATABASE_URL" -X -1 -v ON_ERROR_STOP=1 -f <файл>.
+Подключение: --dsn или $DATABASE_URL (по умолчанию локальный supabase, роль с CREATE DATABASE).
+Зависимости: psql и pg_dump в PATH (pg_dump не старше сервера).
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+_SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+from analyze_rls_performance import (  # noqa: E402
+    BASE_SCHEMA, ROOT, ROOT_SKIP, load_model, root_skipped, split_statements,
+)
+from query_plan_regression import DEFAULT_DSN, redact, run_psql  # noqa: E402
+
+MIGRATIONS_DIR = ROOT / "restodocks_flutter" / "supabase" / "migrations"
+DEFAULT_OUT = ROOT / "supabase" / "baseline"
+PLATFORM_SCHEMAS = ("auth", "storage")
+PLATFORM_DATA = ("storage.buckets",)
+# Включены в новых проектах Supabase — миграции на них рассчитывают (extensions.digest), не создают.
+SUPABASE_PREINSTALLED = {"pgcrypto", "uuid-ossp", "pg_stat_statements", "pg_graphql", "supabase_vault", "pgjwt",
+                         "pgsodium"}
+VERSION_RE = re.compile(r"^(\d{14})_(.+)\.sql$")
+EXTENSION_RE = re.compile(r"\bcreate\s+extension\s+(?:if\s+not\s+exists\s+)?\"?([\w-]+)", re.I)
+HEADER_RE = re.compile(r"^-- squash-([\w-]+): (.*)$")
+
+# Отфильтрованные пространства имён: системные, временные и служебная история миграций.
+NS_CTE = """
+WITH ns AS (
+  SELECT n.oid, n.nspname FROM pg_namespace n
+  WHERE n.nspname NOT IN ('pg_catalog', 'information_schema', 'pg_toast', 'supabase_migrations')
+    AND n.nspname !~ '^pg_(toast_)?temp_'
+), ext AS (
+  SELECT classid, objid FROM pg_depend WHERE deptype = 'e'
+), rel AS (
+  SELECT c.*, n.nspname FROM pg_class c JOIN ns n ON n.oid = c.relnamespace
+  WHERE NOT EXISTS (SELECT 1 FROM ext e WHERE e.classid = 'pg_class'::regclass AND e.objid = c.oid)
+)"""
+
+ACL = "coalesce(array_to_string(array(SELECT unnest({0}::text[]) ORDER BY 1), ','), '')"
+
+CATALOG_SQL = NS_CTE + f"""
+SELECT json_build_object(
+'schema', (SELECT json_object_agg(n.nspname, {ACL.format('x.nspacl')}) FROM ns n JOIN pg_namespace x ON x.oid = n.oid
+  WHERE NOT EXISTS (SELECT 1 FROM ext e WHERE e.classid = 'pg_namespace'::regclass AND e.objid = n.oid)),
+'extension', (SELECT json_object_agg(e.extname, n.nspname || ' ' || e.extversion
+    || CASE WHEN EXISTS (SELECT 1 FROM ext d WHERE d.classid = 'pg_namespace'::regclass AND d.objid = n.oid)
+            THEN ' owns-schema' ELSE '' END)
+  FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace WHERE e.extname <> 'plpgsql'),
+'type', (SELECT json_object_agg(n.nspname || '.' || t.typname, CASE t.typtype
+    WHEN 'e' THEN 'enum ' || (SELECT string_agg(quote_literal(l.enumlabel), ',' ORDER BY l.enumsortorder)
+                              FROM pg_enum l WHERE l.enumtypid = t.oid)
+    WHEN 'd' THEN 'domain ' || format_type(t.typbasetype, t.typtypmod)
+      || CASE WHEN t.typnotnull THEN ' not null' ELSE '' END || coalesce(' default ' || t.typdefault, '')
+      || coalesce(' ' || (SELECT string_agg(pg_get_constraintdef(co.oid), ' ' ORDER BY co.conname)
+                          FROM pg_constraint co WHERE co.contypid = t.oid), '')
+    ELSE 'composite ' || (SELECT string_agg(a.attname || ' ' || format_type(a.atttypid, a.atttypmod), ', '
+                                            ORDER BY a.attnum)
+                          FROM pg_attribute a WHERE a.attrelid = t.typrelid AND a.attnum > 0 AND NOT a.attisdropped)
+    END)
+  FROM pg_type t JOIN ns n ON n.oid = t.typnamespace
+  WHERE (t.typtype IN ('e', 'd') OR (t.typtype = 'c' AND (SELECT relkind FROM pg_class WHERE oid = t.typrelid) = 'c'))
+    AND NOT EXISTS (SELECT 1 FROM ext e WHERE e.classid = 'pg_type'::regclass AND e.objid = t.oid)),
+'relation', (SELECT json_object_agg(c.nspname || '.' || c.relname, format('kind=%s rls=%s force=%s persistence=%s options=%s acl=%s',
+    c.relkind, c.relrowsecurity, c.relforcerowsecurity, c.relpersistence,
+    coalesce(array_to_string(c.reloptions, ','), ''), {ACL.format('c.relacl')}))
+  FROM rel c WHERE c.relkind IN ('r', 'p', 'v', 'm', 'S', 'f')),
+'column', (SELECT json_object_agg(k, v) FROM (
+  SELECT c.nspname || '.' || c.relname || '.' || a.attname AS k,
+    format('%s %s%s%s%s%s%s', row_number() OVER (PARTITION BY c.oid ORDER BY a.attnum),
+      format_type(a.atttypid, a.atttypmod),
+      CASE WHEN a.attnotnull THEN ' not null' ELSE '' END,
+      CASE WHEN a.attgenerated = 's' THEN ' generated (' || pg_get_expr(d.adbin, d.adrelid) || ')'
+           ELSE coalesce(' default ' || pg_get_expr(d.adbin, d.adrelid), '') END,
+      CASE a.attidentity WHEN 'a' THEN ' identity always' WHEN 'd' THEN ' identity by default' ELSE '' END,
+      CASE WHEN a.attcollation <> 0 AND a.attcollation <> (SELECT typcollation FROM pg_type WHERE oid = a.atttypid)
+           THEN ' collate ' || a.attcollation::regcollation ELSE '' END,
+      CASE WHEN a.attacl IS NOT NULL THEN ' acl=' || {ACL.format('a.attacl')} ELSE '' END) AS v
+  FROM rel c JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+  LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+  WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')) s),
+'constraint', (SELECT json_object_agg(c.nspname || '.' || c.relname || '.' || co.conname, pg_get_constraintdef(co.oid))
+  FROM pg_constraint co JOIN rel c ON c.oid = co.conrelid),
+'index', (SELECT json_object_agg(c.nspname || '.' || ic.relname, pg_get_indexdef(i.indexrelid))
+  FROM pg_index i JOIN rel c ON c.oid = i.indrelid JOIN pg_class ic ON ic.oid = i.indexrelid),
+'function', (SELECT json_object_agg(n.nspname || '.' || p.proname || '(' || pg_get_function_identity_arguments(p.oid) || ')',
+    pg_get_functiondef(p.oid) || E'\\n-- acl=' || {ACL.format('p.proacl')})
+  FROM pg_proc p JOIN ns n ON n.oid = p.pronamespace
+  WHERE p.prokind IN ('f', 'p')
+    AND NOT EXISTS (SELECT 1 FROM ext e WHERE e.classid = 'pg_proc'::regclass AND e.objid = p.oid)),
+'trigger', (SELECT json_object_agg(c.nspname || '.' || c.relname || '.' || t.tgname,
+    pg_get_triggerdef(t.oid) || ' enabled=' || t.tgenabled)
+  FROM pg_trigger t JOIN rel c ON c.oid = t.tgrelid WHERE NOT t.tgisinternal),
+'policy', (SELECT json_object_agg(c.nspname || '.' || c.relname || '.' || p.polname, format('%s %s to %s using (%s) check (%s)',
+    CASE WHEN p.polpermissive THEN 'permissive' ELSE 'restrictive' END, p.polcmd,
+    array_to_string(array(SELECT CASE WHEN r = 0 THEN 'public' ELSE r::regrole::text END
+                          FROM unnest(p.polroles) r ORDER BY 1), ','),
+    pg_get_expr(p.polqual, p.polrelid), pg_get_expr(p.polwithcheck, p.polrelid)))
+  FROM pg_policy p JOIN rel c ON c.oid = p.polrelid),
+'view', (SELECT json_object_agg(c.nspname || '.' || c.relname, pg_get_viewdef(c.oid))
+  FROM rel c WHERE c.relkind IN ('v', 'm')),
+'sequence', (SELECT json_object_agg(c.nspname || '.' || c.relname, format('%s start=%s inc=%s min=%s max=%s cache=%s cycle=%s',
+    format_type(s.seqtypid, NULL), s.seqstart, s.seqincrement, s.seqmin, s.seqmax, s.seqcache, s.seqcycle))
+  FROM pg_sequence s JOIN rel c ON c.oid = s.seqrelid),
+'publication', (SELECT json_object_agg(p.pubname, format('all=%s insert=%s update=%s delete=%s truncate=%s',
+    p.puballtables, p.pubinsert, p.pubupdate, p.pubdelete, p.pubtruncate)) FROM pg_publication p),
+'publication_table', (SELECT json_object_agg(pubname || ':' || schemaname || '.' || tablename, '')
+  FROM pg_publication_tables WHERE schemaname <> 'supabase_migrations'),
+'comment', (SELECT json_object_agg(k, v) FROM (
+  SELECT pg_describe_object(d.classoid, d.objoid, d.objsubid) AS k, d.description AS v
+  FROM pg_description d JOIN rel c ON d.classoid = 'pg_class'::regclass AND c.oid = d.objoid
+  UNION ALL
+  SELECT pg_describe_object(d.classoid, d.objoid, d.objsubid), d.description
+  FROM pg_description d JOIN pg_proc p ON d.classoid = 'pg_proc'::regclass AND p.oid = d.objoid
+  JOIN ns n ON n.oid = p.pronamespace
+  UNION ALL
+  SELECT pg_describe_object(d.classoid, d.objoid, d.objsubid), d.description
+  FROM pg_description d JOIN ns n ON d.classoid = 'pg_namespace'::regclass AND n.oid = d.objoid) s),
+'default_acl', (SELECT json_object_agg(a.defaclrole::regrole || ':' || coalesce(n.nspname, '*') || ':' || a.defaclobjtype,
+    {ACL.format('a.defaclacl')})
+  FROM pg_default_acl a LEFT JOIN pg_namespace n ON n.oid = a.defaclnamespace),
+'event_trigger', (SELECT json_object_agg(evtname, evtevent || ' ' || evtfoid::regproc || ' enabled=' || evtenabled)
+  FROM pg_event_trigger)
+)"""
+
+# DDL объектов, которые pg_dump -n <схемы приложения> не выгрузит: всё в платформенных схемах
+# и глобальные публикации/расширения. Ключи совпадают с CATALOG_SQL.
+EXTRAS_SQL = NS_CTE + """
+SELECT coalesce(json_agg(x), '[]') FROM (
+  SELECT 'policy' AS kind, c.nspname || '.' || c.relname || '.' || p.polname AS key, c.nspname AS schema,
+    format('CREATE POLICY %I ON %I.%I AS %s FOR %s TO %s%s%s;', p.polname, c.nspname, c.relname,
+      CASE WHEN p.polpermissive THEN 'PERMISSIVE' ELSE 'RESTRICTIVE' END,
+      CASE p.polcmd WHEN 'r' THEN 'SELECT' WHEN 'a' THEN 'INSERT' WHEN 'w' THEN 'UPDATE' WHEN 'd' THEN 'DELETE' ELSE 'ALL' END,
+      array_to_string(array(SELECT CASE WHEN r = 0 THEN 'public' ELSE quote_ident(r::regrole::text) END
+                            FROM unnest(p.polroles) r ORDER BY 1), ', '),
+      coalesce(' USING (' || pg_get_expr(p.polqual, p.polrelid) || ')', ''),
+      coalesce(' WITH CHECK (' || pg_get_expr(p.polwithcheck, p.polrelid) || ')', '')) AS ddl,
+    format('DROP POLICY IF EXISTS %I ON %I.%I;', p.polname, c.nspname, c.relname) AS drop
+  FROM pg_policy p JOIN rel c ON c.oid = p.polrelid
+  UNION ALL
+  SELECT 'trigger', c.nspname || '.' || c.relname || '.' || t.tgname, c.nspname,
+    pg_get_triggerdef(t.oid) || ';' || CASE t.tgenabled WHEN 'D'
+      THEN format(E'\\nALTER TABLE %I.%I DISABLE TRIGGER %I;', c.nspname, c.relname, t.tgname) ELSE '' END,
+    format('DROP TRIGGER IF EXISTS %I ON %I.%I;', t.tgname, c.nspname, c.relname)
+  FROM pg_trigger t JOIN rel c ON c.oid = t.tgrelid WHERE NOT t.tgisinternal
+  UNION ALL
+  SELECT 'function', n.nspname || '.' || p.proname || '(' || pg_get_function_identity_arguments(p.oid) || ')', n.nspname,
+    pg_get_functiondef(p.oid) || ';', NULL
+  FROM pg_proc p JOIN ns n ON n.oid = p.pronamespace
+  WHERE p.prokind IN ('f', 'p')
+    AND NOT EXISTS (SELECT 1 FROM ext e WHERE e.classid = 'pg_proc'::regclass AND e.objid = p.oid)
+  UNION ALL
+  SELECT 'extension', e.extname, NULL,
+    format('CREATE EXTENSION IF NOT EXISTS %I%s;', e.extname,
+      CASE WHEN EXISTS (SELECT 1 FROM ext d WHERE d.classid = 'pg_namespace'::regclass AND d.objid = n.oid)
+           THEN '' ELSE format(' WITH SCHEMA %I', n.nspname) END),
+    NULL
+  FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace WHERE e.extname <> 'plpgsql'
+  UNION ALL
+  SELECT 'publication', p.pubname, NULL,
+    format('CREATE PUBLICATION %I%s WITH (publish = %L);', p.pubname,
+      CASE WHEN p.puballtables THEN ' FOR ALL TABLES' ELSE '' END,
+      array_to_string(array_remove(ARRAY[
+        CASE WHEN p.pubinsert THEN 'insert' END, CASE WHEN p.pubupdate THEN 'update' END,
+        CASE WHEN p.pubdelete THEN 'delete' END, CASE WHEN p.pubtruncate THEN 'truncate' END], NULL), ', ')),
+    NULL
+  FROM pg_publication p
+  UNION ALL
+  SELECT 'publication_table', pubname || ':' || schemaname || '.' || tablename, NULL,
+    format(E'DO $squash$ BEGIN\\n  ALTER PUBLICATION %I ADD TABLE %I.%I;\\nEXCEPTION WHEN duplicate_object THEN NULL;\\nEND $squash$;',
+      pubname, schemaname, tablename),
+    NULL
+  FROM pg_publication_tables WHERE schemaname <> 'supabase_migrations'
+) x"""
+
+
+@dataclass
+class Source:
+    path: Path
+    kind: str                    # base | migration | root | extra
+    version: Optional[str] = None
+
+    @property
+    def rel(self) -> str:
+        try:
+            return str(self.path.resolve().relative_to(ROOT))
+        except ValueError:
+            return str(self.path)
+
+    def sha(self) -> str:
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+
+def migration_version(path: Path) -> Optional[str]:
+    m = VERSION_RE.match(path.name)
+    return m.group(1) if m else None
+
+
+def collect_sources(args: argparse.Namespace) -> tuple[list[Source], list[Path]]:
+    """Файлы в порядке применения и пропущенные корневые (по ROOT_SKIP + --root-skip)."""
+    out = [Source(p, "base") for p in BASE_SCHEMA if p.is_file()]
+    for p in sorted(args.migrations.glob("*.sql")):
+        v = migration_version(p)
+        if v is None:
+            print(f"  ! пропущен файл без версии: {p.name}", file=sys.stderr)
+            continue
+        if args.cutoff and v > args.cutoff:
+            continue
+        out.append(Source(p, "migration", v))
+    skipped: list[Path] = []
+    if args.with_root:
+        patterns = ROOT_SKIP + tuple(args.root_skip)
+        for p in sorted(ROOT.glob("*.sql")):
+            (skipped.append(p) if root_skipped(p, patterns) else out.append(Source(p, "root")))
+    out += [Source(p, "extra") for p in args.extra]
+    return out, skipped
+
+
+def sources_digest(sources: list[Source]) -> str:
+    h = hashlib.sha256()
+    for s in sources:
+        h.update(s.rel.encode() + b"\0" + s.path.read_bytes() + b"\0")
+    return h.hexdigest()
+
+
+def cutoff_of(sources: list[Source]) -> Optional[Source]:
+    migrations = [s for s in sources if s.kind == "migration"]
+    return migrations[-1] if migrations else None
+
+
+def mentioned_extensions(sources: list[Source]) -> set[str]:
+    out: set[str] = set()
+    for s in sources:
+        out |= {m.group(1).lower() for m in EXTENSION_RE.finditer(s.path.read_text(encoding="utf-8", errors="replace"))}
+    return out
+
+
+# --- Postgres ---
+
+def with_database(dsn: str, name: str) -> str:
+    if dsn.startswith(("postgres://", "postgresql://")):
+        u = urlsplit(dsn)
+        return urlunsplit((u.scheme, u.netloc, "/" + name, u.query, u.fragment))
+    return f"{dsn} dbname={name}"
+
+
+def ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def query_json(dsn: str, psql: str, sql: str) -> Any:
+    res = run_psql(dsn, psql, sql.strip() + ";\n", {})
+    if res.returncode != 0:
+        raise SystemExit(f"psql: {res.stderr.strip()}")
+    out = res.stdout.strip()
+    return json.loads(out) if out else None
+
+
+def apply_file(dsn: str, psql: str, path: Path) -> subprocess.CompletedProcess:
+    cmd = [psql, dsn, "-X", "-q", "-1", "-v", "ON_ERROR_STOP=1", "-f", str(path)]
+    return subprocess.run(cmd, text=True, capture_output=True, cwd=path.parent)
+
+
+def apply_sql(dsn: str, psql: str, sql: str) -> subprocess.CompletedProcess:
+    cmd = [psql, dsn, "-X", "-q", "-1", "-v", "ON_ERROR_STOP=1", "-f", "-"]
+    return subprocess.run(cmd, input=sql, text=True, capture_output=True)
+
+
+def pg_dump(args: argparse.Namespace, dsn: str, extra: list[str]) -> str:
+    cmd = [args.pg_dump, "--dbname", dsn, "--no-owner", "--no-tablespaces", "--no-security-labels",
+           "--no-subscriptions", *extra]
+    res = subprocess.run(cmd, text=True, capture_output=True)
+    if res.returncode != 0:
+        raise SystemExit(f"pg_dump: {res.stderr.strip()}")
+    return res.stdout
+
+
+def clean_dump(text: str) -> str:
+    """Убрать мета-команды psql (\\restrict в pg_dump 17.6+) и сделать CREATE SCHEMA идемпотентным."""
+    lines = [ln for ln in text.splitlines() if not ln.startswith(("\\restrict", "\\unrestrict"))]
+    out = "\n".join(lines)
+    return re.sub(r"^CREATE SCHEMA (?!IF NOT EXISTS)(\S+);$", r"CREATE SCHEMA IF NOT EXISTS \1;", out, flags=re.M)
+
+
+def drop_database(args: argparse.Namespace, name: str) -> None:
+    res = run_psql(args.dsn, args.psql, f"DROP DATABASE IF EXISTS {ident(name)} WITH (FORCE);\n", {})
+    if res.returncode != 0:
+        raise SystemExit(f"psql: {res.stderr.strip()}")
+
+
+def create_scratch(args: argparse.Namespace, name: str, bootstrap: Optional[str]) -> str:
+    drop_database(args, name)
+    template = args.template or "template0"
+    res = run_psql(args.dsn, args.psql, f"CREATE DATABASE {ident(name)} TEMPLATE {ident(template)};\n", {})
+    if res.returncode != 0:
+        raise SystemExit(f"psql: {res.stderr.strip()}")
+    dsn = with_database(args.dsn, name)
+    if bootstrap:
+        res = apply_sql(dsn, args.psql, bootstrap)
+        if res.returncode != 0:
+            raise SystemExit(f"Платформенный слой не применился ({name}): {res.stderr.strip()[-2000:]}\n"
+                             f"Используйте --template <чистая БД supabase> или --bootstrap FILE")
+    return dsn
+
+
+def platform_bootstrap(args: argparse.Namespace, sources: list[Source]) -> str:
+    """Платформенный слой из --dsn: расширения (кроме создаваемых самими миграциями), схемы auth/storage
+    без политик и триггеров приложения, пустые публикации."""
+    app_only = mentioned_extensions(sources) - SUPABASE_PREINSTALLED
+    exts = query_json(args.dsn, args.psql, """
+SELECT coalesce(json_agg(json_build_object('name', e.extname, 'schema', n.nspname,
+  'owns', EXISTS (SELECT 1 FROM pg_depend d WHERE d.classid = 'pg_namespace'::regclass AND d.objid = n.oid
+                  AND d.deptype = 'e')) ORDER BY e.extname), '[]')
+FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace WHERE e.extname <> 'plpgsql'""")
+    schemas = query_json(args.dsn, args.psql,
+                         "SELECT coalesce(json_agg(nspname), '[]') FROM pg_namespace WHERE nspname = ANY ('{"
+                         + ",".join(PLATFORM_SCHEMAS) + "}')")
+    pubs = query_json(args.dsn, args.psql, """
+SELECT coalesce(json_agg(json_build_object('name', pubname, 'all', puballtables)), '[]') FROM pg_publication""")
+
+    parts = ["-- Платформенный слой для scratch-БД (scripts/squash_migrations.py)", "SET check_function_bodies = false;"]
+    for e in exts:
+        if e["name"] in app_only:
+            continue
+        if e["owns"]:
+            parts.append(f"CREATE EXTENSION IF NOT EXISTS {ident(e['name'])};")
+        else:
+            parts.append(f"CREATE SCHEMA IF NOT EXISTS {ident(e['schema'])};")
+            parts.append(f"CREATE EXTENSION IF NOT EXISTS {ident(e['name'])} WITH SCHEMA {ident(e['schema'])};")
+    if schemas:
+        dump = clean_dump(pg_dump(args, args.dsn, ["--schema-only"] + [f"--schema={s}" for s in schemas]))
+        app_trigger = re.compile(r"EXECUTE (?:FUNCTION|PROCEDURE) (\"?[\w$]+\"?)\.", re.I)
+        for stmt, _ in split_statements(dump):
+            head = stmt.lstrip().upper()
+            if head.startswith("CREATE POLICY"):
+                continue
+            if head.startswith(("CREATE TRIGGER", "CREATE CONSTRAINT TRIGGER")):
+                m = app_trigger.search(stmt)
+                if m and m.group(1).strip('"') not in PLATFORM_SCHEMAS:
+                    continue
+            parts.append(stmt + ";")
+    for p in pubs:
+        parts.append(f"CREATE PUBLICATION {ident(p['name'])}{' FOR ALL TABLES' if p['all'] else ''};")
+    return "\n".join(parts) + "\n"
+
+
+def catalog(dsn: str, psql: str) -> dict[str, dict[str, str]]:
+    raw = query_json(dsn, psql, CATALOG_SQL) or {}
+    return {kind: dict(values or {}) for kind, values in raw.items()}
+
+
+def app_schemas(replayed: dict, pristine: dict) -> list[str]:
+    """public + схемы, созданные миграциями (не расширениями)."""
+    return sorted({"public"} | (set(replayed["schema"]) - set(pristine["schema"])))
+
+
+def data_tables(replayed: dict, schemas: list[str]) -> list[str]:
+    out = []
+    for key, value in replayed["relation"].items():
+        schema = key.split(".", 1)[0]
+        if (schema in schemas and value.split()[0] in ("kind=r", "kind=p")) or key in PLATFORM_DATA:
+            out.append(key)
+    return sorted(out)
+
+
+def table_sql(key: str) -> str:
+    schema, name = key.split(".", 1)
+    return f"{ident(schema)}.{ident(name)}"
+
+
+def data_digest(dsn: str, psql: str, tables: list[str]) -> dict[str, str]:
+    if not tables:
+        return {}
+    parts = [
+        f"SELECT {literal(t)} AS k, count(*)::text || ' ' || "
+        f"md5(coalesce(string_agg(t::text, E'\\n' ORDER BY t::text), '')) AS v FROM {table_sql(t)} t"
+        for t in tables
+    ]
+    sql = "SELECT coalesce(json_object_agg(k, v), '{}') FROM (\n" + "\nUNION ALL\n".join(parts) + "\n) s"
+    return query_json(dsn, psql, sql) or {}
+
+
+def diff_catalogs(a: dict[str, dict[str, str]], b: dict[str, dict[str, str]], limit: int) -> list[str]:
+    out: list[str] = []
+    for kind in sorted(set(a) | set(b)):
+        left, right = a.get(kind, {}), b.get(kind, {})
+        for key in sorted(set(left) | set(right)):
+            if key not in right:
+                out.append(f"- {kind} {key}: только после миграций")
+            elif key not in left:
+                out.append(f"+ {kind} {key}: только в baseline")
+            elif left[key] != right[key]:
+                out.append(f"~ {kind} {key}")
+                delta = difflib.unified_diff(left[key].splitlines(), right[key].splitlines(), "migrations", "baseline",
+                                             lineterm="", n=1)
+                out += ["    " + ln for ln in list(delta)[2:14]]
+    if len(out) > limit:
+        out = out[:limit] + [f"… ещё {len(out) - limit} строк"]
+    return out
+
+
+# --- baseline ---
+
+def render_extras(extras: list[dict], replayed: dict, pristine: dict, platform: set[str]) -> tuple[list[str], list[str]]:
+    """(до pg_dump: расширения; после: публикации, объекты в платформенных схемах)."""
+    pre: list[str] = []
+    post: dict[str, list[str]] = {"publication": [], "function": [], "trigger": [], "policy": [], "publication_table": []}
+    for x in extras:
+        kind, key = x["kind"], x["key"]
+        if kind not in ("extension", "publication", "publication_table") and x["schema"] not in platform:
+            continue
+        if replayed.get(kind, {}).get(key) == pristine.get(kind, {}).get(key):
+            continue
+        if kind == "extension":
+            pre.append(x["ddl"])
+            continue
+        if x.get("drop") and key in pristine.get(kind, {}):
+            post[kind].append(x["drop"])
+        post[kind].append(x["ddl"])
+    return pre, [stmt for kind in post for stmt in post[kind]]
+
+
+def platform_tables(cat: dict) -> list[str]:
+    return [t for t in PLATFORM_DATA if t in cat["relation"]]
+
+
+def platform_rows(dsn: str, psql: str, before: dict[str, str], after: dict[str, str]) -> list[str]:
+    """Строки платформенных таблиц (storage.buckets), добавленные миграциями."""
+    out = []
+    for key in PLATFORM_DATA:
+        if key not in after or after.get(key) == before.get(key):
+            continue
+        rows = query_json(dsn, psql, f"SELECT coalesce(json_agg(t), '[]') FROM {table_sql(key)} t")
+        if rows:
+            out.append(f"INSERT INTO {table_sql(key)} SELECT * FROM json_populate_recordset(NULL::{table_sql(key)}, "
+                       f"{literal(json.dumps(rows, ensure_ascii=False))}) ON CONFLICT DO NOTHING;")
+    return out
+
+
+def history_sql(sources: list[Source]) -> str:
+    rows = []
+    for s in sources:
+        if s.kind == "migration":
+            name = VERSION_RE.match(s.path.name).group(2)
+            rows.append(f"  ({literal(s.version)}, {literal(name)})")
+    if not rows:
+        return ""
+    return (
+        "CREATE SCHEMA IF NOT EXISTS supabase_migrations;\n"
+        "CREATE TABLE IF NOT EXISTS supabase_migrations.schema_migrations "
+        "(version text PRIMARY KEY, statements text[], name text);\n"
+        "INSERT INTO supabase_migrations.schema_migrations (version, name) VALUES\n"
+        + ",\n".join(rows) + "\nON CONFLICT (version) DO NOTHING;\n"
+    )
+
+
+def header(args: argparse.Namespace, sources: list[Source], skipped: list[Path], server: str) -> str:
+    cut = cutoff_of(sources)
+    lines = [
+        f"-- Squashed baseline: {len(sources)} файлов до {cut.path.name if cut else '-'} включительно.",
+        "-- Сгенерировано scripts/squash_migrations.py build — не редактировать вручную; миграции с версией",
+        "-- больше отсечки применяются поверх. Проверка: scripts/squash_migrations.py verify <этот файл>.",
+        "-- squash-format: 1",
+        f"-- squash-cutoff: {cut.path.name if cut else '-'}",
+        f"-- squash-dir: {Source(args.migrations, 'dir').rel}",
+        f"-- squash-root-skipped: {len(skipped)}",
+        f"-- squash-server: {server}",
+        f"-- squash-sha256: {sources_digest(sources)}",
+    ]
+    lines += [f"-- squash-file: {s.sha()[:16]} {s.kind} {s.rel}" for s in sources]
+    return "\n".join(lines) + "\n"
+
+
+def parse_header(path: Path) -> tuple[dict[str, str], list[tuple[str, str, str]]]:
+    meta: dict[str, str] = {}
+    files: list[tuple[str, str, str]] = []
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.startswith("--"):
+                break
+            m = HEADER_RE.match(line.rstrip("\n"))
+            if not m:
+                continue
+            if m.group(1) == "file":
+                sha, kind, rel = m.group(2).split(" ", 2)
+                files.append((sha, kind, rel))
+            else:
+                meta[m.group(1)] = m.group(2)
+    if "format" not in meta:
+        raise SystemExit(f"{path}: нет заголовка squash (-- squash-format)")
+    return meta, files
+
+
+def sources_from_header(path: Path) -> list[Source]:
+    _, files = parse_header(path)
+    out = []
+    for _, kind, rel in files:
+        p = Path(rel) if Path(rel).is_absolute() else ROOT / rel
+        if not p.is_file():
+            raise SystemExit(f"Файл из заголовка не найден: {rel}")
+        out.append(Source(p, kind, migration_version(p) if kind == "migration" else None))
+    return out
+
+
+# --- шаги ---
+
+@dataclass
+class Replay:
+    dsn: str
+    pristine: dict
+    replayed: dict
+    platform_before: dict[str, str]
+    timings: list[tuple[float, Source]]
+    failed: list[tuple[Source, str]]
+
+
+def load_bootstrap(args: argparse.Namespace, sources: list[Source]) -> Optional[str]:
+    if args.template:
+        return None
+    if args.bootstrap:
+        return args.bootstrap.read_text(encoding="utf-8")
+    text = platform_bootstrap(args, sources)
+    if args.save_bootstrap:
+        args.save_bootstrap.parent.mkdir(parents=True, exist_ok=True)
+        args.save_bootstrap.write_text(text, encoding="utf-8")
+        print(f"Платформенный слой: {args.save_bootstrap}")
+    return text
+
+
+def replay(args: argparse.Namespace, sources: list[Source], bootstrap: Optional[str]) -> Replay:
+    name = f"{args.prefix}_replay"
+    dsn = create_scratch(args, name, bootstrap)
+    pristine = catalog(dsn, args.psql)
+    platform_before = data_digest(dsn, args.psql, platform_tables(pristine))
+    timings: list[tuple[float, Source]] = []
+    failed: list[tuple[Source, str]] = []
+    print(f"Проигрывание {len(sources)} файлов в {name} …")
+    for i, s in enumerate(sources, 1):
+        t0 = time.perf_counter()
+        res = apply_file(dsn, args.psql, s.path)
+        timings.append((time.perf_counter() - t0, s))
+        if res.returncode == 0:
+            continue
+        err = res.stderr.strip().splitlines()
+        msg = err[-1] if err else f"код {res.returncode}"
+        if s.kind in ("migration", "base") and not args.keep_going:
+            raise SystemExit(f"[{i}/{len(sources)}] {s.rel}: {msg}\nscratch-БД оставлена: {name}")
+        failed.append((s, msg))
+        print(f"  ! {s.rel}: {msg}", file=sys.stderr)
+    return Replay(dsn, pristine, catalog(dsn, args.psql), platform_before, timings, failed)
+
+
+def build_baseline(args: argparse.Namespace, rp: Replay, sources: list[Source], skipped: list[Path]) -> str:
+    platform = set(rp.pristine["schema"]) - {"public"}
+    schemas = app_schemas(rp.replayed, rp.pristine)
+    extras = query_json(rp.dsn, args.psql, EXTRAS_SQL) or []
+    pre, post = render_extras(extras, rp.replayed, rp.pristine, platform)
+    server = (query_json(rp.dsn, args.psql, "SELECT to_json(current_setting('server_version'))") or "?")
+
+    body = clean_dump(pg_dump(args, rp.dsn, ["--schema-only"] + [f"--schema={s}" for s in schemas]))
+    parts = [header(args, sources, skipped, server)]
+    if pre:
+        parts += ["-- Расширения, созданные миграциями", *pre, ""]
+    parts += ["-- Схема приложения (pg_dump --schema-only)", body.strip(), ""]
+
+    tables = [t for t in data_tables(rp.replayed, schemas) if t not in PLATFORM_DATA]
+    if not args.no_data and tables:
+        counts = data_digest(rp.dsn, args.psql, tables)
+        seeded = [t for t in tables if not counts.get(t, "0 ").startswith("0 ")]
+        if seeded:
+            dump = clean_dump(pg_dump(args, rp.dsn, ["--data-only", "--rows-per-insert=500"]
+                                      + [f"--table={table_sql(t)}" for t in seeded]))
+            parts += [f"-- Данные, засеянные миграциями: {', '.join(seeded)}",
+                      "SET session_replication_role = replica;", dump.strip(), "SET session_replication_role = DEFAULT;", ""]
+    rows = platform_rows(rp.dsn, args.psql, rp.platform_before, data_digest(rp.dsn, args.psql, platform_tables(rp.replayed)))
+    if post or rows:
+        parts += ["-- Объекты приложения в платформенных схемах и публикациях", *post, *rows, ""]
+    if not args.no_history:
+        parts += ["-- Отсечка: версии, вошедшие в baseline, считаются применёнными", history_sql(sources)]
+
+    secrets = 0
+    if "vault.secrets" in rp.replayed["relation"]:
+        secrets = query_json(rp.dsn, args.psql, "SELECT count(*) FROM vault.secrets")
+    if secrets:
+        print(f"  ! vault.secrets: {secrets} секретов после миграций — в baseline не переносятся", file=sys.stderr)
+    return "\n".join(parts)
+
+
+def verify_baseline(args: argparse.Namespace, rp: Replay, baseline: Path, bootstrap: Optional[str]) -> int:
+    name = f"{args.prefix}_verify"
+    dsn = create_scratch(args, name, bootstrap)
+    t0 = time.perf_counter()
+    res = apply_file(dsn, args.psql, baseline)
+    load_s = time.perf_counter() - t0
+    if res.returncode != 0:
+        print(f"Baseline не загрузился в {name}: {res.stderr.strip()[-2000:]}", file=sys.stderr)
+        return 1
+    loaded = catalog(dsn, args.psql)
+    tables = data_tables(rp.replayed, app_schemas(rp.replayed, rp.pristine))
+    rp.replayed["data"] = data_digest(rp.dsn, args.psql, tables)
+    loaded["data"] = data_digest(dsn, args.psql, [t for t in tables if t in loaded["relation"]])
+    replay_s = sum(t for t, _ in rp.timings)
+    print(f"Проигрывание: {replay_s:.1f} с ({len(rp.timings)} файлов); baseline: {load_s:.1f} с"
+          + (f" (×{replay_s / load_s:.0f})" if load_s > 0 else ""))
+    diff = diff_catalogs(rp.replayed, loaded, args.max_diff)
+    if not args.keep:
+        drop_database(args, name)
+    if diff:
+        print(f"Каталоги расходятся ({baseline.name}):")
+        print("\n".join("  " + ln for ln in diff))
+        return 1
+    counted = sum(len(v) for v in loaded.values())
+    print(f"Эквивалентно: {counted} объектов каталога и данных совпадают")
+    return 0
+
+
+def print_replay(rp: Replay, top: int) -> None:
+    slow = sorted(rp.timings, key=lambda x: -x[0])[:top]
+    print("Самые медленные файлы: " + ", ".join(f"{s.path.name} {t:.2f} с" for t, s in slow))
+    if rp.failed:
+        print(f"Не применились (ad-hoc SQL, пропущены): {len(rp.failed)}")
+        for s, msg in rp.failed:
+            print(f"  {s.rel}: {msg}")
+
+
+def finish(args: argparse.Namespace) -> None:
+    if args.keep:
+        print(f"scratch-БД оставлены: {args.prefix}_replay, {args.prefix}_verify")
+    else:
+        drop_database(args, f"{args.prefix}_replay")
+
+
+def cmd_plan(args: argparse.Namespace) -> int:
+    sources, skipped = collect_sources(args)
+    cut = cutoff_of(sources)
+    kinds: dict[str, int] = {}
+    for s in sources:
+        kinds[s.kind] = kinds.get(s.kind, 0) + 1
+    print(f"Файлов: {len(sources)} (" + ", ".join(f"{k}={v}" for k, v in kinds.items()) + ")"
+          + (f"; корневых пропущено по ROOT_SKIP: {len(skipped)}" if args.with_root else ""))
+    print(f"Отсечка: {cut.path.name if cut else '-'} → {Source(args.out, 'dir').rel}/{cut.version if cut else 'none'}_baseline.sql")
+    print(f"sha256 источников: {sources_digest(sources)}")
+    exts = sorted(mentioned_extensions(sources))
+    if exts:
+        print("Расширения в миграциях: " + ", ".join(
+            f"{e}{' (предустановлено в Supabase)' if e in SUPABASE_PREINSTALLED else ''}" for e in exts))
+    model = load_model([s.path for s in sources])
+    rls = sum(1 for t in model.tables.values() if t.rls)
+    print(f"Ожидается (статическая модель): таблиц {len(model.tables)} (RLS: {rls}), политик {len(model.policies)}, "
+          f"функций {len(model.functions)}, индексов {len(model.indexes)}")
+    if model.dynamic:
+        print(f"  EXECUTE в DO-блоках не моделируется: {len(model.dynamic)} мест")
+    if args.list:
+        for s in sources:
+            print(f"  {s.kind:9} {s.rel}")
+        for p in skipped:
+            print(f"  {'skip':9} {p.name}")
+    return 0
+
+
+def cmd_build(args: argparse.Namespace) -> int:
+    sources, skipped = collect_sources(args)
+    cut = cutoff_of(sources)
+    if cut is None:
+        raise SystemExit(f"Нет миграций в {args.migrations}")
+    bootstrap = load_bootstrap(args, sources)
+    rp = replay(args, sources, bootstrap)
+    print_replay(rp, args.top)
+    text = build_baseline(args, rp, sources, skipped)
+    args.out.mkdir(parents=True, exist_ok=True)
+    path = args.out / f"{cut.version}_baseline.sql"
+    path.write_text(text, encoding="utf-8")
+    print(f"Baseline: {path} ({len(text) // 1024} КБ, {len(sources)} файлов до {cut.path.name})")
+    code = 0 if args.no_verify else verify_baseline(args, rp, path, bootstrap)
+    finish(args)
+    return code
+
+
+def cmd_verify(args: argparse.Namespace) -> int:
+    sources = sources_from_header(args.baseline)
+    _, files = parse_header(args.baseline)
+    stale = [rel for sha, _, rel in files if (ROOT / rel).is_file() and Source(ROOT / rel, "").sha()[:16] != sha]
+    if stale:
+        print(f"  ! изменены после squash ({len(stale)}): " + ", ".join(stale[:10]), file=sys.stderr)
+    bootstrap = load_bootstrap(args, sources)
+    rp = replay(args, sources, bootstrap)
+    print_replay(rp, args.top)
+    code = verify_baseline(args, rp, args.baseline, bootstrap)
+    finish(args)
+    return code
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    meta, files = parse_header(args.baseline)
+    cutoff = meta.get("cutoff", "-")
+    version = migration_version(Path(cutoff)) or ""
+    mdir = ROOT / meta.get("dir", str(MIGRATIONS_DIR.relative_to(ROOT)))
+    squashed = {rel: sha for sha, _, rel in files}
+    changed = [rel for rel, sha in squashed.items()
+               if (ROOT / rel).is_file() and Source(ROOT / rel, "").sha()[:16] != sha]
+    removed = [rel for rel in squashed if not (ROOT / rel).is_file()]
+    current = sorted(mdir.glob("*.sql"))
+    late = [p for p in current if (migration_version(p) or "") <= version and Source(p, "").rel not in squashed]
+    pending = [p for p in current if (migration_version(p) or "") > version]
+    print(f"Baseline {args.baseline.name}: отсечка {cutoff}, файлов {len(files)}, сервер {meta.get('server', '?')}")
+    print(f"Поверх baseline применить: {len(pending)} миграций" + (f" ({pending[0].name} … {pending[-1].name})" if pending else ""))
+    for title, items in (("Изменены после squash", changed), ("Удалены", removed),
+                         ("Добавлены с версией не позже отсечки (не войдут ни в baseline, ни поверх)", [Source(p, "").rel for p in late])):
+        if items:
+            print(f"{title}: {len(items)}")
+            for rel in items[:args.top]:
+                print(f"  {rel}")
+    if changed or removed or late:
+        print("Baseline устарел: пересоберите (build) или перенесите изменения в новую миграцию")
+        return 1
+    print("Baseline актуален")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Squash миграций в baseline с проверкой эквивалентности каталога")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    def add_sources(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--migrations", type=Path, default=MIGRATIONS_DIR,
+                       help=f"Каталог миграций (по умолчанию {MIGRATIONS_DIR.relative_to(ROOT)})")
+        p.add_argument("--cutoff", default=None, help="Сжимать только миграции с версией ≤ (YYYYMMDDHHMMSS)")
+        p.add_argument("--with-root", action="store_true", help="Применить корневые *.sql поверх миграций")
+        p.add_argument("--root-skip", action="append", default=[], help="Доп. шаблон пропуска корневых файлов")
+        p.add_argument("--extra", type=Path, action="append", default=[], help="Дополнительный SQL-файл (можно повторять)")
+        p.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Каталог для baseline")
+
+    def add_db(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--dsn", default=os.environ.get("DATABASE_URL", DEFAULT_DSN),
+                       help="Админское подключение (по умолчанию $DATABASE_URL или локальный supabase)")
+        p.add_argument("--psql", default="psql", help="Путь к psql")
+        p.add_argument("--pg-dump", default="pg_dump", help="Путь к pg_dump")
+        p.add_argument("--template", default=os.environ.get("SQUASH_TEMPLATE_DB"),
+                       help="Чистая БД supabase для клонирования scratch-БД (по умолчанию $SQUASH_TEMPLATE_DB)")
+        p.add_argument("--bootstrap", type=Path, default=None, help="Готовый SQL платформенного слоя вместо выгрузки из --dsn")
+        p.add_argument("--save-bootstrap", type=Path, default=None, help="Сохранить выгруженный платформенный слой")
+        p.add_argument("--prefix", default="squash_scratch", help="Префикс имён scratch-БД")
+        p.add_argument("--keep", action="store_true", help="Не удалять scratch-БД")
+        p.add_argument("--keep-going", action="store_true", help="Не останавливаться на ошибке миграции")
+        p.add_argument("--max-diff", type=int, default=80, help="Сколько строк расхождений показать")
+        p.add_argument("--top", type=int, default=5, help="Сколько самых медленных файлов показать")
+
+    pl = sub.add_parser("plan", help="Офлайн: файлы, отсечка, ожидаемые объекты")
+    add_sources(pl)
+    pl.add_argument("--list", action="store_true", help="Перечислить файлы")
+    pl.set_defaults(func=cmd_plan)
+
+    bd = sub.add_parser("build", help="Проиграть миграции, выгрузить baseline и проверить")
+    add_sources(bd)
+    add_db(bd)
+    bd.add_argument("--no-verify", action="store_true", help="Не проверять эквивалентность")
+    bd.add_argument("--no-data", action="store_true", help="Не переносить данные, засеянные миграциями")
+    bd.add_argument("--no-history", action="store_true", help="Не отмечать версии в supabase_migrations.schema_migrations")
+    bd.set_defaults(func=cmd_build)
+
+    vf = sub.add_parser("verify", help="Проверить готовый baseline против проигрывания его файлов")
+    vf.add_argument("baseline", type=Path)
+    add_db(vf)
+    vf.set_defaults(func=cmd_verify)
+
+    st = sub.add_parser("status", help="Офлайн: что добавилось после отсечки, не изменились ли сжатые файлы")
+    st.add_argument("baseline", type=Path)
+    st.add_argument("--top", type=int, default=20, help="Сколько файлов показать в каждой группе")
+    st.set_defaults(func=cmd_status)
+
+    args = ap.parse_args()
+    if getattr(args, "dsn", None):
+        print(f"DB: {redact(args.dsn)}", file=sys.stderr)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
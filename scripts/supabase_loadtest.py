@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест слоя БД без AI — Python-версия scripts/supabase_stress_no_ai.js
+(пакет scripts/loadtest): составные сценарии, закрытый/открытый цикл, HDR-перцентили,
+отчёт JSON + CSV и сравнение прогонов.
+
+Защита та же, что у JS-скрипта: без STRESS_CONFIRM=YES_I_UNDERSTAND_THIS_IS_STAGING_LOAD_TEST
+не запускается. Все записи помечены run_id (stress_YYYYMMDDhhmmss, формат общий с JS —
+cleanup любого из двух скриптов удаляет прогон другого).
+
+Env: SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY (локально: supabase start → http://127.0.0.1:54321).
+
+Сценарии (python3 scripts/supabase_loadtest.py list):
+  establishment, employees, tech_cards, inventories, language_churn, read_probe   — фазы JS-скрипта
+  product_search, establishment_products, establishment_products_paging, pos_orders, haccp_logs
+
+Параметры сценария — после двоеточия: ops, concurrency (закрытый цикл) или
+rate, duration, arrival=poisson|constant, max_inflight (открытый цикл), плюс свои
+(count, batch, page_size, ...).
+
+Примеры:
+  export STRESS_CONFIRM=YES_I_UNDERSTAND_THIS_IS_STAGING_LOAD_TEST
+  python3 scripts/supabase_loadtest.py run                       # те же фазы, что у JS
+  python3 scripts/supabase_loadtest.py run --plan establishment,employees:ops=20,tech_cards:count=500 \\
+      --plan establishment_products --plan establishment_products_paging:rate=50,duration=30 \\
+      --plan pos_orders:rate=10,duration=30 --plan haccp_logs:rate=20,duration=30
+  python3 scripts/supabase_loadtest.py compare loadtest_results/stress_A.json loadtest_results/stress_B.json --max-regress 15
+  python3 scripts/supabase_loadtest.py cleanup --run-id stress_20260413153000
+
+Переменные как у JS-скрипта тоже читаются: STRESS_EMPLOYEES, STRESS_TECH_CARDS, STRESS_INVENTORIES,
+STRESS_CONCURRENCY, STRESS_LANGUAGE_SWITCH_OPS, STRESS_LANGS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+if importlib.util.find_spec("requests") is None:
+    print("Установите requests: pip install requests", file=sys.stderr)
+    sys.exit(1)
+
+from loadtest import (
+    DEFAULT_PLAN,
+    SCENARIOS,
+    Context,
+    RestClient,
+    build_report,
+    cleanup,
+    compare,
+    parse_spec,
+    print_summary,
+    run_scenario,
+    write_report,
+)
+
+CONFIRM_TOKEN = "YES_I_UNDERSTAND_THIS_IS_STAGING_LOAD_TEST"
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def js_compatible_overrides() -> dict[str, dict]:
+    """STRESS_* из JS-скрипта → параметры сценариев плана по умолчанию."""
+    c = _env_int("STRESS_CONCURRENCY", 8)
+    return {
+        "employees": {"ops": _env_int("STRESS_EMPLOYEES", 100), "concurrency": c},
+        "tech_cards": {"count": _env_int("STRESS_TECH_CARDS", 1000)},
+        "inventories": {"count": _env_int("STRESS_INVENTORIES", 10)},
+        "language_churn": {"ops": _env_int("STRESS_LANGUAGE_SWITCH_OPS", 300), "concurrency": c},
+        "read_probe": {"concurrency": c},
+    }
+
+
+def make_client() -> RestClient:
+    url = os.environ.get("SUPABASE_URL", "").strip()
+    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "").strip()
+    if not url or not key:
+        print("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY in environment.", file=sys.stderr)
+        sys.exit(1)
+    return RestClient(url, key)
+
+
+def require_confirm() -> None:
+    if os.environ.get("STRESS_CONFIRM", "").strip() != CONFIRM_TOKEN:
+        print(f"Refusing to run. Set STRESS_CONFIRM={CONFIRM_TOKEN}", file=sys.stderr)
+        sys.exit(1)
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    require_confirm()
+    client = make_client()
+    specs = [s for item in (args.plan or [",".join(DEFAULT_PLAN)]) for s in _split_plan(item)]
+    defaults = js_compatible_overrides() if not args.plan else {}
+    plan = []
+    for spec in specs:
+        name, params = parse_spec(spec)
+        if name not in SCENARIOS:
+            print(f"Unknown scenario: {name} (см. list)", file=sys.stderr)
+            return 2
+        plan.append((name, {**defaults.get(name, {}), **params}))
+
+    run_id = "stress_" + datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    langs = [x.strip().lower() for x in os.environ.get("STRESS_LANGS", "ru,en,es,it,tr,vi,de,fr").split(",") if x.strip()]
+    ctx = Context(client=client, run_id=run_id, langs=langs, seed=args.seed)
+    print(f"Starting non-AI load run: {run_id} → {client.base_url}")
+    print("Plan: " + ", ".join(f"{n}{params or ''}" for n, params in plan))
+
+    started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    t0 = time.perf_counter()
+    results = []
+    for name, params in plan:
+        print(f"  → {name} {params or ''}", flush=True)
+        r = run_scenario(ctx, SCENARIOS[name], params)
+        results.append(r)
+        if r.skipped:
+            print(f"    skipped: {r.skipped}")
+        elif name in ("establishment", "employees") and not r.ok:
+            print(f"    {name}: все операции упали ({dict(r.errors)}) — дальше нет смысла", file=sys.stderr)
+            break
+
+    report = build_report(
+        {
+            "run_id": run_id,
+            "started_at": started,
+            "base_url": client.base_url,
+            "seed": args.seed,
+            "total_s": round(time.perf_counter() - t0, 2),
+            "establishment_id": ctx.state.get("establishment_id"),
+            "cleanup_command": f"STRESS_CONFIRM={CONFIRM_TOKEN} python3 scripts/supabase_loadtest.py cleanup --run-id {run_id}",
+        },
+        results,
+    )
+    print_summary(report)
+    json_path, csv_path = write_report(report, args.out_dir)
+    print(f"\nReport: {json_path}  {csv_path}")
+    print(f"Cleanup: {report['cleanup_command']}")
+    if args.baseline:
+        base = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if compare(base, report, args.max_regress):
+            return 1
+    return 0
+
+
+def _split_plan(item: str) -> list[str]:
+    """"a,b:ops=1,concurrency=2,c" → ["a", "b:ops=1,concurrency=2", "c"] (k=v прилипают к сценарию)."""
+    out: list[str] = []
+    for part in item.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" in part and ":" not in part and out:
+            out[-1] += "," + part
+        else:
+            out.append(part)
+    return out
+
+
+def cmd_cleanup(args: argparse.Namespace) -> int:
+    require_confirm()
+    run_id = args.run_id or os.environ.get("STRESS_CLEANUP_RUN_ID", "").strip()
+    if not run_id:
+        print("--run-id (или STRESS_CLEANUP_RUN_ID) is required for cleanup.", file=sys.stderr)
+        return 2
+    try:
+        res = cleanup(make_client(), run_id)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    print(json.dumps({"mode": "cleanup", "cleanupRunId": run_id, **res}, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    head = json.loads(args.head.read_text(encoding="utf-8"))
+    regressions = compare(base, head, args.max_regress)
+    if regressions:
+        print("Регрессии: " + "; ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    for name, sc in SCENARIOS.items():
+        mark = "*" if name in DEFAULT_PLAN else " "
+        print(f"{mark} {name:32} {sc.description}  {sc.defaults}")
+    print("\n* — план по умолчанию (как supabase_stress_no_ai.js)")
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Нагрузочный тест Supabase (без AI)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    run = sub.add_parser("run", help="Прогон плана сценариев")
+    run.add_argument("--plan", action="append", help="Сценарии через запятую, параметры после ':' (можно повторять)")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out-dir", type=Path, default=ROOT / "loadtest_results")
+    run.add_argument("--baseline", type=Path, default=None, help="Отчёт прошлого прогона для сравнения")
+    run.add_argument("--max-regress", type=float, default=None, help="Порог роста p95/p99, %%; код 1 при превышении")
+    run.set_defaults(func=cmd_run)
+
+    cl = sub.add_parser("cleanup", help="Удалить данные прогона по run_id")
+    cl.add_argument("--run-id", default=None)
+    cl.set_defaults(func=cmd_cleanup)
+
+    cmp_ = sub.add_parser("compare", help="Сравнить два отчёта")
+    cmp_.add_argument("base", type=Path)
+    cmp_.add_argument("head", type=Path)
+    cmp_.add_argument("--max-regress", type=float, default=None)
+    cmp_.set_defaults(func=cmd_compare)
+
+    ls = sub.add_parser("list", help="Список сценариев")
+    ls.set_defaults(func=cmd_list)
+
+    args = ap.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
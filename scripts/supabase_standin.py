@@ -0,0 +1,839 @@
+#!/usr/bin/env python3
+"""
+Локальная подмена Supabase (PostgREST + Storage) для офлайн-прогона и бенчмарка скриптов.
+
+Все сервисные скрипты берут адрес из SUPABASE_URL (по умолчанию — прод), поэтому достаточно:
+
+  python3 scripts/supabase_standin.py --fixtures /tmp/standin_data --port 54329 --latency-ms 20
+  SUPABASE_URL=http://127.0.0.1:54329 SUPABASE_SERVICE_KEY=x python3 scripts/count_products.py
+  curl -s http://127.0.0.1:54329/__standin/stats        # запросы/время по маршрутам
+  curl -s -X POST http://127.0.0.1:54329/__standin/reset # обнулить счётчики перед замером
+
+Данные — в памяти процесса:
+  --fixtures DIR       DIR/<table>.json (массив) или <table>.jsonl → таблицы;
+                       DIR/storage/<bucket>/… → объекты Storage
+  --table NAME=FILE    отдельная таблица (можно повторять)
+  --dump DIR           при остановке записать таблицы в DIR/<table>.json (проверка результата скрипта)
+  --latency-ms MS      искусственная задержка на запрос (RTT до облака): выигрыш от меньшего
+                       числа round trip виден во времени прогона, а не только в счётчике
+
+PostgREST (подмножество, которым пользуются скрипты):
+  GET/HEAD /rest/v1/<table>   select=a,b,alias:c,names->>ru,*; фильтры col=eq|neq|gt|gte|lt|lte|like|ilike|
+                              is|in.(…) и not.<op>; or=(…), and=(…) с вложенностью; order=col.asc|desc[.nullsfirst|
+                              .nullslast]; limit/offset и Range; Prefer: count=exact → Content-Range;
+                              Accept: application/vnd.pgrst.object+json
+  POST                        вставка объекта/массива, id=uuid4 по умолчанию; Prefer: return=representation|minimal,
+                              resolution=merge-duplicates|ignore-duplicates (+ on_conflict=col,…)
+  PATCH / DELETE              по фильтрам, Prefer: return=representation
+Storage:
+  GET /storage/v1/bucket, POST /storage/v1/object/list/<bucket> {prefix, limit, offset, sortBy, search},
+  GET/HEAD /storage/v1/object[/public|/authenticated]/<bucket>/<path>, POST/PUT (x-upsert), DELETE
+  (объект или {"prefixes": [...]}).
+
+Edge Functions (для scripts/edge_prober.py):
+  POST/GET /functions/v1/<name> — только функции из --function NAME=SPEC; SPEC: статус по умолчанию,
+  доли ошибок и задержка, например 200,429:0.1,503:0.05,ms=80,jitter=20 (ответ {"ok": true} или
+  {"error": …}, у 429 — Retry-After). Случайность детерминирована (--seed).
+
+Ключи не проверяются. Встраивание (select=tbl(cols)), RPC и ненастроенные Edge Functions не поддерживаются —
+400/404 с понятным сообщением, чтобы было видно, что скрипт вышел за подмножество.
+
+Из Python (бенчмарк/проверка без отдельного процесса):
+  from supabase_standin import StandIn
+  with StandIn(fixtures=Path("/tmp/standin_data"), latency_ms=20) as s:
+      os.environ["SUPABASE_URL"] = s.url
+      ...
+      print(s.stats())
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import random
+import re
+import signal
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl, unquote, urlparse
+
+from instrumentation import Timing
+
+OBJECT_ACCEPT = "application/vnd.pgrst.object+json"
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+# --- PostgREST: значения, фильтры, select ------------------------------------
+
+
+def split_list(s: str) -> list[str]:
+    """«a.eq.1,or(b.is.null,c.eq."x,y")» → элементы верхнего уровня (скобки и кавычки учитываются)."""
+    out, cur, depth, quoted = [], [], 0, False
+    for c in s:
+        if c == '"':
+            quoted = not quoted
+        elif not quoted and c == "(":
+            depth += 1
+        elif not quoted and c == ")":
+            depth -= 1
+        if c == "," and depth == 0 and not quoted:
+            out.append("".join(cur))
+            cur = []
+        else:
+            cur.append(c)
+    if cur:
+        out.append("".join(cur))
+    return [x.strip() for x in out if x.strip()]
+
+
+def column_value(row: dict, col: str) -> Any:
+    """col, col->key (JSON), col->>key (текст)."""
+    m = re.match(r"^([^-]+?)((?:->>?[^-]+)*)$", col)
+    if not m or not m.group(2):
+        return row.get(col)
+    v: Any = row.get(m.group(1))
+    for arrow, key in re.findall(r"(->>?)([^-]+)", m.group(2)):
+        if isinstance(v, str) and v.startswith(("{", "[")):
+            try:
+                v = json.loads(v)
+            except ValueError:
+                return None
+        if isinstance(v, dict):
+            v = v.get(key)
+        elif isinstance(v, list) and key.isdigit() and int(key) < len(v):
+            v = v[int(key)]
+        else:
+            return None
+        if arrow == "->>" and isinstance(v, (dict, list)):
+            v = json.dumps(v, ensure_ascii=False)
+    return v
+
+
+def _coerce(sample: Any, raw: str) -> Any:
+    raw = raw[1:-1] if len(raw) >= 2 and raw[0] == raw[-1] == '"' else raw
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _like(pattern: str, value: Any, flags: int) -> bool:
+    if value is None:
+        return False
+    rx = "".join(".*" if c in "*%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.fullmatch(rx, str(value), flags | re.S) is not None
+
+
+def _cmp(op: str, value: Any, raw: str) -> bool:
+    if op == "is":
+        r = raw.lower()
+        if r == "null":
+            return value is None
+        if r in ("true", "false"):
+            return value is (r == "true")
+        if r == "unknown":
+            return value is None
+        raise ApiError(400, "PGRST100", f"is.{raw}: ожидается null/true/false")
+    if op == "in":
+        items = split_list(raw[1:-1] if raw.startswith("(") else raw)
+        return value is not None and any(_norm(value) == _norm(_coerce(value, x)) for x in items)
+    if op in ("like", "ilike"):
+        return _like(raw, value, re.I if op == "ilike" else 0)
+    if value is None:
+        return False
+    other = _coerce(value, raw)
+    a, b = _norm(value), _norm(other)
+    try:
+        if op == "eq":
+            return a == b
+        if op == "neq":
+            return a != b
+        if op == "gt":
+            return a > b
+        if op == "gte":
+            return a >= b
+        if op == "lt":
+            return a < b
+        if op == "lte":
+            return a <= b
+    except TypeError:
+        return False
+    raise ApiError(400, "PGRST100", f"оператор {op} не поддерживается stand-in")
+
+
+def _norm(v: Any) -> Any:
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, sort_keys=True, ensure_ascii=False)
+    return v
+
+
+Predicate = Callable[[dict], bool]
+
+
+def parse_condition(col: str, expr: str) -> Predicate:
+    """col + «[not.]op.value»."""
+    negate = False
+    if expr.startswith("not."):
+        negate, expr = True, expr[4:]
+    op, _, raw = expr.partition(".")
+    if op in ("or", "and"):
+        raise ApiError(400, "PGRST100", f"{col}={expr}: неверный фильтр")
+
+    def pred(row: dict) -> bool:
+        return _cmp(op, column_value(row, col), raw) != negate
+    return pred
+
+
+def parse_logic(kind: str, body: str, negate: bool = False) -> Predicate:
+    """or=(a.eq.1,and(b.gt.2,c.is.null)) — элементы «col.op.value» или вложенные or()/and()."""
+    inner = body[1:-1] if body.startswith("(") and body.endswith(")") else body
+    preds: list[Predicate] = []
+    for item in split_list(inner):
+        m = re.match(r"^(not\.)?(or|and)(\(.*\))$", item, re.S)
+        if m:
+            preds.append(parse_logic(m.group(2), m.group(3), bool(m.group(1))))
+            continue
+        col, _, rest = item.partition(".")
+        preds.append(parse_condition(col, rest))
+    combine = any if kind == "or" else all
+
+    def pred(row: dict) -> bool:
+        return combine(p(row) for p in preds) != negate
+    return pred
+
+
+RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def parse_filters(query: list[tuple[str, str]]) -> list[Predicate]:
+    preds = []
+    for k, v in query:
+        if k in RESERVED:
+            continue
+        if k in ("or", "and", "not.or", "not.and"):
+            preds.append(parse_logic(k.split(".")[-1], v, k.startswith("not.")))
+        else:
+            preds.append(parse_condition(k, v))
+    return preds
+
+
+def parse_select(select: Optional[str]) -> Optional[list[tuple[str, str]]]:
+    """[(ключ в ответе, колонка)] или None для *."""
+    if not select or select.strip() == "*":
+        return None
+    out = []
+    for item in split_list(select):
+        if item == "*":
+            return None
+        if "(" in item:
+            raise ApiError(400, "PGRST100", f"встраивание «{item}» не поддерживается stand-in")
+        alias, sep, col = item.partition(":")
+        if not sep:
+            col, alias = alias, alias
+        col = col.split("::")[0]  # приведение типа игнорируем
+        if not sep and "->" in col:
+            alias = re.split(r"->>?", col)[-1]
+        out.append((alias, col))
+    return out
+
+
+def project(rows: list[dict], cols: Optional[list[tuple[str, str]]]) -> list[dict]:
+    if cols is None:
+        return [dict(r) for r in rows]
+    return [{alias: column_value(r, col) for alias, col in cols} for r in rows]
+
+
+def sort_rows(rows: list[dict], order: Optional[str]) -> list[dict]:
+    if not order:
+        return rows
+    for term in reversed(split_list(order)):
+        parts = term.split(".")
+        col, desc = parts[0], "desc" in parts[1:]
+        nulls_first = "nullsfirst" in parts[1:] or (desc and "nullslast" not in parts[1:])
+        present = [r for r in rows if column_value(r, col) is not None]
+        missing = [r for r in rows if column_value(r, col) is None]
+        present.sort(key=lambda r: _sort_key(column_value(r, col)), reverse=desc)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def _sort_key(v: Any) -> tuple:
+    if isinstance(v, bool):
+        return (0, int(v))
+    if isinstance(v, (int, float)):
+        return (1, float(v))
+    return (2, str(v) if not isinstance(v, (dict, list)) else json.dumps(v, sort_keys=True))
+
+
+# --- хранилище --------------------------------------------------------------
+
+
+class Storage:
+    def __init__(self) -> None:
+        self.buckets: dict[str, dict[str, dict[str, Any]]] = {}
+
+    def load_dir(self, root: Path) -> None:
+        for bdir in sorted(p for p in root.iterdir() if p.is_dir()):
+            self.buckets.setdefault(bdir.name, {})
+            for f in sorted(bdir.rglob("*")):
+                if f.is_file():
+                    self.put(bdir.name, f.relative_to(bdir).as_posix(), f.read_bytes(), None)
+
+    def put(self, bucket: str, path: str, data: bytes, content_type: Optional[str]) -> None:
+        self.buckets.setdefault(bucket, {})[path] = {
+            "data": data,
+            "etag": hashlib.md5(data).hexdigest(),
+            "mimetype": content_type or mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "id": str(uuid.uuid4()),
+            "updated_at": now_iso(),
+        }
+
+    def list(self, bucket: str, prefix: str, limit: int, offset: int, search: str, desc: bool) -> list[dict]:
+        if bucket not in self.buckets:
+            raise ApiError(400, "NoSuchBucket", f"Bucket not found: {bucket}")
+        folder = prefix.strip("/")
+        base = f"{folder}/" if folder else ""
+        entries: dict[str, Optional[dict]] = {}
+        for path, obj in self.buckets[bucket].items():
+            if not path.startswith(base):
+                continue
+            rest = path[len(base):]
+            head, slash, _ = rest.partition("/")
+            if search and search.lower() not in head.lower():
+                continue
+            entries[head] = None if slash else obj
+        names = sorted(entries, reverse=desc)[offset:offset + limit]
+        out = []
+        for name in names:
+            obj = entries[name]
+            if obj is None:
+                out.append({"name": name, "id": None, "updated_at": None, "created_at": None,
+                            "last_accessed_at": None, "metadata": None})
+            else:
+                out.append({
+                    "name": name,
+                    "id": obj["id"],
+                    "updated_at": obj["updated_at"],
+                    "created_at": obj["updated_at"],
+                    "last_accessed_at": obj["updated_at"],
+                    "metadata": {
+                        "eTag": f'"{obj["etag"]}"',
+                        "size": len(obj["data"]),
+                        "mimetype": obj["mimetype"],
+                        "cacheControl": "max-age=3600",
+                        "lastModified": obj["updated_at"],
+                        "contentLength": len(obj["data"]),
+                        "httpStatusCode": 200,
+                    },
+                })
+        return out
+
+
+# --- сервер -----------------------------------------------------------------
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.routes: dict[str, dict[str, Any]] = {}
+            self.started = time.perf_counter()
+
+    def record(self, route: str, status: int, ms: float, rows: int, nbytes: int) -> None:
+        with self.lock:
+            r = self.routes.setdefault(route, {"timing": Timing(), "status": {}, "rows": 0, "bytes_out": 0})
+            r["timing"].add(ms)
+            r["status"][str(status)] = r["status"].get(str(status), 0) + 1
+            r["rows"] += rows
+            r["bytes_out"] += nbytes
+
+    def snapshot(self) -> dict[str, Any]:
+        with self.lock:
+            routes = {
+                k: {**v["timing"].summary(), "status": v["status"], "rows": v["rows"], "bytes_out": v["bytes_out"]}
+                for k, v in sorted(self.routes.items())
+            }
+            return {
+                "requests": sum(r["count"] for r in routes.values()),
+                "server_ms": round(sum(r["total_ms"] for r in routes.values()), 1),
+                "since_reset_s": round(time.perf_counter() - self.started, 3),
+                "routes": routes,
+            }
+
+
+class FunctionStub:
+    """Поведение Edge Function: "200,429:0.1,503:0.05,ms=80,jitter=20"."""
+
+    def __init__(self, spec: str) -> None:
+        self.status = 200
+        self.faults: list[tuple[int, float]] = []
+        self.ms = 0.0
+        self.jitter = 0.0
+        for part in split_list(spec):
+            key, sep, value = part.partition("=")
+            if sep and key in ("ms", "jitter"):
+                setattr(self, key, float(value))
+            elif ":" in part:
+                code, _, share = part.partition(":")
+                self.faults.append((int(code), float(share)))
+            else:
+                self.status = int(part)
+
+    def pick(self, rng: random.Random) -> tuple[int, float]:
+        x = rng.random()
+        status = self.status
+        for code, share in self.faults:
+            if x < share:
+                status = code
+                break
+            x -= share
+        return status, max(0.0, self.ms + rng.uniform(-self.jitter, self.jitter))
+
+
+class StandInState:
+    def __init__(self, latency_ms: float = 0.0, seed: int = 0) -> None:
+        self.tables: dict[str, list[dict]] = {}
+        self.storage = Storage()
+        self.functions: dict[str, FunctionStub] = {}
+        self.lock = threading.RLock()
+        self.stats = Stats()
+        self.latency_ms = latency_ms
+        self.rng = random.Random(seed)
+
+    def load_fixtures(self, root: Path) -> None:
+        for f in sorted(root.glob("*.json")) + sorted(root.glob("*.jsonl")):
+            self.load_table(f.stem, f)
+        if (root / "storage").is_dir():
+            self.storage.load_dir(root / "storage")
+
+    def load_table(self, name: str, path: Path) -> None:
+        text = path.read_text(encoding="utf-8")
+        if path.suffix == ".jsonl":
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            rows = json.loads(text)
+            if isinstance(rows, dict):
+                rows = rows.get(name) or rows.get("rows") or []
+        self.tables.setdefault(name, []).extend(r for r in rows if isinstance(r, dict))
+
+    def dump(self, root: Path) -> None:
+        root.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            for name, rows in self.tables.items():
+                (root / f"{name}.json").write_text(json.dumps(rows, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+
+
+def parse_prefer(header: Optional[str]) -> dict[str, str]:
+    out = {}
+    for part in (header or "").split(","):
+        k, _, v = part.strip().partition("=")
+        if k:
+            out[k.strip()] = v.strip()
+    return out
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "supabase-standin/1"
+    state: StandInState
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    # --- транспорт ----------------------------------------------------------
+
+    def _body_bytes(self) -> bytes:
+        n = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(n) if n else b""
+
+    def _json_body(self) -> Any:
+        raw = self._body_bytes()
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise ApiError(400, "PGRST102", "Empty or invalid json")
+
+    def _send(self, status: int, body: Any = None, headers: Optional[dict[str, str]] = None,
+              content_type: str = "application/json; charset=utf-8") -> int:
+        """Готовит ответ; пишет его _flush — после учёта в статистике (см. _dispatch)."""
+        if isinstance(body, (bytes, bytearray)):
+            data = bytes(body)
+        elif body is None:
+            data = b""
+        else:
+            data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        out = [("Content-Type", content_type)] if data or body is not None else []
+        out += list((headers or {}).items()) + [("Content-Length", str(len(data)))]
+        self._response = (status, out, data)
+        return len(data)
+
+    def _flush(self) -> None:
+        if self._response is None:
+            return
+        status, headers, data = self._response
+        self._response = None
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD" and data:
+            self.wfile.write(data)
+
+    def _dispatch(self) -> None:
+        t0 = time.perf_counter()
+        self._response: Optional[tuple[int, list[tuple[str, str]], bytes]] = None
+        raw_path = self.path
+        try:
+            # Неэкранированный UTF-8 в строке запроса (curl с кириллицей): http.server декодирует его как latin-1.
+            raw_path = raw_path.encode("latin-1").decode("utf-8")
+        except UnicodeError:
+            pass
+        url = urlparse(raw_path)
+        path = unquote(url.path)
+        query = parse_qsl(url.query, keep_blank_values=True)
+        route, status, rows, nbytes = self.command + " " + path, 500, 0, 0
+        try:
+            if self.state.latency_ms and not path.startswith("/__standin"):
+                time.sleep(self.state.latency_ms / 1000.0)
+            if path.startswith("/rest/v1/"):
+                table = path[len("/rest/v1/"):].strip("/")
+                route = f"{self.command} /rest/v1/{table}"
+                status, rows, nbytes = self._rest(table, query)
+            elif path.startswith("/storage/v1/"):
+                route, status, rows, nbytes = self._storage(path[len("/storage/v1/"):])
+            elif path.startswith("/functions/v1/"):
+                name = path[len("/functions/v1/"):].strip("/")
+                route = f"{self.command} /functions/v1/{name}"
+                status, nbytes = self._function(name)
+            elif path.startswith("/__standin/"):
+                route, status, nbytes = self._control(path, query)
+            else:
+                raise ApiError(404, "NotFound", f"{path} не обслуживается stand-in (только /rest/v1, /storage/v1, /functions/v1)")
+        except ApiError as e:
+            status = e.status
+            nbytes = self._send(e.status, {"code": e.code, "message": e.message, "details": None, "hint": None})
+        except Exception as e:  # noqa: BLE001 — сервер не должен падать от запроса
+            status = 500
+            nbytes = self._send(500, {"code": "standin_error", "message": f"{type(e).__name__}: {e}"})
+        # Учёт до записи ответа: клиент, прочитавший /__standin/stats сразу после вызова, его уже видит.
+        if not route.startswith(("GET /__standin", "POST /__standin")):
+            self.state.stats.record(route, status, (time.perf_counter() - t0) * 1000, rows, nbytes)
+        self._flush()
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+    # --- PostgREST ----------------------------------------------------------
+
+    def _rest(self, table: str, query: list[tuple[str, str]]) -> tuple[int, int, int]:
+        if not table:
+            with self.state.lock:
+                return 200, 0, self._send(200, {"tables": sorted(self.state.tables)})
+        if table.startswith("rpc/"):
+            raise ApiError(404, "PGRST202", f"RPC {table[4:]} не поддерживается stand-in")
+        q = dict(query)
+        prefer = parse_prefer(self.headers.get("Prefer"))
+        single = OBJECT_ACCEPT in (self.headers.get("Accept") or "")
+        cols = parse_select(q.get("select"))
+        preds = parse_filters(query)
+        method = self.command
+
+        with self.state.lock:
+            data = self.state.tables.setdefault(table, [])
+            if method in ("GET", "HEAD"):
+                matched = sort_rows([r for r in data if all(p(r) for p in preds)], q.get("order"))
+                total = len(matched)
+                start, stop = 0, total
+                rng = re.match(r"^\s*(\d+)-(\d*)\s*$", self.headers.get("Range") or "")
+                if rng:
+                    start = int(rng.group(1))
+                    stop = int(rng.group(2)) + 1 if rng.group(2) else total
+                if "offset" in q:
+                    start += int(q["offset"])
+                if "limit" in q:
+                    stop = min(stop, start + int(q["limit"]))
+                page = project(matched[start:stop], cols)
+                headers = {"Content-Range": self._content_range(start, len(page), total if prefer.get("count") else None)}
+                if single:
+                    if len(page) != 1:
+                        raise ApiError(406, "PGRST116", f"JSON object requested, multiple (or no) rows returned ({len(page)})")
+                    return 200, 1, self._send(200, page[0], headers)
+                return (206 if rng and stop < total else 200), len(page), self._send(200, page, headers)
+
+            if method == "POST":
+                body = self._json_body()
+                items = body if isinstance(body, list) else [body] if isinstance(body, dict) else None
+                if items is None:
+                    raise ApiError(400, "PGRST102", "ожидается объект или массив объектов")
+                conflict_cols = [c.strip() for c in q.get("on_conflict", "id").split(",") if c.strip()]
+                resolution = prefer.get("resolution")
+                out = []
+                for item in items:
+                    row = dict(item)
+                    existing = None
+                    if all(c in row for c in conflict_cols):
+                        key = tuple(_norm(row[c]) for c in conflict_cols)
+                        existing = next((r for r in data if tuple(_norm(r.get(c)) for c in conflict_cols) == key), None)
+                    if existing is not None:
+                        if resolution == "merge-duplicates":
+                            existing.update(row)
+                            out.append(existing)
+                        elif resolution == "ignore-duplicates":
+                            continue
+                        else:
+                            raise ApiError(409, "23505", f'duplicate key value violates unique constraint "{table}_pkey"')
+                    else:
+                        if "id" not in row and (not data or "id" in data[0]):
+                            row["id"] = str(uuid.uuid4())
+                        data.append(row)
+                        out.append(row)
+                return self._write_response(201, out, cols, prefer, single)
+
+            if method == "PATCH":
+                body = self._json_body()
+                if not isinstance(body, dict):
+                    raise ApiError(400, "PGRST102", "PATCH ожидает объект")
+                out = [r for r in data if all(p(r) for p in preds)]
+                for r in out:
+                    r.update(body)
+                return self._write_response(200, out, cols, prefer, single)
+
+            if method == "DELETE":
+                out = [r for r in data if all(p(r) for p in preds)]
+                drop = {id(r) for r in out}
+                data[:] = [r for r in data if id(r) not in drop]
+                return self._write_response(200, out, cols, prefer, single)
+
+        raise ApiError(405, "PGRST105", f"{method} не поддерживается")
+
+    @staticmethod
+    def _content_range(start: int, n: int, total: Optional[int]) -> str:
+        span = f"{start}-{start + n - 1}" if n else "*"
+        return f"{span}/{total if total is not None else '*'}"
+
+    def _write_response(self, status: int, rows: list[dict], cols, prefer: dict, single: bool) -> tuple[int, int, int]:
+        if prefer.get("return") == "representation":
+            page = project(rows, cols)
+            if single:
+                if len(page) != 1:
+                    raise ApiError(406, "PGRST116", f"JSON object requested, multiple (or no) rows returned ({len(page)})")
+                return status, 1, self._send(status, page[0])
+            return status, len(page), self._send(status, page)
+        headers = {"Content-Range": self._content_range(0, len(rows), None)}
+        code = 201 if status == 201 else 204
+        return code, len(rows), self._send(code, None, headers)
+
+    # --- Storage ------------------------------------------------------------
+
+    def _storage(self, rest: str) -> tuple[str, int, int, int]:
+        st = self.state.storage
+        method = self.command
+        if rest.rstrip("/") == "bucket" and method == "GET":
+            with self.state.lock:
+                body = [{"id": b, "name": b, "public": False, "created_at": None} for b in sorted(st.buckets)]
+            return "GET /storage/v1/bucket", 200, len(body), self._send(200, body)
+        if rest.startswith("object/list/") and method == "POST":
+            bucket = rest[len("object/list/"):].strip("/")
+            body = self._json_body() or {}
+            sort = body.get("sortBy") or {}
+            with self.state.lock:
+                items = st.list(
+                    bucket,
+                    str(body.get("prefix") or ""),
+                    int(body.get("limit") or 100),
+                    int(body.get("offset") or 0),
+                    str(body.get("search") or ""),
+                    str(sort.get("order") or "asc").lower() == "desc",
+                )
+            return "POST /storage/v1/object/list", 200, len(items), self._send(200, items)
+        if not rest.startswith("object/"):
+            raise ApiError(404, "NotFound", f"/storage/v1/{rest} не поддерживается stand-in")
+        obj_path = re.sub(r"^object/(?:public/|authenticated/|sign/)?", "", rest)
+        bucket, _, path = obj_path.partition("/")
+        route = f"{method} /storage/v1/object"
+        with self.state.lock:
+            objects = st.buckets.get(bucket)
+            if objects is None:
+                raise ApiError(404, "NoSuchBucket", f"Bucket not found: {bucket}")
+            if method in ("GET", "HEAD"):
+                obj = objects.get(path)
+                if obj is None:
+                    raise ApiError(404, "not_found", "Object not found")
+                headers = {"ETag": f'"{obj["etag"]}"', "Last-Modified": obj["updated_at"]}
+                return route, 200, 1, self._send(200, obj["data"], headers, obj["mimetype"])
+            if method in ("POST", "PUT"):
+                upsert = (self.headers.get("x-upsert") or "").lower() == "true" or method == "PUT"
+                if path in objects and not upsert:
+                    raise ApiError(409, "Duplicate", "The resource already exists")
+                st.put(bucket, path, self._body_bytes(), self.headers.get("Content-Type"))
+                return route, 200, 1, self._send(200, {"Key": f"{bucket}/{path}", "Id": objects[path]["id"]})
+            if method == "DELETE":
+                if path:
+                    removed = [path] if objects.pop(path, None) is not None else []
+                else:
+                    body = self._json_body() or {}
+                    removed = [p for p in body.get("prefixes") or [] if objects.pop(p, None) is not None]
+                return route, 200, len(removed), self._send(200, [{"name": p, "bucket_id": bucket} for p in removed])
+        raise ApiError(405, "NotAllowed", f"{method} не поддерживается")
+
+    # --- Edge Functions -----------------------------------------------------
+
+    def _function(self, name: str) -> tuple[int, int]:
+        stub = self.state.functions.get(name)
+        if stub is None:
+            raise ApiError(404, "NotFound", f"Edge Function {name} не настроена (--function {name}=200)")
+        self._body_bytes()
+        with self.state.lock:
+            status, ms = stub.pick(self.state.rng)
+        if ms:
+            time.sleep(ms / 1000.0)
+        if status < 400:
+            return status, self._send(status, {"ok": True, "function": name})
+        headers = {"Retry-After": "1"} if status == 429 else None
+        return status, self._send(status, {"error": f"stand-in {status}", "function": name}, headers)
+
+    # --- управление ---------------------------------------------------------
+
+    def _control(self, path: str, query: list[tuple[str, str]]) -> tuple[str, int, int]:
+        route = f"{self.command} {path}"
+        if path == "/__standin/stats":
+            return route, 200, self._send(200, self.state.stats.snapshot())
+        if path == "/__standin/reset" and self.command == "POST":
+            self.state.stats.reset()
+            return route, 200, self._send(200, {"reset": True})
+        if path == "/__standin/tables":
+            with self.state.lock:
+                return route, 200, self._send(200, {k: len(v) for k, v in sorted(self.state.tables.items())})
+        raise ApiError(404, "NotFound", path)
+
+
+class StandIn:
+    """Stand-in в фоновом потоке текущего процесса."""
+
+    def __init__(self, fixtures: Optional[Path] = None, tables: Optional[dict[str, Path]] = None,
+                 host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 functions: Optional[dict[str, str]] = None, seed: int = 0) -> None:
+        self.state = StandInState(latency_ms, seed)
+        for name, spec in (functions or {}).items():
+            self.state.functions[name] = FunctionStub(spec)
+        if fixtures:
+            self.state.load_fixtures(fixtures)
+        for name, path in (tables or {}).items():
+            self.state.load_table(name, path)
+        handler = type("BoundHandler", (Handler,), {"state": self.state})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StandIn":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="supabase-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> dict[str, Any]:
+        return self.state.stats.snapshot()
+
+    def __enter__(self) -> "StandIn":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def print_stats(snap: dict[str, Any], file=sys.stderr) -> None:
+    print(f"\nrequests={snap['requests']} server_ms={snap['server_ms']:.1f} wall_s={snap['since_reset_s']:.1f}", file=file)
+    print(f"  {'route':42} {'n':>7} {'total ms':>10} {'p50':>7} {'p95':>7} {'rows':>8}  status", file=file)
+    for route, r in snap["routes"].items():
+        st = " ".join(f"{k}:{v}" for k, v in sorted(r["status"].items()))
+        print(f"  {route:42} {r['count']:7d} {r['total_ms']:10.1f} {r['p50_ms']:7.1f} {r['p95_ms']:7.1f} {r['rows']:8d}  {st}", file=file)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Локальная подмена Supabase REST/Storage для офлайн-прогона скриптов")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=54329)
+    ap.add_argument("--fixtures", type=Path, default=None, help="Каталог <table>.json|jsonl и storage/<bucket>/…")
+    ap.add_argument("--table", action="append", default=[], help="NAME=FILE (можно повторять)")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Задержка на каждый запрос, мс")
+    ap.add_argument("--dump", type=Path, default=None, help="При остановке записать таблицы в каталог")
+    ap.add_argument("--function", action="append", default=[],
+                    help="Edge Function NAME=SPEC, напр. register-metadata=200,429:0.1,ms=80 (можно повторять)")
+    ap.add_argument("--seed", type=int, default=0, help="Сид случайных ошибок/задержек функций")
+    args = ap.parse_args()
+
+    tables = {}
+    for spec in args.table:
+        name, sep, path = spec.partition("=")
+        if not sep:
+            print(f"--table ожидает NAME=FILE: {spec}", file=sys.stderr)
+            return 2
+        tables[name] = Path(path)
+    functions = {}
+    for spec in args.function:
+        name, sep, behaviour = spec.partition("=")
+        if not sep:
+            print(f"--function ожидает NAME=SPEC: {spec}", file=sys.stderr)
+            return 2
+        functions[name] = behaviour
+    s = StandIn(args.fixtures, tables, args.host, args.port, args.latency_ms, functions, args.seed)
+    counts = ", ".join(f"{k}={len(v)}" for k, v in sorted(s.state.tables.items())) or "нет таблиц"
+    buckets = ", ".join(f"{k}={len(v)}" for k, v in sorted(s.state.storage.buckets.items())) or "нет бакетов"
+    fns = ", ".join(sorted(s.state.functions)) or "нет функций"
+    print(f"Supabase stand-in: {s.url}  (tables: {counts}; storage: {buckets}; functions: {fns})")
+    print(f"  export SUPABASE_URL={s.url}")
+    def stop(*_: Any) -> None:
+        # shutdown() ждёт выхода из serve_forever — вызываем не из потока, который его крутит.
+        threading.Thread(target=s.server.shutdown, daemon=True).start()
+
+    # SIGTERM (kill) и SIGINT (в том числе когда процесс запущен в фоне с игнорируемым SIGINT).
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        s.server.serve_forever()
+    finally:
+        s.server.server_close()
+        print_stats(s.stats())
+        if args.dump:
+            s.state.dump(args.dump)
+            print(f"Dump: {args.dump}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,118 +2,290 @@
 """
 Бэкап Supabase Storage — скачивает все бакеты включая вложенные папки.
 Нужен service_role ключ: SUPABASE_SERVICE_ROLE_KEY (или SUPABASE_ANON_KEY как fallback).
+
+- Список объектов постранично (limit/offset до пустой страницы) — папки с >1000 файлов
+  больше не обрезаются; папки обходятся параллельно.
+- Скачивание — пул потоков с общей keep-alive сессией (STORAGE_BACKUP_WORKERS, по умолчанию 8).
+- В конце по каждому бакету: файлов, байт, ошибок, время и МБ/с.
+
+Режимы:
+  python3 storage_backup.py                  # полный: дерево файлов + tar.gz (как раньше)
+  python3 storage_backup.py --incremental    # инкрементальный, content-addressed
+  python3 storage_backup.py --stream storage.tar.zst [--level 10] [--threads 0]
+  python3 storage_backup.py --stream - --compression gzip | ssh host 'cat > storage.tar.gz'
+  python3 storage_backup.py --list-snapshots
+  python3 storage_backup.py --diff <manifest_a> <manifest_b>
+  python3 storage_backup.py --restore <manifest> --to <dir>
+
+Инкрементальный режим (STORAGE_BACKUP_STORE, по умолчанию backups/storage_store):
+  blobs/<sha256[:2]>/<sha256>  — содержимое объектов, одна копия на все снимки;
+  manifests/<ts>.json          — путь, размер, etag, updated_at и sha256 каждого объекта.
+Объект скачивается, только если его нет в прошлом манифесте или изменились
+size/etag/updated_at. Восстановление и diff работают по манифесту, без сети.
+
+Потоковый режим (--stream): объекты скачиваются пулом и сразу дописываются в один
+tar-поток со сжатием — без промежуточного дерева на диске и без отдельного `tar -czf`.
+Сжатие: zstd (пакет zstandard или бинарь `zstd -T<threads>`), gzip (`pigz`, если есть,
+иначе встроенный gzip), none; по умолчанию — по расширению архива. Память ограничена:
+в полёте не больше 2×WORKERS объектов, крупные спиливаются во временные файлы.
+
+Переменные окружения:
+  STORAGE_BACKUP_DIR        — куда складывать (по умолчанию storage_backup_<ts>)
+  STORAGE_BACKUP_STORE      — хранилище блобов и манифестов для --incremental
+  STORAGE_BACKUP_WORKERS    — потоков на скачивание / листинг (8)
+  STORAGE_BACKUP_PAGE_SIZE  — размер страницы object/list (1000)
 """
+import argparse
+import gzip
+import hashlib
+import json
 import os
+import shutil
+import subprocess
 import sys
-import requests
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from datetime import datetime
+from typing import Optional
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-SUPABASE_URL = os.getenv("SUPABASE_URL", "https://osglfptwbuqqmqunttha.supabase.co")
+SUPABASE_URL = os.getenv("SUPABASE_URL", "https://osglfptwbuqqmqunttha.supabase.co").rstrip("/")
 SUPABASE_KEY = (
     os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     or os.getenv("SUPABASE_ANON_KEY")
 )
 
-if not SUPABASE_KEY or SUPABASE_KEY == "YOUR_SERVICE_ROLE_KEY_HERE":
-    print("❌ SUPABASE_SERVICE_ROLE_KEY не задан в backup_config.env")
-    print("   Получи его в Supabase Dashboard → Project Settings → API → service_role")
-    sys.exit(1)
-
 HEADERS = {
-    "apikey": SUPABASE_KEY,
+    "apikey": SUPABASE_KEY or "",
     "Authorization": f"Bearer {SUPABASE_KEY}",
 }
 
 OUTPUT_DIR = os.getenv("STORAGE_BACKUP_DIR", f"storage_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+STORE_DIR = os.getenv("STORAGE_BACKUP_STORE", os.path.join("backups", "storage_store"))
+WORKERS = max(1, int(os.getenv("STORAGE_BACKUP_WORKERS", "8")))
+PAGE_SIZE = max(1, int(os.getenv("STORAGE_BACKUP_PAGE_SIZE", "1000")))
+CHUNK_SIZE = 1024 * 1024
+
+def require_key() -> None:
+    if not SUPABASE_KEY or SUPABASE_KEY == "YOUR_SERVICE_ROLE_KEY_HERE":
+        print("❌ SUPABASE_SERVICE_ROLE_KEY не задан в backup_config.env")
+        print("   Получи его в Supabase Dashboard → Project Settings → API → service_role")
+        sys.exit(1)
+
+
+_session_lock = threading.Lock()
+_shared_session = None
+
+
+def _session() -> requests.Session:
+    """Общая keep-alive сессия для всех потоков; пул соединений под число воркеров."""
+    global _shared_session
+    with _session_lock:
+        if _shared_session is None:
+            s = requests.Session()
+            s.headers.update(HEADERS)
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=None,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=WORKERS, max_retries=retry)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _shared_session = s
+        return _shared_session
 
 
-def list_files(bucket: str, prefix: str = "") -> list[str]:
-    """Рекурсивно получает все пути файлов в бакете."""
+def list_prefix(bucket: str, prefix: str = "") -> tuple[list[dict], list[str], int]:
+    """Одна папка целиком (все страницы): (файлы [{path, size, etag, updated_at}], подпапки, ошибки)."""
     url = f"{SUPABASE_URL}/storage/v1/object/list/{bucket}"
-    payload = {"prefix": prefix, "limit": 1000, "offset": 0}
-    resp = requests.post(url, json=payload, headers=HEADERS, timeout=30)
-    if resp.status_code != 200:
-        print(f"   ⚠️ Ошибка получения списка '{bucket}/{prefix}': {resp.status_code} {resp.text[:200]}")
-        return []
+    files: list[dict] = []
+    folders: list[str] = []
+    offset = 0
+    while True:
+        payload = {
+            "prefix": prefix,
+            "limit": PAGE_SIZE,
+            "offset": offset,
+            "sortBy": {"column": "name", "order": "asc"},
+        }
+        try:
+            resp = _session().post(url, json=payload, timeout=30)
+        except requests.RequestException as e:
+            print(f"   ⚠️ Ошибка получения списка '{bucket}/{prefix}': {e}", file=sys.stderr)
+            return files, folders, 1
+        if resp.status_code != 200:
+            print(f"   ⚠️ Ошибка получения списка '{bucket}/{prefix}': {resp.status_code} {resp.text[:200]}", file=sys.stderr)
+            return files, folders, 1
 
-    items = resp.json()
-    if not isinstance(items, list):
-        return []
+        items = resp.json()
+        if not isinstance(items, list):
+            return files, folders, 0
 
-    paths = []
-    for item in items:
-        name = item.get("name", "")
-        metadata = item.get("metadata")
-        if metadata is None:
-            # Это папка — рекурсивно обходим
-            sub_prefix = f"{prefix}{name}/" if prefix else f"{name}/"
-            paths.extend(list_files(bucket, sub_prefix))
-        else:
-            # Это файл
-            file_path = f"{prefix}{name}" if prefix else name
-            paths.append(file_path)
-    return paths
+        for item in items:
+            name = item.get("name", "")
+            metadata = item.get("metadata")
+            if metadata is None:
+                # Это папка — обойдём отдельной задачей
+                folders.append(f"{prefix}{name}/")
+            else:
+                # Это файл
+                files.append(
+                    {
+                        "path": f"{prefix}{name}",
+                        "size": int(metadata.get("size") or 0),
+                        "etag": (metadata.get("eTag") or "").strip('"'),
+                        "updated_at": item.get("updated_at") or metadata.get("lastModified") or "",
+                    }
+                )
+        if len(items) < PAGE_SIZE:
+            return files, folders, 0
+        offset += len(items)
 
 
-def download_file(bucket: str, file_path: str, local_dir: str) -> bool:
-    url = f"{SUPABASE_URL}/storage/v1/object/{bucket}/{file_path}"
-    resp = requests.get(url, headers=HEADERS, timeout=60, stream=True)
-    if resp.status_code != 200:
-        print(f"   ❌ Ошибка скачивания {file_path}: {resp.status_code}")
-        return False
+def list_files(bucket: str, prefix: str = "", failed: Optional[list[str]] = None) -> tuple[list[dict], int]:
+    """Все файлы бакета: папки листаются параллельно в пуле WORKERS.
 
-    local_path = os.path.join(local_dir, file_path.replace("/", os.sep))
-    os.makedirs(os.path.dirname(local_path) if os.path.dirname(local_path) else local_dir, exist_ok=True)
-    with open(local_path, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=8192):
-            f.write(chunk)
-    return True
+    failed — сюда добавляются папки, листинг которых оборвался (их содержимое неполное).
+    """
+    files: list[dict] = []
+    errors = 0
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures = {pool.submit(list_prefix, bucket, prefix): prefix}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                sub_files, sub_folders, sub_errors = fut.result()
+                files.extend(sub_files)
+                errors += sub_errors
+                if sub_errors and failed is not None:
+                    failed.append(futures[fut])
+                for folder in sub_folders:
+                    sub = pool.submit(list_prefix, bucket, folder)
+                    futures[sub] = folder
+                    pending.add(sub)
+    files.sort(key=lambda f: f["path"])
+    return files, errors
 
 
-def backup_storage():
-    print(f"💾 Бэкап Supabase Storage → {OUTPUT_DIR}")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+def download_file(bucket: str, file_path: str, local_dir: str) -> int:
+    """Скачать объект в local_dir. Возвращает число байт, -1 при ошибке."""
+    url = f"{SUPABASE_URL}/storage/v1/object/{bucket}/{quote(file_path, safe='/')}"
+    try:
+        resp = _session().get(url, timeout=60, stream=True)
+    except requests.RequestException as e:
+        print(f"   ❌ Ошибка скачивания {file_path}: {e}")
+        return -1
+    with resp:
+        if resp.status_code != 200:
+            print(f"   ❌ Ошибка скачивания {file_path}: {resp.status_code}")
+            return -1
 
-    # Получаем список бакетов
-    resp = requests.get(f"{SUPABASE_URL}/storage/v1/bucket", headers=HEADERS, timeout=30)
+        local_path = os.path.join(local_dir, file_path.replace("/", os.sep))
+        os.makedirs(os.path.dirname(local_path) if os.path.dirname(local_path) else local_dir, exist_ok=True)
+        written = 0
+        try:
+            with open(local_path, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    written += len(chunk)
+        except (OSError, requests.RequestException) as e:
+            print(f"   ❌ Ошибка скачивания {file_path}: {e}")
+            return -1
+    return written
+
+
+def backup_bucket(bucket_name: str, bucket_dir: str) -> dict:
+    """Листинг + параллельное скачивание одного бакета. Возвращает статистику."""
+    stats = {"bucket": bucket_name, "files": 0, "bytes": 0, "errors": 0, "listed": 0, "seconds": 0.0}
+    t0 = time.monotonic()
+
+    files, list_errors = list_files(bucket_name)
+    stats["errors"] += list_errors
+    stats["listed"] = len(files)
+    if not files:
+        print("   ℹ️ Бакет пустой")
+        stats["seconds"] = time.monotonic() - t0
+        return stats
+
+    print(f"   Файлов: {len(files)} (листинг {time.monotonic() - t0:.1f} с)")
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures = [pool.submit(download_file, bucket_name, f["path"], bucket_dir) for f in files]
+        for i, fut in enumerate(as_completed(futures), 1):
+            n = fut.result()
+            if n >= 0:
+                stats["files"] += 1
+                stats["bytes"] += n
+            else:
+                stats["errors"] += 1
+            if i % 500 == 0:
+                print(f"   ↓ {i}/{len(files)}", flush=True)
+
+    stats["seconds"] = time.monotonic() - t0
+    return stats
+
+
+def print_bucket_stats(stats: dict, file=None) -> None:
+    secs = max(stats["seconds"], 1e-6)
+    mb = stats["bytes"] / (1024 * 1024)
+    print(
+        f"   📊 {stats['bucket']}: файлов {stats['files']}/{stats['listed']}, "
+        f"{mb:.1f} МБ за {stats['seconds']:.1f} с ({mb / secs:.2f} МБ/с, "
+        f"{stats['files'] / secs:.1f} файл/с), ошибок: {stats['errors']}",
+        file=file or sys.stdout,
+    )
+
+
+def list_buckets() -> list[str]:
+    resp = _session().get(f"{SUPABASE_URL}/storage/v1/bucket", timeout=30)
     if resp.status_code != 200:
-        print(f"❌ Не удалось получить список бакетов: {resp.status_code} {resp.text[:300]}")
-        print("   Возможно, нужен service_role ключ (не anon)")
+        print(f"❌ Не удалось получить список бакетов: {resp.status_code} {resp.text[:300]}", file=sys.stderr)
+        print("   Возможно, нужен service_role ключ (не anon)", file=sys.stderr)
         sys.exit(1)
 
     buckets = resp.json()
-    if not isinstance(buckets, list) or len(buckets) == 0:
+    if not isinstance(buckets, list):
+        return []
+    return [b.get("name", "") for b in buckets]
+
+
+def backup_storage():
+    require_key()
+    print(f"💾 Бэкап Supabase Storage → {OUTPUT_DIR} (потоков: {WORKERS})")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # Получаем список бакетов
+    buckets = list_buckets()
+    if len(buckets) == 0:
         print("   ℹ️ Бакетов нет или Storage не используется")
         return
 
     print(f"📂 Найдено бакетов: {len(buckets)}")
-    total_files = 0
-    total_errors = 0
+    all_stats = []
 
-    for bucket in buckets:
-        bucket_name = bucket.get("name", "")
+    for bucket_name in buckets:
         print(f"\n📦 Бакет: {bucket_name}")
         bucket_dir = os.path.join(OUTPUT_DIR, bucket_name)
         os.makedirs(bucket_dir, exist_ok=True)
+        stats = backup_bucket(bucket_name, bucket_dir)
+        print_bucket_stats(stats)
+        all_stats.append(stats)
 
-        files = list_files(bucket_name)
-        if not files:
-            print(f"   ℹ️ Бакет пустой")
-            continue
-
-        print(f"   Файлов: {len(files)}")
-        for file_path in files:
-            print(f"   ↓ {file_path}")
-            ok = download_file(bucket_name, file_path, bucket_dir)
-            if ok:
-                total_files += 1
-            else:
-                total_errors += 1
-
-    print(f"\n✅ Скачано файлов: {total_files}, ошибок: {total_errors}")
+    total_files = sum(s["files"] for s in all_stats)
+    total_errors = sum(s["errors"] for s in all_stats)
+    total_mb = sum(s["bytes"] for s in all_stats) / (1024 * 1024)
+    print(f"\n✅ Скачано файлов: {total_files} ({total_mb:.1f} МБ), ошибок: {total_errors}")
 
     # Архивируем
-    import subprocess
     archive = f"{OUTPUT_DIR}.tar.gz"
     subprocess.run(
         ["tar", "-czf", archive, "-C", os.path.dirname(OUTPUT_DIR) or ".", os.path.basename(OUTPUT_DIR)],
@@ -122,5 +294,449 @@ def backup_storage():
     print(f"📦 Архив: {archive}")
 
 
-if __name__ == "__main__":
+# --- Инкрементальный режим: content-addressed блобы + манифесты -------------------
+
+
+def blob_path(store: str, digest: str) -> str:
+    return os.path.join(store, "blobs", digest[:2], digest)
+
+
+def manifests_dir(store: str) -> str:
+    return os.path.join(store, "manifests")
+
+
+def list_manifests(store: str) -> list[str]:
+    d = manifests_dir(store)
+    if not os.path.isdir(d):
+        return []
+    return sorted(os.path.join(d, n) for n in os.listdir(d) if n.endswith(".json"))
+
+
+def load_manifest(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _unchanged(prev: dict, obj: dict) -> bool:
+    if not prev or not prev.get("sha256"):
+        return False
+    if prev.get("size") != obj["size"]:
+        return False
+    if obj["etag"] or prev.get("etag"):
+        if prev.get("etag") != obj["etag"]:
+            return False
+    return prev.get("updated_at") == obj["updated_at"]
+
+
+def download_to_store(bucket: str, file_path: str, store: str) -> tuple[str, int]:
+    """Скачать объект в блоб-хранилище с подсчётом sha256. ("", -1) при ошибке."""
+    url = f"{SUPABASE_URL}/storage/v1/object/{bucket}/{quote(file_path, safe='/')}"
+    tmp_dir = os.path.join(store, "tmp")
+    try:
+        resp = _session().get(url, timeout=60, stream=True)
+    except requests.RequestException as e:
+        print(f"   ❌ Ошибка скачивания {file_path}: {e}")
+        return "", -1
+    with resp:
+        if resp.status_code != 200:
+            print(f"   ❌ Ошибка скачивания {file_path}: {resp.status_code}")
+            return "", -1
+        h = hashlib.sha256()
+        written = 0
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    h.update(chunk)
+                    f.write(chunk)
+                    written += len(chunk)
+            digest = h.hexdigest()
+            dst = blob_path(store, digest)
+            if os.path.exists(dst):
+                os.unlink(tmp)
+            else:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                os.replace(tmp, dst)
+        except (OSError, requests.RequestException) as e:
+            print(f"   ❌ Ошибка скачивания {file_path}: {e}")
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            return "", -1
+    return digest, written
+
+
+def backup_bucket_incremental(bucket_name: str, store: str, prev: dict) -> tuple[dict, dict]:
+    """Листинг бакета, скачивание только новых/изменённых объектов. (записи манифеста, статистика)"""
+    stats = {
+        "bucket": bucket_name, "files": 0, "bytes": 0, "errors": 0, "listed": 0,
+        "seconds": 0.0, "reused": 0, "carried": 0,
+    }
+    t0 = time.monotonic()
+    failed_prefixes: list[str] = []
+    files, list_errors = list_files(bucket_name, failed=failed_prefixes)
+    stats["errors"] += list_errors
+    stats["listed"] = len(files)
+
+    entries: dict = {}
+    if failed_prefixes:
+        # Папка не долистана — её объекты из прошлого снимка переносим как есть, иначе restore и
+        # --diff посчитают их удалёнными.
+        listed = {obj["path"] for obj in files}
+        for path, old in prev.items():
+            if path not in listed and any(path.startswith(pfx) for pfx in failed_prefixes):
+                entries[path] = old
+                stats["carried"] += 1
+        print(f"   ⚠️ Не долистано папок: {len(failed_prefixes)}; из прошлого снимка перенесено: {stats['carried']}")
+    todo: list[dict] = []
+    for obj in files:
+        old = prev.get(obj["path"])
+        if _unchanged(old, obj) and os.path.exists(blob_path(store, old["sha256"])):
+            entries[obj["path"]] = {
+                "size": obj["size"], "etag": obj["etag"], "updated_at": obj["updated_at"], "sha256": old["sha256"],
+            }
+            stats["reused"] += 1
+        else:
+            todo.append(obj)
+
+    print(f"   Файлов: {len(files)}, без изменений: {stats['reused']}, скачать: {len(todo)}")
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures = {pool.submit(download_to_store, bucket_name, obj["path"], store): obj for obj in todo}
+        for i, fut in enumerate(as_completed(futures), 1):
+            obj = futures[fut]
+            digest, n = fut.result()
+            if n >= 0:
+                stats["files"] += 1
+                stats["bytes"] += n
+                entries[obj["path"]] = {
+                    "size": n, "etag": obj["etag"], "updated_at": obj["updated_at"], "sha256": digest,
+                }
+            else:
+                stats["errors"] += 1
+                old = prev.get(obj["path"])
+                if old and old.get("sha256"):
+                    # Не смогли скачать — оставляем прошлую версию, чтобы снимок был полным.
+                    entries[obj["path"]] = old
+            if i % 500 == 0:
+                print(f"   ↓ {i}/{len(todo)}", flush=True)
+
+    stats["seconds"] = time.monotonic() - t0
+    return dict(sorted(entries.items())), stats
+
+
+def backup_storage_incremental(store: str = STORE_DIR) -> str:
+    require_key()
+    os.makedirs(os.path.join(store, "tmp"), exist_ok=True)
+    os.makedirs(manifests_dir(store), exist_ok=True)
+    previous = list_manifests(store)
+    prev_manifest = load_manifest(previous[-1]) if previous else {"buckets": {}}
+    print(
+        f"💾 Инкрементальный бэкап Storage → {store} (потоков: {WORKERS}); "
+        f"база: {os.path.basename(previous[-1]) if previous else 'нет, первый снимок'}"
+    )
+
+    buckets = list_buckets()
+    manifest = {"created_at": datetime.now().isoformat(timespec="seconds"), "source": SUPABASE_URL, "buckets": {}}
+    all_stats = []
+    for bucket_name in buckets:
+        print(f"\n📦 Бакет: {bucket_name}")
+        entries, stats = backup_bucket_incremental(
+            bucket_name, store, prev_manifest.get("buckets", {}).get(bucket_name, {})
+        )
+        manifest["buckets"][bucket_name] = entries
+        if stats["carried"]:
+            manifest.setdefault("carried_from_previous", {})[bucket_name] = stats["carried"]
+        print_bucket_stats(stats)
+        all_stats.append(stats)
+
+    name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    path = os.path.join(manifests_dir(store), name)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+    fetched_mb = sum(s["bytes"] for s in all_stats) / (1024 * 1024)
+    print(
+        f"\n✅ Снимок: {path}\n"
+        f"   объектов: {sum(s['listed'] for s in all_stats)}, без изменений: {sum(s['reused'] for s in all_stats)}, "
+        f"скачано: {sum(s['files'] for s in all_stats)} ({fetched_mb:.1f} МБ), "
+        f"перенесено из прошлого снимка (не долистано): {sum(s['carried'] for s in all_stats)}, "
+        f"ошибок: {sum(s['errors'] for s in all_stats)}"
+    )
+    return path
+
+
+def diff_manifests(a_path: str, b_path: str) -> dict:
+    """added / removed / changed по бакетам между двумя снимками."""
+    a, b = load_manifest(a_path), load_manifest(b_path)
+    out: dict = {}
+    for bucket in sorted(set(a["buckets"]) | set(b["buckets"])):
+        ea = a["buckets"].get(bucket, {})
+        eb = b["buckets"].get(bucket, {})
+        out[bucket] = {
+            "added": sorted(set(eb) - set(ea)),
+            "removed": sorted(set(ea) - set(eb)),
+            "changed": sorted(p for p in set(ea) & set(eb) if ea[p]["sha256"] != eb[p]["sha256"]),
+        }
+    return out
+
+
+def restore_manifest(manifest_path: str, target: str, store: str = STORE_DIR) -> int:
+    """Разложить снимок в дерево <target>/<bucket>/<path> из блобов. Возвращает число ошибок."""
+    manifest = load_manifest(manifest_path)
+    missing = 0
+    restored = 0
+    for bucket, entries in manifest["buckets"].items():
+        for path, meta in entries.items():
+            src = blob_path(store, meta["sha256"])
+            dst = os.path.join(target, bucket, path.replace("/", os.sep))
+            if not os.path.exists(src):
+                print(f"   ❌ Нет блоба для {bucket}/{path} ({meta['sha256'][:12]})")
+                missing += 1
+                continue
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(src, dst)
+            restored += 1
+    print(f"✅ Восстановлено файлов: {restored} → {target}, ошибок: {missing}")
+    return missing
+
+
+# --- Потоковый режим: скачивание → tar → zstd/gzip в один проход --------------------
+
+SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+class _CountingWriter:
+    """Считает байты, прошедшие в выходной файл (после сжатия)."""
+
+    def __init__(self, raw) -> None:
+        self.raw = raw
+        self.count = 0
+
+    def write(self, data) -> int:
+        n = self.raw.write(data)
+        self.count += len(data)
+        return n if n is not None else len(data)
+
+    def flush(self) -> None:
+        self.raw.flush()
+
+
+def _codec_for(archive: str, codec: str) -> str:
+    if codec != "auto":
+        return codec
+    if archive.endswith((".zst", ".zstd")):
+        return "zstd"
+    if archive.endswith((".gz", ".tgz")):
+        return "gzip"
+    if archive.endswith(".tar"):
+        return "none"
+    return "zstd"
+
+
+def open_compressed(raw, codec: str, level: int, threads: int):
+    """Обёртка над выходным файлом. Возвращает (writer, close, счётчик сжатых байт)."""
+    out = _CountingWriter(raw)
+    if codec == "none":
+        return out, out.flush, out
+    if codec == "zstd":
+        try:
+            import zstandard  # type: ignore
+        except ImportError:
+            zstandard = None
+        if zstandard is not None:
+            cctx = zstandard.ZstdCompressor(level=level, threads=threads or -1)
+            w = cctx.stream_writer(out, closefd=False)
+            return w, w.close, out
+        tool = shutil.which("zstd")
+        if not tool:
+            print("❌ Для zstd нужен пакет zstandard (pip install zstandard) или бинарь zstd")
+            sys.exit(1)
+        cmd = [tool, f"-{level}", f"-T{threads}", "-q", "-c"]
+        if level > 19:
+            cmd.insert(1, "--ultra")
+    else:
+        tool = shutil.which("pigz")
+        if not tool:
+            g = gzip.GzipFile(fileobj=out, mode="wb", compresslevel=level, mtime=0)
+            return g, g.close, out
+        cmd = [tool, f"-{level}", "-c"] + ([f"-p{threads}"] if threads else [])
+
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    pump = threading.Thread(target=lambda: shutil.copyfileobj(proc.stdout, out, CHUNK_SIZE), daemon=True)
+    pump.start()
+
+    def close() -> None:
+        proc.stdin.close()
+        rc = proc.wait()
+        pump.join()
+        out.flush()
+        if rc != 0:
+            raise RuntimeError(f"{cmd[0]} exited with {rc}")
+
+    return proc.stdin, close, out
+
+
+def fetch_object(bucket: str, file_path: str):
+    """Скачать объект в spooled-буфер (память до 8 МБ, дальше — временный файл)."""
+    url = f"{SUPABASE_URL}/storage/v1/object/{bucket}/{quote(file_path, safe='/')}"
+    try:
+        resp = _session().get(url, timeout=60, stream=True)
+    except requests.RequestException as e:
+        print(f"   ❌ Ошибка скачивания {file_path}: {e}", file=sys.stderr)
+        return None, -1
+    with resp:
+        if resp.status_code != 200:
+            print(f"   ❌ Ошибка скачивания {file_path}: {resp.status_code}", file=sys.stderr)
+            return None, -1
+        buf = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        written = 0
+        try:
+            for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                buf.write(chunk)
+                written += len(chunk)
+        except (OSError, requests.RequestException) as e:
+            print(f"   ❌ Ошибка скачивания {file_path}: {e}", file=sys.stderr)
+            buf.close()
+            return None, -1
+    buf.seek(0)
+    return buf, written
+
+
+def _mtime(updated_at: str) -> float:
+    try:
+        return datetime.fromisoformat(updated_at.replace("Z", "+00:00")).timestamp()
+    except (ValueError, AttributeError):
+        return time.time()
+
+
+def stream_bucket(bucket_name: str, tar: tarfile.TarFile) -> dict:
+    """Скачивание бакета пулом с записью в tar по мере готовности (не больше 2×WORKERS в полёте)."""
+    stats = {"bucket": bucket_name, "files": 0, "bytes": 0, "errors": 0, "listed": 0, "seconds": 0.0}
+    t0 = time.monotonic()
+    files, list_errors = list_files(bucket_name)
+    stats["errors"] += list_errors
+    stats["listed"] = len(files)
+    log = sys.stderr
+    print(f"   Файлов: {len(files)} (листинг {time.monotonic() - t0:.1f} с)", file=log)
+
+    def write_done(done) -> None:
+        for fut in done:
+            obj = pending.pop(fut)
+            buf, n = fut.result()
+            if buf is None:
+                stats["errors"] += 1
+                continue
+            info = tarfile.TarInfo(f"{bucket_name}/{obj['path']}")
+            info.size = n
+            info.mtime = _mtime(obj["updated_at"])
+            info.mode = 0o644
+            with buf:
+                tar.addfile(info, buf)
+            stats["files"] += 1
+            stats["bytes"] += n
+
+    limit = WORKERS * 2
+    pending: dict = {}
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        for obj in files:
+            if len(pending) >= limit:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                write_done(done)
+            pending[pool.submit(fetch_object, bucket_name, obj["path"])] = obj
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            write_done(done)
+
+    stats["seconds"] = time.monotonic() - t0
+    return stats
+
+
+def backup_storage_stream(archive: str, codec: str = "auto", level: Optional[int] = None, threads: int = 0) -> int:
+    """Все бакеты одним tar-потоком в archive ('-' — stdout). Возвращает число ошибок."""
+    require_key()
+    codec = _codec_for(archive, codec)
+    if level is None:
+        level = {"zstd": 10, "gzip": 6}.get(codec, 0)
+    # В stdout идёт архив, поэтому весь лог — в stderr.
+    log = sys.stderr
+    print(
+        f"💾 Потоковый бэкап Storage → {archive} ({codec}"
+        f"{f', уровень {level}' if codec != 'none' else ''}, потоков: {WORKERS})",
+        file=log,
+    )
+    t0 = time.monotonic()
+    raw = sys.stdout.buffer if archive == "-" else open(archive + ".part", "wb")
+    try:
+        writer, close, counter = open_compressed(raw, codec, level, threads)
+        all_stats = []
+        with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for bucket_name in list_buckets():
+                print(f"\n📦 Бакет: {bucket_name}", file=log)
+                stats = stream_bucket(bucket_name, tar)
+                print_bucket_stats(stats, file=log)
+                all_stats.append(stats)
+        close()
+    finally:
+        if raw is not sys.stdout.buffer:
+            raw.close()
+    if archive != "-":
+        os.replace(archive + ".part", archive)
+
+    secs = max(time.monotonic() - t0, 1e-6)
+    raw_mb = sum(s["bytes"] for s in all_stats) / (1024 * 1024)
+    out_mb = counter.count / (1024 * 1024)
+    errors = sum(s["errors"] for s in all_stats)
+    print(
+        f"\n✅ Файлов: {sum(s['files'] for s in all_stats)}, ошибок: {errors}\n"
+        f"   {raw_mb:.1f} МБ → {out_mb:.1f} МБ ({codec}) за {secs:.1f} с: "
+        f"вход {raw_mb / secs:.2f} МБ/с, выход {out_mb / secs:.2f} МБ/с",
+        file=log,
+    )
+    if archive != "-":
+        print(f"📦 Архив: {archive}", file=log)
+    return errors
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Бэкап Supabase Storage")
+    ap.add_argument("--incremental", action="store_true", help="Content-addressed снимок с манифестом")
+    ap.add_argument("--store", default=STORE_DIR, help="Хранилище блобов и манифестов")
+    ap.add_argument("--list-snapshots", action="store_true")
+    ap.add_argument("--diff", nargs=2, metavar=("A", "B"), help="Сравнить два манифеста")
+    ap.add_argument("--restore", metavar="MANIFEST", help="Восстановить снимок из манифеста")
+    ap.add_argument("--to", default=None, help="Куда восстанавливать (для --restore)")
+    ap.add_argument("--stream", metavar="ARCHIVE", help="Потоковый tar в файл ('-' — stdout)")
+    ap.add_argument(
+        "--compression", choices=("auto", "zstd", "gzip", "none"), default="auto",
+        help="Сжатие для --stream (auto — по расширению)",
+    )
+    ap.add_argument("--level", type=int, default=None, help="Уровень сжатия (zstd 1–22, gzip 0–9; по умолчанию 10 / 6)")
+    ap.add_argument("--threads", type=int, default=0, help="Потоков сжатия (0 — все ядра)")
+    args = ap.parse_args()
+
+    if args.list_snapshots:
+        for m in list_manifests(args.store):
+            data = load_manifest(m)
+            n = sum(len(e) for e in data["buckets"].values())
+            size = sum(x["size"] for e in data["buckets"].values() for x in e.values())
+            print(f"{m}  объектов: {n}  {size / (1024 * 1024):.1f} МБ")
+        return 0
+    if args.diff:
+        print(json.dumps(diff_manifests(*args.diff), ensure_ascii=False, indent=2))
+        return 0
+    if args.restore:
+        if not args.to:
+            ap.error("--restore требует --to <dir>")
+        return 1 if restore_manifest(args.restore, args.to, args.store) else 0
+    if args.stream:
+        return 1 if backup_storage_stream(args.stream, args.compression, args.level, args.threads) else 0
+    if args.incremental:
+        backup_storage_incremental(args.store)
+        return 0
     backup_storage()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+-- Штамп версии каталога tt_parse_templates: Edge Functions держат индекс шаблонов в памяти изолята
+-- (_shared/try_stored_ttk_templates.ts) и на каждый импорт читают только эту строку по PK,
+-- а весь каталог — лишь когда версия сменилась. Растёт на любой INSERT/UPDATE/DELETE/TRUNCATE.
+
+CREATE TABLE IF NOT EXISTS public.tt_parse_templates_version (
+  id smallint PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  version bigint NOT NULL DEFAULT 1,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+INSERT INTO public.tt_parse_templates_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+COMMENT ON TABLE public.tt_parse_templates_version IS 'Версия каталога tt_parse_templates для кэша шаблонов в Edge Functions';
+
+-- Читает только service role (Edge Functions); политик нет.
+ALTER TABLE public.tt_parse_templates_version ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.tg_tt_parse_templates_bump_version()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE public.tt_parse_templates_version SET version = version + 1, updated_at = now() WHERE id = 1;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_tt_parse_templates_bump_version ON public.tt_parse_templates;
+CREATE TRIGGER trg_tt_parse_templates_bump_version
+AFTER INSERT OR UPDATE OR DELETE ON public.tt_parse_templates
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.tg_tt_parse_templates_bump_version();
+
+DROP TRIGGER IF EXISTS trg_tt_parse_templates_bump_version_truncate ON public.tt_parse_templates;
+CREATE TRIGGER trg_tt_parse_templates_bump_version_truncate
+AFTER TRUNCATE ON public.tt_parse_templates
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.tg_tt_parse_templates_bump_version();